@@ -33,6 +33,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "corsheaders",
     "transparency",
@@ -188,22 +189,111 @@ TRACKING_BASE_URL = os.getenv('TRACKING_BASE_URL', 'http://167.172.30.134')
 # EMAIL_BATCH_SIZE = 10   # emails per batch
 
 
+# ==================== COMMITTEE FINANCIAL ROLLUP ====================
+# Committee income/expense/IE totals are read from committee_financial_rollup.
+# Set to True to aggregate live for committees missing from the rollup
+# (e.g. while it is being rebuilt).
+COMMITTEE_ROLLUP_LIVE_FALLBACK = os.getenv('COMMITTEE_ROLLUP_LIVE_FALLBACK', 'False') == 'True'
+
+
+# ==================== RESULT COUNTS ====================
+# Paginated listings take their counts from transparency/services/counts.py:
+# maintained counters where possible, otherwise a COUNT(*) cached per data
+# version. Searches the planner expects to match more than this many rows get
+# the planner's estimate instead, flagged 'count_approximate' in the response.
+COUNT_ESTIMATE_THRESHOLD = int(os.getenv('COUNT_ESTIMATE_THRESHOLD', '10000'))
+COUNT_CACHE_TIMEOUT = int(os.getenv('COUNT_CACHE_TIMEOUT', '600'))
+
+
+# ==================== TYPEAHEAD ====================
+# Per-process prefix index behind /api/v1/typeahead/ (transparency/services/typeahead.py).
+# Donors beyond TYPEAHEAD_MAX_DONORS (by total contributed) are left out; the
+# index reports its size against TYPEAHEAD_MEMORY_BUDGET in /api/v1/typeahead/stats/.
+TYPEAHEAD_MAX_DONORS = int(os.getenv('TYPEAHEAD_MAX_DONORS', '250000'))
+TYPEAHEAD_MEMORY_BUDGET = int(os.getenv('TYPEAHEAD_MEMORY_BUDGET', str(64 * 1024 * 1024)))
+TYPEAHEAD_VERSION_CHECK_INTERVAL = float(os.getenv('TYPEAHEAD_VERSION_CHECK_INTERVAL', '5'))
+
+
+
+# ==================== CACHE ====================
+# Two tiers (transparency/utils/tiered_cache.py): a bounded per-process LRU
+# in front of a cache shared by all gunicorn workers, Redis when REDIS_URL is
+# set, otherwise files on local disk. Sets and deletes (e.g. the dashboard
+# clear-cache endpoints) reach every worker within SYNC_INTERVAL seconds.
+REDIS_URL = os.getenv('REDIS_URL', '')
 
-# Use memory cache for development (fast but temporary)
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-    }
+        'BACKEND': 'transparency.utils.tiered_cache.TieredCache',
+        'LOCATION': 'default',
+        'OPTIONS': {
+            'L2': 'shared',
+            'MAX_ENTRIES': int(os.getenv('CACHE_L1_MAX_ENTRIES', '1000')),
+            'MAX_BYTES': int(os.getenv('CACHE_L1_MAX_BYTES', str(64 * 1024 * 1024))),
+            'L1_TIMEOUT': 60,
+            'SYNC_INTERVAL': 1.0,
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('FILE_CACHE_DIR', '/tmp/az_sunshine_cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
 }
 
-# For production, use Redis (persistent and fast)
-# CACHES = {
-#     'default': {
-#         'BACKEND': 'django.core.cache.backends.redis.RedisCache',
-#         'LOCATION': 'redis://127.0.0.1:6379/1',
-#     }
-# }
+# ==================== CACHE METRICS ====================
+# Each worker writes its cache hit/miss/latency/bytes counters to the shared
+# cache every CACHE_METRICS_FLUSH_INTERVAL seconds for /api/v1/admin/cache-metrics/
+# (transparency/utils/cache_metrics.py). Per-operation cache log lines are DEBUG
+# and sampled: CACHE_LOG_SAMPLE_RATE is the fraction of operations that log.
+CACHE_METRICS_FLUSH_INTERVAL = float(os.getenv('CACHE_METRICS_FLUSH_INTERVAL', '10'))
+CACHE_LOG_SAMPLE_RATE = float(os.getenv('CACHE_LOG_SAMPLE_RATE', '0.01'))
+
+# ==================== CACHE WARM-UP ====================
+# After imports and materialized view refreshes (import_csv,
+# refresh_dashboard_views, the dashboard refresh endpoints) the dashboard, the
+# first CACHE_WARM_PAGES pages of each list and the CACHE_WARM_RACES busiest
+# races of the latest CACHE_WARM_CYCLES cycles are recomputed by
+# CACHE_WARM_WORKERS threads (transparency/services/cache_warmup.py).
+CACHE_WARM_AFTER_REFRESH = os.getenv('CACHE_WARM_AFTER_REFRESH', 'True') == 'True'
+CACHE_WARM_WORKERS = int(os.getenv('CACHE_WARM_WORKERS', '4'))
+CACHE_WARM_PAGES = int(os.getenv('CACHE_WARM_PAGES', '3'))
+CACHE_WARM_RACES = int(os.getenv('CACHE_WARM_RACES', '50'))
+CACHE_WARM_CYCLES = int(os.getenv('CACHE_WARM_CYCLES', '2'))
+
+# ==================== ZSTD DICTIONARIES ====================
+# CompressedCache compresses each entry with the zstd dictionary trained for its
+# key prefix (transparency/utils/zstd_dictionaries.py). A ZSTD_DICT_SAMPLE_RATE
+# fraction of stored payloads is kept as samples for
+# `manage.py train_zstd_dictionaries`. Each process picks up newly trained
+# dictionaries within ZSTD_DICT_CHECK_INTERVAL seconds.
+ZSTD_DICT_SAMPLE_RATE = float(os.getenv('ZSTD_DICT_SAMPLE_RATE', '0.05'))
+ZSTD_DICT_SIZE = int(os.getenv('ZSTD_DICT_SIZE', str(32 * 1024)))
+ZSTD_DICT_CHECK_INTERVAL = float(os.getenv('ZSTD_DICT_CHECK_INTERVAL', '60'))
+
+# ==================== ANALYTICS ENGINE ====================
+# Race, trend and donor aggregates run over a memory-mapped columnar snapshot
+# of "Transactions" (transparency/services/analytics_engine.py) instead of SQL
+# when ANALYTICS_ENGINE is on. A snapshot per data version is written under
+# ANALYTICS_SNAPSHOT_DIR, which every worker on the host must share; the newest
+# ANALYTICS_SNAPSHOTS_KEPT are kept. A host rebuilds at most every
+# ANALYTICS_REBUILD_INTERVAL seconds; requests use SQL in between.
+ANALYTICS_ENGINE = os.getenv('ANALYTICS_ENGINE', 'False') == 'True'
+ANALYTICS_SNAPSHOT_DIR = os.getenv('ANALYTICS_SNAPSHOT_DIR', '/tmp/az_sunshine_analytics')
+ANALYTICS_SNAPSHOTS_KEPT = int(os.getenv('ANALYTICS_SNAPSHOTS_KEPT', '2'))
+ANALYTICS_REBUILD_INTERVAL = int(os.getenv('ANALYTICS_REBUILD_INTERVAL', '300'))
+
+# ==================== CACHE KEYS ====================
+# Response cache keys carry the data version and the versions of their tags
+# (transparency/utils/data_version.py). Imports, merges, materialized view
+# refreshes and model edits move one or the other, so entries are never served
+# stale and can live for RESPONSE_CACHE_TIMEOUT. Each process re-reads the data
+# version at most every DATA_VERSION_CHECK_INTERVAL seconds.
+DATA_VERSION_CHECK_INTERVAL = float(os.getenv('DATA_VERSION_CHECK_INTERVAL', '2'))
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', str(6 * 3600)))
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
\ No newline at end of file
@@ -16,7 +16,9 @@ from .models import (
     Report,
     CandidateStatementOfInterest,
     AdBuy,
+    ImportBatch,
 )
+from .services.incremental_aggregates import track_transaction_changes
 
 # ============================================================
 # INLINE ADMINS
@@ -110,6 +112,40 @@ class TransactionAdmin(admin.ModelAdmin):
     list_per_page = 100
     autocomplete_fields = ("committee", "entity", "transaction_type", "subject_committee")
 
+    # Edits made here go through track_transaction_changes() like the imports,
+    # so the summary tables, ie_fact and the data version follow them
+    def save_model(self, request, obj, form, change):
+        with track_transaction_changes("SELECT %s", [obj.transaction_id]):
+            super().save_model(request, obj, form, change)
+
+    def delete_model(self, request, obj):
+        with track_transaction_changes("SELECT %s", [obj.transaction_id]):
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        ids = list(queryset.values_list("transaction_id", flat=True))
+        with track_transaction_changes("SELECT unnest(%s::integer[])", [ids]):
+            super().delete_queryset(request, queryset)
+
+
+@admin.register(ImportBatch)
+class ImportBatchAdmin(admin.ModelAdmin):
+    list_display = (
+        "batch_id",
+        "source",
+        "file_name",
+        "bulk",
+        "started_at",
+        "rows_created",
+        "rows_updated",
+        "rows_skipped",
+        "rows_errored",
+    )
+    list_filter = ("bulk",)
+    search_fields = ("source", "file_name")
+    ordering = ("-started_at",)
+    list_per_page = 50
+
 
 @admin.register(Entity)
 class EntityAdmin(admin.ModelAdmin):
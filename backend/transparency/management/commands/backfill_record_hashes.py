@@ -0,0 +1,85 @@
+"""
+Django management command to populate Transaction.record_hash for rows
+imported before the hash was stored.
+
+The hash is computed in SQL with the same normalization import_csv uses, in
+transaction_id batches so each batch commits on its own and the command can
+be stopped and resumed.
+
+Usage:
+    python manage.py backfill_record_hashes
+    python manage.py backfill_record_hashes --batch-size 100000
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from transparency.management.commands.import_csv import STORED_HASH_SQL
+import time
+
+
+class Command(BaseCommand):
+    help = 'Populate record_hash on transactions imported before it was stored'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50000,
+            help='Number of transactions to hash per batch (default: 50000)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        self.stdout.write('=' * 70)
+        self.stdout.write('RECORD HASH BACKFILL')
+        self.stdout.write('=' * 70)
+
+        with connection.cursor() as cursor:
+            cursor.execute('''SELECT COUNT(*) FROM "Transactions" WHERE record_hash = \'\'''')
+            remaining = cursor.fetchone()[0]
+
+        self.stdout.write(f'Transactions without a hash: {remaining:,}')
+        if remaining == 0:
+            self.stdout.write(self.style.SUCCESS('Nothing to do.'))
+            return
+
+        start = time.time()
+        total_updated = 0
+        last_id = None
+
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(f'''
+                    WITH batch AS (
+                        SELECT transaction_id
+                        FROM "Transactions"
+                        WHERE record_hash = ''
+                          AND (%s::integer IS NULL OR transaction_id > %s)
+                        ORDER BY transaction_id
+                        LIMIT %s
+                    )
+                    UPDATE "Transactions" t
+                    SET record_hash = {STORED_HASH_SQL.format(t='t')}
+                    FROM batch
+                    WHERE t.transaction_id = batch.transaction_id
+                    RETURNING t.transaction_id
+                ''', [last_id, last_id, batch_size])
+                ids = [row[0] for row in cursor.fetchall()]
+
+            if not ids:
+                break
+
+            last_id = max(ids)
+            total_updated += len(ids)
+            elapsed = time.time() - start
+            rate = total_updated / elapsed if elapsed > 0 else 0
+            self.stdout.write(
+                f'  Hashed {total_updated:,}/{remaining:,} '
+                f'({total_updated / remaining * 100:.1f}%, {rate:,.0f} rows/s)'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\nBackfilled {total_updated:,} hashes in {time.time() - start:.1f}s'
+        ))
+        self.stdout.write('=' * 70)
@@ -0,0 +1,103 @@
+"""
+Django management command to populate Transaction.cycle for existing rows.
+
+New and re-dated transactions get their cycle from the transactions_cycle
+trigger (migration 0030): the cycle whose begin_date..end_date contains
+transaction_date, the latest one if cycles overlap. This command applies the
+same rule (transaction_cycle_id() in SQL) to every row whose stored cycle
+differs, in transaction_id batches so each batch commits on its own and the
+command can be stopped and resumed. Migration 0030 backfills the rows present
+when it runs; run this after adding a cycle or changing a cycle's dates.
+
+Race, trend and race donor queries filter on the cycle, so ie_fact and the
+per-cycle committee rollups are brought in line and cached responses are
+invalidated (data version bump) when any row changed.
+
+Usage:
+    python manage.py backfill_transaction_cycles
+    python manage.py backfill_transaction_cycles --batch-size 100000
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from transparency.services.incremental_aggregates import refresh_ie_fact_cycles, refresh_rollup_cycles
+from transparency.utils.data_version import bump_data_version
+import time
+
+
+STALE_SQL = 't.cycle_id IS DISTINCT FROM transaction_cycle_id(t.transaction_date)'
+
+
+class Command(BaseCommand):
+    help = 'Attribute transactions to the election cycle containing their date'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50000,
+            help='Number of transactions to update per batch (default: 50000)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        self.stdout.write('=' * 70)
+        self.stdout.write('TRANSACTION CYCLE BACKFILL')
+        self.stdout.write('=' * 70)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM "Transactions" t WHERE {STALE_SQL}')
+            remaining = cursor.fetchone()[0]
+
+        self.stdout.write(f'Transactions with a missing or outdated cycle: {remaining:,}')
+        if remaining == 0:
+            self.stdout.write(self.style.SUCCESS('Nothing to do.'))
+            return
+
+        start = time.time()
+        total_updated = 0
+        last_id = None
+
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(f'''
+                    WITH batch AS (
+                        SELECT t.transaction_id
+                        FROM "Transactions" t
+                        WHERE {STALE_SQL}
+                          AND (%s::integer IS NULL OR t.transaction_id > %s)
+                        ORDER BY t.transaction_id
+                        LIMIT %s
+                    )
+                    UPDATE "Transactions" t
+                    SET cycle_id = transaction_cycle_id(t.transaction_date)
+                    FROM batch
+                    WHERE t.transaction_id = batch.transaction_id
+                    RETURNING t.transaction_id
+                ''', [last_id, last_id, batch_size])
+                ids = [row[0] for row in cursor.fetchall()]
+
+            if not ids:
+                break
+
+            last_id = max(ids)
+            total_updated += len(ids)
+            elapsed = time.time() - start
+            rate = total_updated / elapsed if elapsed > 0 else 0
+            self.stdout.write(
+                f'  Updated {total_updated:,}/{remaining:,} '
+                f'({total_updated / remaining * 100:.1f}%, {rate:,.0f} rows/s)'
+            )
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            ie_facts = refresh_ie_fact_cycles(cursor)
+            rollups = refresh_rollup_cycles(cursor)
+            bump_data_version(cursor)
+        self.stdout.write(f'  Updated the cycle of {ie_facts:,} ie_fact rows')
+        self.stdout.write(f'  Recomputed {rollups:,} per-cycle committee rollups')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\nBackfilled {total_updated:,} cycles in {time.time() - start:.1f}s'
+        ))
+        self.stdout.write('=' * 70)
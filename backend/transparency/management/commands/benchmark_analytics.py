@@ -0,0 +1,281 @@
+"""
+Django management command to benchmark the columnar analytics engine.
+
+Builds bench_transactions (UNLOGGED, 10M rows by default) with the columns of
+"Transactions" the engine reads, cycle_id, and the indexes "Transactions" has
+on them, snapshots it into a temporary directory with the engine's own reader
+and writer (transparency/services/analytics_engine.py), and times each
+analytic query both ways:
+
+    trends      IE spending, count and candidates per two-year cycle
+                (dashboard_spending_trends)
+    race        IE for/against/total per subject committee of one race in
+                one cycle (get_race_ie_spending)
+    donors      top contributors to 100 committees in one cycle
+                (get_top_ie_donors_by_race)
+
+The SQL side filters and groups on cycle_id, as the production queries do on
+Transaction.cycle; the engine slices the cycle's dates.
+
+SQL timings include fetching the rows; engine timings include building the
+same rows in Python. Both sides are compared for equality. The synthetic
+table is dropped afterwards unless --keep is given; a kept table with the
+same row count is reused by the next run.
+
+Usage:
+    python manage.py benchmark_analytics
+    python manage.py benchmark_analytics --rows 1000000 --repeat 3 --keep
+"""
+
+from datetime import date
+from django.core.management.base import BaseCommand
+from django.db import connection
+from pathlib import Path
+import statistics
+import tempfile
+import time
+
+from transparency.services import analytics_engine
+from transparency.services.analytics_engine import TransactionSnapshot
+
+
+TABLE = 'bench_transactions'
+
+COMMITTEES = 2_000
+ENTITIES = 500_000
+INCOME_TYPES = list(range(1, 11))
+EXPENSE_TYPES = list(range(11, 21))
+IE_TYPES = [11, 12]
+FIRST_DAY = date(2006, 1, 1)
+DAYS = 20 * 365
+
+# Two-year cycles 2006-2007 ... 2024-2025, numbered from 1
+CYCLES = [(date(year, 1, 1), date(year + 1, 12, 31)) for year in range(2006, 2026, 2)]
+
+# The race: 12 candidate committees, the 2020-2021 cycle
+RACE_CANDIDATES = list(range(1, 13))
+RACE_CYCLE_ID = 8
+RACE_CYCLE = CYCLES[RACE_CYCLE_ID - 1]
+# The IE committees whose donors are ranked
+DONOR_COMMITTEES = list(range(100, 2000, 19))[:100]
+DONOR_LIMIT = 20
+
+
+class Command(BaseCommand):
+    help = 'Time trend, race IE and top-donor aggregates: SQL vs the columnar engine'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=10_000_000,
+            help='Rows in the synthetic table (default: 10,000,000)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed runs per query; the median is reported (default: 5)'
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the synthetic table for the next run'
+        )
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+
+        self.stdout.write('=' * 70)
+        self.stdout.write('ANALYTICS ENGINE BENCHMARK (SQL vs columnar snapshot)')
+        self.stdout.write('=' * 70)
+
+        with connection.cursor() as cursor, tempfile.TemporaryDirectory() as tmp:
+            self._build(cursor, options['rows'])
+            snap = self._snapshot(cursor, Path(tmp) / 'v0')
+
+            self.stdout.write(f'\nRuns per query: {self.repeat} (median)\n')
+            self.stdout.write(f'  {"query":<10} {"rows out":>9} {"SQL":>11} {"engine":>11} {"speedup":>9}  match')
+            self._compare('trends', lambda: self._trends_sql(cursor), lambda: self._trends_engine(snap))
+            self._compare('race', lambda: self._race_sql(cursor), lambda: self._race_engine(snap))
+            self._compare('donors', lambda: self._donors_sql(cursor), lambda: self._donors_engine(snap))
+
+            if not options['keep']:
+                cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+        self.stdout.write('=' * 70)
+
+    # ==================== SYNTHETIC TABLE ====================
+
+    def _build(self, cursor, rows):
+        cursor.execute("""
+            SELECT to_regclass(%s) IS NOT NULL, EXISTS (
+                SELECT 1 FROM information_schema.columns WHERE table_name = %s AND column_name = 'cycle_id'
+            )
+        """, [TABLE, TABLE])
+        exists, has_cycle = cursor.fetchone()
+        if exists and not has_cycle:
+            cursor.execute(f'DROP TABLE {TABLE}')
+        elif exists:
+            cursor.execute(f'SELECT COUNT(*) FROM {TABLE}')
+            if cursor.fetchone()[0] == rows:
+                self.stdout.write(f'Reusing {TABLE} ({rows:,} rows)')
+                return
+            cursor.execute(f'DROP TABLE {TABLE}')
+
+        self.stdout.write(f'Building {TABLE} ({rows:,} rows)...')
+        start = time.time()
+        # Deterministic values keyed on the row number; one row in ten is an IE
+        cursor.execute(f"""
+            CREATE UNLOGGED TABLE {TABLE} AS
+            SELECT *, 1 + (EXTRACT(YEAR FROM transaction_date)::integer - 2006) / 2 AS cycle_id
+            FROM (SELECT
+                g AS transaction_id,
+                1 + (hashtext('c' || g) & 2147483647) %% %(committees)s AS committee_id,
+                CASE WHEN g %% 10 = 0
+                     THEN 1 + (hashtext('s' || g) & 2147483647) %% %(committees)s END AS subject_committee_id,
+                1 + (hashtext('e' || g) & 2147483647) %% %(entities)s AS entity_id,
+                CASE WHEN g %% 10 = 0
+                     THEN 11 + g %% 2
+                     ELSE 1 + (hashtext('y' || g) & 2147483647) %% 20 END AS transaction_type_id,
+                %(first_day)s::date + (hashtext('d' || g) & 2147483647) %% %(days)s AS transaction_date,
+                CASE WHEN g %% 10 = 0 OR (hashtext('y' || g) & 2147483647) %% 20 >= 10 THEN -1 ELSE 1 END
+                    * ((hashtext('a' || g) & 2147483647) %% 500000 / 100.0)::numeric(12,2) AS amount,
+                CASE WHEN g %% 10 = 0 THEN (hashtext('b' || g) & 1) = 0 END AS is_for_benefit,
+                g %% 97 = 0 AS deleted
+            FROM generate_series(1, %(rows)s) g) s
+        """, {
+            'committees': COMMITTEES, 'entities': ENTITIES, 'first_day': FIRST_DAY,
+            'days': DAYS, 'rows': rows,
+        })
+        cursor.execute(f"""
+            CREATE INDEX ON {TABLE} (transaction_date);
+            CREATE INDEX ON {TABLE} (subject_committee_id, is_for_benefit);
+            CREATE INDEX ON {TABLE} (committee_id, transaction_type_id, transaction_date DESC);
+            CREATE INDEX ON {TABLE} (transaction_type_id, deleted, entity_id, amount DESC);
+            CREATE INDEX ON {TABLE} (cycle_id, subject_committee_id, is_for_benefit)
+                WHERE subject_committee_id IS NOT NULL AND NOT deleted;
+            CREATE INDEX ON {TABLE} (cycle_id, committee_id, transaction_type_id) WHERE NOT deleted;
+            ANALYZE {TABLE};
+        """)
+        self.stdout.write(self.style.SUCCESS(f'Built in {time.time() - start:.1f}s'))
+
+    def _snapshot(self, cursor, path):
+        start = time.time()
+        raw = analytics_engine.read_columns(cursor, TABLE)
+        analytics_engine.write_snapshot(path, raw, 0)
+        snap = TransactionSnapshot(path)
+        size = sum(f.stat().st_size for f in path.iterdir())
+        self.stdout.write(
+            f'Snapshot: {snap.rows:,} active rows, {size / 1024 / 1024:.0f} MB, '
+            f'built in {time.time() - start:.1f}s'
+        )
+        return snap
+
+    # ==================== QUERIES ====================
+
+    def _trends_sql(self, cursor):
+        cursor.execute(f"""
+            SELECT
+                c.cycle_id,
+                COALESCE(s.total, 0),
+                COALESCE(s.count, 0),
+                COALESCE(s.affected, 0)
+            FROM generate_series(1, %s) c(cycle_id)
+            LEFT JOIN (
+                SELECT cycle_id, SUM(ABS(amount)) AS total, COUNT(*) AS count,
+                       COUNT(DISTINCT subject_committee_id) AS affected
+                FROM {TABLE}
+                WHERE subject_committee_id IS NOT NULL AND NOT deleted
+                GROUP BY cycle_id
+            ) s ON s.cycle_id = c.cycle_id
+            ORDER BY c.cycle_id
+        """, [len(CYCLES)])
+        return [(cycle_id, int(total * 100), count, affected) for cycle_id, total, count, affected in cursor.fetchall()]
+
+    def _trends_engine(self, snap):
+        trends = []
+        for cycle_id, (first, last) in enumerate(CYCLES, 1):
+            rows = snap.rows_between(first, last)
+            where = snap.where(rows, has_subject=True)
+            total, count = snap.total(rows, where, absolute=True)
+            trends.append((cycle_id, total, count, len(snap.distinct('subject', rows, where))))
+        return trends
+
+    def _race_sql(self, cursor):
+        cursor.execute(f"""
+            SELECT
+                subject_committee_id,
+                SUM(ABS(amount)) FILTER (WHERE is_for_benefit),
+                SUM(ABS(amount)) FILTER (WHERE NOT is_for_benefit),
+                COUNT(*),
+                SUM(ABS(amount)) AS total_ie
+            FROM {TABLE}
+            WHERE subject_committee_id = ANY(%s)
+              AND transaction_type_id = ANY(%s)
+              AND cycle_id = %s
+              AND NOT deleted
+            GROUP BY subject_committee_id
+            ORDER BY total_ie DESC, subject_committee_id
+        """, [RACE_CANDIDATES, EXPENSE_TYPES, RACE_CYCLE_ID])
+        return [
+            (committee_id, _cents(ie_for), _cents(ie_against), count, _cents(total))
+            for committee_id, ie_for, ie_against, count, total in cursor.fetchall()
+        ]
+
+    def _race_engine(self, snap):
+        rows = snap.rows_between(*RACE_CYCLE)
+        where = snap.where(rows, subject=RACE_CANDIDATES, ttype=EXPENSE_TYPES)
+        benefit = snap.benefit[rows]
+        ids, totals, counts = snap.group_sum('subject', rows, where, absolute=True)
+        ie_for = dict(zip(*(a.tolist() for a in snap.group_sum('subject', rows, where & (benefit == 1), absolute=True)[:2])))
+        ie_against = dict(zip(*(a.tolist() for a in snap.group_sum('subject', rows, where & (benefit == 0), absolute=True)[:2])))
+        race = [
+            (committee_id, ie_for.get(committee_id), ie_against.get(committee_id), count, total)
+            for committee_id, total, count in zip(ids.tolist(), totals.tolist(), counts.tolist())
+        ]
+        return sorted(race, key=lambda r: (-r[4], r[0]))
+
+    def _donors_sql(self, cursor):
+        cursor.execute(f"""
+            SELECT entity_id, SUM(amount) AS total, COUNT(*)
+            FROM {TABLE}
+            WHERE committee_id = ANY(%s)
+              AND transaction_type_id = ANY(%s)
+              AND cycle_id = %s
+              AND NOT deleted
+            GROUP BY entity_id
+            ORDER BY total DESC, entity_id
+            LIMIT %s
+        """, [DONOR_COMMITTEES, INCOME_TYPES, RACE_CYCLE_ID, DONOR_LIMIT])
+        return [(entity_id, _cents(total), count) for entity_id, total, count in cursor.fetchall()]
+
+    def _donors_engine(self, snap):
+        rows = snap.rows_between(*RACE_CYCLE)
+        where = snap.where(rows, committee=DONOR_COMMITTEES, ttype=INCOME_TYPES)
+        ids, totals, counts = snap.group_sum('entity', rows, where)
+        top = snap.top_k(totals, DONOR_LIMIT)
+        return list(zip(ids[top].tolist(), totals[top].tolist(), counts[top].tolist()))
+
+    # ==================== TIMING ====================
+
+    def _compare(self, label, sql, engine):
+        sql_ms, sql_result = self._median(sql)
+        engine_ms, engine_result = self._median(engine)
+        match = self.style.SUCCESS('yes') if sql_result == engine_result else self.style.ERROR('NO')
+        self.stdout.write(
+            f'  {label:<10} {len(sql_result):>9,} {sql_ms:>8.1f} ms {engine_ms:>8.1f} ms '
+            f'{sql_ms / engine_ms:>8.2f}x  {match}'
+        )
+
+    def _median(self, query):
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            result = query()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), result
+
+
+def _cents(value):
+    return None if value is None else int(value * 100)
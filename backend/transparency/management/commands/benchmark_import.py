@@ -0,0 +1,246 @@
+"""
+Django management command to benchmark import_csv throughput.
+
+Generates a synthetic transactions CSV (1M rows by default) that references
+existing committees, entities and transaction types, then times the --bulk
+COPY path against the row-by-row path. Every run is a dry run, so nothing is
+left behind in the database.
+
+Usage:
+    python manage.py benchmark_import
+    python manage.py benchmark_import --rows 200000 --row-sample 20000
+    python manage.py benchmark_import --keep-file /tmp/synthetic.csv
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management import call_command
+from django.db import connection
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+import csv
+import random
+import tempfile
+import time
+
+
+CSV_FIELDS = [
+    'transaction_id', 'committee_id', 'transaction_type_id', 'transaction_date',
+    'amount', 'entity_id', 'subject_committee_id', 'is_for_benefit',
+    'memo', 'deleted',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark import_csv --bulk against the row-by-row path on synthetic data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1_000_000,
+            help='Rows in the synthetic file (default: 1,000,000)'
+        )
+        parser.add_argument(
+            '--row-sample',
+            type=int,
+            default=20_000,
+            help='Rows timed through the row-by-row path; 0 skips it (default: 20,000)'
+        )
+        parser.add_argument(
+            '--existing-ratio',
+            type=float,
+            default=0.2,
+            help='Share of rows that re-import existing transactions (default: 0.2)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50_000,
+            help='Rows per COPY chunk for the bulk path (default: 50,000)'
+        )
+        parser.add_argument(
+            '--keep-file',
+            type=str,
+            help='Write the synthetic CSV here and keep it'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for the synthetic data'
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        sample = min(options['row_sample'], rows)
+        rng = random.Random(options['seed'])
+
+        self.stdout.write('=' * 70)
+        self.stdout.write('IMPORT THROUGHPUT BENCHMARK')
+        self.stdout.write('=' * 70)
+
+        refs = self._load_reference_ids()
+
+        if options['keep_file']:
+            csv_path = Path(options['keep_file'])
+        else:
+            csv_path = Path(tempfile.mkstemp(suffix='.csv', prefix='benchmark_import_')[1])
+
+        try:
+            start = time.time()
+            self._write_synthetic_csv(csv_path, rows, refs, options['existing_ratio'], rng)
+            self.stdout.write(
+                f'Generated {rows:,} rows in {time.time() - start:.1f}s -> {csv_path}'
+            )
+
+            bulk_stats, bulk_elapsed = self._run_import(
+                csv_path, bulk=True, batch_size=options['batch_size']
+            )
+            self._report('Bulk (COPY + upsert)', rows, bulk_elapsed, bulk_stats)
+
+            if sample:
+                sample_path = csv_path.with_name(csv_path.stem + '_sample.csv')
+                self._head(csv_path, sample_path, sample)
+                try:
+                    row_stats, row_elapsed = self._run_import(sample_path, bulk=False)
+                    self._report('Row-by-row', sample, row_elapsed, row_stats)
+
+                    sample_bulk_stats, _ = self._run_import(
+                        sample_path, bulk=True, batch_size=options['batch_size']
+                    )
+                    if sample_bulk_stats == row_stats:
+                        self.stdout.write(self.style.SUCCESS(
+                            f'Counts match on the {sample:,}-row sample: {row_stats}'
+                        ))
+                    else:
+                        self.stdout.write(self.style.ERROR(
+                            f'Count mismatch on sample: bulk={sample_bulk_stats} row={row_stats}'
+                        ))
+
+                    bulk_rate = rows / bulk_elapsed if bulk_elapsed else 0
+                    row_rate = sample / row_elapsed if row_elapsed else 0
+                    if row_rate:
+                        self.stdout.write(self.style.SUCCESS(
+                            f'\nSpeedup: {bulk_rate / row_rate:.1f}x '
+                            f'(est. row-by-row time for {rows:,} rows: {rows / row_rate:,.0f}s)'
+                        ))
+                finally:
+                    sample_path.unlink(missing_ok=True)
+        finally:
+            if not options['keep_file']:
+                csv_path.unlink(missing_ok=True)
+
+        self.stdout.write('=' * 70)
+
+    def _load_reference_ids(self):
+        """Pick real foreign keys so the synthetic rows pass constraints"""
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT committee_id FROM "Committees" ORDER BY committee_id LIMIT 2000')
+            committees = [r[0] for r in cursor.fetchall()]
+            cursor.execute('SELECT name_id FROM "Names" ORDER BY name_id LIMIT 5000')
+            entities = [r[0] for r in cursor.fetchall()]
+            cursor.execute('SELECT transaction_type_id FROM "TransactionTypes"')
+            types = [r[0] for r in cursor.fetchall()]
+            cursor.execute('SELECT COALESCE(MAX(transaction_id), 0) FROM "Transactions"')
+            max_id = cursor.fetchone()[0]
+            cursor.execute("""
+                SELECT transaction_id, committee_id, transaction_date, amount, entity_id
+                FROM "Transactions" ORDER BY transaction_id DESC LIMIT 100000
+            """)
+            existing = cursor.fetchall()
+
+        if not committees or not entities or not types:
+            raise CommandError(
+                'Benchmark needs existing committees, names and transaction types'
+            )
+
+        return {
+            'committees': committees,
+            'entities': entities,
+            'types': types,
+            'next_id': max_id + 1,
+            'existing': existing,
+        }
+
+    def _write_synthetic_csv(self, path, rows, refs, existing_ratio, rng):
+        """Write new transactions mixed with unchanged and changed re-imports"""
+        base_date = date(2016, 1, 1)
+        next_id = refs['next_id']
+        existing = refs['existing']
+
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_FIELDS)
+
+            for _ in range(rows):
+                if existing and rng.random() < existing_ratio:
+                    txn_id, committee_id, txn_date, amount, entity_id = rng.choice(existing)
+                    if rng.random() < 0.5:
+                        amount = amount + 1  # Changed amount -> updated
+                    writer.writerow([
+                        txn_id, committee_id, rng.choice(refs['types']),
+                        txn_date.strftime('%Y-%m-%d'), amount, entity_id,
+                        '', '', '', '0',
+                    ])
+                    continue
+
+                is_ie = rng.random() < 0.1
+                writer.writerow([
+                    next_id,
+                    rng.choice(refs['committees']),
+                    rng.choice(refs['types']),
+                    (base_date + timedelta(days=rng.randrange(3650))).strftime('%Y-%m-%d'),
+                    f'{rng.uniform(5, 5000):.2f}',
+                    rng.choice(refs['entities']),
+                    rng.choice(refs['committees']) if is_ie else '',
+                    rng.choice(['1', '0']) if is_ie else '',
+                    'synthetic benchmark row',
+                    '0',
+                ])
+                next_id += 1
+
+    def _head(self, source, target, rows):
+        """Copy the header plus the first N data rows"""
+        with open(source, 'r', encoding='utf-8') as src, \
+                open(target, 'w', encoding='utf-8') as dst:
+            for i, line in enumerate(src):
+                if i > rows:
+                    break
+                dst.write(line)
+
+    def _run_import(self, path, bulk, batch_size=1000):
+        """Run import_csv as a dry run and return (stats, elapsed seconds)"""
+        out = StringIO()
+        start = time.time()
+        call_command(
+            'import_csv',
+            str(path),
+            source='benchmark',
+            dry_run=True,
+            bulk=bulk,
+            batch_size=batch_size,
+            stdout=out
+        )
+        elapsed = time.time() - start
+        return self._parse_counts(out.getvalue()), elapsed
+
+    def _parse_counts(self, output):
+        """Read the Created/Updated/Skipped/Errors lines of the import summary"""
+        stats = {'created': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+        for line in output.split('\n'):
+            label, _, value = line.strip().partition(':')
+            key = label.strip().lower()
+            if key in stats and value.strip():
+                stats[key] = int(value.split()[0])
+        return stats
+
+    def _report(self, label, rows, elapsed, stats):
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(
+            f'\n{label}: {rows:,} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)'
+        )
+        self.stdout.write(
+            f"  created={stats['created']:,} updated={stats['updated']:,} "
+            f"skipped={stats['skipped']:,} errors={stats['errors']:,}"
+        )
@@ -0,0 +1,159 @@
+"""
+Django management command to benchmark OFFSET against keyset pagination.
+
+For each page depth it times the page query of expenditures_list,
+donors_list and the transactions API both ways: LIMIT/OFFSET as ?page=N
+does, and the keyset seek that ?cursor= does (see transparency/utils/keyset.py).
+The cursor for page N is taken from the last row of page N-1 (untimed), as a
+client following 'next' links would have it. Nothing is written.
+
+Usage:
+    python manage.py benchmark_pagination
+    python manage.py benchmark_pagination --pages 1,100,10000 --page-size 50
+    python manage.py benchmark_pagination --endpoint expenditures --repeat 10
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+import statistics
+import time
+
+from transparency.models import Transaction
+from transparency.utils.keyset import keyset_filter
+from transparency.views import expenditure_page_rows, donor_page_rows
+
+
+ENDPOINTS = ['transactions', 'expenditures', 'donors']
+
+
+class Command(BaseCommand):
+    help = 'Compare OFFSET and keyset page latency from page 1 to deep pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages',
+            type=str,
+            default='1,10,100,1000,10000',
+            help='Comma-separated page numbers (default: 1,10,100,1000,10000)'
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=25,
+            help='Rows per page (default: 25)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed runs per query; the median is reported (default: 5)'
+        )
+        parser.add_argument(
+            '--endpoint',
+            choices=ENDPOINTS,
+            action='append',
+            help='Endpoint to benchmark; repeatable (default: all)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            pages = sorted({int(p) for p in options['pages'].split(',') if p.strip()})
+        except ValueError:
+            raise CommandError('--pages must be comma-separated integers')
+        if not pages or pages[0] < 1:
+            raise CommandError('--pages must be positive')
+
+        self.page_size = options['page_size']
+        self.repeat = options['repeat']
+
+        self.stdout.write('=' * 70)
+        self.stdout.write('PAGINATION BENCHMARK (OFFSET vs keyset)')
+        self.stdout.write('=' * 70)
+        self.stdout.write(f'Page size: {self.page_size}   Runs per query: {self.repeat} (median)')
+
+        for endpoint in options['endpoint'] or ENDPOINTS:
+            offset_page, keyset_page, boundary = getattr(self, f'_{endpoint}')()
+            self._run(endpoint, pages, offset_page, keyset_page, boundary)
+
+        self.stdout.write('=' * 70)
+
+    # ==================== ENDPOINTS ====================
+    # Each returns (offset_page(offset), keyset_page(after), boundary(offset)),
+    # where boundary gives the cursor values of the row before that offset
+
+    def _transactions(self):
+        queryset = Transaction.objects.filter(deleted=False).order_by(
+            '-transaction_date', '-transaction_id'
+        )
+        size = self.page_size
+
+        def offset_page(offset):
+            return list(queryset[offset:offset + size + 1])
+
+        def keyset_page(after):
+            return list(keyset_filter(
+                queryset, 'transaction_date', 'transaction_id', after
+            )[:size + 1])
+
+        def boundary(offset):
+            row = queryset.values_list('transaction_date', 'transaction_id')[offset - 1:offset]
+            return row[0] if row else None
+
+        return offset_page, keyset_page, boundary
+
+    def _expenditures(self):
+        size = self.page_size
+
+        def boundary(offset):
+            rows = expenditure_page_rows('', 1, offset - 1)
+            return (rows[0][1], rows[0][0]) if rows else None
+
+        return (
+            lambda offset: expenditure_page_rows('', size + 1, offset),
+            lambda after: expenditure_page_rows('', size + 1, after=after),
+            boundary,
+        )
+
+    def _donors(self):
+        size = self.page_size
+
+        def boundary(offset):
+            rows = donor_page_rows('', 1, offset - 1)
+            return (rows[0][7], rows[0][0]) if rows else None
+
+        return (
+            lambda offset: donor_page_rows('', size + 1, offset),
+            lambda after: donor_page_rows('', size + 1, after=after),
+            boundary,
+        )
+
+    # ==================== TIMING ====================
+
+    def _run(self, endpoint, pages, offset_page, keyset_page, boundary):
+        self.stdout.write(f'\n{endpoint}')
+        self.stdout.write(f'  {"page":>8} {"OFFSET ms":>12} {"keyset ms":>12} {"speedup":>9}')
+
+        for page in pages:
+            offset = (page - 1) * self.page_size
+            after = boundary(offset) if offset else None
+            if offset and after is None:
+                self.stdout.write(f'  {page:>8,} {"(beyond the data)":>25}')
+                break
+
+            offset_ms = self._median(lambda: offset_page(offset))
+            if after is None:
+                keyset_ms = self._median(lambda: offset_page(0))
+            else:
+                keyset_ms = self._median(lambda: keyset_page(after))
+
+            speedup = offset_ms / keyset_ms if keyset_ms else 0
+            self.stdout.write(
+                f'  {page:>8,} {offset_ms:>12.2f} {keyset_ms:>12.2f} {speedup:>8.1f}x'
+            )
+
+    def _median(self, query):
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            query()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
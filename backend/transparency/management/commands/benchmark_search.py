@@ -0,0 +1,197 @@
+"""
+Django management command to benchmark name search on a synthetic "Names".
+
+Builds bench_search_names (UNLOGGED, 2.3M rows by default, the size of the
+production "Names" table) with search_name and the same GIN trigram index as
+"Names", then times each query three ways:
+
+    concat ILIKE   COALESCE(last_name || ', ' || first_name, last_name) ILIKE
+                   '%q%', as donors_list searched top_donors_mv
+    icontains OR   first/last name icontains chains, as CommitteeViewSet and
+                   candidates_list searched
+    search_name    services/search.py: match, ranked by similarity
+
+The table is dropped afterwards unless --keep is given; a kept table with the
+same row count is reused by the next run.
+
+Usage:
+    python manage.py benchmark_search
+    python manage.py benchmark_search --rows 500000 --query "garcia" --keep
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+import statistics
+import time
+
+from transparency.services import search as name_search
+
+
+TABLE = 'bench_search_names'
+
+DEFAULT_QUERIES = ['smith', 'maria garcia', "o'brien", 'jonh smiht', 'zz']
+
+FIRST_NAMES = [
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda',
+    'William', 'Elizabeth', 'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica',
+    'Thomas', 'Sarah', 'Carlos', 'Maria', 'Jose', 'Ana', 'Luis', 'Rosa', 'Daniel',
+    'Karen', 'Mark', 'Nancy', 'Paul', 'Lisa', 'Kevin', 'Betty', 'Brian', 'Sandra',
+]
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+    'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson',
+    'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin', "O'Brien", 'Smith-Jones',
+    'Nguyen', 'Begay', 'Yazzie', 'Tsosie', 'Lee', 'Walker', 'Hall', 'Allen',
+]
+# Syllables appended to most last names so the table holds many distinct names
+SYLLABLES = ['ka', 'lo', 'mer', 'van', 'ste', 'rin', 'bo', 'dal', 'ton', 'wick', 'ley', 'son']
+SUFFIXES = ['', '', '', '', '', '', '', '', 'Jr.', 'Sr.', 'III']
+
+
+class Command(BaseCommand):
+    help = 'Time name search on a synthetic 2.3M-row "Names": ILIKE chains vs search_name'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=2_300_000,
+            help='Rows in the synthetic table (default: 2,300,000)'
+        )
+        parser.add_argument(
+            '--query',
+            action='append',
+            help='Query to time; repeatable (default: a fixed mix incl. a misspelling)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed runs per query; the median is reported (default: 5)'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=25,
+            help='Rows fetched per search, as a result page (default: 25)'
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the synthetic table for the next run'
+        )
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        self.limit = options['limit']
+
+        self.stdout.write('=' * 70)
+        self.stdout.write('NAME SEARCH BENCHMARK')
+        self.stdout.write('=' * 70)
+
+        with connection.cursor() as cursor:
+            self._build(cursor, options['rows'])
+
+            self.stdout.write(f'Rows per page: {self.limit}   Runs per query: {self.repeat} (median)\n')
+            self.stdout.write(
+                f'  {"query":<16} {"matches":>9} {"concat ILIKE":>13} '
+                f'{"icontains OR":>13} {"search_name":>12}'
+            )
+            for query in options['query'] or DEFAULT_QUERIES:
+                self._run(cursor, query)
+
+            if not options['keep']:
+                cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+        self.stdout.write('=' * 70)
+
+    # ==================== SYNTHETIC TABLE ====================
+
+    def _build(self, cursor, rows):
+        cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [TABLE])
+        if cursor.fetchone()[0]:
+            cursor.execute(f'SELECT COUNT(*) FROM {TABLE}')
+            if cursor.fetchone()[0] == rows:
+                self.stdout.write(f'Reusing {TABLE} ({rows:,} rows)')
+                return
+            cursor.execute(f'DROP TABLE {TABLE}')
+
+        self.stdout.write(f'Building {TABLE} ({rows:,} rows)...')
+        start = time.time()
+        # Deterministic picks from the name lists, keyed on the row number
+        cursor.execute(f"""
+            CREATE UNLOGGED TABLE {TABLE} AS
+            SELECT
+                g AS name_id,
+                (%(first)s::text[])[1 + (hashtext('f' || g) & 2147483647) %% cardinality(%(first)s::text[])] AS first_name,
+                CASE WHEN g %% 4 = 0
+                     THEN (%(first)s::text[])[1 + (hashtext('m' || g) & 2147483647) %% cardinality(%(first)s::text[])]
+                     ELSE '' END AS middle_name,
+                (%(last)s::text[])[1 + (hashtext('l' || g) & 2147483647) %% cardinality(%(last)s::text[])]
+                || CASE WHEN g %% 5 = 0 THEN ''
+                        ELSE (%(syllables)s::text[])[1 + (hashtext('a' || g) & 2147483647) %% cardinality(%(syllables)s::text[])]
+                          || (%(syllables)s::text[])[1 + (hashtext('b' || g) & 2147483647) %% cardinality(%(syllables)s::text[])]
+                   END AS last_name,
+                (%(suffixes)s::text[])[1 + (hashtext('s' || g) & 2147483647) %% cardinality(%(suffixes)s::text[])] AS suffix
+            FROM generate_series(1, %(rows)s) g
+        """, {
+            'first': FIRST_NAMES, 'last': LAST_NAMES, 'syllables': SYLLABLES,
+            'suffixes': SUFFIXES, 'rows': rows,
+        })
+        cursor.execute(f"""
+            ALTER TABLE {TABLE} ADD COLUMN search_name text;
+            UPDATE {TABLE} SET search_name = normalize_search_name(
+                concat_ws(' ', first_name, middle_name, last_name, suffix)
+            );
+            CREATE INDEX ON {TABLE} USING gin (search_name gin_trgm_ops);
+            CREATE INDEX ON {TABLE} (last_name, first_name);
+            ANALYZE {TABLE};
+        """)
+        self.stdout.write(self.style.SUCCESS(f'Built in {time.time() - start:.1f}s'))
+
+    # ==================== TIMING ====================
+
+    def _run(self, cursor, query):
+        pattern = f'%{query}%'
+
+        concat_ms = self._median(cursor, f"""
+            SELECT name_id FROM {TABLE} n
+            WHERE COALESCE(n.last_name || ', ' || n.first_name, n.last_name) ILIKE %s
+            ORDER BY n.last_name, n.first_name
+            LIMIT %s
+        """, [pattern, self.limit])
+
+        icontains_ms = self._median(cursor, f"""
+            SELECT name_id FROM {TABLE} n
+            WHERE UPPER(n.first_name) LIKE UPPER(%s) OR UPPER(n.last_name) LIKE UPPER(%s)
+            ORDER BY n.last_name, n.first_name
+            LIMIT %s
+        """, [pattern, pattern, self.limit])
+
+        match_sql, match_params = name_search.match_sql('n', query)
+        rank_sql, rank_params = name_search.rank_sql('n', query)
+        search_sql = f"""
+            SELECT name_id FROM {TABLE} n
+            WHERE {match_sql}
+            ORDER BY {rank_sql} DESC, n.name_id
+            LIMIT %s
+        """
+        search_params = match_params + rank_params + [self.limit]
+        search_ms = self._median(cursor, search_sql, search_params)
+
+        cursor.execute(f'SELECT COUNT(*) FROM {TABLE} n WHERE {match_sql}', match_params)
+        matches = cursor.fetchone()[0]
+
+        self.stdout.write(
+            f'  {query[:16]:<16} {matches:>9,} {concat_ms:>10.1f} ms '
+            f'{icontains_ms:>10.1f} ms {search_ms:>9.1f} ms'
+        )
+
+    def _median(self, cursor, sql, params):
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,169 @@
+"""
+Django management command to benchmark transform_seethemoney throughput.
+
+Generates a SeeTheMoney-style CSV (2M rows by default) with realistic repetition
+of filer, payee and transaction type names, then times the original
+single-process transform against the chunked transform for each output format.
+
+Usage:
+    python manage.py benchmark_transform
+    python manage.py benchmark_transform --rows 500000 --workers 4
+    python manage.py benchmark_transform --formats csv parquet
+"""
+
+from django.core.management.base import BaseCommand
+from django.core.management import call_command
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+import csv
+import os
+import random
+import shutil
+import tempfile
+import time
+
+
+SEETHEMONEY_FIELDS = [
+    'TransactionDate', 'FilerName', 'TransactionName', 'TransactionType',
+    'Amount', 'Occupation', 'Employer', 'City', 'State', 'ZipCode',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the chunked transform_seethemoney against the single-process transform'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=2_000_000,
+            help='Rows in the generated file (default: 2,000,000)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=0,
+            help='Workers for the chunked transform (default: one per CPU)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=50000,
+            help='Rows per chunk (default: 50000)'
+        )
+        parser.add_argument(
+            '--formats',
+            nargs='+',
+            choices=['csv', 'parquet', 'arrow'],
+            default=['csv', 'parquet', 'arrow'],
+            help='Output formats to time for the chunked transform'
+        )
+        parser.add_argument(
+            '--skip-baseline',
+            action='store_true',
+            help='Do not time the single-process transform'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for the generated data'
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        workers = options['workers'] or os.cpu_count() or 1
+
+        self.stdout.write('=' * 70)
+        self.stdout.write('SEETHEMONEY TRANSFORM BENCHMARK')
+        self.stdout.write('=' * 70)
+
+        work_dir = Path(tempfile.mkdtemp(prefix='benchmark_transform_'))
+        try:
+            input_path = work_dir / 'seethemoney.csv'
+            start = time.time()
+            self._write_seethemoney_csv(input_path, rows, random.Random(options['seed']))
+            self.stdout.write(
+                f'Generated {rows:,} rows in {time.time() - start:.1f}s '
+                f'({input_path.stat().st_size / 1024 / 1024:,.0f} MB)'
+            )
+
+            results = []
+            if not options['skip_baseline']:
+                elapsed = self._time_transform(input_path)
+                results.append(('single-process csv', elapsed, self._output_size(input_path, 'csv')))
+
+            for output_format in options['formats']:
+                try:
+                    elapsed = self._time_transform(
+                        input_path,
+                        workers=workers,
+                        chunk_size=options['chunk_size'],
+                        format=output_format,
+                    )
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'{output_format}: {e}'))
+                    continue
+                results.append((
+                    f'chunked {output_format} ({workers} workers)',
+                    elapsed,
+                    self._output_size(input_path, output_format),
+                ))
+
+            self.stdout.write(f'\n{"Mode":<34} {"Seconds":>9} {"Rows/s":>12} {"Output MB":>10}')
+            self.stdout.write('-' * 70)
+            for label, elapsed, size in results:
+                rate = rows / elapsed if elapsed else 0
+                self.stdout.write(
+                    f'{label:<34} {elapsed:>9.1f} {rate:>12,.0f} {size / 1024 / 1024:>10.1f}'
+                )
+
+            if results and not options['skip_baseline']:
+                baseline = results[0][1]
+                for label, elapsed, _ in results[1:]:
+                    self.stdout.write(self.style.SUCCESS(
+                        f'{label}: {baseline / elapsed:.1f}x faster than single-process'
+                    ))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        self.stdout.write('=' * 70)
+
+    def _write_seethemoney_csv(self, path, rows, rng):
+        """Write a file whose name cardinality resembles a SeeTheMoney export"""
+        filers = [f'Committee {i} For Arizona' for i in range(4000)]
+        payees = [f'Donor{i}, Person {i % 997}' for i in range(250000)]
+        types = [
+            'Contribution from Individuals', 'Independent Expenditures',
+            'Operating Expenses', 'Contribution from PACs', 'Loan Received',
+        ]
+        base_date = date(2016, 1, 1)
+
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(SEETHEMONEY_FIELDS)
+            for _ in range(rows):
+                day = base_date + timedelta(days=rng.randrange(3000))
+                writer.writerow([
+                    f'{day.month}/{day.day}/{day.year} 12:00:00 AM',
+                    rng.choice(filers),
+                    rng.choice(payees),
+                    rng.choice(types),
+                    f'{rng.uniform(5, 25000):,.2f}',
+                    'Retired',
+                    'Self',
+                    'Phoenix',
+                    'AZ',
+                    '85004',
+                ])
+
+    def _time_transform(self, input_path, **options):
+        start = time.time()
+        call_command('transform_seethemoney', str(input_path), stdout=StringIO(), **options)
+        return time.time() - start
+
+    def _output_size(self, input_path, output_format):
+        suffix = {'csv': '.csv', 'parquet': '.parquet', 'arrow': '.arrow'}[output_format]
+        output_path = input_path.with_name(f'{input_path.stem}_transformed{suffix}')
+        return output_path.stat().st_size if output_path.exists() else 0
@@ -0,0 +1,167 @@
+"""
+Django management command to benchmark zstd dictionaries on API payloads.
+
+Captures response bodies from candidates_list, donors_list and
+expenditures_list over a range of pages, page sizes and searches, trains a
+dictionary per endpoint on every other payload, and compresses the rest
+with plain zstd (level 3, as CompressedCache without a dictionary) and with
+the dictionary. Reports size and median compress/decompress time per payload.
+Nothing is written to the database; the captured requests go through the
+views, so they may fill the response cache.
+
+Usage:
+    python manage.py benchmark_zstd_dictionaries
+    python manage.py benchmark_zstd_dictionaries --page-sizes 10,25 --pages 40
+    python manage.py benchmark_zstd_dictionaries --endpoint donors --size 65536
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+import statistics
+import time
+import zstandard as zstd
+
+from transparency.utils import zstd_dictionaries
+
+
+ENDPOINTS = {
+    'candidates': '/api/v1/candidates/',
+    'donors': '/api/v1/donors/',
+    'expenditures': '/api/v1/expenditures/',
+}
+SEARCHES = ['', 'a', 'e', 'smith', 'for']
+
+
+class Command(BaseCommand):
+    help = 'Compare plain and dictionary zstd on captured list-endpoint payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=20,
+            help='Pages captured per page size and search (default: 20)'
+        )
+        parser.add_argument(
+            '--page-sizes',
+            type=str,
+            default='10,25,50',
+            help='Comma-separated page sizes (default: 10,25,50)'
+        )
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=None,
+            help='Dictionary size in bytes (default: ZSTD_DICT_SIZE)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Timed runs per payload; the median is reported (default: 20)'
+        )
+        parser.add_argument(
+            '--endpoint',
+            choices=list(ENDPOINTS),
+            action='append',
+            help='Endpoint to benchmark; repeatable (default: all)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            page_sizes = [int(s) for s in options['page_sizes'].split(',') if s.strip()]
+        except ValueError:
+            raise CommandError('--page-sizes must be comma-separated integers')
+
+        self.repeat = options['repeat']
+        self.client = Client(raise_request_exception=False, HTTP_ACCEPT_ENCODING='identity')
+
+        self.stdout.write('=' * 70)
+        self.stdout.write('ZSTD DICTIONARY BENCHMARK (plain level 3 vs trained dictionary)')
+        self.stdout.write('=' * 70)
+        self.stdout.write(f'Runs per payload: {self.repeat} (median)')
+
+        for endpoint in options['endpoint'] or ENDPOINTS:
+            payloads = self._capture(ENDPOINTS[endpoint], options['pages'], page_sizes)
+            self._run(endpoint, payloads, options['size'])
+
+        self.stdout.write('=' * 70)
+
+    # ==================== CAPTURE ====================
+
+    def _capture(self, url, pages, page_sizes):
+        """Distinct bodies of the endpoint's pages, in request order"""
+        payloads = []
+        seen = set()
+        for search in SEARCHES:
+            for page_size in page_sizes:
+                for page in range(1, pages + 1):
+                    response = self.client.get(url, {'page': page, 'page_size': page_size, 'search': search})
+                    if response.status_code != 200:
+                        break
+                    body = response.content
+                    if body not in seen:
+                        seen.add(body)
+                        payloads.append(body)
+        return payloads
+
+    # ==================== TIMING ====================
+
+    def _run(self, endpoint, payloads, dict_size):
+        self.stdout.write(f'\n{endpoint}')
+
+        # Every other payload trains, the rest are measured
+        train, test = payloads[::2], payloads[1::2]
+        if len(train) < 8 or not test:
+            self.stdout.write(f'  {len(payloads)} distinct payloads captured: too few to train on')
+            return
+        try:
+            dictionary = zstd_dictionaries.build(train, dict_size)
+        except zstd.ZstdError as e:
+            self.stdout.write(self.style.WARNING(f'  training failed: {e}'))
+            return
+
+        plain = (zstd.ZstdCompressor(level=zstd_dictionaries.LEVEL), zstd.ZstdDecompressor())
+        primed = (
+            zstd.ZstdCompressor(level=zstd_dictionaries.LEVEL, dict_data=dictionary),
+            zstd.ZstdDecompressor(dict_data=dictionary),
+        )
+
+        raw = sum(len(p) for p in test)
+        self.stdout.write(
+            f'  {len(train)} training / {len(test)} measured payloads, '
+            f'median {statistics.median(len(p) for p in test):,.0f} bytes, '
+            f'dictionary {len(dictionary.as_bytes()):,} bytes'
+        )
+        self.stdout.write(
+            f'  {"":<12} {"stored bytes":>14} {"ratio":>8} {"compress us":>13} {"decompress us":>15}'
+        )
+
+        results = {}
+        for label, (compressor, decompressor) in (('plain', plain), ('dictionary', primed)):
+            stored = [compressor.compress(p) for p in test]
+            size = sum(len(s) for s in stored)
+            compress_us = statistics.median(
+                self._median(lambda: compressor.compress(p)) for p in test
+            )
+            decompress_us = statistics.median(
+                self._median(lambda: decompressor.decompress(s)) for s in stored
+            )
+            results[label] = (size, compress_us, decompress_us)
+            self.stdout.write(
+                f'  {label:<12} {size:>14,} {raw / size:>7.2f}x {compress_us:>13.1f} {decompress_us:>15.1f}'
+            )
+
+        (plain_size, plain_c, plain_d), (dict_size_, dict_c, dict_d) = results['plain'], results['dictionary']
+        self.stdout.write(self.style.SUCCESS(
+            f'  dictionary: {(1 - dict_size_ / plain_size) * 100:.1f}% smaller, '
+            f'compress {plain_c / dict_c:.2f}x, decompress {plain_d / dict_d:.2f}x the plain speed'
+        ))
+
+    def _median(self, operation):
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            operation()
+            timings.append((time.perf_counter() - start) * 1_000_000)
+        return statistics.median(timings)
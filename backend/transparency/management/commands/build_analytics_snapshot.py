@@ -0,0 +1,54 @@
+"""
+Django management command to build the columnar analytics snapshot.
+
+Writes the snapshot of "Transactions" for the current data version under
+ANALYTICS_SNAPSHOT_DIR (see transparency/services/analytics_engine.py) and
+deletes older ones. Workers otherwise build it themselves, in the background,
+the first time they see a new version; running this after an import means
+no request is served from SQL while that happens.
+
+Usage:
+    python manage.py build_analytics_snapshot
+    python manage.py build_analytics_snapshot --keep 3
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+import time
+
+from transparency.services import analytics_engine
+
+
+class Command(BaseCommand):
+    help = 'Build the columnar "Transactions" snapshot for the current data version'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=None,
+            help='Snapshots to keep, the new one included (default: ANALYTICS_SNAPSHOTS_KEPT)'
+        )
+
+    def handle(self, *args, **options):
+        if options['keep'] is not None and options['keep'] < 1:
+            raise CommandError('--keep must be at least 1')
+
+        self.stdout.write('=' * 70)
+        self.stdout.write('ANALYTICS SNAPSHOT')
+        self.stdout.write('=' * 70)
+        if not settings.ANALYTICS_ENGINE:
+            self.stdout.write(self.style.WARNING('ANALYTICS_ENGINE is off: views keep using SQL'))
+
+        start = time.time()
+        version, rows = analytics_engine.build()
+        path = analytics_engine.snapshot_path(version)
+        size = sum(f.stat().st_size for f in path.iterdir())
+        self.stdout.write(f'  version {version}: {rows:,} rows, {size / 1024 / 1024:.1f} MB in {path}')
+
+        deleted = analytics_engine.prune(options['keep'])
+        if deleted:
+            self.stdout.write(f'  deleted versions {", ".join(str(v) for v in deleted)}')
+
+        self.stdout.write('=' * 70)
+        self.stdout.write(self.style.SUCCESS(f'Snapshot built in {time.time() - start:.1f}s'))
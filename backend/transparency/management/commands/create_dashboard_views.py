@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.db import connection
+from transparency.services.incremental_aggregates import summary_view_installed
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,32 +14,30 @@ class Command(BaseCommand):
         try:
             with connection.cursor() as cursor:
                 # 1. Create IE Benefit Breakdown View
-                self.stdout.write('Creating ie_benefit_breakdown...')
-                cursor.execute("""
-                    DROP MATERIALIZED VIEW IF EXISTS ie_benefit_breakdown CASCADE;
+                if not self._skip_summary_view(cursor, 'ie_benefit_breakdown'):
+                    self.stdout.write('Creating ie_benefit_breakdown...')
+                    cursor.execute("""
+                        DROP MATERIALIZED VIEW IF EXISTS ie_benefit_breakdown CASCADE;
                     
-                    CREATE MATERIALIZED VIEW ie_benefit_breakdown AS
-                    SELECT 
-                        is_for_benefit,
-                        COUNT(*) as transaction_count,
-                        COALESCE(SUM(amount), 0) as total_amount,
-                        ROUND(
-                            100.0 * COALESCE(SUM(amount), 0) / NULLIF(
-                                (SELECT SUM(amount) FROM "Transactions" 
-                                 WHERE subject_committee_id IS NOT NULL AND deleted = false), 
-                                0
-                            ), 
-                            1
-                        ) as percentage
-                    FROM "Transactions"
-                    WHERE subject_committee_id IS NOT NULL 
-                        AND deleted = false
-                        AND is_for_benefit IS NOT NULL
-                    GROUP BY is_for_benefit;
+                        CREATE MATERIALIZED VIEW ie_benefit_breakdown AS
+                        SELECT 
+                            is_for_benefit,
+                            COUNT(*) as transaction_count,
+                            COALESCE(SUM(CASE WHEN negative THEN -amount_cents ELSE amount_cents END) / 100.0, 0)::numeric(18, 2) as total_amount,
+                            ROUND(
+                                100.0 * COALESCE(SUM(CASE WHEN negative THEN -amount_cents ELSE amount_cents END), 0) / NULLIF(
+                                    (SELECT SUM(CASE WHEN negative THEN -amount_cents ELSE amount_cents END) FROM ie_fact), 
+                                    0
+                                ), 
+                                1
+                            ) as percentage
+                        FROM ie_fact
+                        WHERE is_for_benefit IS NOT NULL
+                        GROUP BY is_for_benefit;
                     
-                    CREATE UNIQUE INDEX idx_ie_benefit_unique ON ie_benefit_breakdown(is_for_benefit);
-                """)
-                self.stdout.write(self.style.SUCCESS('  ie_benefit_breakdown created'))
+                        CREATE UNIQUE INDEX idx_ie_benefit_unique ON ie_benefit_breakdown(is_for_benefit);
+                    """)
+                    self.stdout.write(self.style.SUCCESS('  ie_benefit_breakdown created'))
                 
                 # 2. Create Top IE Committees View (if not exists)
                 self.stdout.write('Creating top_ie_committees_mv...')
@@ -49,76 +48,79 @@ class Command(BaseCommand):
                     SELECT 
                         c.committee_id,
                         COALESCE(n.last_name || ', ' || n.first_name, n.last_name, 'Unknown') as committee,
-                        COALESCE(SUM(t.amount), 0) as total_spending,
-                        COUNT(t.transaction_id) as transaction_count
-                    FROM "Committees" c
+                        s.total_spending,
+                        s.transaction_count
+                    FROM (
+                        SELECT committee_id,
+                               (SUM(CASE WHEN negative THEN -amount_cents ELSE amount_cents END) / 100.0)::numeric(18, 2) as total_spending,
+                               COUNT(*) as transaction_count
+                        FROM ie_fact
+                        GROUP BY committee_id
+                    ) s
+                    JOIN "Committees" c ON c.committee_id = s.committee_id
                     LEFT JOIN "Names" n ON c.name_id = n.name_id
-                    LEFT JOIN "Transactions" t ON c.committee_id = t.committee_id
-                    WHERE t.subject_committee_id IS NOT NULL 
-                        AND t.deleted = false
-                    GROUP BY c.committee_id, n.last_name, n.first_name
-                    HAVING COUNT(t.transaction_id) > 0
-                    ORDER BY total_spending DESC;
+                    ORDER BY s.total_spending DESC;
                     
                     CREATE UNIQUE INDEX idx_top_committees_unique ON top_ie_committees_mv(committee_id);
                 """)
                 self.stdout.write(self.style.SUCCESS('  top_ie_committees_mv created'))
                 
                 # 3. Create Top Donors View (if not exists)
-                self.stdout.write('Creating top_donors_mv...')
-                cursor.execute("""
-                    DROP MATERIALIZED VIEW IF EXISTS top_donors_mv CASCADE;
+                if not self._skip_summary_view(cursor, 'top_donors_mv'):
+                    self.stdout.write('Creating top_donors_mv...')
+                    cursor.execute("""
+                        DROP MATERIALIZED VIEW IF EXISTS top_donors_mv CASCADE;
 
-                    CREATE MATERIALIZED VIEW top_donors_mv AS
-                    SELECT
-                        e.name_id as entity_id,
-                        COALESCE(e.last_name || ', ' || e.first_name, e.last_name, 'Unknown') as entity_name,
-                        e.city,
-                        e.state,
-                        et.name as entity_type,
-                        COALESCE(SUM(t.amount), 0) as total_contributed,
-                        COUNT(t.transaction_id) as contribution_count
-                    FROM "Names" e
-                    LEFT JOIN "Transactions" t ON e.name_id = t.entity_id
-                    LEFT JOIN "TransactionTypes" tt ON t.transaction_type_id = tt.transaction_type_id
-                    LEFT JOIN "EntityTypes" et ON e.entity_type_id = et.entity_type_id
-                    WHERE tt.income_expense_neutral = 1  -- Contributions only
-                        AND t.deleted = false
-                    GROUP BY e.name_id, e.last_name, e.first_name, e.city, e.state, et.name
-                    HAVING COUNT(t.transaction_id) > 0
-                    ORDER BY total_contributed DESC;
+                        CREATE MATERIALIZED VIEW top_donors_mv AS
+                        SELECT
+                            e.name_id as entity_id,
+                            COALESCE(e.last_name || ', ' || e.first_name, e.last_name, 'Unknown') as entity_name,
+                            e.city,
+                            e.state,
+                            et.name as entity_type,
+                            COALESCE(SUM(t.amount), 0) as total_contributed,
+                            COUNT(t.transaction_id) as contribution_count
+                        FROM "Names" e
+                        LEFT JOIN "Transactions" t ON e.name_id = t.entity_id
+                        LEFT JOIN "TransactionTypes" tt ON t.transaction_type_id = tt.transaction_type_id
+                        LEFT JOIN "EntityTypes" et ON e.entity_type_id = et.entity_type_id
+                        WHERE tt.income_expense_neutral = 1  -- Contributions only
+                            AND t.deleted = false
+                        GROUP BY e.name_id, e.last_name, e.first_name, e.city, e.state, et.name
+                        HAVING COUNT(t.transaction_id) > 0
+                        ORDER BY total_contributed DESC;
 
-                    CREATE UNIQUE INDEX idx_top_donors_unique ON top_donors_mv(entity_id);
-                """)
-                self.stdout.write(self.style.SUCCESS('  top_donors_mv created'))
+                        CREATE UNIQUE INDEX idx_top_donors_unique ON top_donors_mv(entity_id);
+                        CREATE INDEX idx_top_donors_keyset ON top_donors_mv(total_contributed DESC, entity_id DESC);
+                    """)
+                    self.stdout.write(self.style.SUCCESS('  top_donors_mv created'))
                 
                 # 4. Create Dashboard Aggregations View
-                self.stdout.write('Creating dashboard_aggregations...')
-                cursor.execute("""
-                    DROP MATERIALIZED VIEW IF EXISTS dashboard_aggregations CASCADE;
+                if not self._skip_summary_view(cursor, 'dashboard_aggregations'):
+                    self.stdout.write('Creating dashboard_aggregations...')
+                    cursor.execute("""
+                        DROP MATERIALIZED VIEW IF EXISTS dashboard_aggregations CASCADE;
                     
-                    CREATE MATERIALIZED VIEW dashboard_aggregations AS
-                    SELECT 
-                        -- IE Spending totals
-                        (SELECT COALESCE(SUM(amount), 0) 
-                         FROM "Transactions" 
-                         WHERE subject_committee_id IS NOT NULL AND deleted = false) as total_ie_spending,
+                        CREATE MATERIALIZED VIEW dashboard_aggregations AS
+                        SELECT 
+                            -- IE Spending totals
+                            (SELECT COALESCE(SUM(CASE WHEN negative THEN -amount_cents ELSE amount_cents END) / 100.0, 0)::numeric(18, 2)
+                             FROM ie_fact) as total_ie_spending,
                         
-                        -- Candidate counts
-                        (SELECT COUNT(*) FROM "Committees" WHERE candidate_id IS NOT NULL) as candidate_committees,
+                            -- Candidate counts
+                            (SELECT COUNT(*) FROM "Committees" WHERE candidate_id IS NOT NULL) as candidate_committees,
                         
-                        -- IE transaction count
-                        (SELECT COUNT(*) FROM "Transactions" 
-                         WHERE subject_committee_id IS NOT NULL AND deleted = false) as num_expenditures,
+                            -- IE transaction count
+                            (SELECT COUNT(*) FROM ie_fact) as num_expenditures,
                         
-                        -- SOI stats
-                        (SELECT COUNT(*) FROM candidate_soi) as soi_total,
-                        (SELECT COUNT(*) FROM candidate_soi WHERE contact_status = 'uncontacted') as soi_uncontacted,
-                        (SELECT COUNT(*) FROM candidate_soi WHERE pledge_received = true) as soi_pledged;
+                            -- SOI stats
+                            (SELECT COUNT(*) FROM candidate_soi) as soi_total,
+                            (SELECT COUNT(*) FROM candidate_soi WHERE contact_status = 'uncontacted') as soi_uncontacted,
+                            (SELECT COUNT(*) FROM candidate_soi WHERE pledge_received = true) as soi_pledged;
                     
-                    CREATE UNIQUE INDEX idx_dashboard_agg_unique ON dashboard_aggregations((1));
-                """)
-                self.stdout.write(self.style.SUCCESS('  dashboard_aggregations created'))
+                        CREATE UNIQUE INDEX idx_dashboard_agg_unique ON dashboard_aggregations((1));
+                    """)
+                    self.stdout.write(self.style.SUCCESS('  dashboard_aggregations created'))
                 
             self.stdout.write(self.style.SUCCESS('\nAll materialized views created successfully!'))
             self.stdout.write('\nView summary:')
@@ -146,4 +148,17 @@ class Command(BaseCommand):
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'Error creating views: {e}'))
             logger.error(f"Error creating materialized views: {e}", exc_info=True)
-            raise
\ No newline at end of file
+            raise
+
+    def _skip_summary_view(self, cursor, name):
+        """
+        Names replaced by incremental_aggregates --install-views are plain views
+        over the summary tables: recreating them as materialized views would
+        fail on DROP MATERIALIZED VIEW and bring back a copy that goes stale
+        """
+        if summary_view_installed(cursor, name):
+            self.stdout.write(self.style.WARNING(
+                f'Skipping {name}: served from the summary tables (incremental_aggregates --install-views)'
+            ))
+            return True
+        return False
@@ -4,6 +4,14 @@ Django management command to remove duplicate transactions from the database.
 The duplicate bug was caused by import_mdb_corrected.py using Transaction.objects.create()
 instead of update_or_create(), resulting in ~522,000 duplicate records.
 
+Duplicate groups are found on the stored record_hash (plus transaction type)
+when every row has one, which avoids a five-column GROUP BY over the whole
+table. The transactions_record_hash trigger (migration 0033) recomputes the
+hash on every insert and on every update of a natural-key column, whoever
+writes it (imports, admin edits, entity merges, SQL fixes). Run
+backfill_record_hashes first on databases imported before record_hash
+existed; otherwise the natural-key columns are grouped directly.
+
 Usage:
     python manage.py deduplicate_transactions --dry-run  # Preview what will be deleted
     python manage.py deduplicate_transactions            # Actually delete duplicates
@@ -15,6 +23,12 @@ Date: 2025-01-03
 from django.core.management.base import BaseCommand
 from django.db import connection, transaction
 from transparency.models import Transaction
+from transparency.services.incremental_aggregates import track_transaction_changes
+
+
+# Natural key of a transaction, and its stored-hash equivalent
+NATURAL_KEY = 'committee_id, entity_id, amount, transaction_date, transaction_type_id'
+HASH_KEY = 'record_hash, transaction_type_id'
 
 
 class Command(BaseCommand):
@@ -52,29 +66,29 @@ class Command(BaseCommand):
             cursor.execute('SELECT COUNT(*) FROM "Transactions"')
             total_count = cursor.fetchone()[0]
 
-            # Count duplicates using the natural key
-            cursor.execute('''
-                SELECT COUNT(*)
-                FROM (
-                    SELECT committee_id, entity_id, amount, transaction_date, transaction_type_id
-                    FROM "Transactions"
-                    GROUP BY committee_id, entity_id, amount, transaction_date, transaction_type_id
-                    HAVING COUNT(*) > 1
-                ) dups
-            ''')
-            duplicate_groups = cursor.fetchone()[0]
-
-            # Count how many records will be deleted
-            cursor.execute('''
-                SELECT SUM(cnt - 1)
+            # Group on the stored hash when every row has one
+            cursor.execute('''SELECT EXISTS (SELECT 1 FROM "Transactions" WHERE record_hash = '')''')
+            missing_hashes = cursor.fetchone()[0]
+            group_key = NATURAL_KEY if missing_hashes else HASH_KEY
+            if missing_hashes:
+                self.stdout.write(self.style.WARNING(
+                    'Some transactions have no record_hash; grouping on the natural key '
+                    '(run backfill_record_hashes to speed this up)'
+                ))
+            else:
+                self.stdout.write('Grouping on stored record_hash')
+
+            # Count duplicate groups and how many records will be deleted
+            cursor.execute(f'''
+                SELECT COUNT(*), COALESCE(SUM(cnt - 1), 0)
                 FROM (
                     SELECT COUNT(*) as cnt
                     FROM "Transactions"
-                    GROUP BY committee_id, entity_id, amount, transaction_date, transaction_type_id
+                    GROUP BY {group_key}
                     HAVING COUNT(*) > 1
                 ) dups
             ''')
-            duplicates_to_delete = cursor.fetchone()[0] or 0
+            duplicate_groups, duplicates_to_delete = cursor.fetchone()
 
         self.stdout.write(f'\nStatistics:')
         self.stdout.write(f'  Total transactions:     {total_count:,}')
@@ -94,17 +108,17 @@ class Command(BaseCommand):
             # Show some sample duplicates
             self.stdout.write('\nSample duplicate groups (first 5):')
             with connection.cursor() as cursor:
-                cursor.execute('''
+                cursor.execute(f'''
                     SELECT
-                        committee_id,
-                        entity_id,
-                        amount,
-                        transaction_date,
-                        transaction_type_id,
+                        MIN(committee_id),
+                        MIN(entity_id),
+                        MIN(amount),
+                        MIN(transaction_date),
+                        MIN(transaction_type_id),
                         COUNT(*) as duplicate_count,
                         array_agg(transaction_id ORDER BY transaction_id) as transaction_ids
                     FROM "Transactions"
-                    GROUP BY committee_id, entity_id, amount, transaction_date, transaction_type_id
+                    GROUP BY {group_key}
                     HAVING COUNT(*) > 1
                     ORDER BY COUNT(*) DESC
                     LIMIT 5
@@ -126,15 +140,14 @@ class Command(BaseCommand):
 
         with connection.cursor() as cursor:
             # Create temp table with IDs to delete (keeps lowest transaction_id per group)
-            cursor.execute('''
+            cursor.execute(f'''
                 CREATE TEMP TABLE IF NOT EXISTS ids_to_delete AS
                 SELECT transaction_id
                 FROM (
                     SELECT
                         transaction_id,
                         ROW_NUMBER() OVER (
-                            PARTITION BY committee_id, entity_id, amount,
-                                         transaction_date, transaction_type_id
+                            PARTITION BY {group_key}
                             ORDER BY transaction_id
                         ) as rn
                     FROM "Transactions"
@@ -166,34 +179,38 @@ class Command(BaseCommand):
             batch_num += 1
 
             with connection.cursor() as cursor:
-                # Delete batch from temp table
-                cursor.execute('''
-                    DELETE FROM "Transactions"
-                    WHERE transaction_id IN (
-                        SELECT transaction_id FROM ids_to_delete LIMIT %s
-                    )
-                ''', [batch_size])
-
-                deleted_count = cursor.rowcount
-
-                total_deleted += deleted_count
-
-                # Also remove from temp table to track progress
+                # Take the next batch off the temp table to track progress
                 cursor.execute('''
                     DELETE FROM ids_to_delete
                     WHERE ctid IN (
                         SELECT ctid FROM ids_to_delete LIMIT %s
                     )
+                    RETURNING transaction_id
                 ''', [batch_size])
-
-                if deleted_count > 0:
-                    self.stdout.write(
-                        f'  Batch {batch_num}: Deleted {deleted_count:,} records '
-                        f'(Total: {total_deleted:,}/{duplicates_to_delete:,})'
-                    )
-
-                if deleted_count < batch_size:
-                    break
+                batch_ids = [row[0] for row in cursor.fetchall()]
+
+            if not batch_ids:
+                break
+
+            # Delete the same ids, keeping the dashboard aggregates in step
+            with track_transaction_changes('SELECT unnest(%s::integer[])', [batch_ids]):
+                with connection.cursor() as cursor:
+                    cursor.execute('''
+                        DELETE FROM "Transactions"
+                        WHERE transaction_id = ANY(%s)
+                    ''', [batch_ids])
+                    deleted_count = cursor.rowcount
+
+            total_deleted += deleted_count
+
+            if deleted_count > 0:
+                self.stdout.write(
+                    f'  Batch {batch_num}: Deleted {deleted_count:,} records '
+                    f'(Total: {total_deleted:,}/{duplicates_to_delete:,})'
+                )
+
+            if len(batch_ids) < batch_size:
+                break
 
         # Drop temp table
         with connection.cursor() as cursor:
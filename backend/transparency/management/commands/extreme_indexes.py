@@ -8,6 +8,7 @@ to eliminate sequential scans on all hot paths.
 
 from django.core.management.base import BaseCommand
 from django.db import connection
+from transparency.services.incremental_aggregates import relation_kind
 import logging
 
 logger = logging.getLogger(__name__)
@@ -73,23 +74,32 @@ class Command(BaseCommand):
 
             # Dashboard aggregations (single row - no index needed)
 
+            # After incremental_aggregates --install-views these are plain
+            # views over the summary tables, which carry their own indexes
+            materialized = {
+                name for name in ('ie_benefit_breakdown', 'top_donors_mv')
+                if relation_kind(cursor, name) == 'm'
+            }
+
             # IE benefit breakdown
-            cursor.execute("""
-                CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_ie_benefit_pk
-                ON ie_benefit_breakdown(is_for_benefit);
-            """)
+            if 'ie_benefit_breakdown' in materialized:
+                cursor.execute("""
+                    CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_ie_benefit_pk
+                    ON ie_benefit_breakdown(is_for_benefit);
+                """)
 
             # Top donors MV - already has indexes from earlier
             # Verify they exist
-            cursor.execute("""
-                CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_top_donors_amount
-                ON top_donors_mv(total_contributed DESC);
-            """)
+            if 'top_donors_mv' in materialized:
+                cursor.execute("""
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_top_donors_amount
+                    ON top_donors_mv(total_contributed DESC);
+                """)
 
-            cursor.execute("""
-                CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_top_donors_name_trgm
-                ON top_donors_mv USING gin (entity_name gin_trgm_ops);
-            """)
+                cursor.execute("""
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_top_donors_name_trgm
+                    ON top_donors_mv USING gin (entity_name gin_trgm_ops);
+                """)
 
             self.stdout.write(self.style.SUCCESS('  Materialized views indexed'))
 
@@ -100,8 +110,8 @@ class Command(BaseCommand):
             cursor.execute('ANALYZE "Transactions";')
             cursor.execute('ANALYZE "Names";')
             cursor.execute('ANALYZE "Committees";')
-            cursor.execute('ANALYZE top_donors_mv;')
-            cursor.execute('ANALYZE ie_benefit_breakdown;')
+            for name in sorted(materialized):
+                cursor.execute(f'ANALYZE {name};')
 
             self.stdout.write(self.style.SUCCESS('  Statistics updated'))
 
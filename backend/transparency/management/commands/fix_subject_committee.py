@@ -18,6 +18,7 @@ import io
 from django.core.management.base import BaseCommand
 from django.db import transaction as db_transaction
 from transparency.models import Transaction, Committee, Entity, EntityType
+from transparency.services.incremental_aggregates import track_transaction_changes
 
 
 class Command(BaseCommand):
@@ -227,7 +228,10 @@ class Command(BaseCommand):
                 updates.append(txn)
 
             if updates and not dry_run:
-                Transaction.objects.bulk_update(updates, ['subject_committee_id'])
+                with track_transaction_changes(
+                    'SELECT unnest(%s::integer[])', [[t.transaction_id for t in updates]]
+                ):
+                    Transaction.objects.bulk_update(updates, ['subject_committee_id'])
                 updated_count += len(updates)
 
                 if updated_count % 10000 == 0:
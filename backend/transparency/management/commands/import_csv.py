@@ -5,21 +5,70 @@ with duplicate detection and data provenance tracking.
 Usage:
     python manage.py import_csv path/to/file.csv --source "AZ SOS Q1 2024"
     python manage.py import_csv path/to/file.csv --dry-run
+    python manage.py import_csv path/to/file.csv --bulk --batch-size 50000
+    python manage.py import_csv path/to/file_transformed.parquet --bulk
+    python manage.py import_csv path/to/full_year.csv --bulk-load --index-workers 4
+
+Bulk mode streams the CSV into a temporary staging table with COPY FROM STDIN
+and applies it with set-based UPDATE and INSERT statements. It reports
+the same created/updated/skipped counts as the row-by-row path.
+
+--bulk-load is bulk mode that, for files of at least --bulk-load-threshold
+rows, drops the secondary indexes of "Transactions" for the load and rebuilds
+them in parallel afterwards (see transparency/services/bulk_load.py). It
+reports the time saved against an estimate of loading with the indexes in
+place. If the import dies before the rebuild, `transaction_indexes --restore`
+builds the indexes it dropped.
+
+Parquet and Arrow IPC files written by transform_seethemoney are read as typed
+columns (requires pyarrow) instead of CSV text.
 """
 
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
+from django.db import connection, transaction
+from django.utils import timezone
 from transparency.models import (
     Committee, Entity, Transaction, TransactionType,
-    EntityType, County, Party, Office, Cycle, ExpenseCategory
+    EntityType, County, Party, Office, Cycle, ExpenseCategory, ImportBatch
 )
+from transparency.services import bulk_load
+from transparency.services.cache_warmup import after_refresh
+from transparency.services.incremental_aggregates import track_transaction_changes
 import csv
 from datetime import datetime
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 import hashlib
+import io
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
 
+# Typed columnar inputs produced by transform_seethemoney --format
+ARROW_SUFFIXES = {'.parquet', '.arrow', '.feather', '.ipc'}
+
+
+# Columns of the temporary staging table used by --bulk, in COPY order
+STAGING_COLUMNS = [
+    'row_num', 'transaction_id', 'committee_id', 'transaction_type_id',
+    'transaction_date', 'amount', 'entity_id', 'subject_committee_id',
+    'is_for_benefit', 'category_id', 'memo', 'account_type', 'deleted',
+    'record_hash', 'create_error',
+]
+
+# SQL expression reproducing _generate_record_hash() for a stored transaction:
+# sha256 of "committee_id|YYYY-MM-DD|amount|entity_id". Used for rows imported
+# before record_hash was stored and to hash the values an upsert writes.
+STORED_HASH_SQL = """
+    encode(sha256(convert_to(
+        COALESCE({t}.committee_id::text, 'None') || '|' ||
+        COALESCE(to_char({t}.transaction_date, 'YYYY-MM-DD'), 'None') || '|' ||
+        COALESCE({t}.amount::text, 'None') || '|' ||
+        COALESCE({t}.entity_id::text, 'None'),
+    'UTF8')), 'hex')
+"""
+
+
 class Command(BaseCommand):
     help = 'Import campaign finance data from CSV with duplicate detection'
 
@@ -40,7 +89,40 @@ class Command(BaseCommand):
             '--batch-size',
             type=int,
             default=1000,
-            help='Number of records to process in each batch'
+            help='Number of records to process in each batch (rows per COPY chunk with --bulk)'
+        )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Load through a COPY staging table and a set-based upsert'
+        )
+        parser.add_argument(
+            '--bulk-load',
+            action='store_true',
+            help='--bulk, with the secondary indexes of "Transactions" dropped and rebuilt for large files'
+        )
+        parser.add_argument(
+            '--bulk-load-threshold',
+            type=int,
+            default=bulk_load.DEFAULT_THRESHOLD,
+            help=f'Rows from which --bulk-load suspends the indexes (default: {bulk_load.DEFAULT_THRESHOLD})'
+        )
+        parser.add_argument(
+            '--index-workers',
+            type=int,
+            default=4,
+            help='Indexes rebuilt in parallel after --bulk-load (default: 4)'
+        )
+        parser.add_argument(
+            '--maintenance-work-mem',
+            type=int,
+            default=1024,
+            help='maintenance_work_mem in MB shared by the index rebuilds (default: 1024)'
+        )
+        parser.add_argument(
+            '--no-warm',
+            action='store_true',
+            help='Skip the cache warm-up after the import'
         )
 
     def handle(self, *args, **options):
@@ -60,6 +142,32 @@ class Command(BaseCommand):
         if dry_run:
             self.stdout.write(self.style.WARNING('DRY RUN MODE - No changes will be saved'))
 
+        with connection.cursor() as cursor:
+            suspended = [index for index in bulk_load.suspended(cursor) if index.parent is None]
+        if suspended and not options['bulk_load']:
+            self.stdout.write(self.style.WARNING(
+                f'{len(suspended)} indexes on "Transactions" are suspended by an earlier '
+                f'--bulk-load (run transaction_indexes --restore)'
+            ))
+
+        bulk = options['bulk'] or options['bulk_load']
+        batch = ImportBatch.objects.create(
+            source=source,
+            file_name=Path(csv_file).name,
+            bulk=bulk,
+        )
+
+        if bulk:
+            if options['bulk_load'] and not dry_run:
+                stats, row_num = self._bulk_load(csv_file, batch, batch_size, options)
+            else:
+                stats, row_num = self._bulk_import(csv_file, batch, dry_run, batch_size)
+            self._finish_batch(batch, stats, row_num, dry_run)
+            self._print_summary(stats, row_num)
+            if not dry_run and not options['no_warm']:
+                after_refresh(self.stdout)
+            return
+
         stats = {
             'created': 0,
             'updated': 0,
@@ -69,36 +177,166 @@ class Command(BaseCommand):
         }
 
         try:
-            with open(csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-
+            with self._open_rows(csv_file) as (fieldnames, reader):
                 # Validate CSV headers
-                self._validate_headers(reader.fieldnames)
+                self._validate_headers(fieldnames)
 
-                batch = []
                 row_num = 0
+                transaction_ids = self._scan_transaction_ids(csv_file)
 
                 with transaction.atomic():
-                    for row in reader:
-                        row_num += 1
+                    with track_transaction_changes(
+                        'SELECT unnest(%s::integer[])', [transaction_ids]
+                    ):
+                        for row in reader:
+                            row_num += 1
+
+                            try:
+                                result = self._process_row(row, batch)
+                                stats[result] += 1
+
+                                # Progress indicator
+                                if row_num % 100 == 0:
+                                    self.stdout.write(f'Processed {row_num} rows...', ending='\r')
+
+                            except Exception as e:
+                                stats['errors'] += 1
+                                error_msg = f"Row {row_num}: {str(e)}"
+                                stats['error_details'].append(error_msg)
+
+                                if stats['errors'] <= 10:  # Only show first 10 errors
+                                    self.stdout.write(
+                                        self.style.ERROR(error_msg)
+                                    )
+
+                    if dry_run:
+                        transaction.set_rollback(True)
+                        self.stdout.write(
+                            self.style.WARNING('\nDRY RUN - Rolling back all changes')
+                        )
+
+        except Exception as e:
+            batch.delete()
+            raise CommandError(f'Import failed: {str(e)}')
+
+        self._finish_batch(batch, stats, row_num, dry_run)
 
-                        try:
-                            result = self._process_row(row, source)
-                            stats[result] += 1
+        # Print summary
+        self._print_summary(stats, row_num)
+
+        # The import moved the data version: recompute the hot pages
+        if not dry_run and not options['no_warm']:
+            after_refresh(self.stdout)
+
+    @contextmanager
+    def _open_rows(self, path):
+        """
+        Yield (fieldnames, rows) for a CSV, Parquet or Arrow IPC file.
+
+        Columnar rows keep their types (int ids, date, Decimal amount), which
+        the parsing helpers below pass through unchanged.
+        """
+        if Path(path).suffix.lower() not in ARROW_SUFFIXES:
+            with open(path, 'r', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                yield reader.fieldnames or [], reader
+            return
+
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise CommandError('Parquet/Arrow input requires pyarrow (pip install pyarrow)')
+
+        if Path(path).suffix.lower() == '.parquet':
+            source = pq.ParquetFile(path)
+            fieldnames = source.schema_arrow.names
+            batches = source.iter_batches()
+        else:
+            source = pa.ipc.open_file(path)
+            fieldnames = source.schema.names
+            batches = (source.get_batch(i) for i in range(source.num_record_batches))
 
-                            # Progress indicator
-                            if row_num % 100 == 0:
-                                self.stdout.write(f'Processed {row_num} rows...', ending='\r')
+        def rows():
+            for batch in batches:
+                yield from batch.to_pylist()
 
-                        except Exception as e:
-                            stats['errors'] += 1
-                            error_msg = f"Row {row_num}: {str(e)}"
-                            stats['error_details'].append(error_msg)
+        yield fieldnames, rows()
 
-                            if stats['errors'] <= 10:  # Only show first 10 errors
-                                self.stdout.write(
-                                    self.style.ERROR(error_msg)
-                                )
+    # ==================== BULK (COPY) PATH ====================
+
+    def _bulk_import(self, csv_file, batch, dry_run, batch_size):
+        """
+        Import through a COPY-loaded staging table.
+
+        First occurrences of each transaction_id are staged and classified in
+        SQL exactly like _process_row would classify them; repeated ids later in
+        the file depend on the state left by earlier rows, so they are replayed
+        through _process_row afterwards, in file order.
+        """
+        stats = {
+            'created': 0,
+            'updated': 0,
+            'skipped': 0,
+            'errors': 0,
+            'error_details': []
+        }
+        batch_size = max(batch_size, 1)
+        row_num = 0
+        seen_ids = set()
+        repeated_rows = []
+        start = time.time()
+
+        try:
+            with self._open_rows(csv_file) as (fieldnames, reader):
+                self._validate_headers(fieldnames)
+
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        self._create_staging_table(cursor)
+
+                        buffer = io.StringIO()
+                        writer = csv.writer(buffer)
+                        buffered = 0
+
+                        for row in reader:
+                            row_num += 1
+                            try:
+                                staged = self._stage_row(row_num, row)
+                            except Exception as e:
+                                self._record_error(stats, f"Row {row_num}: {str(e)}")
+                                continue
+
+                            transaction_id = staged[1]
+                            if transaction_id in seen_ids:
+                                repeated_rows.append((row_num, row))
+                                continue
+                            seen_ids.add(transaction_id)
+
+                            writer.writerow(staged)
+                            buffered += 1
+                            if buffered >= batch_size:
+                                self._copy_buffer(cursor, buffer)
+                                buffer = io.StringIO()
+                                writer = csv.writer(buffer)
+                                buffered = 0
+                                self.stdout.write(f'Staged {row_num} rows...', ending='\r')
+
+                        if buffered:
+                            self._copy_buffer(cursor, buffer)
+
+                    # Every transaction the file touches has its id in the staging table
+                    with track_transaction_changes('SELECT transaction_id FROM import_staging'):
+                        with connection.cursor() as cursor:
+                            self._apply_staging(cursor, stats, batch)
+
+                        # Repeated transaction_ids see the state left by earlier rows
+                        for dup_row_num, row in repeated_rows:
+                            try:
+                                result = self._process_row(row, batch)
+                                stats[result] += 1
+                            except Exception as e:
+                                self._record_error(stats, f"Row {dup_row_num}: {str(e)}")
 
                     if dry_run:
                         transaction.set_rollback(True)
@@ -106,11 +344,296 @@ class Command(BaseCommand):
                             self.style.WARNING('\nDRY RUN - Rolling back all changes')
                         )
 
+        except CommandError:
+            batch.delete()
+            raise
         except Exception as e:
+            batch.delete()
             raise CommandError(f'Import failed: {str(e)}')
 
-        # Print summary
-        self._print_summary(stats, row_num)
+        elapsed = time.time() - start
+        rate = row_num / elapsed if elapsed > 0 else 0
+        self.stdout.write(f'\nBulk load: {row_num:,} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)')
+        if repeated_rows:
+            self.stdout.write(f'Repeated transaction_ids replayed row-by-row: {len(repeated_rows):,}')
+
+        return stats, row_num
+
+    def _bulk_load(self, csv_file, batch, batch_size, options):
+        """
+        _bulk_import() with the secondary indexes of "Transactions" suspended.
+
+        Below --bulk-load-threshold rows the indexes stay. Indexes left in
+        the manifest by an earlier run are rebuilt either way, also when the
+        load fails.
+        """
+        with self._open_rows(csv_file) as (fieldnames, reader):
+            total_rows = sum(1 for _ in reader)
+
+        with connection.cursor() as cursor:
+            leftover = bulk_load.suspended(cursor)
+        threshold = options['bulk_load_threshold']
+        suspend = total_rows >= threshold
+        if suspend:
+            # Per-row index maintenance cost: the same insert with and without the indexes
+            probe_rows, with_indexes = bulk_load.probe_insert()
+            suspend_start = time.time()
+            indexes = bulk_load.suspend_indexes(batch.batch_id)
+            suspend_seconds = time.time() - suspend_start
+            _, without_indexes = bulk_load.probe_insert()
+            self.stdout.write(
+                f'Suspended {len(indexes)} indexes on "Transactions" '
+                f'({sum(i.bytes for i in indexes) / 1024 / 1024:,.1f}MB) for {total_rows:,} rows'
+            )
+        else:
+            self.stdout.write(
+                f'{total_rows:,} rows is below --bulk-load-threshold ({threshold:,}): indexes kept'
+            )
+
+        load_start = time.time()
+        try:
+            stats, row_num = self._bulk_import(csv_file, batch, False, batch_size)
+        finally:
+            load_seconds = time.time() - load_start
+            if suspend or leftover:
+                self.stdout.write('\nRebuilding indexes...')
+                rebuild_start = time.time()
+                try:
+                    built = bulk_load.rebuild_indexes(
+                        workers=options['index_workers'],
+                        maintenance_work_mem_mb=options['maintenance_work_mem'],
+                        progress=lambda name, seconds: self.stdout.write(f'  index {name} ({seconds:.1f}s)'),
+                    )
+                except ValueError as e:
+                    raise CommandError(str(e))
+                rebuild_seconds = time.time() - rebuild_start
+                self.stdout.write(f'Rebuilt {len(built)} indexes in {rebuild_seconds:.1f}s')
+
+        if suspend and probe_rows:
+            written = stats['created'] + stats['updated']
+            per_row = max(with_indexes - without_indexes, 0) / probe_rows
+            in_place = load_seconds + per_row * written
+            actual = suspend_seconds + load_seconds + rebuild_seconds
+            self.stdout.write(
+                f'Index maintenance: {per_row * 1e6:,.1f}us per row written '
+                f'(rolled-back insert of {probe_rows:,} rows)'
+            )
+            self.stdout.write(
+                f'Bulk-load: {actual:.1f}s (load {load_seconds:.1f}s, rebuild {rebuild_seconds:.1f}s); '
+                f'in place (est.): {in_place:.1f}s for {written:,} rows written'
+            )
+            if in_place >= actual:
+                self.stdout.write(self.style.SUCCESS(f'Time saved: {in_place - actual:.1f}s'))
+            else:
+                self.stdout.write(self.style.WARNING(
+                    f'Suspending the indexes cost {actual - in_place:.1f}s more than loading in place '
+                    f'(consider a higher --bulk-load-threshold)'
+                ))
+
+        return stats, row_num
+
+    def _create_staging_table(self, cursor):
+        """Create the per-transaction staging table (dropped on commit)"""
+        # Inside an outer transaction an earlier import's tables are still there
+        cursor.execute("DROP TABLE IF EXISTS import_staging, import_plan, import_rows")
+        cursor.execute("""
+            CREATE TEMP TABLE import_staging (
+                row_num integer NOT NULL,
+                transaction_id integer NOT NULL,
+                committee_id integer,
+                transaction_type_id integer,
+                transaction_date date NOT NULL,
+                amount numeric(12, 2) NOT NULL,
+                entity_id integer,
+                subject_committee_id integer,
+                is_for_benefit boolean,
+                category_id integer,
+                memo text NOT NULL,
+                account_type text NOT NULL,
+                deleted boolean NOT NULL,
+                record_hash char(64) NOT NULL,
+                create_error text
+            ) ON COMMIT DROP
+        """)
+
+    def _stage_row(self, row_num, row):
+        """
+        Convert a CSV row into a staging tuple.
+
+        Raises for values the row path can never store (id, date, amount).
+        Values only needed when creating a transaction are validated lazily:
+        their error is kept in create_error and only counts if the
+        transaction turns out not to exist yet.
+        """
+        transaction_id = int(row['transaction_id'])
+        transaction_date = self._parse_date(row['transaction_date'])
+        if transaction_date is None:
+            raise ValueError('transaction_date is required')
+        amount = Decimal(row['amount'])
+
+        create_error = ''
+        ids = {}
+        for field in ('committee_id', 'transaction_type_id', 'entity_id'):
+            try:
+                ids[field] = int(row[field])
+            except (ValueError, TypeError) as e:
+                ids[field] = None
+                create_error = create_error or str(e)
+
+        is_for_benefit = self._get_bool_or_none(row.get('is_for_benefit'))
+
+        return [
+            row_num,
+            transaction_id,
+            ids['committee_id'],
+            ids['transaction_type_id'],
+            transaction_date.isoformat(),
+            amount,
+            ids['entity_id'],
+            self._get_int_or_none(row.get('subject_committee_id')),
+            '' if is_for_benefit is None else ('t' if is_for_benefit else 'f'),
+            self._get_int_or_none(row.get('category_id')),
+            row.get('memo', '') or '',
+            row.get('account_type', '') or '',
+            't' if row.get('deleted', '0') == '1' else 'f',
+            self._generate_record_hash(row),
+            create_error,
+        ]
+
+    def _copy_buffer(self, cursor, buffer):
+        """Stream one CSV chunk into the staging table"""
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY import_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN "
+            f"WITH (FORMAT csv, FORCE_NOT_NULL (memo, account_type, record_hash))",
+            buffer
+        )
+
+    def _apply_staging(self, cursor, stats, batch):
+        """Classify staged rows against Transactions and upsert in one statement"""
+        cursor.execute("ANALYZE import_staging")
+
+        # Anti-join on the stored hash: only rows whose natural key changed
+        # are written. Rows imported before record_hash existed are hashed on
+        # the fly.
+        cursor.execute(f"""
+            CREATE TEMP TABLE import_plan ON COMMIT DROP AS
+            SELECT
+                s.*,
+                CASE
+                    WHEN t.transaction_id IS NULL AND s.create_error IS NOT NULL THEN 'error'
+                    WHEN t.transaction_id IS NULL THEN 'created'
+                    WHEN s.record_hash = COALESCE(
+                        NULLIF(t.record_hash, ''), {STORED_HASH_SQL.format(t='t')}
+                    ) THEN 'skipped'
+                    ELSE 'updated'
+                END AS outcome
+            FROM import_staging s
+            LEFT JOIN "Transactions" t ON t.transaction_id = s.transaction_id
+        """)
+
+        cursor.execute("SELECT outcome, COUNT(*) FROM import_plan GROUP BY outcome")
+        for outcome, count in cursor.fetchall():
+            if outcome == 'error':
+                continue
+            stats[outcome] += count
+
+        cursor.execute("""
+            SELECT row_num, create_error FROM import_plan
+            WHERE outcome = 'error' ORDER BY row_num
+        """)
+        for error_row_num, message in cursor.fetchall():
+            self._record_error(stats, f"Row {error_row_num}: {message}")
+
+        # Columns the row path never updates keep their stored values, so
+        # updated rows take them from the existing transaction. The stored
+        # hash is recomputed from the values actually written. Updates and
+        # inserts are separate statements rather than ON CONFLICT
+        # (transaction_id): a partitioned "Transactions" (partition_transactions)
+        # has no unique index on transaction_id alone.
+        cursor.execute(f"""
+            CREATE TEMP TABLE import_rows ON COMMIT DROP AS
+            SELECT v.*, {STORED_HASH_SQL.format(t='v')} AS record_hash
+            FROM (
+                SELECT
+                    p.transaction_id,
+                    COALESCE(t.committee_id, p.committee_id) AS committee_id,
+                    COALESCE(t.transaction_type_id, p.transaction_type_id) AS transaction_type_id,
+                    p.transaction_date,
+                    p.amount,
+                    COALESCE(t.entity_id, p.entity_id) AS entity_id,
+                    CASE WHEN t.transaction_id IS NULL THEN p.subject_committee_id ELSE t.subject_committee_id END AS subject_committee_id,
+                    CASE WHEN t.transaction_id IS NULL THEN p.is_for_benefit ELSE t.is_for_benefit END AS is_for_benefit,
+                    CASE WHEN t.transaction_id IS NULL THEN p.category_id ELSE t.category_id END AS category_id,
+                    p.memo,
+                    CASE WHEN t.transaction_id IS NULL THEN p.account_type ELSE t.account_type END AS account_type,
+                    p.deleted,
+                    t.transaction_id IS NOT NULL AS existing
+                FROM import_plan p
+                LEFT JOIN "Transactions" t ON t.transaction_id = p.transaction_id
+                WHERE p.outcome IN ('created', 'updated')
+            ) v
+        """)
+        cursor.execute("""
+            UPDATE "Transactions" t SET
+                amount = r.amount,
+                transaction_date = r.transaction_date,
+                memo = r.memo,
+                deleted = r.deleted,
+                record_hash = r.record_hash,
+                import_batch_id = %s
+            FROM import_rows r
+            WHERE r.existing
+              AND t.transaction_id = r.transaction_id
+              AND (t.record_hash IS DISTINCT FROM r.record_hash
+                   OR t.memo IS DISTINCT FROM r.memo
+                   OR t.deleted IS DISTINCT FROM r.deleted)
+        """, [batch.batch_id])
+        cursor.execute("""
+            INSERT INTO "Transactions" (
+                transaction_id, committee_id, transaction_type_id, transaction_date,
+                amount, entity_id, subject_committee_id, is_for_benefit,
+                category_id, memo, account_type, deleted, record_hash, import_batch_id
+            )
+            SELECT
+                transaction_id, committee_id, transaction_type_id, transaction_date,
+                amount, entity_id, subject_committee_id, is_for_benefit,
+                category_id, memo, account_type, deleted, record_hash, %s
+            FROM import_rows
+            WHERE NOT existing
+        """, [batch.batch_id])
+
+    def _finish_batch(self, batch, stats, total_rows, dry_run):
+        """Record final statistics on the import batch (dropped on dry runs)"""
+        if dry_run:
+            batch.delete()
+            return
+        batch.completed_at = timezone.now()
+        batch.rows_total = total_rows
+        batch.rows_created = stats['created']
+        batch.rows_updated = stats['updated']
+        batch.rows_skipped = stats['skipped']
+        batch.rows_errored = stats['errors']
+        batch.save()
+
+    def _record_error(self, stats, error_msg):
+        """Count an error and echo the first few"""
+        stats['errors'] += 1
+        stats['error_details'].append(error_msg)
+        if stats['errors'] <= 10:  # Only show first 10 errors
+            self.stdout.write(self.style.ERROR(error_msg))
+
+    # ==================== ROW-BY-ROW PATH ====================
+
+    def _scan_transaction_ids(self, csv_file):
+        """Collect the file's transaction ids so aggregate deltas can snapshot them"""
+        ids = set()
+        with self._open_rows(csv_file) as (fieldnames, reader):
+            for row in reader:
+                transaction_id = self._get_int_or_none(row.get('transaction_id'))
+                if transaction_id is not None:
+                    ids.add(transaction_id)
+        return list(ids)
 
     def _validate_headers(self, headers):
         """Validate that CSV has required columns"""
@@ -125,7 +648,7 @@ class Command(BaseCommand):
                 f'Missing required columns: {", ".join(missing)}'
             )
 
-    def _process_row(self, row, source):
+    def _process_row(self, row, batch):
         """
         Process a single CSV row and create/update transaction.
         Returns: 'created', 'updated', or 'skipped'
@@ -137,41 +660,71 @@ class Command(BaseCommand):
         try:
             existing_txn = Transaction.objects.get(transaction_id=int(row['transaction_id']))
 
-            # Check if data has changed using hash
-            current_hash = self._generate_record_hash({
-                'committee_id': existing_txn.committee_id,
-                'transaction_type_id': existing_txn.transaction_type_id,
-                'transaction_date': existing_txn.transaction_date.strftime('%Y-%m-%d'),
-                'amount': str(existing_txn.amount),
-                'entity_id': existing_txn.entity_id,
-            })
+            # Check if data has changed using the stored hash
+            current_hash = existing_txn.record_hash or self._stored_record_hash(existing_txn)
 
             if current_hash == record_hash:
                 return 'skipped'  # No changes
             else:
                 # Update existing transaction
-                self._update_transaction(existing_txn, row, source)
+                self._update_transaction(existing_txn, row, batch)
                 return 'updated'
 
         except Transaction.DoesNotExist:
             # Create new transaction
-            self._create_transaction(row, source, record_hash)
+            self._create_transaction(row, batch, record_hash)
             return 'created'
 
     def _generate_record_hash(self, row):
         """
         Generate SHA256 hash from transaction natural key.
         Natural key: committee_id + transaction_date + amount + entity_id
+
+        Values are normalized the way PostgreSQL stores them (ISO date, amount
+        with two decimals) so "100" and "100.00" hash the same and the hash
+        can be compared with record_hash or recomputed in SQL.
         """
         natural_key = (
-            f"{row['committee_id']}|"
-            f"{row['transaction_date']}|"
-            f"{row['amount']}|"
-            f"{row['entity_id']}"
+            f"{self._normalize_key_int(row['committee_id'])}|"
+            f"{self._normalize_key_date(row['transaction_date'])}|"
+            f"{self._normalize_key_amount(row['amount'])}|"
+            f"{self._normalize_key_int(row['entity_id'])}"
         )
         return hashlib.sha256(natural_key.encode()).hexdigest()
 
-    def _create_transaction(self, row, source, record_hash):
+    def _stored_record_hash(self, txn):
+        """Hash of a stored transaction, for rows imported before record_hash existed"""
+        return self._generate_record_hash({
+            'committee_id': txn.committee_id,
+            'transaction_date': txn.transaction_date,
+            'amount': txn.amount,
+            'entity_id': txn.entity_id,
+        })
+
+    def _normalize_key_int(self, value):
+        try:
+            return str(int(value))
+        except (ValueError, TypeError):
+            return str(value)
+
+    def _normalize_key_date(self, value):
+        if hasattr(value, 'strftime'):
+            return value.strftime('%Y-%m-%d')
+        try:
+            parsed = self._parse_date(value)
+        except ValueError:
+            parsed = None
+        return parsed.strftime('%Y-%m-%d') if parsed else str(value)
+
+    def _normalize_key_amount(self, value):
+        try:
+            # numeric(12, 2) rounds half away from zero; "+ 0" drops negative zero
+            amount = Decimal(str(value)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            return str(amount + 0)
+        except (InvalidOperation, ValueError):
+            return str(value)
+
+    def _create_transaction(self, row, batch, record_hash):
         """Create new transaction from CSV row"""
         Transaction.objects.create(
             transaction_id=int(row['transaction_id']),
@@ -186,21 +739,27 @@ class Command(BaseCommand):
             memo=row.get('memo', ''),
             account_type=row.get('account_type', ''),
             deleted=row.get('deleted', '0') == '1',
-            # Note: record_hash and source fields need to be added to model
+            record_hash=record_hash,
+            import_batch=batch,
         )
 
-    def _update_transaction(self, transaction, row, source):
+    def _update_transaction(self, transaction, row, batch):
         """Update existing transaction with new data"""
         transaction.amount = Decimal(row['amount'])
         transaction.transaction_date = self._parse_date(row['transaction_date'])
         transaction.memo = row.get('memo', '')
         transaction.deleted = row.get('deleted', '0') == '1'
+        # Committee and entity are not updated, so hash the values as stored
+        transaction.record_hash = self._stored_record_hash(transaction)
+        transaction.import_batch = batch
         transaction.save()
 
     def _parse_date(self, date_str):
         """Parse date string to date object"""
         if not date_str:
             return None
+        if hasattr(date_str, 'year'):  # Already a date (columnar input)
+            return date_str
 
         # Try common date formats
         formats = ['%Y-%m-%d', '%m/%d/%Y', '%Y/%m/%d', '%m-%d-%Y']
@@ -0,0 +1,115 @@
+"""
+Django management command to manage the incrementally maintained dashboard
+aggregates (see transparency/services/incremental_aggregates.py).
+
+Once built, import_csv, deduplicate_transactions, fix_subject_committee and
+entity merges keep the summary tables current from the rows they touch.
+--install-views swaps the dashboard materialized views for plain views over
+the summary tables, after which refresh_dashboard_views skips them.
+
+Usage:
+    python manage.py incremental_aggregates                    # Show status
+    python manage.py incremental_aggregates --rebuild          # Full recompute
+    python manage.py incremental_aggregates --rebuild --install-views
+    python manage.py incremental_aggregates --check            # Compare with full recompute
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from transparency.services.incremental_aggregates import (
+    SUMMARY_TABLES, INCREMENTAL_VIEWS, aggregates_built, rebuild,
+    check_consistency, install_views,
+)
+
+
+class Command(BaseCommand):
+    help = 'Build, check and install the incrementally maintained dashboard aggregates'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recompute the summary tables from "Transactions"'
+        )
+        parser.add_argument(
+            '--install-views',
+            action='store_true',
+            help='Replace the dashboard materialized views with views over the summary tables'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Compare the summary tables with a full recompute'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('=' * 70)
+        self.stdout.write('INCREMENTAL DASHBOARD AGGREGATES')
+        self.stdout.write('=' * 70)
+
+        if options['rebuild']:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    elapsed = rebuild(cursor)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt summary tables in {elapsed:.2f}s'))
+
+        with connection.cursor() as cursor:
+            built = aggregates_built(cursor)
+
+        if not built and (options['install_views'] or options['check']):
+            raise CommandError('Summary tables have not been built; run with --rebuild first')
+
+        if options['install_views']:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    install_views(cursor)
+            self.stdout.write(self.style.SUCCESS(
+                f'Installed views: {", ".join(INCREMENTAL_VIEWS)}'
+            ))
+
+        if options['check']:
+            self._check()
+        else:
+            self._status()
+
+        self.stdout.write('=' * 70)
+
+    def _status(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT built_at, updated_at FROM agg_state WHERE id = 1')
+            row = cursor.fetchone()
+            self.stdout.write(f'Built:        {row[0] if row else "never"}')
+            self.stdout.write(f'Last delta:   {row[1] if row else "never"}')
+
+            for table in SUMMARY_TABLES:
+                cursor.execute(f'SELECT COUNT(*) FROM {table}')
+                self.stdout.write(f'  {table:<28} {cursor.fetchone()[0]:>10,} rows')
+
+            cursor.execute(
+                "SELECT relname, relkind FROM pg_class WHERE relname = ANY(%s) ORDER BY relname",
+                [INCREMENTAL_VIEWS]
+            )
+            kinds = {'m': 'materialized view', 'v': 'view (incremental)'}
+            for name, kind in cursor.fetchall():
+                self.stdout.write(f'  {name:<32} {kinds.get(kind, kind)}')
+
+    def _check(self):
+        with connection.cursor() as cursor:
+            report = check_consistency(cursor)
+
+        total = 0
+        for table, result in report.items():
+            total += result['mismatches']
+            if result['mismatches']:
+                self.stdout.write(self.style.ERROR(
+                    f'{table}: {result["mismatches"]} mismatched rows'
+                ))
+                for row in result['sample']:
+                    self.stdout.write(f'    {row}')
+            else:
+                self.stdout.write(self.style.SUCCESS(f'{table}: consistent'))
+
+        if total:
+            raise CommandError(
+                f'{total} mismatched rows; run with --rebuild to recompute'
+            )
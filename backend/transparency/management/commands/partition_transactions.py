@@ -0,0 +1,270 @@
+"""
+Django management command to range-partition "Transactions" by election cycle.
+
+Without options it shows the layout: whether "Transactions" is partitioned,
+its partitions with row estimates and sizes, archived cycles, and the state
+of a conversion in progress.
+
+--convert turns the plain table into a partitioned one while it stays in use
+(see transparency/services/partitioning.py): rows are copied in batches with
+progress, indexes and foreign keys are rebuilt, changes made meanwhile are
+replayed, the tables are swapped in one short ACCESS EXCLUSIVE transaction,
+and the materialized views reading "Transactions" are refreshed. An interrupted conversion resumes where it
+stopped. The old table is kept as transactions_unpartitioned until
+--drop-old.
+
+After adding a cycle, --sync creates its partition. --detach moves an old
+cycle's partition into the archive schema (out of every query and summary);
+--attach brings it back.
+
+Usage:
+    python manage.py partition_transactions
+    python manage.py partition_transactions --convert --batch-size 100000 --verify
+    python manage.py partition_transactions --drop-old
+    python manage.py partition_transactions --sync
+    python manage.py partition_transactions --detach 1
+    python manage.py partition_transactions --attach 1 --archive-schema archive
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from transparency.services import bulk_load, partitioning
+from transparency.utils.data_version import bump_data_version
+import time
+
+
+class Command(BaseCommand):
+    help = 'Range-partition "Transactions" by election cycle; archive old cycles'
+
+    def add_arguments(self, parser):
+        action = parser.add_mutually_exclusive_group()
+        action.add_argument(
+            '--convert',
+            action='store_true',
+            help='Convert "Transactions" to a partitioned table online'
+        )
+        action.add_argument(
+            '--drop-old',
+            action='store_true',
+            help='Drop the unpartitioned table kept by --convert'
+        )
+        action.add_argument(
+            '--sync',
+            action='store_true',
+            help='Create partitions for cycles that have none'
+        )
+        action.add_argument(
+            '--detach',
+            type=int,
+            metavar='CYCLE_ID',
+            help="Move a cycle's partition into the archive schema"
+        )
+        action.add_argument(
+            '--attach',
+            type=int,
+            metavar='CYCLE_ID',
+            help="Move an archived cycle's partition back into \"Transactions\""
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50000,
+            help='Rows copied or replayed per batch during --convert (default: 50000)'
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='With --convert, compare row checksums before swapping (reads both tables)'
+        )
+        parser.add_argument(
+            '--archive-schema',
+            default='archive',
+            help='Schema holding detached cycle partitions (default: archive)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('=' * 70)
+        self.stdout.write('TRANSACTIONS PARTITIONING')
+        self.stdout.write('=' * 70)
+
+        try:
+            if options['convert']:
+                self.convert(options['batch_size'], options['verify'])
+            elif options['drop_old']:
+                self.drop_old()
+            elif options['sync']:
+                self.sync(options['archive_schema'])
+            elif options['detach'] is not None:
+                rows = partitioning.detach_cycle(options['detach'], options['archive_schema'])
+                self.stdout.write(self.style.SUCCESS(
+                    f'Detached cycle {options["detach"]} ({rows:,} rows) into {options["archive_schema"]}'
+                ))
+            elif options['attach'] is not None:
+                rows = partitioning.attach_cycle(options['attach'], options['archive_schema'])
+                self.stdout.write(self.style.SUCCESS(
+                    f'Attached cycle {options["attach"]} ({rows:,} rows)'
+                ))
+            else:
+                self.show(options['archive_schema'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+    # ==================== STATUS ====================
+
+    def show(self, archive_schema):
+        with connection.cursor() as cursor:
+            status = partitioning.conversion_status(cursor)
+            ranges = partitioning.cycle_ranges(cursor)
+            current = partitioning.partitions(cursor) if status['partitioned'] else []
+            archive = partitioning.archived(cursor, archive_schema)
+
+        if not status['partitioned']:
+            self.stdout.write('"Transactions" is not partitioned. --convert would create:')
+            for r in ranges:
+                self.stdout.write(
+                    f'  {partitioning.partition_name(r.cycle_id):<24} {r.name:<12} {r.start} .. {r.end}'
+                )
+            self.stdout.write(f'  {partitioning.DEFAULT_PARTITION:<24} dates outside every cycle')
+        else:
+            self.stdout.write(f'{"Partition":<26} {"Rows (est.)":>14} {"Size":>10}  Bounds')
+            for p in current:
+                self.stdout.write(f'  {p.name:<24} {p.rows:>14,} {p.bytes / 1024 / 1024:>8.1f}MB  {p.bounds}')
+            missing = [
+                r for r in ranges
+                if partitioning.partition_name(r.cycle_id) not in {p.name for p in current}
+                and partitioning.partition_name(r.cycle_id) not in {p.name for p in archive}
+            ]
+            if missing:
+                self.stdout.write(self.style.WARNING(
+                    f'Cycles without a partition: {", ".join(r.name for r in missing)} (run --sync)'
+                ))
+
+        if archive:
+            self.stdout.write(f'\nArchived in {archive_schema}:')
+            for p in archive:
+                self.stdout.write(f'  {p.name:<24} {p.rows:>14,} {p.bytes / 1024 / 1024:>8.1f}MB')
+        if status['converting']:
+            self.stdout.write(
+                f'\nConversion in progress: {status["copied"]:,} rows copied, '
+                f'{status["pending_changes"] or 0:,} changes to replay (run --convert to resume)'
+            )
+        if status['old_table']:
+            self.stdout.write(f'\n{partitioning.OLD} is still present (run --drop-old)')
+
+    # ==================== CONVERSION ====================
+
+    def convert(self, batch_size, verify):
+        start = time.time()
+
+        # The partitioned copy is built with the indexes "Transactions" has now
+        with connection.cursor() as cursor:
+            if bulk_load.suspended(cursor):
+                raise ValueError(
+                    'Indexes on "Transactions" are suspended by import_csv --bulk-load; '
+                    'run transaction_indexes --restore first'
+                )
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            created = partitioning.prepare(cursor)
+        for name in created:
+            self.stdout.write(f'  created {name}')
+
+        # Copy in id order; each batch commits, so an interruption resumes here
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM "Transactions"')
+            total = cursor.fetchone()[0]
+            last_id = partitioning.copied_through(cursor)
+            cursor.execute(f'SELECT COUNT(*) FROM {partitioning.SHADOW}')
+            copied = cursor.fetchone()[0]
+        if copied:
+            self.stdout.write(f'  resuming after transaction_id {last_id} ({copied:,} rows copied)')
+
+        copy_start = time.time()
+        copied_now = 0
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                rows, batch_last = partitioning.copy_batch(cursor, last_id, batch_size)
+            if not rows:
+                break
+            last_id = batch_last
+            copied += rows
+            copied_now += rows
+            elapsed = time.time() - copy_start
+            rate = copied_now / elapsed if elapsed > 0 else 0
+            self.stdout.write(
+                f'  Copied {copied:,}/{total:,} '
+                f'({copied / max(total, 1) * 100:.1f}%, {rate:,.0f} rows/s)'
+            )
+
+        # Indexes first: each catch-up pass looks the changed ids up in the copy
+        self.stdout.write('\nBuilding primary key, indexes and foreign keys...')
+        with connection.cursor() as cursor:
+            partitioning.add_primary_key(cursor)
+            skipped = partitioning.build_indexes(
+                cursor, progress=lambda name: self.stdout.write(f'  index {name}')
+            )
+            dropped = partitioning.add_foreign_keys(cursor)
+        for name in skipped:
+            self.stdout.write(self.style.WARNING(f'  skipped unique index {name} (no partition key)'))
+        for name in dropped:
+            self.stdout.write(self.style.WARNING(f'  dropped self-referencing foreign key {name}'))
+
+        self.replay(batch_size)
+
+        self.stdout.write('\nBuilding materialized views over the partitioned table...')
+        with connection.cursor() as cursor:
+            partitioning.build_materialized_views(
+                cursor, progress=lambda name: self.stdout.write(f'  {name}')
+            )
+
+        self.replay(batch_size)
+
+        self.stdout.write('\nSwapping tables...')
+        swap_start = time.time()
+        with transaction.atomic(), connection.cursor() as cursor:
+            rows = partitioning.swap(cursor, batch_size, verify=verify)
+            bump_data_version(cursor)
+        self.stdout.write(f'  swapped {rows:,} rows (locked for {time.time() - swap_start:.1f}s)')
+
+        # The views were built before the last catch-ups
+        self.stdout.write('\nRefreshing materialized views...')
+        with transaction.atomic(), connection.cursor() as cursor:
+            partitioning.refresh_materialized_views(
+                cursor, progress=lambda name: self.stdout.write(f'  {name}')
+            )
+
+        self.stdout.write('=' * 70)
+        self.stdout.write(self.style.SUCCESS(
+            f'"Transactions" partitioned in {time.time() - start:.1f}s; '
+            f'{partitioning.OLD} kept until --drop-old'
+        ))
+
+    def replay(self, batch_size):
+        """Replay logged changes until one batch covers what is left"""
+        replayed = 0
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                ids = partitioning.catch_up(cursor, batch_size)
+            replayed += ids
+            if ids < batch_size:
+                break
+        if replayed:
+            self.stdout.write(f'  replayed {replayed:,} changed transactions')
+
+    # ==================== MAINTENANCE ====================
+
+    def drop_old(self):
+        with transaction.atomic(), connection.cursor() as cursor:
+            dropped = partitioning.drop_old(cursor)
+        if dropped:
+            self.stdout.write(self.style.SUCCESS(f'Dropped {partitioning.OLD}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Nothing to drop.'))
+
+    def sync(self, archive_schema):
+        created = partitioning.sync_partitions(archive_schema)
+        for name in created:
+            self.stdout.write(f'  created {name}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(created)} partitions' if created else 'Every cycle has a partition.'
+        ))
@@ -1,6 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.db import connection
-from django.core.cache import cache
+from transparency.services.cache_warmup import after_refresh
+from transparency.services.incremental_aggregates import refresh_materialized_view
+from transparency.utils.data_version import invalidate_tags
 import logging
 import time
 
@@ -9,6 +11,13 @@ logger = logging.getLogger(__name__)
 class Command(BaseCommand):
     help = 'Refresh all dashboard materialized views'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-warm',
+            action='store_true',
+            help='Skip the cache warm-up after the refresh'
+        )
+
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('Refreshing all dashboard materialized views...\n'))
 
@@ -38,7 +47,9 @@ class Command(BaseCommand):
                     start = time.time()
                     self.stdout.write(f'Refreshing {view}...', ending=' ')
                     try:
-                        cursor.execute(f'REFRESH MATERIALIZED VIEW CONCURRENTLY {view}')
+                        if not refresh_materialized_view(cursor, view, concurrently=True):
+                            self.stdout.write('Skipped (not a materialized view)')
+                            continue
                         elapsed = time.time() - start
                         self.stdout.write(self.style.SUCCESS(f'Done in {elapsed:.2f}s'))
                     except Exception as e:
@@ -49,19 +60,23 @@ class Command(BaseCommand):
                     start = time.time()
                     self.stdout.write(f'Refreshing {view}...', ending=' ')
                     try:
-                        cursor.execute(f'REFRESH MATERIALIZED VIEW {view}')
+                        if not refresh_materialized_view(cursor, view):
+                            self.stdout.write('Skipped (not a materialized view)')
+                            continue
                         elapsed = time.time() - start
                         self.stdout.write(self.style.SUCCESS(f'Done in {elapsed:.2f}s'))
                     except Exception as e:
                         self.stdout.write(self.style.ERROR(f'Error: {e}'))
 
-            # Clear Django cache
-            self.stdout.write('\n🗑️  Clearing Django cache...', ending=' ')
-            cache.delete('dashboard_summary_v1')
-            cache.delete('dashboard_charts_fast_v2')
-            cache.delete('dashboard_recent_exp_v1')
+            # Each refresh moved the data version; also drop the dashboard tag
+            # for the views that are no longer materialized
+            self.stdout.write('\n🗑️  Invalidating dashboard caches...', ending=' ')
+            invalidate_tags('dashboard')
             self.stdout.write(self.style.SUCCESS('Done'))
 
+            if not options['no_warm']:
+                after_refresh(self.stdout)
+
             total_elapsed = time.time() - total_start
             self.stdout.write(self.style.SUCCESS(f'\nAll views refreshed successfully in {total_elapsed:.2f}s!'))
             self.stdout.write(self.style.SUCCESS('Dashboard should now load instantly!'))
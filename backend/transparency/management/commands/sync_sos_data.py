@@ -18,6 +18,9 @@ Usage:
 
     # Import latest downloaded file
     python manage.py sync_sos_data --import-only
+
+    # Full-year load with the Transactions indexes suspended (import_csv --bulk-load)
+    python manage.py sync_sos_data --year 2024 --bulk-load
 """
 
 from django.core.management.base import BaseCommand, CommandError
@@ -70,6 +73,11 @@ class Command(BaseCommand):
             action='store_true',
             help='Show browser (useful for CAPTCHA solving)'
         )
+        parser.add_argument(
+            '--bulk-load',
+            action='store_true',
+            help='Import with import_csv --bulk-load (indexes rebuilt after large files)'
+        )
 
     def handle(self, *args, **options):
         year = options.get('year')
@@ -173,6 +181,9 @@ class Command(BaseCommand):
                     'import_csv',
                     str(csv_file),
                     source=source,
+                    bulk=True,
+                    bulk_load=options['bulk_load'],
+                    batch_size=50000,
                     verbosity=options.get('verbosity', 1)
                 )
 
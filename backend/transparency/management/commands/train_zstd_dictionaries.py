@@ -0,0 +1,114 @@
+"""
+Django management command to train CompressedCache's zstd dictionaries.
+
+Trains one dictionary per key prefix from the payloads the cache has sampled
+(see transparency/utils/zstd_dictionaries.py) and stores it as that prefix's
+newest version. Workers switch to it within ZSTD_DICT_CHECK_INTERVAL seconds;
+entries written under older versions keep decompressing until --keep prunes
+those versions, after which they are read as misses.
+
+Usage:
+    python manage.py train_zstd_dictionaries
+    python manage.py train_zstd_dictionaries --prefix candidates_list --size 65536
+    python manage.py train_zstd_dictionaries --keep 2
+    python manage.py train_zstd_dictionaries --list
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+import zstandard as zstd
+
+from transparency.utils import zstd_dictionaries
+
+
+class Command(BaseCommand):
+    help = 'Train per-key-prefix zstd dictionaries from sampled cache payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prefix',
+            action='append',
+            help='Key prefix to train; repeatable (default: every sampled prefix)'
+        )
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=None,
+            help='Dictionary size in bytes (default: ZSTD_DICT_SIZE)'
+        )
+        parser.add_argument(
+            '--min-samples',
+            type=int,
+            default=20,
+            help='Skip prefixes with fewer samples than this (default: 20)'
+        )
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=3,
+            help='Versions to keep per prefix, the new one included (default: 3)'
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='List the stored dictionaries and exit'
+        )
+
+    def handle(self, *args, **options):
+        if options['keep'] < 1:
+            raise CommandError('--keep must be at least 1')
+
+        self.stdout.write('=' * 70)
+        self.stdout.write('ZSTD DICTIONARIES')
+        self.stdout.write('=' * 70)
+
+        if options['list']:
+            self._list()
+            return
+
+        prefixes = options['prefix'] or zstd_dictionaries.sampled_prefixes()
+        if not prefixes:
+            self.stdout.write(self.style.WARNING('No samples yet: the cache records them as it stores entries'))
+            return
+
+        trained = 0
+        for prefix in prefixes:
+            samples = zstd_dictionaries.samples(prefix)
+            if len(samples) < options['min_samples']:
+                self.stdout.write(f'  {prefix}: {len(samples)} samples, skipped (--min-samples {options["min_samples"]})')
+                continue
+
+            try:
+                dictionary = zstd_dictionaries.build(samples, options['size'])
+            except zstd.ZstdError as e:
+                self.stdout.write(self.style.WARNING(f'  {prefix}: training failed: {e}'))
+                continue
+
+            raw = sum(len(s) for s in samples)
+            plain = sum(len(zstd.ZstdCompressor(level=zstd_dictionaries.LEVEL).compress(s)) for s in samples)
+            compressor = zstd.ZstdCompressor(level=zstd_dictionaries.LEVEL, dict_data=dictionary)
+            primed = sum(len(compressor.compress(s)) for s in samples)
+
+            dict_id = zstd_dictionaries.save(prefix, dictionary, len(samples))
+            pruned = zstd_dictionaries.prune(prefix, options['keep'])
+            trained += 1
+
+            self.stdout.write(
+                f'  {prefix}: version {dict_id} from {len(samples)} samples | '
+                f'{len(dictionary.as_bytes()):,} bytes | '
+                f'samples {raw:,} -> {plain:,} plain, {primed:,} with dictionary'
+                + (f' | pruned {pruned}' if pruned else '')
+            )
+
+        self.stdout.write('=' * 70)
+        self.stdout.write(self.style.SUCCESS(f'Trained {trained} of {len(prefixes)} prefixes'))
+
+    def _list(self):
+        rows = zstd_dictionaries.versions()
+        if not rows:
+            self.stdout.write('No dictionaries stored')
+        for dict_id, prefix, size, sample_count, created_at in rows:
+            self.stdout.write(
+                f'  {prefix:<30} version {dict_id:<6} {size:>8,} bytes  '
+                f'{sample_count:>4} samples  {created_at:%Y-%m-%d %H:%M}'
+            )
+        self.stdout.write('=' * 70)
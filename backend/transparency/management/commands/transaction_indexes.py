@@ -0,0 +1,94 @@
+"""
+Django management command to inspect and restore the secondary indexes of
+"Transactions" suspended by import_csv --bulk-load.
+
+Without options it lists the secondary indexes in place and any left in the
+index manifest by a bulk load that did not finish. --restore rebuilds those
+in parallel (see transparency/services/bulk_load.py).
+
+Usage:
+    python manage.py transaction_indexes
+    python manage.py transaction_indexes --restore --workers 4 --maintenance-work-mem 2048
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from transparency.services import bulk_load
+import time
+
+
+class Command(BaseCommand):
+    help = 'Show or restore the "Transactions" indexes suspended by import_csv --bulk-load'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--restore',
+            action='store_true',
+            help='Rebuild every index listed in the manifest'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Indexes rebuilt in parallel (default: 4)'
+        )
+        parser.add_argument(
+            '--maintenance-work-mem',
+            type=int,
+            default=1024,
+            help='maintenance_work_mem in MB shared by the rebuilds (default: 1024)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('=' * 70)
+        self.stdout.write('TRANSACTIONS SECONDARY INDEXES')
+        self.stdout.write('=' * 70)
+
+        if options['restore']:
+            self.restore(options['workers'], options['maintenance_work_mem'])
+        else:
+            self.show()
+
+    def show(self):
+        with connection.cursor() as cursor:
+            present = bulk_load.secondary_indexes(cursor)
+            suspended = bulk_load.suspended(cursor)
+
+        # Partitions' copies are listed under their partitioned index
+        present = [index for index in present if index.parent is None]
+        self.stdout.write(f'{"Index":<48} {"Size":>10}')
+        for index in present:
+            self.stdout.write(f'  {index.name:<46} {index.bytes / 1024 / 1024:>8.1f}MB')
+        self.stdout.write(f'{len(present)} secondary indexes in place')
+
+        if suspended:
+            copies = {}
+            for index in suspended:
+                if index.parent is not None:
+                    copies[index.parent] = copies.get(index.parent, 0) + 1
+            parents = [index for index in suspended if index.parent is None]
+            self.stdout.write(self.style.WARNING(
+                f'\n{len(parents)} indexes suspended (run --restore):'
+            ))
+            for index in parents:
+                pending = f' ({copies[index.name]} partition copies to build)' if index.name in copies else ''
+                self.stdout.write(f'  {index.name}{pending}')
+        else:
+            self.stdout.write(self.style.SUCCESS('No indexes suspended.'))
+
+    def restore(self, workers, maintenance_work_mem):
+        start = time.time()
+        try:
+            built = bulk_load.rebuild_indexes(
+                workers=workers,
+                maintenance_work_mem_mb=maintenance_work_mem,
+                progress=lambda name, seconds: self.stdout.write(f'  index {name} ({seconds:.1f}s)'),
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write('=' * 70)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {len(built)} indexes in {time.time() - start:.1f}s'
+            if built else 'No indexes suspended.'
+        ))
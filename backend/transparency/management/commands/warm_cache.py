@@ -0,0 +1,87 @@
+"""
+Django management command to warm the response cache.
+
+Requests the dashboard payloads, the first pages of the list endpoints and
+the pages of the active races (see transparency/services/cache_warmup.py),
+so they are cached under the current data version before visitors ask for
+them. refresh_dashboard_views and import_csv run the same warm-up when they
+finish, unless CACHE_WARM_AFTER_REFRESH is off.
+
+Usage:
+    python manage.py warm_cache
+    python manage.py warm_cache --workers 8 --pages 5 --races 100
+    python manage.py warm_cache --list
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transparency.services.cache_warmup import hot_requests, warm
+
+
+class Command(BaseCommand):
+    help = 'Compute and cache the most requested API responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Pages requested in parallel (default: CACHE_WARM_WORKERS)'
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=None,
+            help='Pages warmed per list endpoint (default: CACHE_WARM_PAGES)'
+        )
+        parser.add_argument(
+            '--races',
+            type=int,
+            default=None,
+            help='Active races warmed (default: CACHE_WARM_RACES)'
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='List the requests without making them'
+        )
+        parser.add_argument(
+            '--verbose-requests',
+            action='store_true',
+            help='Show the time of every request'
+        )
+
+    def handle(self, *args, **options):
+        for name in ('workers', 'pages', 'races'):
+            if options[name] is not None and options[name] < 1:
+                raise CommandError(f'--{name} must be at least 1')
+
+        self.stdout.write('=' * 70)
+        self.stdout.write('CACHE WARM-UP')
+        self.stdout.write('=' * 70)
+
+        if options['list']:
+            requests = hot_requests(pages=options['pages'], races=options['races'])
+            for request in requests:
+                self.stdout.write(f'  {request.group:<10} {request.path} {request.params or ""}')
+            self.stdout.write(f'{len(requests)} requests')
+            return
+
+        report = warm(workers=options['workers'], pages=options['pages'], races=options['races'])
+
+        if options['verbose_requests']:
+            for r in report.results:
+                status = r.error or r.status
+                self.stdout.write(f'  {r.ms:>9.1f} ms  {status!s:<5} {r.request.path} {r.request.params or ""}')
+            self.stdout.write('')
+
+        self.stdout.write(f'  {"group":<10} {"warmed":>10} {"total s":>9} {"slowest ms":>11}')
+        for group, (count, ok, total_ms, slowest_ms) in report.groups().items():
+            self.stdout.write(f'  {group:<10} {f"{ok}/{count}":>10} {total_ms / 1000:>9.2f} {slowest_ms:>11.1f}')
+
+        for r in report.failed:
+            self.stdout.write(self.style.ERROR(f'  Failed: {r.request.path} {r.request.params}: {r.error or r.status}'))
+
+        self.stdout.write('=' * 70)
+        style = self.style.SUCCESS if not report.failed else self.style.WARNING
+        self.stdout.write(style(f'Warm-up complete: {report.summary()}'))
@@ -2,6 +2,31 @@
 from django.db import migrations, models
 
 
+SOURCE_URL = models.URLField(max_length=500, null=True, blank=True, db_index=True)
+PHONE = models.CharField(max_length=100, blank=True, db_index=True)
+
+
+def add_missing_field(name, field):
+    """
+    Add the candidate_soi column with the schema editor, exactly as AddField
+    would (indexes, no database default), unless it is already there.
+    """
+    def forwards(apps, schema_editor):
+        model = apps.get_model('transparency', 'CandidateStatementOfInterest')
+        connection = schema_editor.connection
+        with connection.cursor() as cursor:
+            columns = {
+                column.name
+                for column in connection.introspection.get_table_description(cursor, model._meta.db_table)
+            }
+        if name in columns:
+            return
+        column = field.clone()
+        column.set_attributes_from_name(name)
+        schema_editor.add_field(model, column)
+    return forwards
+
+
 class Migration(migrations.Migration):
 
     dependencies = [
@@ -17,17 +42,36 @@ class Migration(migrations.Migration):
         ),
         
         # Add source_url to CandidateStatementOfInterest if not exists
-        migrations.AddField(
-            model_name='candidatestatementofinterest',
-            name='source_url',
-            field=models.URLField(max_length=500, null=True, blank=True, db_index=True),
+        # (0011 adds it too, and runs first on a fresh database)
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(
+                    add_missing_field('source_url', SOURCE_URL), migrations.RunPython.noop
+                ),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='candidatestatementofinterest',
+                    name='source_url',
+                    field=SOURCE_URL,
+                ),
+            ],
         ),
         
-        # Add phone field if not exists
-        migrations.AddField(
-            model_name='candidatestatementofinterest',
-            name='phone',
-            field=models.CharField(max_length=100, blank=True, db_index=True),
+        # Add phone field if not exists (0006 adds it too)
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(
+                    add_missing_field('phone', PHONE), migrations.RunPython.noop
+                ),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='candidatestatementofinterest',
+                    name='phone',
+                    field=PHONE,
+                ),
+            ],
         ),
     ]
 
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.7 on 2026-10-17 04:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transparency', '0019_userprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportBatch',
+            fields=[
+                ('batch_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('source', models.CharField(db_index=True, max_length=255)),
+                ('file_name', models.CharField(blank=True, max_length=500)),
+                ('bulk', models.BooleanField(default=False)),
+                ('started_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('rows_total', models.IntegerField(default=0)),
+                ('rows_created', models.IntegerField(default=0)),
+                ('rows_updated', models.IntegerField(default=0)),
+                ('rows_skipped', models.IntegerField(default=0)),
+                ('rows_errored', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Import Batch',
+                'verbose_name_plural': 'Import Batches',
+                'db_table': 'import_batches',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='record_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='import_batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='transparency.importbatch'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['record_hash', 'transaction_type'], name='idx_txn_record_hash'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Summary tables maintained incrementally from import deltas
+# (see transparency/services/incremental_aggregates.py)
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transparency', '0020_transaction_record_hash'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE TABLE IF NOT EXISTS agg_ie_by_subject (
+                subject_committee_id integer NOT NULL,
+                benefit smallint NOT NULL,
+                total_amount numeric(18, 2) NOT NULL DEFAULT 0,
+                total_abs_amount numeric(18, 2) NOT NULL DEFAULT 0,
+                transaction_count bigint NOT NULL DEFAULT 0,
+                PRIMARY KEY (subject_committee_id, benefit)
+            );
+
+            CREATE TABLE IF NOT EXISTS agg_ie_by_spender (
+                committee_id integer PRIMARY KEY,
+                total_amount numeric(18, 2) NOT NULL DEFAULT 0,
+                total_abs_amount numeric(18, 2) NOT NULL DEFAULT 0,
+                transaction_count bigint NOT NULL DEFAULT 0
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_agg_ie_spender_abs
+            ON agg_ie_by_spender(total_abs_amount DESC);
+
+            CREATE TABLE IF NOT EXISTS agg_donor_totals (
+                entity_id integer PRIMARY KEY,
+                total_contributed numeric(18, 2) NOT NULL DEFAULT 0,
+                total_abs_contributed numeric(18, 2) NOT NULL DEFAULT 0,
+                contribution_count bigint NOT NULL DEFAULT 0
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_agg_donor_total
+            ON agg_donor_totals(total_contributed DESC);
+
+            CREATE TABLE IF NOT EXISTS agg_state (
+                id smallint PRIMARY KEY CHECK (id = 1),
+                built_at timestamptz,
+                updated_at timestamptz
+            );
+            """,
+            reverse_sql="""
+            DROP TABLE IF EXISTS agg_state CASCADE;
+            DROP TABLE IF EXISTS agg_donor_totals CASCADE;
+            DROP TABLE IF EXISTS agg_ie_by_spender CASCADE;
+            DROP TABLE IF EXISTS agg_ie_by_subject CASCADE;
+            """
+        ),
+    ]
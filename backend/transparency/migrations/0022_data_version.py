@@ -0,0 +1,27 @@
+# Counter bumped by every tracked write to "Transactions"
+# (see transparency/utils/data_version.py)
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transparency', '0021_incremental_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE TABLE IF NOT EXISTS data_version (
+                id smallint PRIMARY KEY CHECK (id = 1),
+                version bigint NOT NULL DEFAULT 0,
+                updated_at timestamptz
+            );
+
+            INSERT INTO data_version (id, version, updated_at)
+            VALUES (1, 0, now())
+            ON CONFLICT (id) DO NOTHING;
+            """,
+            reverse_sql="DROP TABLE IF EXISTS data_version;"
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.0.7 on 2026-10-17 04:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transparency', '0022_data_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommitteeFinancialRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cycle_key', models.IntegerField(default=0)),
+                ('total_income', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('total_expenses', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('ie_for', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('ie_against', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('income_count', models.IntegerField(default=0)),
+                ('expense_count', models.IntegerField(default=0)),
+                ('ie_for_count', models.IntegerField(default=0)),
+                ('ie_against_count', models.IntegerField(default=0)),
+                ('committee', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='financial_rollups', to='transparency.committee')),
+            ],
+            options={
+                'db_table': 'committee_financial_rollup',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='committeefinancialrollup',
+            constraint=models.UniqueConstraint(fields=('committee', 'cycle_key'), name='uniq_rollup_committee_cycle'),
+        ),
+        # Populate from existing transactions; imports keep it current from here
+        migrations.RunSQL(
+            sql="""
+            INSERT INTO committee_financial_rollup (
+                committee_id, cycle_key, total_income, total_expenses, ie_for, ie_against,
+                income_count, expense_count, ie_for_count, ie_against_count
+            )
+            WITH facts AS (
+                SELECT 1 AS sign, t.committee_id, t.transaction_date,
+                       CASE WHEN tt.income_expense_neutral = 1 THEN t.amount ELSE 0 END AS income,
+                       CASE WHEN tt.income_expense_neutral = 2 THEN t.amount ELSE 0 END AS expenses,
+                       0 AS ie_for, 0 AS ie_against,
+                       CASE WHEN tt.income_expense_neutral = 1 THEN 1 ELSE 0 END AS income_n,
+                       CASE WHEN tt.income_expense_neutral = 2 THEN 1 ELSE 0 END AS expense_n,
+                       0 AS ie_for_n, 0 AS ie_against_n
+                FROM "Transactions" t
+                JOIN "TransactionTypes" tt ON tt.transaction_type_id = t.transaction_type_id
+                WHERE tt.income_expense_neutral IN (1, 2) AND t.deleted = false
+                UNION ALL
+                SELECT 1, t.subject_committee_id, t.transaction_date,
+                       0, 0,
+                       CASE WHEN t.is_for_benefit THEN t.amount ELSE 0 END,
+                       CASE WHEN NOT t.is_for_benefit THEN t.amount ELSE 0 END,
+                       0, 0,
+                       CASE WHEN t.is_for_benefit THEN 1 ELSE 0 END,
+                       CASE WHEN NOT t.is_for_benefit THEN 1 ELSE 0 END
+                FROM "Transactions" t
+                WHERE t.subject_committee_id IS NOT NULL AND t.is_for_benefit IS NOT NULL AND t.deleted = false
+            ),
+            keyed AS (
+                SELECT f.*, 0 AS cycle_key FROM facts f
+                UNION ALL
+                SELECT f.*, cy.cycle_id FROM facts f
+                JOIN "Cycles" cy ON f.transaction_date BETWEEN cy.begin_date::date AND cy.end_date::date
+            )
+            SELECT committee_id, cycle_key,
+                   SUM(sign * income), SUM(sign * expenses),
+                   SUM(sign * ie_for), SUM(sign * ie_against),
+                   SUM(sign * income_n), SUM(sign * expense_n),
+                   SUM(sign * ie_for_n), SUM(sign * ie_against_n)
+            FROM keyed
+            GROUP BY committee_id, cycle_key
+            HAVING SUM(sign * income_n) <> 0 OR SUM(sign * expense_n) <> 0
+                OR SUM(sign * ie_for_n) <> 0 OR SUM(sign * ie_against_n) <> 0
+                OR SUM(sign * income) <> 0 OR SUM(sign * expenses) <> 0
+                OR SUM(sign * ie_for) <> 0 OR SUM(sign * ie_against) <> 0;
+            """,
+            reverse_sql="DELETE FROM committee_financial_rollup;"
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.7 on 2026-10-17 04:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transparency', '0023_committee_financial_rollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['committee', 'deleted', '-transaction_date'], name='idx_txn_comm_active_date'),
+        ),
+    ]
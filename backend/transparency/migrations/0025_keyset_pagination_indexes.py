@@ -0,0 +1,45 @@
+# Generated by Django 5.0.7 on 2026-10-17 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transparency', '0024_transaction_committee_recent_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['deleted', '-transaction_date', '-transaction_id'], name='idx_txn_keyset_date'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['deleted', '-amount', '-transaction_id'], name='idx_txn_keyset_amount'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('deleted', False), ('subject_committee__isnull', False)), fields=['-transaction_date', '-transaction_id'], name='idx_txn_ie_keyset_date'),
+        ),
+        # donors_list keyset order: the table behind top_donors_mv once
+        # installed as a view, and the materialized view when it is one
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS idx_agg_donor_keyset
+            ON agg_donor_totals(total_contributed DESC, entity_id DESC);
+
+            DO $$
+            BEGIN
+                IF EXISTS (SELECT 1 FROM pg_matviews WHERE matviewname = 'top_donors_mv') THEN
+                    CREATE INDEX IF NOT EXISTS idx_top_donors_keyset
+                    ON top_donors_mv(total_contributed DESC, entity_id DESC);
+                END IF;
+            END $$;
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS idx_top_donors_keyset;
+            DROP INDEX IF EXISTS idx_agg_donor_keyset;
+            """
+        ),
+    ]
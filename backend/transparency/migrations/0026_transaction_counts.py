@@ -0,0 +1,36 @@
+# Maintained row counts behind the paginated transaction listings
+# (see transparency/services/counts.py)
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transparency', '0025_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE TABLE IF NOT EXISTS transaction_counts (
+                committee_id integer NOT NULL,
+                income_expense_neutral smallint NOT NULL,
+                is_ie boolean NOT NULL,
+                transaction_count bigint NOT NULL DEFAULT 0,
+                PRIMARY KEY (committee_id, income_expense_neutral, is_ie)
+            );
+
+            -- Populate from existing transactions; imports keep it current from here
+            INSERT INTO transaction_counts
+                (committee_id, income_expense_neutral, is_ie, transaction_count)
+            SELECT t.committee_id, tt.income_expense_neutral,
+                   t.subject_committee_id IS NOT NULL, COUNT(*)
+            FROM "Transactions" t
+            JOIN "TransactionTypes" tt ON tt.transaction_type_id = t.transaction_type_id
+            WHERE t.deleted = false
+            GROUP BY 1, 2, 3
+            ON CONFLICT DO NOTHING;
+            """,
+            reverse_sql="DROP TABLE IF EXISTS transaction_counts;"
+        ),
+    ]
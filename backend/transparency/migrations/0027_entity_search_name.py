@@ -0,0 +1,101 @@
+# Generated by Django 5.0.7 on 2026-10-17 04:46
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transparency', '0026_transaction_counts'),
+    ]
+
+    operations = [
+        # pg_trgm ships with contrib; where it is missing the column and
+        # trigger are still created, name search needs it at query time
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql="""
+                    DO $$
+                    BEGIN
+                        IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+                            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+                        ELSE
+                            RAISE WARNING 'pg_trgm is not available: idx_entity_search_trgm not created';
+                        END IF;
+                    END
+                    $$;
+                    """,
+                    reverse_sql=migrations.RunSQL.noop,
+                ),
+            ],
+            state_operations=[TrigramExtension()],
+        ),
+        migrations.AddField(
+            model_name='entity',
+            name='search_name',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        # Normalized name (see transparency/services/search.py), set on every
+        # insert and name change by any import path, then backfilled
+        migrations.RunSQL(
+            sql="""
+            CREATE OR REPLACE FUNCTION normalize_search_name(value text) RETURNS text
+            LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+                SELECT btrim(regexp_replace(
+                    regexp_replace(upper(value), '[[:punct:]]', '', 'g'), '\\s+', ' ', 'g'
+                ))
+            $$;
+
+            CREATE OR REPLACE FUNCTION names_set_search_name() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                NEW.search_name := normalize_search_name(
+                    concat_ws(' ', NEW.first_name, NEW.middle_name, NEW.last_name, NEW.suffix)
+                );
+                RETURN NEW;
+            END
+            $$;
+
+            DROP TRIGGER IF EXISTS names_search_name ON "Names";
+            CREATE TRIGGER names_search_name
+            BEFORE INSERT OR UPDATE OF first_name, middle_name, last_name, suffix, search_name
+            ON "Names"
+            FOR EACH ROW EXECUTE FUNCTION names_set_search_name();
+
+            UPDATE "Names" SET search_name = normalize_search_name(
+                concat_ws(' ', first_name, middle_name, last_name, suffix)
+            );
+            """,
+            reverse_sql="""
+            DROP TRIGGER IF EXISTS names_search_name ON "Names";
+            DROP FUNCTION IF EXISTS names_set_search_name();
+            DROP FUNCTION IF EXISTS normalize_search_name(text);
+            """
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql="""
+                    DO $$
+                    BEGIN
+                        IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+                            CREATE INDEX IF NOT EXISTS idx_entity_search_trgm
+                                ON "Names" USING gin (search_name gin_trgm_ops);
+                        END IF;
+                    END
+                    $$;
+                    """,
+                    reverse_sql='DROP INDEX IF EXISTS idx_entity_search_trgm;',
+                ),
+            ],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='entity',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_name'], name='idx_entity_search_trgm', opclasses=['gin_trgm_ops']),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.7 on 2026-10-17 04:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transparency', '0027_entity_search_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='candidatestatementofinterest',
+            index=models.Index(fields=['entity', '-filing_date'], name='idx_soi_entity_date'),
+        ),
+    ]
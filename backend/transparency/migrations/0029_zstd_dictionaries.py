@@ -0,0 +1,27 @@
+# Trained zstd dictionaries used by CompressedCache, one row per version
+# (see transparency/utils/zstd_dictionaries.py)
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transparency', '0028_soi_entity_date_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE TABLE IF NOT EXISTS zstd_dictionaries (
+                id serial PRIMARY KEY,
+                prefix text NOT NULL,
+                data bytea NOT NULL,
+                sample_count integer NOT NULL,
+                created_at timestamptz NOT NULL DEFAULT now()
+            );
+            CREATE INDEX IF NOT EXISTS idx_zstd_dictionaries_prefix
+                ON zstd_dictionaries (prefix, id DESC);
+            """,
+            reverse_sql="DROP TABLE IF EXISTS zstd_dictionaries;"
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.0.7 on 2026-10-17 05:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # The backfill commits batch by batch
+    atomic = False
+
+    dependencies = [
+        ('transparency', '0029_zstd_dictionaries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='cycle',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='transparency.cycle'),
+        ),
+        # Cycle attribution, set on every insert and date change by any import
+        # path; existing rows are filled in below
+        migrations.RunSQL(
+            sql="""
+            CREATE OR REPLACE FUNCTION transaction_cycle_id(value date) RETURNS integer
+            LANGUAGE sql STABLE PARALLEL SAFE AS $$
+                SELECT cycle_id FROM "Cycles"
+                WHERE value BETWEEN begin_date::date AND end_date::date
+                ORDER BY begin_date DESC, cycle_id DESC
+                LIMIT 1
+            $$;
+
+            CREATE OR REPLACE FUNCTION transactions_set_cycle() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                NEW.cycle_id := transaction_cycle_id(NEW.transaction_date);
+                RETURN NEW;
+            END
+            $$;
+
+            DROP TRIGGER IF EXISTS transactions_cycle ON "Transactions";
+            CREATE TRIGGER transactions_cycle
+            BEFORE INSERT OR UPDATE OF transaction_date, cycle_id
+            ON "Transactions"
+            FOR EACH ROW EXECUTE FUNCTION transactions_set_cycle();
+            """,
+            reverse_sql="""
+            DROP TRIGGER IF EXISTS transactions_cycle ON "Transactions";
+            DROP FUNCTION IF EXISTS transactions_set_cycle();
+            DROP FUNCTION IF EXISTS transaction_cycle_id(date);
+            """
+        ),
+        # Backfill existing rows in transaction_id ranges, each committed on its
+        # own, so race and trend queries have cycles as soon as the deploy ends
+        # (`manage.py backfill_transaction_cycles` does the same after cycle edits)
+        migrations.RunSQL(
+            sql="""
+            DO $$
+            DECLARE
+                low integer;
+                high integer;
+                step constant integer := 50000;
+            BEGIN
+                SELECT MIN(transaction_id), MAX(transaction_id) INTO low, high FROM "Transactions";
+                WHILE low <= high LOOP
+                    UPDATE "Transactions"
+                    SET cycle_id = transaction_cycle_id(transaction_date)
+                    WHERE transaction_id >= low AND transaction_id < low + step
+                      AND cycle_id IS DISTINCT FROM transaction_cycle_id(transaction_date);
+                    COMMIT;
+                    low := low + step;
+                END LOOP;
+            END
+            $$;
+            """,
+            reverse_sql=migrations.RunSQL.noop
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('deleted', False), ('subject_committee__isnull', False)), fields=['cycle', 'subject_committee', 'is_for_benefit'], name='idx_txn_cycle_ie'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['cycle', 'committee', 'transaction_type'], name='idx_txn_cycle_comm_type'),
+        ),
+    ]
@@ -0,0 +1,189 @@
+# Generated by Django 5.0.7 on 2026-10-17 05:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transparency', '0030_transaction_cycle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IEFact',
+            fields=[
+                ('transaction', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='ie_fact', serialize=False, to='transparency.transaction')),
+                ('is_for_benefit', models.BooleanField(null=True)),
+                ('amount_cents', models.BigIntegerField()),
+                ('negative', models.BooleanField(default=False)),
+                ('transaction_date', models.DateField()),
+                ('committee', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='transparency.committee')),
+                ('cycle', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='transparency.cycle')),
+                ('office', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='transparency.office')),
+                ('party', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='transparency.party')),
+                ('subject_committee', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ie_facts', to='transparency.committee')),
+                ('transaction_type', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='transparency.transactiontype')),
+            ],
+            options={
+                'db_table': 'ie_fact',
+                'indexes': [models.Index(fields=['office', 'cycle', 'subject_committee'], name='idx_ie_fact_race'), models.Index(fields=['subject_committee', 'cycle', 'is_for_benefit'], name='idx_ie_fact_subject'), models.Index(fields=['-transaction_date', '-transaction'], name='idx_ie_fact_date')],
+            },
+        ),
+        # Populate from existing transactions; imports keep it current from here
+        migrations.RunSQL(
+            sql="""
+            INSERT INTO ie_fact (
+                transaction_id, committee_id, subject_committee_id, office_id, party_id,
+                cycle_id, transaction_type_id, is_for_benefit, amount_cents, negative,
+                transaction_date
+            )
+            SELECT t.transaction_id, t.committee_id, t.subject_committee_id,
+                   sc.candidate_office_id, sc.candidate_party_id, t.cycle_id,
+                   t.transaction_type_id, t.is_for_benefit,
+                   (ABS(t.amount) * 100)::bigint, t.amount < 0, t.transaction_date
+            FROM "Transactions" t
+            JOIN "Committees" sc ON sc.committee_id = t.subject_committee_id
+            WHERE t.subject_committee_id IS NOT NULL AND t.deleted = false;
+
+            ANALYZE ie_fact;
+            """,
+            reverse_sql=migrations.RunSQL.noop
+        ),
+        # Office and party are the candidate committee's
+        migrations.RunSQL(
+            sql="""
+            CREATE OR REPLACE FUNCTION ie_fact_committee_changed() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                UPDATE ie_fact
+                SET office_id = NEW.candidate_office_id, party_id = NEW.candidate_party_id
+                WHERE subject_committee_id = NEW.committee_id;
+                RETURN NULL;
+            END
+            $$;
+
+            DROP TRIGGER IF EXISTS ie_fact_committee ON "Committees";
+            CREATE TRIGGER ie_fact_committee
+            AFTER UPDATE OF candidate_office_id, candidate_party_id ON "Committees"
+            FOR EACH ROW
+            WHEN (OLD.candidate_office_id IS DISTINCT FROM NEW.candidate_office_id
+                  OR OLD.candidate_party_id IS DISTINCT FROM NEW.candidate_party_id)
+            EXECUTE FUNCTION ie_fact_committee_changed();
+            """,
+            reverse_sql="""
+            DROP TRIGGER IF EXISTS ie_fact_committee ON "Committees";
+            DROP FUNCTION IF EXISTS ie_fact_committee_changed();
+            """
+        ),
+        # Dashboard materialized views over ie_fact instead of "Transactions"
+        migrations.RunSQL(
+            sql="""
+            DROP MATERIALIZED VIEW IF EXISTS mv_dashboard_support_oppose;
+            CREATE MATERIALIZED VIEW mv_dashboard_support_oppose AS
+            SELECT
+                (SUM(CASE WHEN f.is_for_benefit = TRUE THEN f.amount_cents ELSE 0 END) / 100.0)::numeric(18, 2) as total_for_benefit,
+                (SUM(CASE WHEN f.is_for_benefit = FALSE THEN f.amount_cents ELSE 0 END) / 100.0)::numeric(18, 2) as total_not_for_benefit,
+                COUNT(CASE WHEN f.is_for_benefit = TRUE THEN 1 END) as count_for_benefit,
+                COUNT(CASE WHEN f.is_for_benefit = FALSE THEN 1 END) as count_not_for_benefit
+            FROM ie_fact f
+            WHERE f.is_for_benefit IS NOT NULL;
+
+            -- Only the 50 rows shown read "Transactions" (for memo and signed amount)
+            DROP MATERIALIZED VIEW IF EXISTS mv_dashboard_recent_expenditures;
+            CREATE MATERIALIZED VIEW mv_dashboard_recent_expenditures AS
+            SELECT
+                f.transaction_id as id,
+                t.amount as amount,
+                f.transaction_date as expenditure_date,
+                t.memo as purpose,
+                f.is_for_benefit as is_for_benefit,
+                CONCAT(COALESCE(cn.first_name, ''), ' ', COALESCE(cn.last_name, '')) as committee_name,
+                CONCAT(COALESCE(scn.first_name, ''), ' ', COALESCE(scn.last_name, '')) as subject_committee_name,
+                CONCAT(COALESCE(scn.first_name, ''), ' ', COALESCE(scn.last_name, '')) as candidate_name
+            FROM (
+                SELECT * FROM ie_fact
+                ORDER BY transaction_date DESC, transaction_id DESC
+                LIMIT 50
+            ) f
+            JOIN "Transactions" t
+              ON t.transaction_id = f.transaction_id AND t.transaction_date = f.transaction_date
+            LEFT JOIN "Committees" c ON f.committee_id = c.committee_id
+            LEFT JOIN "Names" cn ON c.name_id = cn.name_id
+            LEFT JOIN "Committees" sc ON f.subject_committee_id = sc.committee_id
+            LEFT JOIN "Names" scn ON sc.name_id = scn.name_id
+            ORDER BY f.transaction_date DESC, f.transaction_id DESC;
+
+            CREATE INDEX IF NOT EXISTS mv_dashboard_recent_expenditures_date_idx
+            ON mv_dashboard_recent_expenditures(expenditure_date DESC NULLS LAST);
+
+            -- Created by create_dashboard_views, where it exists
+            DO $$
+            BEGIN
+                IF EXISTS (SELECT 1 FROM pg_matviews WHERE matviewname = 'top_ie_committees_mv') THEN
+                    DROP MATERIALIZED VIEW top_ie_committees_mv;
+                    CREATE MATERIALIZED VIEW top_ie_committees_mv AS
+                    SELECT
+                        c.committee_id,
+                        COALESCE(n.last_name || ', ' || n.first_name, n.last_name, 'Unknown') as committee,
+                        s.total_spending,
+                        s.transaction_count
+                    FROM (
+                        SELECT committee_id,
+                               (SUM(CASE WHEN negative THEN -amount_cents ELSE amount_cents END) / 100.0)::numeric(18, 2) as total_spending,
+                               COUNT(*) as transaction_count
+                        FROM ie_fact
+                        GROUP BY committee_id
+                    ) s
+                    JOIN "Committees" c ON c.committee_id = s.committee_id
+                    LEFT JOIN "Names" n ON c.name_id = n.name_id
+                    ORDER BY s.total_spending DESC;
+
+                    CREATE UNIQUE INDEX idx_top_committees_unique ON top_ie_committees_mv(committee_id);
+                END IF;
+            END
+            $$;
+            """,
+            reverse_sql="""
+            DROP MATERIALIZED VIEW IF EXISTS mv_dashboard_support_oppose;
+            CREATE MATERIALIZED VIEW mv_dashboard_support_oppose AS
+            SELECT
+                SUM(CASE WHEN t.is_for_benefit = TRUE THEN ABS(t.amount) ELSE 0 END) as total_for_benefit,
+                SUM(CASE WHEN t.is_for_benefit = FALSE THEN ABS(t.amount) ELSE 0 END) as total_not_for_benefit,
+                COUNT(CASE WHEN t.is_for_benefit = TRUE THEN 1 END) as count_for_benefit,
+                COUNT(CASE WHEN t.is_for_benefit = FALSE THEN 1 END) as count_not_for_benefit
+            FROM "Transactions" t
+            WHERE t.subject_committee_id IS NOT NULL
+                AND t.is_for_benefit IS NOT NULL
+                AND t.deleted = FALSE;
+
+            DROP MATERIALIZED VIEW IF EXISTS mv_dashboard_recent_expenditures;
+            CREATE MATERIALIZED VIEW mv_dashboard_recent_expenditures AS
+            SELECT
+                t.transaction_id as id,
+                t.amount as amount,
+                t.transaction_date as expenditure_date,
+                t.memo as purpose,
+                t.is_for_benefit as is_for_benefit,
+                CONCAT(COALESCE(cn.first_name, ''), ' ', COALESCE(cn.last_name, '')) as committee_name,
+                CONCAT(COALESCE(scn.first_name, ''), ' ', COALESCE(scn.last_name, '')) as subject_committee_name,
+                CONCAT(COALESCE(scn.first_name, ''), ' ', COALESCE(scn.last_name, '')) as candidate_name
+            FROM "Transactions" t
+            LEFT JOIN "Committees" c ON t.committee_id = c.committee_id
+            LEFT JOIN "Names" cn ON c.name_id = cn.name_id
+            LEFT JOIN "Committees" sc ON t.subject_committee_id = sc.committee_id
+            LEFT JOIN "Names" scn ON sc.name_id = scn.name_id
+            WHERE t.subject_committee_id IS NOT NULL
+                AND t.deleted = FALSE
+            ORDER BY t.transaction_date DESC NULLS LAST, t.transaction_id DESC
+            LIMIT 50;
+
+            CREATE INDEX IF NOT EXISTS mv_dashboard_recent_expenditures_date_idx
+            ON mv_dashboard_recent_expenditures(expenditure_date DESC NULLS LAST);
+
+            -- Reads ie_fact; create_dashboard_views recreates it
+            DROP MATERIALIZED VIEW IF EXISTS top_ie_committees_mv;
+            """
+        ),
+    ]
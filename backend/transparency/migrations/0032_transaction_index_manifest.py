@@ -0,0 +1,26 @@
+# Secondary indexes of "Transactions" dropped by import_csv --bulk-load and
+# not yet rebuilt (see transparency/services/bulk_load.py)
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transparency', '0031_ie_fact'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE TABLE IF NOT EXISTS transactions_index_manifest (
+                index_name text PRIMARY KEY,
+                definition text NOT NULL,
+                bytes bigint NOT NULL DEFAULT 0,
+                parent_index text,
+                import_batch_id integer,
+                suspended_at timestamptz NOT NULL DEFAULT now()
+            );
+            """,
+            reverse_sql="DROP TABLE IF EXISTS transactions_index_manifest;"
+        ),
+    ]
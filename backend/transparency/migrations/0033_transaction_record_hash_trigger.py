@@ -0,0 +1,41 @@
+# record_hash kept in step with the natural key on every write, not only by
+# import_csv: admin edits, entity merges and SQL fixes change committee_id,
+# transaction_date, amount or entity_id too, and deduplicate_transactions
+# groups on the stored hash. Same expression as import_csv.STORED_HASH_SQL.
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transparency', '0032_transaction_index_manifest'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE OR REPLACE FUNCTION transactions_set_record_hash() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                NEW.record_hash := encode(sha256(convert_to(
+                    COALESCE(NEW.committee_id::text, 'None') || '|' ||
+                    COALESCE(to_char(NEW.transaction_date, 'YYYY-MM-DD'), 'None') || '|' ||
+                    COALESCE(NEW.amount::text, 'None') || '|' ||
+                    COALESCE(NEW.entity_id::text, 'None'),
+                'UTF8')), 'hex');
+                RETURN NEW;
+            END
+            $$;
+
+            DROP TRIGGER IF EXISTS transactions_record_hash ON "Transactions";
+            CREATE TRIGGER transactions_record_hash
+            BEFORE INSERT OR UPDATE OF committee_id, transaction_date, amount, entity_id, record_hash
+            ON "Transactions"
+            FOR EACH ROW EXECUTE FUNCTION transactions_set_record_hash();
+            """,
+            reverse_sql="""
+            DROP TRIGGER IF EXISTS transactions_record_hash ON "Transactions";
+            DROP FUNCTION IF EXISTS transactions_set_record_hash();
+            """
+        ),
+    ]
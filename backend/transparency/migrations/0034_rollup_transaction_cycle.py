@@ -0,0 +1,56 @@
+# Per-cycle committee rollups keyed on Transaction.cycle (the transactions_cycle
+# trigger's single cycle) instead of every cycle whose dates contain the
+# transaction date, which counted a transaction once per overlapping cycle.
+# The all-cycles rows (cycle_key 0) are unchanged.
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transparency', '0033_transaction_record_hash_trigger'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            DELETE FROM committee_financial_rollup WHERE cycle_key <> 0;
+
+            INSERT INTO committee_financial_rollup (
+                committee_id, cycle_key, total_income, total_expenses, ie_for, ie_against,
+                income_count, expense_count, ie_for_count, ie_against_count
+            )
+            SELECT committee_id, cycle_id,
+                   SUM(income), SUM(expenses), SUM(ie_for), SUM(ie_against),
+                   SUM(income_n), SUM(expense_n), SUM(ie_for_n), SUM(ie_against_n)
+            FROM (
+                SELECT t.committee_id, t.cycle_id,
+                       CASE WHEN tt.income_expense_neutral = 1 THEN t.amount ELSE 0 END AS income,
+                       CASE WHEN tt.income_expense_neutral = 2 THEN t.amount ELSE 0 END AS expenses,
+                       0 AS ie_for, 0 AS ie_against,
+                       CASE WHEN tt.income_expense_neutral = 1 THEN 1 ELSE 0 END AS income_n,
+                       CASE WHEN tt.income_expense_neutral = 2 THEN 1 ELSE 0 END AS expense_n,
+                       0 AS ie_for_n, 0 AS ie_against_n
+                FROM "Transactions" t
+                JOIN "TransactionTypes" tt ON tt.transaction_type_id = t.transaction_type_id
+                WHERE tt.income_expense_neutral IN (1, 2) AND t.deleted = false
+                UNION ALL
+                SELECT t.subject_committee_id, t.cycle_id,
+                       0, 0,
+                       CASE WHEN t.is_for_benefit THEN t.amount ELSE 0 END,
+                       CASE WHEN NOT t.is_for_benefit THEN t.amount ELSE 0 END,
+                       0, 0,
+                       CASE WHEN t.is_for_benefit THEN 1 ELSE 0 END,
+                       CASE WHEN NOT t.is_for_benefit THEN 1 ELSE 0 END
+                FROM "Transactions" t
+                WHERE t.subject_committee_id IS NOT NULL AND t.is_for_benefit IS NOT NULL
+                  AND t.deleted = false
+            ) f
+            WHERE cycle_id IS NOT NULL
+            GROUP BY committee_id, cycle_id;
+
+            ANALYZE committee_financial_rollup;
+            """,
+            reverse_sql=migrations.RunSQL.noop
+        ),
+    ]
@@ -1,8 +1,11 @@
 # models.py for Arizona Sunshine Transparency Project
 # Complete models with comprehensive indexing for performance
 
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.db.models import Sum, Count, Q
+from django.db.models.functions import Cast
 from decimal import Decimal
 
 # ==================== LOOKUP TABLES ====================
@@ -81,6 +84,21 @@ class Cycle(models.Model):
     def __str__(self):
         return self.name
 
+    def transaction_date_filters(self):
+        """
+        Transaction filters bounding transaction_date by this cycle's dates.
+
+        Redundant next to cycle=self (the cycle is derived from the date), but
+        lets the planner skip every other partition when "Transactions" is
+        partitioned by date (see services/partitioning.py).
+        """
+        filters = {}
+        if self.begin_date:
+            filters['transaction_date__gte'] = self.begin_date.date()
+        if self.end_date:
+            filters['transaction_date__lte'] = self.end_date.date()
+        return filters
+
 
 class EntityType(models.Model):
     """Types of entities (individual, business, committee, etc)"""
@@ -154,6 +172,10 @@ class Entity(models.Model):
     first_name = models.CharField(max_length=255, blank=True, db_index=True)
     middle_name = models.CharField(max_length=255, blank=True)
     suffix = models.CharField(max_length=50, blank=True)
+
+    # First, middle, last and suffix, upper-cased without punctuation; set by
+    # the names_search_name trigger (see services/search.py)
+    search_name = models.TextField(blank=True, default='', editable=False)
     
     # Address
     address1 = models.CharField(max_length=255, blank=True)
@@ -174,6 +196,7 @@ class Entity(models.Model):
             # Name searches
             models.Index(fields=['last_name', 'first_name'], name='idx_entity_name'),
             models.Index(fields=['first_name', 'last_name'], name='idx_entity_name_reverse'),
+            GinIndex(fields=['search_name'], name='idx_entity_search_trgm', opclasses=['gin_trgm_ops']),
             
             # Grouping and filtering
             models.Index(fields=['name_group_id'], name='idx_entity_group'),
@@ -369,27 +392,85 @@ class Committee(models.Model):
     def is_active(self):
         return self.termination_date is None
     
+    def get_financial_rollup(self):
+        """
+        All-cycle CommitteeFinancialRollup row, or None if the committee has no
+        transactions. Cached on the instance; list views can attach it up front
+        with Prefetch('financial_rollups', ..., to_attr='prefetched_rollups').
+        """
+        if not hasattr(self, '_financial_rollup'):
+            prefetched = getattr(self, 'prefetched_rollups', None)
+            if prefetched is not None:
+                self._financial_rollup = prefetched[0] if prefetched else None
+            else:
+                self._financial_rollup = CommitteeFinancialRollup.objects.filter(
+                    committee_id=self.committee_id,
+                    cycle_key=CommitteeFinancialRollup.ALL_CYCLES
+                ).first()
+        return self._financial_rollup
+
+    def _rollup_value(self, field, live):
+        """
+        Read field from the rollup. A committee without a rollup row has no
+        transactions, unless the rollup is behind; COMMITTEE_ROLLUP_LIVE_FALLBACK
+        opts into aggregating live in that case.
+        """
+        rollup = self.get_financial_rollup()
+        if rollup is not None:
+            return getattr(rollup, field)
+        if getattr(settings, 'COMMITTEE_ROLLUP_LIVE_FALLBACK', False):
+            return live()
+        return Decimal('0.00')
+
     def get_total_income(self):
         """Calculate total contributions received"""
-        return self.transactions.filter(
-            transaction_type__income_expense_neutral=1,
-            deleted=False
+        return self._rollup_value('total_income', self._live_total_income)
+
+    def get_total_expenses(self):
+        """Calculate total expenditures"""
+        return self._rollup_value('total_expenses', self._live_total_expenses)
+
+    def get_cash_balance(self):
+        """Income minus expenses"""
+        return self._rollup_value('cash_balance', self._live_cash_balance)
+
+    def get_ie_for(self):
+        """Independent expenditures supporting this committee"""
+        return self._rollup_value('ie_for', self._live_ie_for)
+
+    def get_ie_against(self):
+        """Independent expenditures opposing this committee"""
+        return self._rollup_value('ie_against', self._live_ie_against)
+
+    def _live_transactions(self, cycle_id=None, **filters):
+        """
+        Undeleted transactions matching filters, optionally only those of one
+        Transaction.cycle (the key of the per-cycle rollup rows).
+        """
+        qs = Transaction.objects.filter(deleted=False, **filters)
+        if cycle_id is not None:
+            qs = qs.filter(cycle_id=cycle_id)
+        return qs
+
+    def _live_total_income(self, cycle_id=None):
+        """Calculate total contributions received"""
+        return self._live_transactions(
+            cycle_id, committee=self, transaction_type__income_expense_neutral=1
         ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
     
-    def get_total_expenses(self):
+    def _live_total_expenses(self, cycle_id=None):
         """Calculate total expenditures"""
-        return self.transactions.filter(
-            transaction_type__income_expense_neutral=2,
-            deleted=False
+        return self._live_transactions(
+            cycle_id, committee=self, transaction_type__income_expense_neutral=2
         ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
     
-    def get_cash_balance(self):
+    def _live_cash_balance(self, cycle_id=None):
         """
         Income minus expenses.
         FIXED: Single query to avoid race condition between income/expense reads.
         """
         # Single atomic query using conditional aggregation
-        totals = self.transactions.filter(deleted=False).aggregate(
+        totals = self._live_transactions(cycle_id, committee=self).aggregate(
             income=Sum('amount', filter=Q(transaction_type__income_expense_neutral=1)),
             expenses=Sum('amount', filter=Q(transaction_type__income_expense_neutral=2))
         )
@@ -397,20 +478,16 @@ class Committee(models.Model):
         expenses = totals['expenses'] or Decimal('0.00')
         return income - expenses
     
-    def get_ie_for(self):
+    def _live_ie_for(self, cycle_id=None):
         """Independent expenditures supporting this committee"""
-        return Transaction.objects.filter(
-            subject_committee=self,
-            is_for_benefit=True,
-            deleted=False
+        return self._live_transactions(
+            cycle_id, subject_committee=self, is_for_benefit=True
         ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
     
-    def get_ie_against(self):
+    def _live_ie_against(self, cycle_id=None):
         """Independent expenditures opposing this committee"""
-        return Transaction.objects.filter(
-            subject_committee=self,
-            is_for_benefit=False,
-            deleted=False
+        return self._live_transactions(
+            cycle_id, subject_committee=self, is_for_benefit=False
         ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
     
     # ==================== PHASE 1 METHODS ====================
@@ -528,6 +605,32 @@ class Committee(models.Model):
 
 # ==================== TRANSACTIONS ====================
 
+class ImportBatch(models.Model):
+    """One run of import_csv, for provenance of imported transactions"""
+    batch_id = models.BigAutoField(primary_key=True)
+    source = models.CharField(max_length=255, db_index=True)
+    file_name = models.CharField(max_length=500, blank=True)
+    bulk = models.BooleanField(default=False)
+    started_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    # Import statistics
+    rows_total = models.IntegerField(default=0)
+    rows_created = models.IntegerField(default=0)
+    rows_updated = models.IntegerField(default=0)
+    rows_skipped = models.IntegerField(default=0)
+    rows_errored = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'import_batches'
+        ordering = ['-started_at']
+        verbose_name = 'Import Batch'
+        verbose_name_plural = 'Import Batches'
+
+    def __str__(self):
+        return f"Import {self.batch_id}: {self.source}"
+
+
 class Transaction(models.Model):
     """All financial transactions (contributions and expenses)"""
     transaction_id = models.IntegerField(primary_key=True)
@@ -535,6 +638,11 @@ class Transaction(models.Model):
     transaction_type = models.ForeignKey(TransactionType, on_delete=models.PROTECT, db_index=True)
     transaction_date = models.DateField(db_index=True)
     amount = models.DecimalField(max_digits=12, decimal_places=2, db_index=True)
+
+    # Cycle whose dates contain transaction_date, set by a database trigger on
+    # every insert and date change (see backfill_transaction_cycles)
+    cycle = models.ForeignKey(Cycle, related_name='transactions', null=True, blank=True,
+                              on_delete=models.SET_NULL, db_index=True, editable=False)
     
     # Donor (for contributions) or Payee (for expenses)
     entity = models.ForeignKey(Entity, related_name='transactions', on_delete=models.PROTECT, db_index=True)
@@ -556,8 +664,17 @@ class Transaction(models.Model):
                                             related_name='amendments',
                                             on_delete=models.SET_NULL, db_index=True)
     deleted = models.BooleanField(default=False, db_index=True)
+
+    # Import provenance: SHA-256 of committee_id|transaction_date|amount|entity_id
+    # (see import_csv) and the batch that last created or changed the row
+    record_hash = models.CharField(max_length=64, blank=True, default='')
+    import_batch = models.ForeignKey(ImportBatch, related_name='transactions',
+                                     null=True, blank=True, on_delete=models.SET_NULL, db_index=True)
     
     class Meta:
+        # May be range-partitioned by transaction_date, one partition per cycle
+        # (partition_transactions); the primary key is then (transaction_id,
+        # transaction_date), so transaction_id is unique by import, not by index
         db_table = 'Transactions'
         ordering = ['-transaction_date', '-amount']  # Most recent, largest first
         indexes = [
@@ -582,6 +699,17 @@ class Transaction(models.Model):
             # Active transactions only
             models.Index(fields=['deleted'], name='idx_txn_deleted'),
             models.Index(fields=['deleted', '-transaction_date'], name='idx_txn_active_date'),
+            models.Index(fields=['committee', 'deleted', '-transaction_date'],
+                        name='idx_txn_comm_active_date'),
+
+            # Keyset pagination: sort key + primary key (see utils/keyset.py)
+            models.Index(fields=['deleted', '-transaction_date', '-transaction_id'],
+                        name='idx_txn_keyset_date'),
+            models.Index(fields=['deleted', '-amount', '-transaction_id'],
+                        name='idx_txn_keyset_amount'),
+            models.Index(fields=['-transaction_date', '-transaction_id'],
+                        name='idx_txn_ie_keyset_date',
+                        condition=Q(subject_committee__isnull=False, deleted=False)),
             
             # Combined indexes for common queries
             models.Index(fields=['committee', 'transaction_type', '-transaction_date'], 
@@ -595,11 +723,21 @@ class Transaction(models.Model):
             models.Index(fields=['transaction_date', 'committee'], name='idx_txn_date_committee'),
             models.Index(fields=['transaction_date', 'entity'], name='idx_txn_date_entity'),
 
+            # Cycle queries: race IE spending, spending trends, race donors
+            models.Index(fields=['cycle', 'subject_committee', 'is_for_benefit'],
+                        name='idx_txn_cycle_ie',
+                        condition=Q(subject_committee__isnull=False, deleted=False)),
+            models.Index(fields=['cycle', 'committee', 'transaction_type'],
+                        name='idx_txn_cycle_comm_type', condition=Q(deleted=False)),
+
             # Dashboard optimization indexes
             models.Index(fields=['deleted', 'subject_committee', 'is_for_benefit'],
                         name='idx_txn_dash_ie_benefit'),
             models.Index(fields=['transaction_type', 'deleted', 'entity', '-amount'],
                         name='idx_txn_dash_donors'),
+
+            # Import change detection and hash-based deduplication
+            models.Index(fields=['record_hash', 'transaction_type'], name='idx_txn_record_hash'),
         ]
     
     def __str__(self):
@@ -619,6 +757,113 @@ class Transaction(models.Model):
         return self.subject_committee is not None
 
 
+class CommitteeFinancialRollup(models.Model):
+    """
+    Precomputed committee financials, maintained from import deltas
+    (services/incremental_aggregates.py). One row per committee with
+    cycle_key=ALL_CYCLES, plus one per committee and Transaction.cycle of
+    its transactions (each transaction counts in one cycle row).
+
+    Sums mirror the Committee live aggregates: income/expenses over the
+    committee's own transactions, IE for/against over transactions naming it
+    as subject_committee.
+    """
+    ALL_CYCLES = 0
+
+    committee = models.ForeignKey(Committee, related_name='financial_rollups',
+                                  on_delete=models.CASCADE, db_constraint=False)
+    cycle_key = models.IntegerField(default=ALL_CYCLES)  # Cycle.cycle_id, or ALL_CYCLES
+
+    total_income = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    total_expenses = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    ie_for = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    ie_against = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    income_count = models.IntegerField(default=0)
+    expense_count = models.IntegerField(default=0)
+    ie_for_count = models.IntegerField(default=0)
+    ie_against_count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'committee_financial_rollup'
+        constraints = [
+            models.UniqueConstraint(fields=['committee', 'cycle_key'], name='uniq_rollup_committee_cycle'),
+        ]
+
+    def __str__(self):
+        return f"Rollup {self.committee_id} ({self.cycle_key or 'all cycles'})"
+
+    @property
+    def cash_balance(self):
+        return self.total_income - self.total_expenses
+
+
+def cents_to_dollars(expression):
+    """An integer cents expression (e.g. Sum('amount_cents')) as dollars, numeric(18, 2)"""
+    dollars = models.ExpressionWrapper(expression / Decimal('100'), output_field=models.DecimalField())
+    return Cast(dollars, models.DecimalField(max_digits=18, decimal_places=2))
+
+
+class IEFact(models.Model):
+    """
+    One row per live independent expenditure (a transaction with a
+    subject_committee that is not deleted), with the candidate's office and
+    party and the transaction's cycle resolved, so IE queries read neither
+    "Transactions" nor the candidate committee.
+
+    Maintained from import deltas (services/incremental_aggregates.py); the
+    ie_fact_committee trigger follows office and party changes on the
+    candidate committee. amount_cents is the absolute amount; negative keeps
+    the sign for the queries that sum signed amounts.
+    """
+    transaction = models.OneToOneField(Transaction, primary_key=True, related_name='ie_fact',
+                                       on_delete=models.DO_NOTHING, db_constraint=False)
+    committee = models.ForeignKey(Committee, related_name='+', on_delete=models.DO_NOTHING,
+                                  db_constraint=False, db_index=False)  # Spender
+    subject_committee = models.ForeignKey(Committee, related_name='ie_facts', on_delete=models.DO_NOTHING,
+                                          db_constraint=False, db_index=False)  # Candidate committee
+    office = models.ForeignKey(Office, null=True, related_name='+', on_delete=models.DO_NOTHING,
+                               db_constraint=False, db_index=False)
+    party = models.ForeignKey(Party, null=True, related_name='+', on_delete=models.DO_NOTHING,
+                              db_constraint=False, db_index=False)
+    cycle = models.ForeignKey(Cycle, null=True, related_name='+', on_delete=models.DO_NOTHING,
+                              db_constraint=False, db_index=False)
+    transaction_type = models.ForeignKey(TransactionType, related_name='+', on_delete=models.DO_NOTHING,
+                                         db_constraint=False, db_index=False)
+    is_for_benefit = models.BooleanField(null=True)
+    amount_cents = models.BigIntegerField()
+    negative = models.BooleanField(default=False)
+    transaction_date = models.DateField()
+
+    class Meta:
+        db_table = 'ie_fact'
+        indexes = [
+            # Race spending (office + cycle, optionally party)
+            models.Index(fields=['office', 'cycle', 'subject_committee'], name='idx_ie_fact_race'),
+            # Candidate totals, primary races, race donors
+            models.Index(fields=['subject_committee', 'cycle', 'is_for_benefit'], name='idx_ie_fact_subject'),
+            # Expenditure listing and recent expenditures, newest first
+            models.Index(fields=['-transaction_date', '-transaction'], name='idx_ie_fact_date'),
+        ]
+
+    def __str__(self):
+        return f"IE {self.transaction_id}"
+
+    @staticmethod
+    def signed_cents():
+        """Expression: the transaction's signed amount in cents"""
+        return models.Case(
+            models.When(negative=True, then=-models.F('amount_cents')),
+            default=models.F('amount_cents'),
+            output_field=models.BigIntegerField()
+        )
+
+    @property
+    def amount(self):
+        """Signed amount in dollars, as stored on the transaction"""
+        value = Decimal(self.amount_cents) / 100
+        return -value if self.negative else value
+
+
 # ==================== REPORTING ====================
 
 class ReportType(models.Model):
@@ -759,6 +1004,7 @@ class CandidateStatementOfInterest(models.Model):
             # Search and filter
             models.Index(fields=['candidate_name'], name='idx_soi_name'),
             models.Index(fields=['office', '-filing_date'], name='idx_soi_office_date'),
+            models.Index(fields=['entity', '-filing_date'], name='idx_soi_entity_date'),
             models.Index(fields=['-filing_date'], name='idx_soi_date_desc'),
             
             # Status tracking
@@ -943,27 +1189,31 @@ class RaceAggregationManager:
         Consolidates FOR and AGAINST spending per candidate
         Returns absolute values for proper display
 
-        Filter by transaction dates within the cycle, not committee's election_cycle.
-        This ensures candidates running in a cycle are included even if their
-        committee registration shows a different cycle.
+        Filter by the transaction's cycle (its date within the cycle's dates),
+        not committee's election_cycle. This ensures candidates running in a
+        cycle are included even if their committee registration shows a
+        different cycle.
         """
-        from django.db.models.functions import Abs
+        from transparency.services import analytics_engine
+        from transparency.services.race_aggregation import race_ie_spending_from_snapshot
 
+        snap = analytics_engine.snapshot()
+        if snap is not None:
+            return race_ie_spending_from_snapshot(snap, office, cycle, party)
+
+        # ie_fact already holds the candidate's office and party and the
+        # absolute amount of every live IE
         filters = {
-            'subject_committee__candidate_office': office,
-            'deleted': False,
-            'subject_committee__isnull': False,
-            'transaction_date__gte': cycle.begin_date,
-            'transaction_date__lte': cycle.end_date,
+            'office': office,
+            'cycle': cycle,
             'transaction_type__income_expense_neutral': 2,  # Only count actual expenses (not Pay a Bill)
         }
 
         if party:
-            filters['subject_committee__candidate_party'] = party
+            filters['party'] = party
 
         # Aggregate IE FOR and AGAINST separately per candidate
-        # Use Abs() since expenses are stored as negative values
-        race_spending = Transaction.objects.filter(
+        race_spending = IEFact.objects.filter(
             **filters
         ).values(
             'subject_committee__committee_id',
@@ -971,12 +1221,11 @@ class RaceAggregationManager:
             'subject_committee__name__first_name',
             'subject_committee__candidate_party__name',
         ).annotate(
-            ie_for=Sum(Abs('amount'), filter=Q(is_for_benefit=True)),
-            ie_against=Sum(Abs('amount'), filter=Q(is_for_benefit=False)),
+            ie_for=cents_to_dollars(Sum('amount_cents', filter=Q(is_for_benefit=True))),
+            ie_against=cents_to_dollars(Sum('amount_cents', filter=Q(is_for_benefit=False))),
             num_expenditures=Count('transaction_id')
         ).annotate(
-            # Calculate totals from the absolute values
-            total_ie=Sum(Abs('amount'))
+            total_ie=cents_to_dollars(Sum('amount_cents'))
         ).order_by('-total_ie')
 
         return race_spending
@@ -985,10 +1234,17 @@ class RaceAggregationManager:
     def get_top_ie_donors_by_race(office, cycle, limit=20):
         """
         Ben requires: "Aggregate IE donors by race and candidate"
-        Shows top donors impacting a specific race
+        Shows top donors impacting a specific race: contributions during the
+        cycle to the committees that made IEs on its candidates in the cycle
 
         Optimized to avoid slow subqueries by materializing intermediate results.
+        Steps 2 and 3 run on the analytics snapshot when it is available.
         """
+        from transparency.services import analytics_engine
+        from transparency.services.race_aggregation import (
+            ie_committees_from_snapshot, top_donors_from_snapshot
+        )
+
         # Step 1: Get candidate committee IDs (materialize to list)
         candidate_ids = list(Committee.objects.filter(
             candidate_office=office,
@@ -999,11 +1255,20 @@ class RaceAggregationManager:
         if not candidate_ids:
             return []
 
+        snap = analytics_engine.snapshot()
+        if snap is not None:
+            ie_committee_ids = ie_committees_from_snapshot(snap, candidate_ids, cycle)
+            if not ie_committee_ids:
+                return []
+            return top_donors_from_snapshot(snap, ie_committee_ids, limit, cycle)
+
         # Step 2: Get IE committee IDs that spent on these candidates (materialize)
-        ie_committee_ids = list(Transaction.objects.filter(
+        ie_committee_ids = list(IEFact.objects.filter(
             subject_committee_id__in=candidate_ids,
-            deleted=False
-        ).values_list('committee_id', flat=True).distinct()[:100])  # Limit to top 100 IE committees
+            cycle=cycle
+        ).order_by('committee_id').values_list(
+            'committee_id', flat=True
+        ).distinct()[:100])  # Limit to 100 IE committees (distinct: no default ordering columns)
 
         if not ie_committee_ids:
             return []
@@ -1011,8 +1276,10 @@ class RaceAggregationManager:
         # Step 3: Get top donors to those IE committees
         top_donors = Transaction.objects.filter(
             committee_id__in=ie_committee_ids,
+            cycle=cycle,
             transaction_type__income_expense_neutral=1,
-            deleted=False
+            deleted=False,
+            **cycle.transaction_date_filters()
         ).values(
             'entity__name_id',
             'entity__last_name',
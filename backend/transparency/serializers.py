@@ -132,6 +132,7 @@ class CommitteeDetailSerializer(CommitteeSerializer):
     cash_balance = serializers.SerializerMethodField()
     ie_for = serializers.SerializerMethodField()
     ie_against = serializers.SerializerMethodField()
+    recent_transactions = serializers.SerializerMethodField()
     
     class Meta(CommitteeSerializer.Meta):
         fields = CommitteeSerializer.Meta.fields + [
@@ -139,7 +140,7 @@ class CommitteeDetailSerializer(CommitteeSerializer):
             'physical_address1', 'physical_address2', 'physical_zip_code',
             'financial_institution1', 'financial_institution2', 'financial_institution3',
             'total_income', 'total_expenses', 'cash_balance',
-            'ie_for', 'ie_against'
+            'ie_for', 'ie_against', 'recent_transactions'
         ]
     
     def get_total_income(self, obj):
@@ -156,6 +157,10 @@ class CommitteeDetailSerializer(CommitteeSerializer):
     
     def get_ie_against(self, obj):
         return str(obj.get_ie_against())
+    
+    def get_recent_transactions(self, obj):
+        """Latest transactions, as prefetched by CommitteeViewSet (bounded)"""
+        return TransactionSerializer(getattr(obj, 'recent_transactions', []), many=True).data
 
 
 # ==================== TRANSACTION SERIALIZERS ====================
@@ -0,0 +1,441 @@
+"""
+Columnar Analytics Engine
+
+An optional in-memory copy of the "Transactions" columns the analytic
+endpoints group and filter on, as NumPy arrays, so race, trend and donor
+aggregates run as vectorized kernels instead of a GROUP BY whose Decimal
+rows are then materialized one at a time in Python.
+
+Columns (one .npy file each, active rows only, sorted by date):
+
+    amount      int64   cents
+    day         int32   days since 1970-01-01
+    committee   int32   code into committee_ids
+    subject     int32   code into committee_ids; len(committee_ids) = NULL
+    entity      int32   code into entity_ids
+    ttype       int32   code into type_ids
+    benefit     int8    is_for_benefit: 1, 0, or -1 for NULL
+
+Codes are positions in the sorted id arrays (committee_ids, entity_ids,
+type_ids), so a filter on a set of ids is a boolean table indexed by code
+(selector()), and a GROUP BY is np.bincount over the codes. Date ranges are
+slices (the rows are sorted by day). Only transaction facts are snapshotted:
+committee office/party/cycle and transaction type filters are resolved to
+ids per query, so editing a committee never leaves the snapshot stale.
+
+Snapshots: `manage.py build_analytics_snapshot`, or the first worker that
+sees a new data version (one per host, in a background thread), reads the
+columns with COPY ... (FORMAT binary) in one REPEATABLE READ transaction,
+together with the data version they match, and writes
+ANALYTICS_SNAPSHOT_DIR/v{version}/. Workers open the files with
+mmap_mode='r', so they share one copy in the page cache. Until the snapshot
+for the current version exists, snapshot() returns None and callers use SQL.
+
+Background builds are debounced: a host starts one at most every
+ANALYTICS_REBUILD_INTERVAL seconds, so a burst of version bumps (an import
+committing batch by batch) costs one COPY of the version current when the
+build starts, not one per bump.
+
+Sums are exact: bincount adds in float64, exact for totals below 2**53
+cents.
+
+Usage:
+    snap = analytics_engine.snapshot()          # None: disabled or building
+    if snap is not None:
+        rows = snap.rows_between(cycle.begin_date, cycle.end_date)
+        where = snap.where(rows, subject=committee_ids, ttype=expense_type_ids)
+        ids, amounts, counts = snap.group_sum('subject', rows, where, absolute=True)
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from pathlib import Path
+from transparency.utils.data_version import current_data_version
+import json
+import logging
+import numpy as np
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+EPOCH = date(1970, 1, 1)
+
+# Fact columns and their on-disk dtypes
+COLUMNS = {
+    'amount': np.int64,
+    'day': np.int32,
+    'committee': np.int32,
+    'subject': np.int32,
+    'entity': np.int32,
+    'ttype': np.int32,
+    'benefit': np.int8,
+}
+# Dictionary each coded column indexes into
+DICTIONARIES = {
+    'committee': 'committee_ids',
+    'subject': 'committee_ids',
+    'entity': 'entity_ids',
+    'ttype': 'type_ids',
+}
+
+# COPY binary row: field count, then (length, value) per field, big-endian
+SOURCE_FIELDS = [
+    ('amount', '>i8', '(t.amount * 100)::bigint'),
+    ('day', '>i4', "(t.transaction_date - DATE '1970-01-01')"),
+    ('committee', '>i4', 't.committee_id'),
+    ('subject', '>i4', 'COALESCE(t.subject_committee_id, -1)'),
+    ('entity', '>i4', 't.entity_id'),
+    ('ttype', '>i4', 't.transaction_type_id'),
+    ('benefit', '>i2', 'CASE WHEN t.is_for_benefit THEN 1 WHEN NOT t.is_for_benefit THEN 0 ELSE -1 END::smallint'),
+]
+COPY_DTYPE = np.dtype(
+    [('fields', '>i2')]
+    + [item for name, dtype, _ in SOURCE_FIELDS for item in ((f'{name}_len', '>i4'), (name, dtype))]
+)
+COPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+COPY_BATCH_BYTES = 4 * 1024 * 1024
+
+# Per host: held while a background build runs, and set for
+# ANALYTICS_REBUILD_INTERVAL seconds after it ends
+BUILD_LOCK_KEY = 'analytics_build:{}'
+BUILT_KEY = 'analytics_built:{}'
+BUILD_LOCK_TIMEOUT = 3600
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+# ==================== SNAPSHOT ====================
+
+class TransactionSnapshot:
+    """Memory-mapped fact columns of one data version"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / 'meta.json').read_text())
+        self.version = self.meta['version']
+        for name in list(COLUMNS) + ['committee_ids', 'entity_ids', 'type_ids']:
+            setattr(self, name, np.load(self.path / f'{name}.npy', mmap_mode='r'))
+        self.rows = len(self.amount)
+
+    # ==================== SELECTION ====================
+
+    @staticmethod
+    def day_of(value):
+        """Day number of a date, datetime or ISO date string (as the ORM compares a DateField to it)"""
+        if isinstance(value, str):
+            value = date.fromisoformat(value[:10])
+        if isinstance(value, datetime):
+            value = timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+        return (value - EPOCH).days
+
+    def rows_between(self, first=None, last=None):
+        """Slice of the rows dated first..last (inclusive; None is open)"""
+        start = 0 if first is None else int(np.searchsorted(self.day, self.day_of(first), 'left'))
+        stop = self.rows if last is None else int(np.searchsorted(self.day, self.day_of(last), 'right'))
+        return slice(start, max(start, stop))
+
+    def selector(self, column, ids):
+        """Boolean table over column's codes (NULL slot last): True for ids"""
+        dictionary = getattr(self, DICTIONARIES[column])
+        table = np.zeros(len(dictionary) + 1, dtype=bool)
+        ids = np.asarray(list(ids), dtype=np.int64)
+        if len(ids) and len(dictionary):
+            codes = np.searchsorted(dictionary, ids)
+            found = codes < len(dictionary)
+            found[found] = dictionary[codes[found]] == ids[found]
+            table[codes[found]] = True
+        return table
+
+    def where(self, rows, has_subject=False, benefit=None, **ids):
+        """Mask over rows: has a subject committee, is_for_benefit is benefit (1/0/-1),
+        and column in ids for each coded column given (committee=[...], ttype=[...])"""
+        mask = np.ones(rows.stop - rows.start, dtype=bool)
+        if has_subject:
+            mask &= self.subject[rows] != len(self.committee_ids)
+        if benefit is not None:
+            mask &= self.benefit[rows] == benefit
+        for column, values in ids.items():
+            mask &= self.selector(column, values)[getattr(self, column)[rows]]
+        return mask
+
+    # ==================== KERNELS ====================
+
+    def group_sum(self, column, rows, where=None, absolute=False):
+        """GROUP BY column: (ids, sum of amount in cents, row count) of non-empty groups"""
+        codes = getattr(self, column)[rows]
+        amounts = self.amount[rows]
+        if where is not None:
+            codes = codes[where]
+            amounts = amounts[where]
+        if absolute:
+            amounts = np.abs(amounts)
+
+        dictionary = getattr(self, DICTIONARIES[column])
+        counts = np.bincount(codes, minlength=len(dictionary) + 1)[:len(dictionary)]
+        sums = np.bincount(codes, weights=amounts, minlength=len(dictionary) + 1)[:len(dictionary)]
+        present = np.flatnonzero(counts)
+        return dictionary[present], np.rint(sums[present]).astype(np.int64), counts[present]
+
+    def group_sum_pairs(self, column_a, column_b, rows, where=None):
+        """GROUP BY column_a, column_b: (a ids, b ids, sum in cents, row count) of non-empty groups"""
+        codes_a = getattr(self, column_a)[rows]
+        codes_b = getattr(self, column_b)[rows]
+        amounts = self.amount[rows]
+        if where is not None:
+            codes_a, codes_b, amounts = codes_a[where], codes_b[where], amounts[where]
+
+        dictionary_a = getattr(self, DICTIONARIES[column_a])
+        dictionary_b = getattr(self, DICTIONARIES[column_b])
+        width = len(dictionary_b) + 1
+        keys, groups = np.unique(codes_a.astype(np.int64) * width + codes_b, return_inverse=True)
+        sums = np.bincount(groups, weights=amounts, minlength=len(keys))
+        counts = np.bincount(groups, minlength=len(keys))
+
+        # Drop groups with a NULL on either side
+        a, b = keys // width, keys % width
+        keep = (a < len(dictionary_a)) & (b < len(dictionary_b))
+        return dictionary_a[a[keep]], dictionary_b[b[keep]], np.rint(sums[keep]).astype(np.int64), counts[keep]
+
+    def total(self, rows, where=None, absolute=False):
+        """(sum of amount in cents, row count)"""
+        amounts = self.amount[rows]
+        if where is not None:
+            amounts = amounts[where]
+        if absolute:
+            amounts = np.abs(amounts)
+        return int(amounts.sum()), len(amounts)
+
+    def distinct(self, column, rows, where=None):
+        """Sorted ids of column present in rows"""
+        codes = getattr(self, column)[rows]
+        if where is not None:
+            codes = codes[where]
+        dictionary = getattr(self, DICTIONARIES[column])
+        present = np.flatnonzero(np.bincount(codes, minlength=len(dictionary) + 1)[:len(dictionary)])
+        return dictionary[present]
+
+    @staticmethod
+    def top_k(values, k):
+        """Positions of the k largest values, largest first (ties by position)"""
+        if k < len(values):
+            candidates = np.argpartition(-values, k - 1)[:k]
+        else:
+            candidates = np.arange(len(values))
+        return candidates[np.lexsort((candidates, -values[candidates]))]
+
+
+def cents(value):
+    """Decimal dollars of an integer number of cents"""
+    return Decimal(int(value)).scaleb(-2)
+
+
+# ==================== LOOKUP ====================
+
+def snapshot():
+    """This process's snapshot for the current data version, or None (use SQL)"""
+    global _snapshot
+
+    if not settings.ANALYTICS_ENGINE:
+        return None
+
+    version = current_data_version()
+    current = _snapshot
+    if current is not None and current.version == version:
+        return current
+
+    path = snapshot_path(version)
+    if not (path / 'meta.json').exists():
+        _build_in_background()
+        return None
+
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = TransactionSnapshot(path)
+            logger.info(f"Analytics snapshot v{version} opened ({_snapshot.rows:,} rows)")
+        return _snapshot
+
+
+def snapshot_path(version):
+    return Path(settings.ANALYTICS_SNAPSHOT_DIR) / f'v{version}'
+
+
+def _build_in_background():
+    """
+    Build a snapshot of the current version, unless another worker on this
+    host is building one or the last build ended less than
+    ANALYTICS_REBUILD_INTERVAL seconds ago
+    """
+    host = socket.gethostname()
+    if cache.get(BUILT_KEY.format(host)) is not None:
+        return
+    lock_key = BUILD_LOCK_KEY.format(host)
+    if not cache.add(lock_key, os.getpid(), timeout=BUILD_LOCK_TIMEOUT):
+        return
+
+    def run():
+        try:
+            build()
+            prune()
+        except Exception as e:
+            logger.error(f"Analytics snapshot build failed: {e}", exc_info=True)
+        finally:
+            # Failed builds wait out the interval too, rather than retry per request
+            cache.set(BUILT_KEY.format(host), time.time(), timeout=settings.ANALYTICS_REBUILD_INTERVAL)
+            cache.delete(lock_key)
+            connection.close()
+
+    threading.Thread(target=run, name='analytics-snapshot', daemon=True).start()
+
+
+# ==================== BUILD ====================
+
+class _CopyDecoder:
+    """File-like target for COPY (FORMAT binary): decodes rows into column chunks"""
+
+    def __init__(self):
+        self.pending = []
+        self.pending_bytes = 0
+        self.buffer = bytearray()
+        self.header_read = False
+        self.chunks = {name: [] for name, _, _ in SOURCE_FIELDS}
+
+    def write(self, data):
+        # psycopg2 writes one row at a time: decode in batches
+        self.pending.append(data)
+        self.pending_bytes += len(data)
+        if self.pending_bytes >= COPY_BATCH_BYTES:
+            self._decode()
+        return len(data)
+
+    def _decode(self):
+        self.buffer += b''.join(self.pending)
+        self.pending = []
+        self.pending_bytes = 0
+        if not self.header_read:
+            if len(self.buffer) < 19:
+                return
+            if bytes(self.buffer[:11]) != COPY_SIGNATURE:
+                raise ValueError('Not a PostgreSQL binary COPY stream')
+            extension = int.from_bytes(self.buffer[15:19], 'big')
+            del self.buffer[:19 + extension]
+            self.header_read = True
+
+        complete = len(self.buffer) // COPY_DTYPE.itemsize
+        if complete:
+            records = np.frombuffer(bytes(self.buffer[:complete * COPY_DTYPE.itemsize]), dtype=COPY_DTYPE)
+            del self.buffer[:complete * COPY_DTYPE.itemsize]
+            if (records['fields'] != len(SOURCE_FIELDS)).any():
+                raise ValueError('Unexpected field count in COPY stream')
+            for name, _, _ in SOURCE_FIELDS:
+                self.chunks[name].append(records[name].astype(COLUMNS[name]))
+
+    def columns(self):
+        self._decode()
+        # What is left is the trailer (-1 as int16)
+        if bytes(self.buffer) != b'\xff\xff':
+            raise ValueError('Truncated COPY stream')
+        return {
+            name: np.concatenate(chunks) if chunks else np.empty(0, dtype=COLUMNS[name])
+            for name, chunks in self.chunks.items()
+        }
+
+
+def read_columns(cursor, table='"Transactions"'):
+    """Fact columns of the active rows of table (same columns as "Transactions")"""
+    decoder = _CopyDecoder()
+    select = ', '.join(expression for _, _, expression in SOURCE_FIELDS)
+    cursor.copy_expert(
+        f'COPY (SELECT {select} FROM {table} t WHERE NOT t.deleted) TO STDOUT (FORMAT binary)',
+        decoder,
+    )
+    return decoder.columns()
+
+
+def write_snapshot(path, raw, version):
+    """Encode raw id columns, sort by day and save; returns the row count"""
+    path = Path(path)
+    tmp = path.parent / f'.building-{uuid.uuid4().hex}'
+    tmp.mkdir(parents=True)
+    try:
+        order = np.argsort(raw['day'], kind='stable')
+
+        committee_ids = np.unique(np.concatenate([raw['committee'], raw['subject'][raw['subject'] >= 0]]))
+        entity_ids = np.unique(raw['entity'])
+        type_ids = np.unique(raw['ttype'])
+
+        subject = raw['subject'][order]
+        subject_codes = np.searchsorted(committee_ids, subject).astype(np.int32)
+        subject_codes[subject < 0] = len(committee_ids)
+
+        arrays = {
+            'amount': raw['amount'][order],
+            'day': raw['day'][order],
+            'committee': np.searchsorted(committee_ids, raw['committee'][order]).astype(np.int32),
+            'subject': subject_codes,
+            'entity': np.searchsorted(entity_ids, raw['entity'][order]).astype(np.int32),
+            'ttype': np.searchsorted(type_ids, raw['ttype'][order]).astype(np.int32),
+            'benefit': raw['benefit'][order].astype(np.int8),
+            'committee_ids': committee_ids.astype(np.int32),
+            'entity_ids': entity_ids.astype(np.int32),
+            'type_ids': type_ids.astype(np.int32),
+        }
+        for name, array in arrays.items():
+            np.save(tmp / f'{name}.npy', array)
+
+        (tmp / 'meta.json').write_text(json.dumps({
+            'version': version,
+            'rows': len(order),
+            'built_at': timezone.now().isoformat(),
+        }))
+
+        if path.exists():
+            shutil.rmtree(tmp)
+        else:
+            os.rename(tmp, path)
+        return len(order)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def build():
+    """Snapshot "Transactions" under the data version it matches; returns (version, rows)"""
+    start = time.perf_counter()
+    with transaction.atomic(), connection.cursor() as cursor:
+        # The columns and the version come from the same snapshot of the data
+        cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        cursor.execute('SELECT version FROM data_version WHERE id = 1')
+        row = cursor.fetchone()
+        version = row[0] if row else 0
+        raw = read_columns(cursor)
+
+    rows = write_snapshot(snapshot_path(version), raw, version)
+    logger.info(f"Analytics snapshot v{version}: {rows:,} rows in {time.perf_counter() - start:.1f}s")
+    return version, rows
+
+
+def prune(keep=None):
+    """Delete all but the newest `keep` snapshots; returns the versions deleted"""
+    keep = keep or settings.ANALYTICS_SNAPSHOTS_KEPT
+    root = Path(settings.ANALYTICS_SNAPSHOT_DIR)
+    if not root.exists():
+        return []
+    versions = sorted(
+        int(p.name[1:]) for p in root.iterdir()
+        if p.is_dir() and p.name.startswith('v') and p.name[1:].isdigit()
+    )
+    deleted = versions[:-keep]
+    for version in deleted:
+        # Workers still mapping these files keep them until they reopen
+        shutil.rmtree(root / f'v{version}', ignore_errors=True)
+    return deleted
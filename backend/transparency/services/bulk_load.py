@@ -0,0 +1,276 @@
+"""
+Bulk-load mode for "Transactions": suspend the secondary indexes during a
+large import and rebuild them afterwards.
+
+Every row an import writes updates each non-unique index of "Transactions"
+(Meta.indexes plus one per foreign key, over thirty in all). For a load that
+is a large share of the table, dropping them and building them again in one
+sorted pass per index is cheaper than maintaining them row by row.
+
+    suspend_indexes()   records each non-unique secondary index (name,
+                        pg_get_indexdef, size) in transactions_index_manifest
+                        and drops it, in one database transaction
+    rebuild_indexes()   recreates the indexes listed in the manifest,
+                        `workers` at a time on separate connections, sharing a
+                        maintenance_work_mem budget; each index is created and
+                        its manifest row deleted in one database transaction
+
+The primary key and unique indexes stay, so the upsert's lookups by
+transaction_id and track_transaction_changes() keep their index. Queries that
+relied on a suspended index are slower until the rebuild.
+
+The manifest is the recovery record: if an import dies between the two steps,
+the indexes it dropped are still listed there and `transaction_indexes
+--restore` (or the next --bulk-load import) builds them.
+
+On a partitioned "Transactions" each index is a partitioned index with one
+copy per partition. The manifest records the copies under their own names
+(parent_index set), and the rebuild does what pg_dump does: the parent index
+is created ON ONLY the parent, and the copies are built in parallel and
+attached to it. The parent becomes valid once every partition has its copy.
+Building the parents with a plain CREATE INDEX instead would name the copies
+automatically, and concurrent builds over the same columns race for the same
+generated name.
+
+probe_insert() times a rolled-back insert of recent transactions; run with
+and without the indexes, it gives the per-row index maintenance cost used to
+estimate what the load would have taken in place.
+
+Usage:
+    suspended = suspend_indexes(import_batch_id=batch.batch_id)
+    try:
+        ...  # load
+    finally:
+        rebuilt = rebuild_indexes(workers=4, maintenance_work_mem_mb=1024)
+"""
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connection, transaction
+from transparency.services.partitioning import PARENT, quote
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'transactions_index_manifest'
+
+# Rows below which --bulk-load keeps the indexes in place
+DEFAULT_THRESHOLD = 100000
+
+# Floor of each build's share of the maintenance_work_mem budget
+MIN_WORK_MEM_MB = 64
+
+SuspendedIndex = namedtuple('SuspendedIndex', ['name', 'definition', 'bytes', 'parent'])
+
+
+def secondary_indexes(cursor):
+    """
+    SuspendedIndex for each non-unique index of "Transactions", then for each
+    partition's copy of them (parent set), largest first.
+    """
+    cursor.execute("""
+        WITH secondary AS (
+            SELECT i.indexrelid, c.relname
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE i.indrelid = to_regclass(%s)
+              AND NOT i.indisunique
+              AND NOT i.indisprimary
+              AND NOT i.indisexclusion
+        )
+        SELECT relname, pg_get_indexdef(indexrelid),
+               (SELECT COALESCE(SUM(pg_relation_size(p.relid)), 0)
+                FROM pg_partition_tree(indexrelid) p),
+               NULL
+        FROM secondary
+        UNION ALL
+        SELECT c.relname, pg_get_indexdef(p.relid), pg_relation_size(p.relid), s.relname
+        FROM secondary s
+        CROSS JOIN pg_partition_tree(s.indexrelid) p
+        JOIN pg_class c ON c.oid = p.relid
+        WHERE p.parentrelid = s.indexrelid
+    """, [quote(PARENT)])
+    rows = sorted(cursor.fetchall(), key=lambda r: (r[3] is not None, -r[2], r[0]))
+    return [SuspendedIndex(*row) for row in rows]
+
+
+def suspended(cursor):
+    """SuspendedIndex for each index in the manifest, parents first, largest first"""
+    cursor.execute(f"""
+        SELECT index_name, definition, bytes, parent_index FROM {MANIFEST}
+        ORDER BY parent_index IS NOT NULL, bytes DESC, index_name
+    """)
+    return [SuspendedIndex(*row) for row in cursor.fetchall()]
+
+
+def _partitioned(index):
+    # pg_get_indexdef of a partitioned index reads "ON ONLY"
+    return ' ON ONLY ' in index.definition
+
+
+def _exists(cursor, name):
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [quote(name)])
+    return cursor.fetchone()[0]
+
+
+# ==================== SUSPEND / REBUILD ====================
+
+def suspend_indexes(import_batch_id=None):
+    """Drop the secondary indexes of "Transactions", recording them first; returns them"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        # One lock up front rather than one per DROP INDEX
+        cursor.execute(f'LOCK TABLE {quote(PARENT)} IN ACCESS EXCLUSIVE MODE')
+        indexes = secondary_indexes(cursor)
+        for index in indexes:
+            cursor.execute(f"""
+                INSERT INTO {MANIFEST} (index_name, definition, bytes, parent_index, import_batch_id)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (index_name) DO NOTHING
+            """, [index.name, index.definition, index.bytes, index.parent, import_batch_id])
+        # Dropping a partitioned index drops its partitions' copies
+        for index in indexes:
+            if index.parent is None:
+                cursor.execute(f'DROP INDEX {quote(index.name)}')
+    suspended = [index for index in indexes if index.parent is None]
+    logger.info(f'Suspended {len(suspended)} indexes on "{PARENT}"')
+    return suspended
+
+
+def rebuild_indexes(workers=4, maintenance_work_mem_mb=1024, progress=None):
+    """
+    Recreate the indexes listed in the manifest; returns [(name, seconds)].
+
+    Builds (the partitions' copies of a partitioned index, or the index
+    itself) run `workers` at a time, largest first; each gets an equal share
+    of maintenance_work_mem_mb. Concurrent CREATE INDEX statements on one
+    table take SHARE locks, which do not conflict with each other. seconds
+    adds up the builds of an index; progress(label, seconds) is called after
+    each build. Indexes that fail stay in the manifest and the first error is
+    raised once the others are done.
+    """
+    with connection.cursor() as cursor:
+        indexes = suspended(cursor)
+    if not indexes:
+        return []
+
+    # Partitioned parents are created empty (ON ONLY) before their copies
+    parents = [index for index in indexes if index.parent is None and _partitioned(index)]
+    with transaction.atomic(), connection.cursor() as cursor:
+        for index in parents:
+            if not _exists(cursor, index.name):
+                cursor.execute(index.definition)
+
+    pending = [index for index in indexes if index not in parents][::-1]
+    workers = max(1, min(workers, len(pending)))
+    work_mem_mb = max(maintenance_work_mem_mb // workers, MIN_WORK_MEM_MB)
+    built = {}
+    errors = []
+    lock = threading.Lock()
+
+    def drain():
+        # Each pool thread builds from the queue on one database connection
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"SET maintenance_work_mem = '{work_mem_mb}MB'")
+            while True:
+                with lock:
+                    if not pending:
+                        return
+                    index = pending.pop()
+                start = time.perf_counter()
+                try:
+                    _rebuild_one(index)
+                except Exception as e:
+                    logger.error(f'Rebuilding {index.name} failed: {e}')
+                    with lock:
+                        errors.append((index.name, e))
+                    continue
+                seconds = time.perf_counter() - start
+                name = index.parent or index.name
+                with lock:
+                    built[name] = built.get(name, 0) + seconds
+                if progress:
+                    progress(f'{name} ({index.name})' if index.parent else name, seconds)
+        finally:
+            connection.close()
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(drain) for _ in range(workers)]:
+                future.result()
+
+    for index in parents:
+        try:
+            if not _finish_parent(index):
+                built.pop(index.name, None)
+        except Exception as e:
+            logger.error(f'Rebuilding {index.name} failed: {e}')
+            errors.append((index.name, e))
+            built.pop(index.name, None)
+
+    if built:
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {quote(PARENT)}')
+    if errors:
+        name, error = errors[0]
+        raise ValueError(
+            f'{len(errors)} indexes not rebuilt (still in {MANIFEST}); {name}: {error}'
+        )
+    return list(built.items())
+
+
+def _rebuild_one(index):
+    """Build one index (attaching a partition's copy to its parent); drop its manifest row"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not _exists(cursor, index.name):
+            cursor.execute(index.definition)
+            if index.parent is not None:
+                cursor.execute(f'ALTER INDEX {quote(index.parent)} ATTACH PARTITION {quote(index.name)}')
+        cursor.execute(f'DELETE FROM {MANIFEST} WHERE index_name = %s', [index.name])
+
+
+def _finish_parent(index):
+    """Drop a partitioned index's manifest row once every partition has its copy"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'SELECT 1 FROM {MANIFEST} WHERE parent_index = %s LIMIT 1', [index.name])
+        if cursor.fetchone():
+            return False
+        cursor.execute(
+            'SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)', [quote(index.name)]
+        )
+        if not cursor.fetchone()[0]:
+            # A partition created while suspended has no copy: build the index whole
+            cursor.execute(f'DROP INDEX {quote(index.name)}')
+            cursor.execute(index.definition.replace(' ON ONLY ', ' ON ', 1))
+        cursor.execute(f'DELETE FROM {MANIFEST} WHERE index_name = %s', [index.name])
+    return True
+
+
+# ==================== IN-PLACE ESTIMATE ====================
+
+def probe_insert(sample_rows=5000):
+    """
+    (rows, seconds) to insert copies of the newest transactions, rolled back.
+
+    The copies get negated ids, so they never collide with stored rows; the
+    sample is staged before the clock starts, so only the INSERT is timed.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                CREATE TEMP TABLE index_probe ON COMMIT DROP AS
+                SELECT * FROM {quote(PARENT)}
+                WHERE transaction_id > 0
+                ORDER BY transaction_id DESC
+                LIMIT %s
+            """, [sample_rows])
+            rows = cursor.rowcount
+            cursor.execute('UPDATE index_probe SET transaction_id = -transaction_id')
+
+            start = time.perf_counter()
+            cursor.execute(f'INSERT INTO {quote(PARENT)} SELECT * FROM index_probe')
+            seconds = time.perf_counter() - start
+        transaction.set_rollback(True)
+    return rows, seconds
@@ -0,0 +1,229 @@
+"""
+Cache warm-up after imports and materialized view refreshes.
+
+An import or a refresh moves the data version, so every cached response is
+missed at once and the first visitor to each page pays its full query cost.
+warm() requests the pages visitors hit first, so they are computed once, in
+the background, and cached under the new version:
+
+    dashboard   dashboard/extreme, spending-trends, summary-optimized,
+                charts-data, recent-expenditures and the SOI stats
+    lists       the first CACHE_WARM_PAGES pages of candidates, donors,
+                expenditures and SOI candidates, at the frontend's page size
+    races       the candidate list and money flow graph of each active race:
+                office x cycle pairs with candidate committees in the latest
+                CACHE_WARM_CYCLES cycles, most committees first, at most
+                CACHE_WARM_RACES of them
+
+Each page goes through its view (resolved from the URL), so it is cached
+under exactly the key a visitor's request looks up. Pages are requested by
+CACHE_WARM_WORKERS threads, each with its own database connection. List
+pages past the last page (404) are skipped rather than counted as failures.
+
+Usage:
+    report = warm()                 # blocks; see WarmupReport
+    warm_in_background()            # after a refresh from an API request
+"""
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+from django.test import RequestFactory
+from django.urls import resolve
+from transparency.models import Committee, Cycle
+from transparency.utils.data_version import reload_data_version
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+API_ROOT = '/api/v1/'
+
+# Rows per page the frontend requests (Candidates.jsx, Donors.jsx, ...)
+LIST_PAGE_SIZE = 10
+
+DASHBOARD_PAGES = [
+    ('dashboard/extreme/', {}),
+    ('dashboard/spending-trends/', {}),
+    ('dashboard/summary-optimized/', {}),
+    ('dashboard/charts-data/', {}),
+    ('dashboard/recent-expenditures/', {'limit': 10}),
+    ('soi/dashboard-stats/', {}),
+]
+
+LIST_ENDPOINTS = ['candidates/', 'donors/', 'expenditures/', 'soi/candidates/']
+
+WarmRequest = namedtuple('WarmRequest', ['group', 'path', 'params'])
+WarmResult = namedtuple('WarmResult', ['request', 'status', 'ms', 'error'])
+
+# Only one warm-up at a time per process
+_running = threading.Lock()
+
+
+# ==================== HOT KEY SPACE ====================
+
+def active_races(cycles=None, limit=None):
+    """(office_id, cycle_id) of the races worth warming, busiest first"""
+    cycles = cycles or settings.CACHE_WARM_CYCLES
+    limit = limit or settings.CACHE_WARM_RACES
+    recent = Cycle.objects.order_by('-begin_date', '-cycle_id').values_list('cycle_id', flat=True)[:cycles]
+    races = (
+        Committee.objects
+        .filter(candidate__isnull=False, candidate_office__isnull=False, election_cycle__in=list(recent))
+        .values('candidate_office', 'election_cycle')
+        .annotate(committees=Count('committee_id'))
+        .order_by('-committees', 'candidate_office', 'election_cycle')
+    )[:limit]
+    return [(race['candidate_office'], race['election_cycle']) for race in races]
+
+
+def hot_requests(pages=None, races=None):
+    """The requests warm() makes, dashboard first"""
+    pages = pages or settings.CACHE_WARM_PAGES
+    requests = [WarmRequest('dashboard', path, params) for path, params in DASHBOARD_PAGES]
+
+    for path in LIST_ENDPOINTS:
+        for page in range(1, pages + 1):
+            requests.append(WarmRequest('lists', path, {'page': page, 'page_size': LIST_PAGE_SIZE}))
+
+    for office_id, cycle_id in active_races(limit=races):
+        requests.append(WarmRequest('races', 'candidates/', {
+            'office_id': office_id, 'cycle': cycle_id, 'page': 1, 'page_size': LIST_PAGE_SIZE,
+        }))
+        requests.append(WarmRequest('races', 'races/detailed-money-flow/', {
+            'office_id': office_id, 'cycle_id': cycle_id,
+        }))
+
+    return requests
+
+
+# ==================== WARMING ====================
+
+class WarmupReport:
+    """Results of one warm-up, by group"""
+
+    def __init__(self, results, seconds):
+        self.results = results
+        self.seconds = seconds
+
+    @property
+    def skipped(self):
+        """List pages past the last page (404)"""
+        return [r for r in self.results if r.status == 404]
+
+    @property
+    def failed(self):
+        return [r for r in self.results if r.error or r.status not in (200, 404)]
+
+    @property
+    def coverage(self):
+        """Fraction of the existing hot pages that are now cached"""
+        existing = len(self.results) - len(self.skipped)
+        if not existing:
+            return 1.0
+        return 1 - len(self.failed) / existing
+
+    def groups(self):
+        """{group: (existing pages, warmed, total ms, slowest ms)}"""
+        summary = {}
+        for r in self.results:
+            count, ok, total, slowest = summary.get(r.request.group, (0, 0, 0.0, 0.0))
+            summary[r.request.group] = (
+                count + (r.status != 404),
+                ok + (r.status == 200 and not r.error),
+                total + r.ms,
+                max(slowest, r.ms),
+            )
+        return summary
+
+    def summary(self):
+        existing = len(self.results) - len(self.skipped)
+        return (
+            f"{existing - len(self.failed)}/{existing} pages cached "
+            f"({self.coverage * 100:.0f}%) in {self.seconds:.1f}s"
+        )
+
+
+def warm(workers=None, pages=None, races=None):
+    """Request every hot page with bounded parallelism; returns a WarmupReport"""
+    start = time.perf_counter()
+
+    # A refresh in this process just moved the version: cache under the new one
+    reload_data_version()
+
+    requests = hot_requests(pages=pages, races=races)
+    results = [None] * len(requests)
+    pending = list(enumerate(requests))[::-1]
+    lock = threading.Lock()
+
+    def drain():
+        # Each pool thread works through the queue on one database connection
+        try:
+            while True:
+                with lock:
+                    if not pending:
+                        return
+                    i, request = pending.pop()
+                results[i] = _warm_one(request)
+        finally:
+            connection.close()
+
+    workers = workers or settings.CACHE_WARM_WORKERS
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(drain) for _ in range(workers)]:
+            future.result()
+
+    report = WarmupReport(results, time.perf_counter() - start)
+    logger.info(f"Cache warm-up: {report.summary()}")
+    for r in report.failed:
+        logger.warning(f"Cache warm-up failed: {r.request.path} {r.request.params}: {r.error or r.status}")
+    return report
+
+
+def warm_in_background():
+    """warm() in a daemon thread, unless one is already running in this process"""
+    if not _running.acquire(blocking=False):
+        logger.info("Cache warm-up already running")
+        return False
+
+    def run():
+        try:
+            warm()
+        except Exception as e:
+            logger.error(f"Cache warm-up failed: {e}", exc_info=True)
+        finally:
+            connection.close()
+            _running.release()
+
+    threading.Thread(target=run, name='cache-warmup', daemon=True).start()
+    return True
+
+
+def after_refresh(stdout=None):
+    """The post-refresh hook: warm the cache if CACHE_WARM_AFTER_REFRESH is set
+
+    With stdout (a management command), warms now and writes the summary;
+    otherwise warms in the background.
+    """
+    if not settings.CACHE_WARM_AFTER_REFRESH:
+        return None
+    if stdout is None:
+        warm_in_background()
+        return None
+    report = warm()
+    stdout.write(f'Cache warm-up: {report.summary()}')
+    return report
+
+
+def _warm_one(request):
+    start = time.perf_counter()
+    try:
+        path = API_ROOT + request.path
+        match = resolve(path)
+        response = match.func(RequestFactory().get(path, request.params), *match.args, **match.kwargs)
+        return WarmResult(request, response.status_code, (time.perf_counter() - start) * 1000, None)
+    except Exception as e:
+        return WarmResult(request, None, (time.perf_counter() - start) * 1000, str(e))
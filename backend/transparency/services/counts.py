@@ -0,0 +1,112 @@
+"""
+Result counts for paginated listings without a COUNT(*) per request.
+
+A page of 25 rows is cheap; counting every matching row behind it is not
+(expenditures_list counted "Transactions" joined to "Committees" and "Names"
+twice on every uncached call). Counts come from, cheapest first:
+
+    counter_count()   exact, from transaction_counts: rows per committee,
+                      income/expense/neutral type and IE flag, kept current
+                      by track_transaction_changes() (incremental_aggregates)
+    search_count()    for anything else: the planner's row estimate when it
+                      is above COUNT_ESTIMATE_THRESHOLD (approximate=True),
+                      otherwise an exact COUNT(*)
+
+Both are cached under the current data version, so a page walk counts once
+and a committed import recounts. COUNT_CACHE_TIMEOUT bounds how long counts
+over tables the data version does not track (e.g. "Committees") can lag.
+
+Usage:
+    result = counter_count(ie_only=True)
+    result = queryset_count(Committee.objects.filter(...))
+    response['count'], response['count_approximate'] = result
+"""
+
+from collections import namedtuple
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from transparency.utils.data_version import get_data_version
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+CountResult = namedtuple('CountResult', ['count', 'approximate'])
+
+
+def cached_count(name, compute):
+    """compute() -> CountResult, cached under name for the current data version"""
+    key = f'count_{name}_v{get_data_version()}'
+    result = cache.get(key)
+    if result is None:
+        result = CountResult(*compute())
+        cache.set(key, tuple(result), timeout=settings.COUNT_CACHE_TIMEOUT)
+    return CountResult(*result)
+
+
+# ==================== MAINTAINED COUNTERS ====================
+
+def counter_count(committee_id=None, income_expense_neutral=None, ie_only=False):
+    """Exact count of active transactions, optionally narrowed to a committee, type or IEs"""
+    conditions, params = [], []
+    if committee_id is not None:
+        conditions.append('committee_id = %s')
+        params.append(int(committee_id))
+    if income_expense_neutral is not None:
+        conditions.append('income_expense_neutral = %s')
+        params.append(income_expense_neutral)
+    if ie_only:
+        conditions.append('is_ie')
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+    def compute():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COALESCE(SUM(transaction_count), 0) FROM transaction_counts {where_sql}",
+                params
+            )
+            return CountResult(int(cursor.fetchone()[0]), False)
+
+    name = f'txn_c{committee_id}_t{income_expense_neutral}_ie{int(bool(ie_only))}'
+    return cached_count(name, compute)
+
+
+# ==================== SEARCHES ====================
+
+def estimate_rows(sql, params=None):
+    """Rows the planner expects sql to return (EXPLAIN, nothing is executed)"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params or [])
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def search_count(sql, params=None, name=None):
+    """
+    Count the rows of the query sql: estimated above COUNT_ESTIMATE_THRESHOLD,
+    exact below it. Cached under name (default: a hash of sql and params).
+    """
+    params = list(params or [])
+    if name is None:
+        name = hashlib.md5(repr((sql, params)).encode('utf-8')).hexdigest()
+
+    def compute():
+        estimate = estimate_rows(sql, params)
+        if estimate > settings.COUNT_ESTIMATE_THRESHOLD:
+            logger.debug(f"Count estimated at {estimate:,} rows for {name}")
+            return CountResult(estimate, True)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM ({sql}) counted', params)
+            return CountResult(cursor.fetchone()[0], False)
+
+    return cached_count(name, compute)
+
+
+def queryset_count(queryset):
+    """search_count() for the rows of a queryset (ordering and columns dropped)"""
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    return search_count(sql, params)
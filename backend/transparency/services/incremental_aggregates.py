@@ -0,0 +1,592 @@
+"""
+Incremental maintenance of the dashboard aggregates.
+
+The dashboard reads dashboard_aggregations, ie_benefit_breakdown, top_donors_mv,
+mv_dashboard_top_ie_committees and race_ie_spending. Refreshing those as
+materialized views rescans all of "Transactions". The summary tables below hold
+the same aggregates keyed like those views; once installed, the five names
+become plain views over them.
+
+Writers wrap their changes in track_transaction_changes(). Before the change
+it snapshots the affected transactions with sign -1. After the change it
+snapshots the same ids with sign +1. The signed sums are then added to the
+summary tables. Unchanged rows cancel out, so the cost is proportional to the
+number of rows touched rather than the size of the table.
+
+committee_financial_rollup (CommitteeFinancialRollup) is maintained the same
+way and backs the Committee income/expense/IE methods; transaction_counts
+holds the row counts behind paginated listings (see services/counts.py).
+ie_fact (IEFact) holds one resolved row per live IE: its rows for the tracked
+ids are replaced after the change. agg_ie_by_subject and agg_ie_by_spender are
+sums over the same rows, so the views and ie_fact cannot disagree on IE totals
+(--check recomputes them from ie_fact). create_dashboard_views leaves the
+installed views alone.
+
+Usage:
+    with track_transaction_changes('SELECT transaction_id FROM import_staging'):
+        ...  # insert / update / delete transactions
+
+    python manage.py incremental_aggregates --rebuild --install-views
+    python manage.py incremental_aggregates --check
+"""
+
+from contextlib import contextmanager
+from django.db import connection, transaction
+from transparency.utils.data_version import bump_data_version
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# ie_fact comes first: the IE aggregates are recomputed from it
+SUMMARY_TABLES = [
+    'ie_fact', 'agg_ie_by_subject', 'agg_ie_by_spender', 'agg_donor_totals',
+    'committee_financial_rollup', 'transaction_counts',
+]
+
+ROLLUP_COLUMNS = [
+    'committee_id', 'cycle_key', 'total_income', 'total_expenses', 'ie_for', 'ie_against',
+    'income_count', 'expense_count', 'ie_for_count', 'ie_against_count',
+]
+
+
+def rollup_sql(source, sign, where=''):
+    """
+    committee_financial_rollup rows (ROLLUP_COLUMNS order) summed over source.
+
+    Each transaction counts toward its committee's income or expenses and,
+    as an IE, toward its subject committee's for/against totals; each of
+    those lands in the all-cycles row (cycle_key 0) and in the row of its
+    Transaction.cycle (one cycle, as for ie_fact and the race queries).
+    """
+    return f"""
+        WITH facts AS (
+            SELECT {sign} AS sign, t.committee_id, t.cycle_id,
+                   CASE WHEN tt.income_expense_neutral = 1 THEN t.amount ELSE 0 END AS income,
+                   CASE WHEN tt.income_expense_neutral = 2 THEN t.amount ELSE 0 END AS expenses,
+                   0 AS ie_for, 0 AS ie_against,
+                   CASE WHEN tt.income_expense_neutral = 1 THEN 1 ELSE 0 END AS income_n,
+                   CASE WHEN tt.income_expense_neutral = 2 THEN 1 ELSE 0 END AS expense_n,
+                   0 AS ie_for_n, 0 AS ie_against_n
+            FROM {source} t
+            JOIN "TransactionTypes" tt ON tt.transaction_type_id = t.transaction_type_id
+            WHERE tt.income_expense_neutral IN (1, 2) {where}
+            UNION ALL
+            SELECT {sign}, t.subject_committee_id, t.cycle_id,
+                   0, 0,
+                   CASE WHEN t.is_for_benefit THEN t.amount ELSE 0 END,
+                   CASE WHEN NOT t.is_for_benefit THEN t.amount ELSE 0 END,
+                   0, 0,
+                   CASE WHEN t.is_for_benefit THEN 1 ELSE 0 END,
+                   CASE WHEN NOT t.is_for_benefit THEN 1 ELSE 0 END
+            FROM {source} t
+            WHERE t.subject_committee_id IS NOT NULL AND t.is_for_benefit IS NOT NULL {where}
+        ),
+        keyed AS (
+            SELECT f.*, 0 AS cycle_key FROM facts f
+            UNION ALL
+            SELECT f.*, f.cycle_id FROM facts f WHERE f.cycle_id IS NOT NULL
+        )
+        SELECT committee_id, cycle_key,
+               SUM(sign * income), SUM(sign * expenses),
+               SUM(sign * ie_for), SUM(sign * ie_against),
+               SUM(sign * income_n), SUM(sign * expense_n),
+               SUM(sign * ie_for_n), SUM(sign * ie_against_n)
+        FROM keyed
+        GROUP BY committee_id, cycle_key
+        HAVING SUM(sign * income_n) <> 0 OR SUM(sign * expense_n) <> 0
+            OR SUM(sign * ie_for_n) <> 0 OR SUM(sign * ie_against_n) <> 0
+            OR SUM(sign * income) <> 0 OR SUM(sign * expenses) <> 0
+            OR SUM(sign * ie_for) <> 0 OR SUM(sign * ie_against) <> 0
+    """
+
+IE_FACT_COLUMNS = [
+    'transaction_id', 'committee_id', 'subject_committee_id', 'office_id', 'party_id',
+    'cycle_id', 'transaction_type_id', 'is_for_benefit', 'amount_cents', 'negative',
+    'transaction_date',
+]
+
+
+def ie_fact_sql(where=''):
+    """ie_fact rows (IE_FACT_COLUMNS order) of the live IEs in "Transactions" matching where"""
+    return f"""
+        SELECT t.transaction_id, t.committee_id, t.subject_committee_id,
+               sc.candidate_office_id, sc.candidate_party_id, t.cycle_id,
+               t.transaction_type_id, t.is_for_benefit,
+               (ABS(t.amount) * 100)::bigint, t.amount < 0, t.transaction_date
+        FROM "Transactions" t
+        JOIN "Committees" sc ON sc.committee_id = t.subject_committee_id
+        WHERE t.subject_committee_id IS NOT NULL AND t.deleted = false {where}
+    """
+
+# Full recompute of each summary table; shared by rebuild and check. The IE
+# aggregates are sums over ie_fact, so every IE figure has one source of rows.
+# benefit encodes is_for_benefit as 1 (for), 0 (against) or -1 (unknown) so it can be a key.
+FULL_RECOMPUTE_SQL = {
+    'agg_ie_by_subject': """
+        SELECT
+            f.subject_committee_id,
+            CASE WHEN f.is_for_benefit THEN 1 WHEN NOT f.is_for_benefit THEN 0 ELSE -1 END AS benefit,
+            SUM(CASE WHEN f.negative THEN -f.amount_cents ELSE f.amount_cents END) / 100.0 AS total_amount,
+            SUM(f.amount_cents) / 100.0 AS total_abs_amount,
+            COUNT(*) AS transaction_count
+        FROM ie_fact f
+        GROUP BY 1, 2
+    """,
+    'agg_ie_by_spender': """
+        SELECT
+            f.committee_id,
+            SUM(CASE WHEN f.negative THEN -f.amount_cents ELSE f.amount_cents END) / 100.0 AS total_amount,
+            SUM(f.amount_cents) / 100.0 AS total_abs_amount,
+            COUNT(*) AS transaction_count
+        FROM ie_fact f
+        GROUP BY 1
+    """,
+    'agg_donor_totals': """
+        SELECT
+            t.entity_id,
+            SUM(t.amount) AS total_contributed,
+            SUM(ABS(t.amount)) AS total_abs_contributed,
+            COUNT(*) AS contribution_count
+        FROM "Transactions" t
+        JOIN "TransactionTypes" tt ON tt.transaction_type_id = t.transaction_type_id
+        WHERE tt.income_expense_neutral = 1 AND t.deleted = false
+        GROUP BY 1
+    """,
+    'transaction_counts': """
+        SELECT
+            t.committee_id,
+            tt.income_expense_neutral,
+            t.subject_committee_id IS NOT NULL AS is_ie,
+            COUNT(*) AS transaction_count
+        FROM "Transactions" t
+        JOIN "TransactionTypes" tt ON tt.transaction_type_id = t.transaction_type_id
+        WHERE t.deleted = false
+        GROUP BY 1, 2, 3
+    """,
+}
+
+FULL_RECOMPUTE_SQL['committee_financial_rollup'] = rollup_sql(
+    '"Transactions"', '1', 'AND t.deleted = false'
+)
+FULL_RECOMPUTE_SQL['ie_fact'] = ie_fact_sql()
+
+SUMMARY_KEYS = {
+    'agg_ie_by_subject': ['subject_committee_id', 'benefit'],
+    'agg_ie_by_spender': ['committee_id'],
+    'agg_donor_totals': ['entity_id'],
+    'committee_financial_rollup': ['committee_id', 'cycle_key'],
+    'transaction_counts': ['committee_id', 'income_expense_neutral', 'is_ie'],
+    'ie_fact': ['transaction_id'],
+}
+
+# Columns compared and loaded, where a table has more than its aggregates (e.g. an id)
+SUMMARY_COLUMNS = {
+    'committee_financial_rollup': ROLLUP_COLUMNS,
+    'ie_fact': IE_FACT_COLUMNS,
+}
+
+# Plain views replacing the materialized views, with the same names and columns
+VIEW_DEFINITIONS = {
+    'dashboard_aggregations': """
+        SELECT
+            (SELECT COALESCE(SUM(total_amount), 0) FROM agg_ie_by_subject) as total_ie_spending,
+            (SELECT COUNT(*) FROM "Committees" WHERE candidate_id IS NOT NULL) as candidate_committees,
+            (SELECT COALESCE(SUM(transaction_count), 0) FROM agg_ie_by_subject) as num_expenditures,
+            (SELECT COUNT(*) FROM candidate_soi) as soi_total,
+            (SELECT COUNT(*) FROM candidate_soi WHERE contact_status = 'uncontacted') as soi_uncontacted,
+            (SELECT COUNT(*) FROM candidate_soi WHERE pledge_received = true) as soi_pledged
+    """,
+    'ie_benefit_breakdown': """
+        SELECT
+            (a.benefit = 1) as is_for_benefit,
+            SUM(a.transaction_count) as transaction_count,
+            COALESCE(SUM(a.total_amount), 0) as total_amount,
+            ROUND(
+                100.0 * COALESCE(SUM(a.total_amount), 0) / NULLIF(
+                    (SELECT SUM(total_amount) FROM agg_ie_by_subject), 0
+                ),
+                1
+            ) as percentage
+        FROM agg_ie_by_subject a
+        WHERE a.benefit >= 0
+        GROUP BY a.benefit
+    """,
+    'top_donors_mv': """
+        SELECT
+            d.entity_id,
+            COALESCE(e.last_name || ', ' || e.first_name, e.last_name, 'Unknown') as entity_name,
+            e.city,
+            e.state,
+            et.name as entity_type,
+            d.total_contributed,
+            d.contribution_count
+        FROM agg_donor_totals d
+        JOIN "Names" e ON e.name_id = d.entity_id
+        LEFT JOIN "EntityTypes" et ON e.entity_type_id = et.entity_type_id
+    """,
+    'mv_dashboard_top_ie_committees': """
+        SELECT
+            s.committee_id,
+            CONCAT(COALESCE(n.first_name, ''), ' ', COALESCE(n.last_name, '')) as committee_name,
+            s.total_abs_amount as total_spent,
+            s.transaction_count as expenditure_count
+        FROM agg_ie_by_spender s
+        JOIN "Committees" c ON c.committee_id = s.committee_id
+        JOIN "Names" n ON c.name_id = n.name_id
+        ORDER BY s.total_abs_amount DESC
+        LIMIT 10
+    """,
+    'race_ie_spending': """
+        SELECT
+            c.candidate_office_id as office_id,
+            o.name as office_name,
+            cy.cycle_id,
+            cy.name as cycle_name,
+            a.subject_committee_id,
+            c.name_id as candidate_name_id,
+            CASE a.benefit WHEN 1 THEN true WHEN 0 THEN false END as is_for_benefit,
+            a.total_amount as total_ie,
+            a.transaction_count
+        FROM agg_ie_by_subject a
+        JOIN "Committees" c ON a.subject_committee_id = c.committee_id
+        JOIN "Offices" o ON c.candidate_office_id = o.office_id
+        JOIN "Cycles" cy ON c.election_cycle_id = cy.cycle_id
+    """,
+}
+
+INCREMENTAL_VIEWS = list(VIEW_DEFINITIONS)
+
+
+def aggregates_built(cursor):
+    """True once the summary tables have been populated by rebuild()"""
+    cursor.execute("SELECT to_regclass('agg_state') IS NOT NULL")
+    if not cursor.fetchone()[0]:
+        return False
+    cursor.execute("SELECT built_at IS NOT NULL FROM agg_state WHERE id = 1")
+    row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+@contextmanager
+def track_transaction_changes(ids_sql, params=None):
+    """
+    Keep the summary tables in step with changes to the transactions
+    selected by ids_sql (a query returning transaction_id). The committee
+    rollup, transaction_counts and ie_fact are always maintained (their
+    migrations populate them); the dashboard aggregates only once rebuild()
+    has built them.
+
+    ids_sql is evaluated once, before the block runs, so it may name rows
+    that do not exist yet (e.g. ids staged for insert). The block, the
+    aggregate update and the data version bump share one database transaction.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            aggregates = aggregates_built(cursor)
+            _capture_before(cursor, ids_sql, params or [])
+
+        yield
+
+        with connection.cursor() as cursor:
+            _capture_after(cursor)
+            apply_delta(cursor, aggregates=aggregates)
+            bump_data_version(cursor)
+
+
+def _capture_before(cursor, ids_sql, params):
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS agg_delta_ids (
+            transaction_id integer PRIMARY KEY
+        ) ON COMMIT DROP
+    """)
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS agg_delta (
+            sign smallint NOT NULL,
+            transaction_id integer NOT NULL,
+            committee_id integer,
+            entity_id integer,
+            subject_committee_id integer,
+            is_for_benefit boolean,
+            transaction_type_id integer,
+            transaction_date date,
+            amount numeric(12, 2),
+            deleted boolean,
+            cycle_id integer
+        ) ON COMMIT DROP
+    """)
+    cursor.execute("TRUNCATE agg_delta_ids, agg_delta")
+    cursor.execute(
+        f"INSERT INTO agg_delta_ids (transaction_id) {ids_sql} ON CONFLICT DO NOTHING",
+        params
+    )
+    _snapshot(cursor, -1)
+
+
+def _capture_after(cursor):
+    _snapshot(cursor, 1)
+
+
+def _snapshot(cursor, sign):
+    cursor.execute("""
+        INSERT INTO agg_delta
+        SELECT %s, t.transaction_id, t.committee_id, t.entity_id, t.subject_committee_id,
+               t.is_for_benefit, t.transaction_type_id, t.transaction_date, t.amount, t.deleted,
+               t.cycle_id
+        FROM "Transactions" t
+        JOIN agg_delta_ids i ON i.transaction_id = t.transaction_id
+        WHERE t.deleted = false
+    """, [sign])
+
+
+def apply_delta(cursor, aggregates=True):
+    """Add the signed snapshots in agg_delta to the summary tables"""
+    start = time.time()
+
+    _apply_rollup_delta(cursor)
+    _apply_count_delta(cursor)
+    _apply_ie_fact_delta(cursor)
+    if aggregates:
+        _apply_aggregate_delta(cursor)
+
+    cursor.execute("SELECT COUNT(*) FROM agg_delta")
+    rows = cursor.fetchone()[0]
+    cursor.execute("TRUNCATE agg_delta_ids, agg_delta")
+
+    logger.info(f"Incremental aggregates: applied {rows} snapshot rows in {time.time() - start:.2f}s")
+    return rows
+
+
+def _apply_rollup_delta(cursor):
+    columns = ', '.join(ROLLUP_COLUMNS)
+    updates = ',\n            '.join(
+        f'{c} = r.{c} + EXCLUDED.{c}' for c in ROLLUP_COLUMNS[2:]
+    )
+    cursor.execute(f"""
+        INSERT INTO committee_financial_rollup AS r ({columns})
+        SELECT * FROM ({rollup_sql('agg_delta', 't.sign')}) delta
+        ON CONFLICT (committee_id, cycle_key) DO UPDATE SET
+            {updates}
+    """)
+    cursor.execute("""
+        DELETE FROM committee_financial_rollup
+        WHERE income_count = 0 AND expense_count = 0
+          AND ie_for_count = 0 AND ie_against_count = 0
+          AND committee_id IN (
+              SELECT committee_id FROM agg_delta
+              UNION SELECT subject_committee_id FROM agg_delta
+          )
+    """)
+
+
+def _apply_count_delta(cursor):
+    cursor.execute("""
+        INSERT INTO transaction_counts AS a
+            (committee_id, income_expense_neutral, is_ie, transaction_count)
+        SELECT d.committee_id, tt.income_expense_neutral,
+               d.subject_committee_id IS NOT NULL, SUM(d.sign)
+        FROM agg_delta d
+        JOIN "TransactionTypes" tt ON tt.transaction_type_id = d.transaction_type_id
+        GROUP BY 1, 2, 3
+        HAVING SUM(d.sign) <> 0
+        ON CONFLICT (committee_id, income_expense_neutral, is_ie) DO UPDATE SET
+            transaction_count = a.transaction_count + EXCLUDED.transaction_count
+    """)
+    cursor.execute("""
+        DELETE FROM transaction_counts
+        WHERE transaction_count = 0
+          AND committee_id IN (SELECT committee_id FROM agg_delta)
+    """)
+
+
+def _apply_ie_fact_delta(cursor):
+    # Replaced rather than summed: the tracked ids' rows as they are now
+    cursor.execute("""
+        DELETE FROM ie_fact f USING agg_delta_ids i WHERE f.transaction_id = i.transaction_id
+    """)
+    cursor.execute(f"""
+        INSERT INTO ie_fact ({', '.join(IE_FACT_COLUMNS)})
+        {ie_fact_sql('AND t.transaction_id IN (SELECT transaction_id FROM agg_delta_ids)')}
+    """)
+
+
+def refresh_ie_fact_cycles(cursor):
+    """
+    Copy Transaction.cycle to ie_fact where they differ; for writers that
+    reassign cycles without tracking (backfill_transaction_cycles,
+    partition_transactions --sync). Returns the rows updated.
+    """
+    cursor.execute("""
+        UPDATE ie_fact f SET cycle_id = t.cycle_id
+        FROM "Transactions" t
+        WHERE t.transaction_id = f.transaction_id
+          AND t.transaction_date = f.transaction_date
+          AND f.cycle_id IS DISTINCT FROM t.cycle_id
+    """)
+    return cursor.rowcount
+
+
+def refresh_rollup_cycles(cursor):
+    """
+    Recompute the per-cycle rows of committee_financial_rollup from
+    Transaction.cycle; for the same untracked cycle writers as
+    refresh_ie_fact_cycles(). Returns the rows written.
+    """
+    columns = ', '.join(ROLLUP_COLUMNS)
+    cursor.execute("DELETE FROM committee_financial_rollup WHERE cycle_key <> 0")
+    cursor.execute(f"""
+        INSERT INTO committee_financial_rollup ({columns})
+        SELECT * FROM ({FULL_RECOMPUTE_SQL['committee_financial_rollup']}) r
+        WHERE r.cycle_key <> 0
+    """)
+    return cursor.rowcount
+
+
+def _apply_aggregate_delta(cursor):
+    # Groups whose before and after snapshots cancel are left untouched
+    cursor.execute("""
+        INSERT INTO agg_ie_by_subject AS a
+            (subject_committee_id, benefit, total_amount, total_abs_amount, transaction_count)
+        SELECT
+            d.subject_committee_id,
+            CASE WHEN d.is_for_benefit THEN 1 WHEN NOT d.is_for_benefit THEN 0 ELSE -1 END,
+            SUM(d.sign * d.amount), SUM(d.sign * ABS(d.amount)), SUM(d.sign)
+        FROM agg_delta d
+        JOIN "Committees" sc ON sc.committee_id = d.subject_committee_id
+        GROUP BY 1, 2
+        HAVING SUM(d.sign) <> 0 OR SUM(d.sign * d.amount) <> 0 OR SUM(d.sign * ABS(d.amount)) <> 0
+        ON CONFLICT (subject_committee_id, benefit) DO UPDATE SET
+            total_amount = a.total_amount + EXCLUDED.total_amount,
+            total_abs_amount = a.total_abs_amount + EXCLUDED.total_abs_amount,
+            transaction_count = a.transaction_count + EXCLUDED.transaction_count
+    """)
+    cursor.execute("""
+        INSERT INTO agg_ie_by_spender AS a
+            (committee_id, total_amount, total_abs_amount, transaction_count)
+        SELECT d.committee_id, SUM(d.sign * d.amount), SUM(d.sign * ABS(d.amount)), SUM(d.sign)
+        FROM agg_delta d
+        JOIN "Committees" sc ON sc.committee_id = d.subject_committee_id
+        GROUP BY 1
+        HAVING SUM(d.sign) <> 0 OR SUM(d.sign * d.amount) <> 0 OR SUM(d.sign * ABS(d.amount)) <> 0
+        ON CONFLICT (committee_id) DO UPDATE SET
+            total_amount = a.total_amount + EXCLUDED.total_amount,
+            total_abs_amount = a.total_abs_amount + EXCLUDED.total_abs_amount,
+            transaction_count = a.transaction_count + EXCLUDED.transaction_count
+    """)
+    cursor.execute("""
+        INSERT INTO agg_donor_totals AS a
+            (entity_id, total_contributed, total_abs_contributed, contribution_count)
+        SELECT d.entity_id, SUM(d.sign * d.amount), SUM(d.sign * ABS(d.amount)), SUM(d.sign)
+        FROM agg_delta d
+        JOIN "TransactionTypes" tt ON tt.transaction_type_id = d.transaction_type_id
+        WHERE tt.income_expense_neutral = 1
+        GROUP BY 1
+        HAVING SUM(d.sign) <> 0 OR SUM(d.sign * d.amount) <> 0 OR SUM(d.sign * ABS(d.amount)) <> 0
+        ON CONFLICT (entity_id) DO UPDATE SET
+            total_contributed = a.total_contributed + EXCLUDED.total_contributed,
+            total_abs_contributed = a.total_abs_contributed + EXCLUDED.total_abs_contributed,
+            contribution_count = a.contribution_count + EXCLUDED.contribution_count
+    """)
+
+    # Drop groups that no longer have any transactions
+    cursor.execute("""
+        DELETE FROM agg_ie_by_subject
+        WHERE transaction_count = 0
+          AND subject_committee_id IN (SELECT subject_committee_id FROM agg_delta)
+    """)
+    cursor.execute("""
+        DELETE FROM agg_ie_by_spender
+        WHERE transaction_count = 0
+          AND committee_id IN (SELECT committee_id FROM agg_delta)
+    """)
+    cursor.execute("""
+        DELETE FROM agg_donor_totals
+        WHERE contribution_count = 0
+          AND entity_id IN (SELECT entity_id FROM agg_delta)
+    """)
+
+    cursor.execute("UPDATE agg_state SET updated_at = now() WHERE id = 1")
+
+
+def rebuild(cursor):
+    """Recompute every summary table from scratch and mark them built"""
+    start = time.time()
+    cursor.execute("TRUNCATE " + ", ".join(SUMMARY_TABLES))
+    for table in SUMMARY_TABLES:
+        columns = SUMMARY_COLUMNS.get(table)
+        target = f"{table} ({', '.join(columns)})" if columns else table
+        cursor.execute(f"INSERT INTO {target} {FULL_RECOMPUTE_SQL[table]}")
+        cursor.execute(f"ANALYZE {table}")
+    cursor.execute("""
+        INSERT INTO agg_state (id, built_at, updated_at) VALUES (1, now(), now())
+        ON CONFLICT (id) DO UPDATE SET built_at = now(), updated_at = now()
+    """)
+    return time.time() - start
+
+
+def check_consistency(cursor, sample_size=5):
+    """
+    Compare each summary table with a full recompute.
+
+    Returns {table: {'mismatches': n, 'sample': [rows]}}; a row appears in the
+    sample once for its stored value and once for its recomputed value.
+    """
+    report = {}
+    for table in SUMMARY_TABLES:
+        recompute = FULL_RECOMPUTE_SQL[table]
+        keys = ', '.join(SUMMARY_KEYS[table])
+        columns = ', '.join(SUMMARY_COLUMNS.get(table, ['*']))
+        cursor.execute(f"""
+            WITH stored AS (SELECT {columns} FROM {table}),
+                 expected AS ({recompute}),
+                 diff AS (
+                     (SELECT 'stored' AS side, * FROM stored EXCEPT SELECT 'stored', * FROM expected)
+                     UNION ALL
+                     (SELECT 'expected' AS side, * FROM expected EXCEPT SELECT 'expected', * FROM stored)
+                 )
+            SELECT * FROM diff ORDER BY {keys}, side
+        """)
+        rows = cursor.fetchall()
+        report[table] = {'mismatches': len(rows), 'sample': rows[:sample_size * 2]}
+    return report
+
+
+def relation_kind(cursor, name):
+    """pg_class.relkind of name ('m' materialized view, 'v' view, ...), None if missing"""
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [name])
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def summary_view_installed(cursor, name):
+    """True if name is one of the plain views install_views() put over the summary tables"""
+    return name in VIEW_DEFINITIONS and relation_kind(cursor, name) == 'v'
+
+
+def install_views(cursor):
+    """Replace the materialized views with plain views over the summary tables"""
+    for name, definition in VIEW_DEFINITIONS.items():
+        kind = relation_kind(cursor, name)
+        if kind == 'm':
+            cursor.execute(f"DROP MATERIALIZED VIEW {name} CASCADE")
+        elif kind == 'v':
+            cursor.execute(f"DROP VIEW {name} CASCADE")
+        cursor.execute(f"CREATE VIEW {name} AS {definition}")
+
+
+def refresh_materialized_view(cursor, name, concurrently=False):
+    """
+    Refresh name if it is still a materialized view.
+
+    Names replaced by install_views() are plain views over the summary tables
+    and need no refresh; returns False for those (and for missing views).
+    A refresh bumps the data version, so caches built from the view miss.
+    """
+    cursor.execute("SELECT 1 FROM pg_matviews WHERE matviewname = %s", [name])
+    if cursor.fetchone() is None:
+        return False
+    mode = 'CONCURRENTLY ' if concurrently else ''
+    cursor.execute(f'REFRESH MATERIALIZED VIEW {mode}{name}')
+    bump_data_version(cursor)
+    return True
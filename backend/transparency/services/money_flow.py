@@ -0,0 +1,404 @@
+"""
+Money Flow Engine
+
+Builds the donor -> IE committee -> candidate graph for a race (office +
+cycle), an office or a cycle, from a fixed number of grouped queries:
+
+1. IE edges: spending committee -> candidate committee, for/against totals
+2. Donor edges: contributions from donors to those spending committees
+3. Committee labels (spenders and candidates)
+
+The cycle is the transactions' own (Transaction.cycle, from their dates), as
+in RaceAggregationManager.get_race_ie_spending; with a cycle, donor edges are
+the contributions made during it. An office or a cycle is required, so no
+graph spans the whole table.
+
+The graph is kept as integer-indexed numpy arrays (one array per edge
+attribute, nodes referenced by position) rather than dicts of dicts, so it
+is small to cache and cheap to rank. Donor names are looked up per request,
+only for the donors being returned.
+
+Amounts are magnitudes: IE spending is summed with ABS() like
+RaceAggregationManager.get_race_ie_spending, and donor edges are net
+contributions (refunds subtracted), dropping edges that net to zero or less.
+
+Donor money is attributed to candidates in proportion to each committee's
+IE spending, so a path donor -> committee -> candidate carries
+    donor_amount * committee_spend_on_candidate / committee_total_spend
+
+Usage:
+    graph = get_flow_graph(office_id=1, cycle_id=7)
+    graph.top_paths(10)
+    graph.sankey(donor_limit=12)
+"""
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Sum, Count, Q
+from django.db.models.functions import Abs
+
+from transparency.models import Committee, Entity, Transaction
+from transparency.utils.data_version import current_data_version
+
+
+GRAPH_CACHE_TIMEOUT = 3600
+
+
+class MoneyFlowGraph:
+    """Donor -> IE committee -> candidate graph over integer-indexed arrays"""
+
+    def __init__(self, donor_ids, committee_ids, candidate_ids,
+                 donor_src, donor_dst, donor_amount, donor_count,
+                 ie_src, ie_dst, ie_for, ie_against, ie_count,
+                 committee_labels, candidate_labels):
+        # Node ids by position
+        self.donor_ids = donor_ids
+        self.committee_ids = committee_ids
+        self.candidate_ids = candidate_ids
+
+        # Donor edges: donor index -> committee index
+        self.donor_src = donor_src
+        self.donor_dst = donor_dst
+        self.donor_amount = donor_amount
+        self.donor_count = donor_count
+
+        # IE edges: committee index -> candidate index, sorted by committee
+        self.ie_src = ie_src
+        self.ie_dst = ie_dst
+        self.ie_for = ie_for
+        self.ie_against = ie_against
+        self.ie_count = ie_count
+
+        self.committee_labels = committee_labels
+        self.candidate_labels = candidate_labels
+
+        n_committees = len(committee_ids)
+        self.ie_total = ie_for + ie_against
+        self.committee_spend = np.bincount(ie_src, weights=self.ie_total, minlength=n_committees)
+        self.committee_support = np.bincount(ie_src, weights=ie_for, minlength=n_committees)
+        self.committee_oppose = np.bincount(ie_src, weights=ie_against, minlength=n_committees)
+        self.committee_raised = np.bincount(donor_dst, weights=donor_amount, minlength=n_committees)
+        self.committee_donors = np.bincount(donor_dst, minlength=n_committees)
+        self.committee_candidates = np.bincount(ie_src, minlength=n_committees)
+
+        # Offsets of each committee's IE edges (ie_* are sorted by ie_src)
+        self.ie_offsets = np.searchsorted(ie_src, np.arange(n_committees + 1))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spend = self.committee_spend[ie_src]
+            self.ie_share = np.where(spend > 0, self.ie_total / spend, 0.0)
+
+    @property
+    def donor_totals(self):
+        return np.bincount(self.donor_src, weights=self.donor_amount, minlength=len(self.donor_ids))
+
+    # ==================== RANKING ====================
+
+    def top_paths(self, k=10):
+        """
+        Top k donor -> committee -> candidate paths by attributed amount.
+
+        A path can never exceed its donor edge's best path, so only the k donor
+        edges with the largest best path need expanding.
+        """
+        if k <= 0 or not len(self.donor_src):
+            return []
+
+        best_share = np.zeros(len(self.committee_ids))
+        np.maximum.at(best_share, self.ie_src, self.ie_share)
+        best = self.donor_amount * best_share[self.donor_dst]
+        edges = _top_k(best, k)
+
+        paths = []
+        for e in edges:
+            c = self.donor_dst[e]
+            for j in range(self.ie_offsets[c], self.ie_offsets[c + 1]):
+                paths.append((self.donor_amount[e] * self.ie_share[j], e, j))
+        paths.sort(key=lambda p: p[0], reverse=True)
+
+        donor_names = self._donor_names(self.donor_src[[e for _, e, _ in paths[:k]]])
+        return [
+            {
+                'donor_id': int(self.donor_ids[self.donor_src[e]]),
+                'donor_name': donor_names.get(int(self.donor_ids[self.donor_src[e]]), 'Unknown'),
+                'committee_id': int(self.committee_ids[self.donor_dst[e]]),
+                'committee_name': self.committee_labels[self.donor_dst[e]],
+                'candidate_committee_id': int(self.candidate_ids[self.ie_dst[j]]),
+                'candidate_name': self.candidate_labels[self.ie_dst[j]],
+                'donor_amount': _money(self.donor_amount[e]),
+                'attributed_amount': _money(amount),
+                'spending_type': 'Support' if self.ie_for[j] >= self.ie_against[j] else 'Oppose',
+            }
+            for amount, e, j in paths[:k]
+            if amount > 0
+        ]
+
+    def top_donors(self, k=10):
+        """Donors with the largest total contributions to the graph's committees"""
+        totals = self.donor_totals
+        top = _top_k(totals, k)
+        counts = np.bincount(self.donor_src, weights=self.donor_count, minlength=len(self.donor_ids))
+        names = self._donor_names(top)
+        return [
+            {
+                'entity_id': int(self.donor_ids[d]),
+                'name': names.get(int(self.donor_ids[d]), 'Unknown'),
+                'total_contributed': _money(totals[d]),
+                'num_contributions': int(counts[d]),
+                'num_committees': int(np.count_nonzero(self.donor_src == d)),
+            }
+            for d in top
+        ]
+
+    def candidates(self):
+        """IE totals per candidate committee, largest first"""
+        n = len(self.candidate_ids)
+        ie_for = np.bincount(self.ie_dst, weights=self.ie_for, minlength=n)
+        ie_against = np.bincount(self.ie_dst, weights=self.ie_against, minlength=n)
+        counts = np.bincount(self.ie_dst, weights=self.ie_count, minlength=n)
+        committees = np.bincount(self.ie_dst, minlength=n)
+        order = np.argsort(-(ie_for + ie_against), kind='stable')
+        return [
+            {
+                'committee_id': int(self.candidate_ids[k]),
+                'candidate_name': self.candidate_labels[k],
+                'ie_for': _money(ie_for[k]),
+                'ie_against': _money(ie_against[k]),
+                'total_ie': _money(ie_for[k] + ie_against[k]),
+                'num_expenditures': int(counts[k]),
+                'num_committees': int(committees[k]),
+            }
+            for k in order
+        ]
+
+    def committee_flows(self, limit=10, top_donor_count=5):
+        """Per IE committee flow summaries, largest primary spending first"""
+        primary = np.maximum(self.committee_support, self.committee_oppose)
+        active = np.flatnonzero((self.committee_donors > 0) & (self.committee_spend > 0))
+        order = active[np.argsort(-primary[active], kind='stable')][:limit]
+
+        # Top donors of the selected committees, in one name lookup
+        top_edges = {}
+        for c in order:
+            edges = np.flatnonzero(self.donor_dst == c)
+            top_edges[c] = edges[_top_k(self.donor_amount[edges], top_donor_count)]
+        names = self._donor_names(
+            self.donor_src[np.concatenate(list(top_edges.values()))] if top_edges else []
+        )
+
+        flows = []
+        for c in order:
+            edges = top_edges[c]
+            lo, hi = self.ie_offsets[c], self.ie_offsets[c + 1]
+            top_target = lo + int(np.argmax(self.ie_total[lo:hi]))
+            top_donor = names.get(int(self.donor_ids[self.donor_src[edges[0]]])) if len(edges) else None
+            flows.append({
+                'committee_id': int(self.committee_ids[c]),
+                'committee_name': self.committee_labels[c],
+                'num_donors': int(self.committee_donors[c]),
+                'num_candidates': int(self.committee_candidates[c]),
+                'total_amount': _money(primary[c]),
+                'top_donor': top_donor or 'Anonymous',
+                'top_candidate': self.candidate_labels[self.ie_dst[top_target]],
+                'spending_type': (
+                    'Support' if self.committee_support[c] > self.committee_oppose[c] else 'Oppose'
+                ),
+                'details': {
+                    'top_donors': [
+                        {
+                            'name': names.get(int(self.donor_ids[self.donor_src[e]]), ''),
+                            'amount': _money(self.donor_amount[e]),
+                        }
+                        for e in edges
+                    ],
+                    'total_contributions': _money(self.committee_raised[c]),
+                    'total_spending': _money(self.committee_spend[c]),
+                    'support_spending': _money(self.committee_support[c]),
+                    'oppose_spending': _money(self.committee_oppose[c]),
+                }
+            })
+        return flows, order
+
+    def sankey(self, donor_limit=10, committee_limit=None):
+        """
+        Sankey nodes and links: top donors -> their IE committees -> candidates.
+
+        Committee -> candidate links carry the committees' full IE spending;
+        donor -> committee links carry the top donors' contributions.
+        """
+        donors = _top_k(self.donor_totals, donor_limit)
+        donor_edges = np.flatnonzero(np.isin(self.donor_src, donors))
+        committees = np.unique(self.donor_dst[donor_edges])
+        if committee_limit:
+            committees = committees[_top_k(self.committee_spend[committees], committee_limit)]
+            donor_edges = donor_edges[np.isin(self.donor_dst[donor_edges], committees)]
+        ie_edges = np.flatnonzero(np.isin(self.ie_src, committees))
+
+        names = self._donor_names(donors)
+        nodes, index = [], {}
+
+        def node(kind, position, node_id, name):
+            key = (kind, position)
+            if key not in index:
+                index[key] = len(nodes)
+                nodes.append({'id': f'{kind}-{node_id}', 'name': name, 'type': kind})
+            return index[key]
+
+        links = []
+        for e in donor_edges:
+            d, c = self.donor_src[e], self.donor_dst[e]
+            donor_id = int(self.donor_ids[d])
+            links.append({
+                'source': node('donor', d, donor_id, names.get(donor_id, 'Unknown')),
+                'target': node('committee', c, int(self.committee_ids[c]), self.committee_labels[c]),
+                'value': _money(self.donor_amount[e]),
+            })
+        for j in ie_edges:
+            c, k = self.ie_src[j], self.ie_dst[j]
+            links.append({
+                'source': node('committee', c, int(self.committee_ids[c]), self.committee_labels[c]),
+                'target': node('candidate', k, int(self.candidate_ids[k]), self.candidate_labels[k]),
+                'value': _money(self.ie_total[j]),
+                'support': _money(self.ie_for[j]),
+                'oppose': _money(self.ie_against[j]),
+            })
+        return {'nodes': nodes, 'links': links}
+
+    def summary(self, committees=None):
+        """Graph totals, optionally restricted to a subset of committee indexes"""
+        if committees is None:
+            committees = np.arange(len(self.committee_ids))
+        committees = np.asarray(committees, dtype=np.int64)
+        in_donor = np.isin(self.donor_dst, committees)
+        in_ie = np.isin(self.ie_src, committees)
+        primary = np.maximum(self.committee_support, self.committee_oppose)
+        return {
+            'total_donors': int(len(np.unique(self.donor_src[in_donor]))),
+            'total_committees': int(len(committees)),
+            'total_candidates': int(len(np.unique(self.ie_dst[in_ie]))),
+            'total_amount': _money(primary[committees].sum()),
+        }
+
+    def _donor_names(self, donor_positions):
+        """Names for the given donor indexes, in one query"""
+        ids = [int(self.donor_ids[d]) for d in np.unique(np.asarray(donor_positions, dtype=np.int64))]
+        if not ids:
+            return {}
+        return {
+            e.name_id: e.full_name
+            for e in Entity.objects.filter(name_id__in=ids).only(
+                'name_id', 'first_name', 'last_name', 'suffix'
+            )
+        }
+
+
+def _money(value):
+    """Dollar amount for JSON output, without float summation noise"""
+    return round(float(value), 2)
+
+
+def _top_k(values, k):
+    """Indexes of the k largest values, largest first"""
+    values = np.asarray(values)
+    if k <= 0 or not len(values):
+        return np.array([], dtype=np.int64)
+    if k < len(values):
+        candidates = np.argpartition(-values, k - 1)[:k]
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.argsort(-values[candidates], kind='stable')]
+
+
+# ==================== BUILD ====================
+
+def get_flow_graph(office_id=None, cycle_id=None):
+    """Cached graph for (office, cycle); a new data version invalidates it"""
+    cache_key = f'money_flow_graph_o{office_id or ""}_c{cycle_id or ""}_v{current_data_version()}'
+    graph = cache.get(cache_key)
+    if graph is None:
+        graph = build_flow_graph(office_id, cycle_id)
+        cache.set(cache_key, graph, timeout=GRAPH_CACHE_TIMEOUT)
+    return graph
+
+
+def build_flow_graph(office_id=None, cycle_id=None):
+    """Build the graph for candidates in office/cycle (one may be omitted)"""
+    if not office_id and not cycle_id:
+        raise ValueError('office_id or cycle_id is required')
+
+    ie_filters = Q(
+        subject_committee__candidate__isnull=False,
+        transaction_type__income_expense_neutral=2,  # Only actual expenses (not Pay a Bill)
+        deleted=False,
+    )
+    if office_id:
+        ie_filters &= Q(subject_committee__candidate_office_id=office_id)
+    if cycle_id:
+        ie_filters &= Q(cycle_id=cycle_id)
+
+    # Query 1: IE edges
+    ie_rows = list(
+        Transaction.objects.filter(ie_filters)
+        .values('committee_id', 'subject_committee_id')
+        .annotate(
+            ie_for=Sum(Abs('amount'), filter=Q(is_for_benefit=True)),
+            ie_against=Sum(Abs('amount'), filter=Q(is_for_benefit=False)),
+            num=Count('transaction_id'),
+        )
+        .order_by('committee_id', 'subject_committee_id')
+        .values_list('committee_id', 'subject_committee_id', 'ie_for', 'ie_against', 'num')
+    )
+
+    committee_ids = np.unique(np.array([r[0] for r in ie_rows], dtype=np.int64))
+    candidate_ids = np.unique(np.array([r[1] for r in ie_rows], dtype=np.int64))
+
+    # Query 2: donor edges into the spending committees
+    donor_rows = []
+    if len(committee_ids):
+        donor_filters = Q(
+            committee_id__in=committee_ids.tolist(),
+            transaction_type__income_expense_neutral=1,
+            deleted=False,
+        )
+        if cycle_id:
+            donor_filters &= Q(cycle_id=cycle_id)
+        donor_rows = list(
+            Transaction.objects.filter(donor_filters)
+            .values('entity_id', 'committee_id')
+            .annotate(total=Sum('amount'), num=Count('transaction_id'))
+            .filter(total__gt=0)
+            .order_by()
+            .values_list('entity_id', 'committee_id', 'total', 'num')
+        )
+    donor_ids = np.unique(np.array([r[0] for r in donor_rows], dtype=np.int64))
+
+    # Query 3: committee labels
+    labels = {}
+    label_ids = np.union1d(committee_ids, candidate_ids).tolist()
+    if label_ids:
+        for committee in Committee.objects.filter(committee_id__in=label_ids).select_related(
+            'name', 'candidate'
+        ):
+            labels[committee.committee_id] = (
+                committee.candidate.full_name if committee.candidate else committee.name.full_name
+            )
+
+    def column(rows, i, dtype):
+        return np.array([r[i] or 0 for r in rows], dtype=dtype)
+
+    return MoneyFlowGraph(
+        donor_ids=donor_ids,
+        committee_ids=committee_ids,
+        candidate_ids=candidate_ids,
+        donor_src=np.searchsorted(donor_ids, column(donor_rows, 0, np.int64)).astype(np.int32),
+        donor_dst=np.searchsorted(committee_ids, column(donor_rows, 1, np.int64)).astype(np.int32),
+        donor_amount=column(donor_rows, 2, np.float64),
+        donor_count=column(donor_rows, 3, np.int32),
+        ie_src=np.searchsorted(committee_ids, column(ie_rows, 0, np.int64)).astype(np.int32),
+        ie_dst=np.searchsorted(candidate_ids, column(ie_rows, 1, np.int64)).astype(np.int32),
+        ie_for=column(ie_rows, 2, np.float64),
+        ie_against=column(ie_rows, 3, np.float64),
+        ie_count=column(ie_rows, 4, np.int32),
+        committee_labels=[labels.get(int(c), f'Committee {c}') for c in committee_ids],
+        candidate_labels=[labels.get(int(c), f'Committee {c}') for c in candidate_ids],
+    )
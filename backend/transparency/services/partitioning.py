@@ -0,0 +1,574 @@
+"""
+Range partitioning of "Transactions" by election cycle.
+
+Once converted, "Transactions" is a table partitioned by RANGE
+(transaction_date): one partition per cycle, transactions_c{cycle_id},
+covering begin_date..end_date, and transactions_p_default for dates outside
+every cycle. Indexes are declared on the parent, so each partition has its
+own copy and queries bounded by transaction_date only scan and only lock the
+partitions they need. The race queries bound transaction_date by the cycle
+for that reason, as well as filtering on cycle_id.
+
+A partitioned table's unique indexes must contain the partition key, so the
+primary key becomes (transaction_id, transaction_date), and the
+modifies_transaction foreign key to "Transactions" itself is dropped (the
+column and its index stay).
+
+Online conversion (partition_transactions --convert), each step resumable:
+
+    prepare     create transactions_partitioned and its partitions, and a
+                trigger logging the ids of rows changed in "Transactions"
+    copy        copy "Transactions" in transaction_id batches, each its own
+                database transaction
+    indexes     primary key, the indexes and foreign keys of "Transactions"
+                (before any catch-up, which looks rows up by transaction_id)
+    catch up    re-copy the logged ids (repeated until the log is short)
+    views       a copy of each materialized view reading "Transactions"
+    swap        under an ACCESS EXCLUSIVE lock: a last catch-up, a row count
+                check, then renames; the old heap is kept as
+                transactions_unpartitioned until --drop-old
+    refresh     the swapped-in materialized views, which were built before
+                the last catch-ups
+
+Writers keep running until the swap. TRUNCATE is not logged: do not
+truncate "Transactions" during a conversion.
+
+Old cycles can be detached into an archive schema and attached back. The
+summary tables (incremental_aggregates) follow, as for any other change.
+
+Usage:
+    with connection.cursor() as cursor:
+        partitioned = is_partitioned(cursor)
+        for partition in partitions(cursor): ...
+    detach_cycle(cycle_id, 'archive')
+"""
+
+from collections import namedtuple
+from django.db import connection, transaction
+from transparency.services.incremental_aggregates import (
+    refresh_ie_fact_cycles, refresh_rollup_cycles, track_transaction_changes,
+)
+from transparency.utils.data_version import bump_data_version
+import logging
+
+logger = logging.getLogger(__name__)
+
+PARENT = 'Transactions'
+SHADOW = 'transactions_partitioned'
+OLD = 'transactions_unpartitioned'
+CHANGES = 'transactions_partition_changes'
+DEFAULT_PARTITION = 'transactions_p_default'
+PARTITION_PREFIX = 'transactions_c'
+PARTITION_KEY = 'transaction_date'
+
+# Indexes and views built for the partitioned table are renamed at the swap
+SHADOW_SUFFIX = '__p'
+OLD_SUFFIX = '__old'
+
+CycleRange = namedtuple('CycleRange', ['cycle_id', 'name', 'start', 'end'])  # end exclusive
+Partition = namedtuple('Partition', ['name', 'bounds', 'rows', 'bytes'])
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _suffixed(name, suffix):
+    return name[:63 - len(suffix)] + suffix
+
+
+def _exists(cursor, name):
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [name])
+    return cursor.fetchone()[0]
+
+
+# ==================== LAYOUT ====================
+
+def is_partitioned(cursor):
+    cursor.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(%s)", [quote(PARENT)])
+    row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+def partition_name(cycle_id):
+    return f'{PARTITION_PREFIX}{cycle_id}'
+
+
+def cycle_ranges(cursor):
+    """Date range of every cycle with dates, oldest first; partitions may not overlap"""
+    cursor.execute("""
+        SELECT cycle_id, name, begin_date::date, end_date::date + 1
+        FROM "Cycles"
+        WHERE begin_date IS NOT NULL AND end_date IS NOT NULL
+        ORDER BY begin_date, cycle_id
+    """)
+    ranges = [CycleRange(*row) for row in cursor.fetchall()]
+    for previous, current in zip(ranges, ranges[1:]):
+        if current.start < previous.end:
+            raise ValueError(
+                f'Cycles {previous.name} and {current.name} overlap; '
+                f'fix their dates before partitioning by cycle'
+            )
+    return ranges
+
+
+def partitions(cursor, parent=PARENT):
+    """Partitions of parent: bounds, estimated rows (as of the last ANALYZE) and size"""
+    cursor.execute("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid),
+               GREATEST(c.reltuples, 0)::bigint, pg_total_relation_size(c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        ORDER BY c.relname
+    """, [quote(parent)])
+    return [Partition(*row) for row in cursor.fetchall()]
+
+
+def archived(cursor, schema):
+    """Cycle partitions detached into schema"""
+    cursor.execute("""
+        SELECT c.relname, GREATEST(c.reltuples, 0)::bigint, pg_total_relation_size(c.oid)
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = %s AND c.relkind = 'r' AND c.relname LIKE %s
+        ORDER BY c.relname
+    """, [schema, PARTITION_PREFIX + '%'])
+    return [Partition(name, None, rows, size) for name, rows, size in cursor.fetchall()]
+
+
+def _create_partitions(cursor, parent, ranges):
+    """Create the missing cycle partitions of parent and its default partition"""
+    existing = {p.name for p in partitions(cursor, parent)}
+    created = []
+    for r in ranges:
+        name = partition_name(r.cycle_id)
+        if name in existing:
+            continue
+        cursor.execute(
+            f'CREATE TABLE {quote(name)} PARTITION OF {quote(parent)} FOR VALUES FROM (%s) TO (%s)',
+            [r.start, r.end]
+        )
+        created.append(name)
+    if DEFAULT_PARTITION not in existing:
+        cursor.execute(f'CREATE TABLE {quote(DEFAULT_PARTITION)} PARTITION OF {quote(parent)} DEFAULT')
+        created.append(DEFAULT_PARTITION)
+    return created
+
+
+def sync_partitions(archive_schema):
+    """Create partitions for cycles added since the conversion (rows dated in
+    them move out of the default partition, taking the new cycle_id); returns
+    the partitions created"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            raise ValueError('"Transactions" is not partitioned; run --convert first')
+        ranges = cycle_ranges(cursor)
+        existing = {p.name for p in partitions(cursor)}
+        missing = [
+            r for r in ranges
+            if partition_name(r.cycle_id) not in existing
+            and not _exists(cursor, f'{quote(archive_schema)}.{quote(partition_name(r.cycle_id))}')
+        ]
+        if not missing:
+            return _create_partitions(cursor, PARENT, [])
+
+        # A partition cannot be added while the default one holds rows in its
+        # range, so those rows move across with the default detached
+        if DEFAULT_PARTITION not in existing:
+            return _create_partitions(cursor, PARENT, missing)
+        cursor.execute(f'ALTER TABLE {quote(PARENT)} DETACH PARTITION {quote(DEFAULT_PARTITION)}')
+        created = []
+        moved = 0
+        for r in missing:
+            name = partition_name(r.cycle_id)
+            cursor.execute(
+                f'CREATE TABLE {quote(name)} PARTITION OF {quote(PARENT)} FOR VALUES FROM (%s) TO (%s)',
+                [r.start, r.end]
+            )
+            cursor.execute(f"""
+                WITH moved AS (
+                    DELETE FROM {quote(DEFAULT_PARTITION)}
+                    WHERE {PARTITION_KEY} >= %s AND {PARTITION_KEY} < %s
+                    RETURNING *
+                )
+                INSERT INTO {quote(name)} SELECT * FROM moved
+            """, [r.start, r.end])
+            moved += cursor.rowcount
+            created.append(name)
+        cursor.execute(f'ALTER TABLE {quote(PARENT)} ATTACH PARTITION {quote(DEFAULT_PARTITION)} DEFAULT')
+
+        # The transactions_cycle trigger gave the moved rows their new cycle
+        if moved:
+            refresh_ie_fact_cycles(cursor)
+            refresh_rollup_cycles(cursor)
+            bump_data_version(cursor)
+        return created
+
+
+# ==================== ARCHIVING ====================
+
+def detach_cycle(cycle_id, schema):
+    """Move a cycle's partition out of "Transactions" into schema; returns its row count"""
+    name = partition_name(cycle_id)
+    with connection.cursor() as cursor:
+        if name not in {p.name for p in partitions(cursor)}:
+            raise ValueError(f'{name} is not a partition of "Transactions"')
+        cursor.execute(f'SELECT COUNT(*) FROM {quote(name)}')
+        rows = cursor.fetchone()[0]
+
+    # Its rows leave the summary tables as if deleted
+    with track_transaction_changes(f'SELECT transaction_id FROM {quote(name)}'):
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {quote(schema)}')
+            cursor.execute(f'ALTER TABLE {quote(PARENT)} DETACH PARTITION {quote(name)}')
+            cursor.execute(f'ALTER TABLE {quote(name)} SET SCHEMA {quote(schema)}')
+    logger.info(f"Detached {name} ({rows} rows) into {schema}")
+    return rows
+
+
+def attach_cycle(cycle_id, schema):
+    """Move an archived cycle partition back into "Transactions"; returns its row count"""
+    name = partition_name(cycle_id)
+    archived_name = f'{quote(schema)}.{quote(name)}'
+    with connection.cursor() as cursor:
+        if not _exists(cursor, archived_name):
+            raise ValueError(f'{schema}.{name} does not exist')
+        ranges = {r.cycle_id: r for r in cycle_ranges(cursor)}
+        if cycle_id not in ranges:
+            raise ValueError(f'Cycle {cycle_id} has no dates')
+        cycle = ranges[cycle_id]
+        cursor.execute(f'SELECT COUNT(*) FROM {archived_name}')
+        rows = cursor.fetchone()[0]
+
+    # ATTACH checks that the default partition has no rows in the range
+    with track_transaction_changes(f'SELECT transaction_id FROM {archived_name}'):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {archived_name} SET SCHEMA public')
+            cursor.execute(
+                f'ALTER TABLE {quote(PARENT)} ATTACH PARTITION {quote(name)} FOR VALUES FROM (%s) TO (%s)',
+                [cycle.start, cycle.end]
+            )
+    logger.info(f"Attached {name} ({rows} rows) from {schema}")
+    return rows
+
+
+# ==================== ONLINE CONVERSION ====================
+
+def conversion_status(cursor):
+    """{partitioned, converting, old_table, copied, pending_changes}"""
+    converting = _exists(cursor, SHADOW)
+    status = {
+        'partitioned': is_partitioned(cursor),
+        'converting': converting,
+        'old_table': _exists(cursor, OLD),
+        'copied': None,
+        'pending_changes': None,
+    }
+    if converting:
+        cursor.execute(f'SELECT COUNT(*) FROM {SHADOW}')
+        status['copied'] = cursor.fetchone()[0]
+    if _exists(cursor, CHANGES):
+        cursor.execute(f'SELECT COUNT(*) FROM {CHANGES}')
+        status['pending_changes'] = cursor.fetchone()[0]
+    return status
+
+
+def prepare(cursor):
+    """Create the partitioned copy and start logging changes; returns partitions created"""
+    if is_partitioned(cursor):
+        raise ValueError('"Transactions" is already partitioned')
+    ranges = cycle_ranges(cursor)
+
+    cursor.execute(f'CREATE TABLE IF NOT EXISTS {CHANGES} (transaction_id integer NOT NULL)')
+    cursor.execute(f"""
+        CREATE OR REPLACE FUNCTION transactions_log_change() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                INSERT INTO {CHANGES} VALUES (OLD.transaction_id);
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                INSERT INTO {CHANGES} VALUES (NEW.transaction_id);
+            END IF;
+            RETURN NULL;
+        END
+        $$;
+
+        DROP TRIGGER IF EXISTS transactions_partition_log ON {quote(PARENT)};
+        CREATE TRIGGER transactions_partition_log
+        AFTER INSERT OR UPDATE OR DELETE ON {quote(PARENT)}
+        FOR EACH ROW EXECUTE FUNCTION transactions_log_change();
+    """)
+
+    if not _exists(cursor, SHADOW):
+        cursor.execute(f"""
+            CREATE TABLE {SHADOW} (
+                LIKE {quote(PARENT)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED
+            ) PARTITION BY RANGE ({PARTITION_KEY})
+        """)
+    return _create_partitions(cursor, SHADOW, ranges)
+
+
+def copy_batch(cursor, after_id, batch_size):
+    """Copy the next batch_size rows by transaction_id; returns (rows, last id)"""
+    cursor.execute(f"""
+        WITH copied AS (
+            INSERT INTO {SHADOW}
+            SELECT * FROM {quote(PARENT)}
+            WHERE (%s::integer IS NULL OR transaction_id > %s)
+            ORDER BY transaction_id
+            LIMIT %s
+            RETURNING transaction_id
+        )
+        SELECT COUNT(*), MAX(transaction_id) FROM copied
+    """, [after_id, after_id, batch_size])
+    return cursor.fetchone()
+
+
+def copied_through(cursor):
+    """Highest transaction_id copied so far (where an interrupted copy resumes)"""
+    cursor.execute(f'SELECT MAX(transaction_id) FROM {SHADOW}')
+    return cursor.fetchone()[0]
+
+
+def catch_up(cursor, batch_size):
+    """Re-copy up to batch_size logged ids from "Transactions"; returns the ids processed
+
+    Log rows are deleted only once read, so a change committed while this runs
+    stays logged for the next pass.
+    """
+    cursor.execute('CREATE TEMP TABLE IF NOT EXISTS partition_sync (transaction_id integer) ON COMMIT DROP')
+    cursor.execute('TRUNCATE partition_sync')
+    cursor.execute(f"""
+        WITH taken AS (
+            DELETE FROM {CHANGES}
+            WHERE ctid IN (SELECT ctid FROM {CHANGES} LIMIT %s)
+            RETURNING transaction_id
+        )
+        INSERT INTO partition_sync SELECT DISTINCT transaction_id FROM taken
+    """, [batch_size])
+    cursor.execute('SELECT COUNT(*) FROM partition_sync')
+    ids = cursor.fetchone()[0]
+    if ids:
+        cursor.execute(f"""
+            DELETE FROM {SHADOW} s USING partition_sync p WHERE s.transaction_id = p.transaction_id
+        """)
+        cursor.execute(f"""
+            INSERT INTO {SHADOW}
+            SELECT t.* FROM {quote(PARENT)} t JOIN partition_sync p ON p.transaction_id = t.transaction_id
+        """)
+    return ids
+
+
+def pending_changes(cursor):
+    cursor.execute(f'SELECT COUNT(*) FROM {CHANGES}')
+    return cursor.fetchone()[0]
+
+
+def add_primary_key(cursor):
+    """(transaction_id, transaction_date): the key must contain the partition key"""
+    name = _suffixed(f'{PARENT}_pkey', SHADOW_SUFFIX)
+    if not _exists(cursor, quote(name)):
+        cursor.execute(
+            f'ALTER TABLE {SHADOW} ADD CONSTRAINT {quote(name)} PRIMARY KEY (transaction_id, {PARTITION_KEY})'
+        )
+
+
+def _indexes(cursor, table):
+    """(name, definition, primary, unique) of table's indexes"""
+    cursor.execute("""
+        SELECT c.relname, pg_get_indexdef(i.indexrelid), i.indisprimary, i.indisunique
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = to_regclass(%s)
+        ORDER BY c.relname
+    """, [table])
+    return cursor.fetchall()
+
+
+def _index_sql(name, definition, table, unique=False):
+    """definition recreated under name on table"""
+    using = definition.split(' USING ', 1)[1]
+    return f'CREATE {"UNIQUE " if unique else ""}INDEX {quote(name)} ON {table} USING {using}'
+
+
+def build_indexes(cursor, progress=None):
+    """Create the indexes of "Transactions" on the partitioned copy; returns those skipped"""
+    skipped = []
+    for name, definition, primary, unique in _indexes(cursor, quote(PARENT)):
+        if primary:
+            continue
+        if unique:
+            # A unique index without the partition key cannot be declared
+            skipped.append(name)
+            continue
+        shadow_name = _suffixed(name, SHADOW_SUFFIX)
+        if _exists(cursor, quote(shadow_name)):
+            continue
+        if progress:
+            progress(name)
+        cursor.execute(_index_sql(shadow_name, definition, SHADOW))
+    cursor.execute(f'ANALYZE {SHADOW}')
+    return skipped
+
+
+def add_foreign_keys(cursor):
+    """The foreign keys of "Transactions" to other tables; returns those dropped"""
+    cursor.execute("""
+        SELECT conname, pg_get_constraintdef(oid), confrelid = conrelid
+        FROM pg_constraint
+        WHERE conrelid = to_regclass(%s) AND contype = 'f'
+        ORDER BY conname
+    """, [quote(PARENT)])
+    dropped = []
+    for name, definition, self_reference in cursor.fetchall():
+        if self_reference:
+            # Would need a unique key on transaction_id alone
+            dropped.append(name)
+            continue
+        cursor.execute("""
+            SELECT 1 FROM pg_constraint WHERE conrelid = to_regclass(%s) AND conname = %s
+        """, [SHADOW, name])
+        if not cursor.fetchone():
+            cursor.execute(f'ALTER TABLE {SHADOW} ADD CONSTRAINT {quote(name)} {definition}')
+    return dropped
+
+
+def dependent_views(cursor):
+    """(name, kind, definition) of the views and materialized views reading "Transactions" """
+    cursor.execute("""
+        SELECT DISTINCT v.relname, v.relkind, pg_get_viewdef(v.oid)
+        FROM pg_depend d
+        JOIN pg_rewrite r ON r.oid = d.objid
+        JOIN pg_class v ON v.oid = r.ev_class
+        WHERE d.refobjid = to_regclass(%s) AND v.oid <> d.refobjid
+        ORDER BY v.relname
+    """, [quote(PARENT)])
+    views = cursor.fetchall()
+
+    # Recreating them must not drop anything built on top of them
+    for name, _, _ in views:
+        cursor.execute("""
+            SELECT DISTINCT v.relname
+            FROM pg_depend d
+            JOIN pg_rewrite r ON r.oid = d.objid
+            JOIN pg_class v ON v.oid = r.ev_class
+            WHERE d.refobjid = to_regclass(%s) AND v.oid <> d.refobjid
+        """, [quote(name)])
+        dependents = [row[0] for row in cursor.fetchall()]
+        if dependents:
+            raise ValueError(f'{name} reads "Transactions" and is read by {", ".join(dependents)}')
+    return views
+
+
+def build_materialized_views(cursor, progress=None):
+    """Copies of the materialized views reading "Transactions", over the partitioned copy"""
+    for name, kind, definition in dependent_views(cursor):
+        if kind != 'm':
+            continue
+        shadow_name = _suffixed(name, SHADOW_SUFFIX)
+        if progress:
+            progress(name)
+        cursor.execute(f'DROP MATERIALIZED VIEW IF EXISTS {quote(shadow_name)}')
+        cursor.execute(
+            f'CREATE MATERIALIZED VIEW {quote(shadow_name)} AS '
+            + definition.rstrip().rstrip(';').replace(quote(PARENT), SHADOW)
+        )
+        for index, index_definition, _, unique in _indexes(cursor, quote(name)):
+            cursor.execute(_index_sql(
+                _suffixed(index, SHADOW_SUFFIX), index_definition, quote(shadow_name), unique
+            ))
+
+
+def refresh_materialized_views(cursor, progress=None):
+    """Refresh the materialized views reading "Transactions"; returns their names"""
+    refreshed = []
+    for name, kind, _ in dependent_views(cursor):
+        if kind != 'm':
+            continue
+        if progress:
+            progress(name)
+        # CONCURRENTLY keeps the view readable, and needs a unique index
+        unique = any(index[3] for index in _indexes(cursor, quote(name)))
+        cursor.execute(
+            f'REFRESH MATERIALIZED VIEW {"CONCURRENTLY " if unique else ""}{quote(name)}'
+        )
+        refreshed.append(name)
+    return refreshed
+
+
+def _rename_indexes(cursor, table, rename):
+    for name, _, _, _ in _indexes(cursor, table):
+        new_name = rename(name)
+        if new_name != name:
+            cursor.execute(f'ALTER INDEX {quote(name)} RENAME TO {quote(new_name)}')
+
+
+def _strip_shadow_suffix(name):
+    return name[:-len(SHADOW_SUFFIX)] if name.endswith(SHADOW_SUFFIX) else name
+
+
+def swap(cursor, batch_size, verify=False):
+    """Make the partitioned copy "Transactions"; call inside transaction.atomic()
+
+    Returns the row count. Raises ValueError, leaving everything as it was, if
+    the copy does not match.
+    """
+    cursor.execute(f'LOCK TABLE {quote(PARENT)} IN ACCESS EXCLUSIVE MODE')
+    while catch_up(cursor, batch_size):
+        pass
+
+    cursor.execute(f'SELECT COUNT(*) FROM {quote(PARENT)}')
+    rows = cursor.fetchone()[0]
+    cursor.execute(f'SELECT COUNT(*) FROM {SHADOW}')
+    copied = cursor.fetchone()[0]
+    if rows != copied:
+        raise ValueError(f'"Transactions" has {rows:,} rows, the partitioned copy {copied:,}')
+    if verify:
+        checksum = 'SELECT COALESCE(SUM(hashtextextended(t::text, 0)), 0) FROM {} t'
+        cursor.execute(checksum.format(quote(PARENT)))
+        expected = cursor.fetchone()[0]
+        cursor.execute(checksum.format(SHADOW))
+        if cursor.fetchone()[0] != expected:
+            raise ValueError('The partitioned copy differs from "Transactions" (checksum)')
+
+    views = dependent_views(cursor)
+    cursor.execute("""
+        SELECT tgname, pg_get_triggerdef(oid) FROM pg_trigger
+        WHERE tgrelid = to_regclass(%s) AND NOT tgisinternal AND tgname <> 'transactions_partition_log'
+    """, [quote(PARENT)])
+    triggers = cursor.fetchall()
+
+    cursor.execute(f'DROP TRIGGER transactions_partition_log ON {quote(PARENT)}')
+    for name, _ in triggers:
+        cursor.execute(f'DROP TRIGGER {quote(name)} ON {quote(PARENT)}')
+
+    _rename_indexes(cursor, quote(PARENT), lambda name: _suffixed(name, OLD_SUFFIX))
+    cursor.execute(f'ALTER TABLE {quote(PARENT)} RENAME TO {OLD}')
+    cursor.execute(f'ALTER TABLE {SHADOW} RENAME TO {quote(PARENT)}')
+    _rename_indexes(cursor, quote(PARENT), _strip_shadow_suffix)
+
+    # Definitions name "Transactions", which is now the partitioned table
+    for _, definition in triggers:
+        cursor.execute(definition)
+    for name, kind, definition in views:
+        if kind == 'v':
+            cursor.execute(f'CREATE OR REPLACE VIEW {quote(name)} AS {definition}')
+        else:
+            shadow_name = _suffixed(name, SHADOW_SUFFIX)
+            cursor.execute(f'DROP MATERIALIZED VIEW {quote(name)}')
+            cursor.execute(f'ALTER MATERIALIZED VIEW {quote(shadow_name)} RENAME TO {quote(name)}')
+            _rename_indexes(cursor, quote(name), _strip_shadow_suffix)
+
+    cursor.execute(f'DROP TABLE {CHANGES}')
+    cursor.execute('DROP FUNCTION transactions_log_change()')
+    return rows
+
+
+def drop_old(cursor):
+    """Drop the pre-conversion heap; returns False if there is none"""
+    if not _exists(cursor, OLD):
+        return False
+    cursor.execute(f'DROP TABLE {OLD}')
+    return True
@@ -0,0 +1,272 @@
+"""
+Race IE Aggregation Service
+
+For/against IE totals and counts for every candidate committee matching an
+office/cycle filter, from one grouped query instead of one or two aggregate
+queries per candidate.
+
+Without a date window the totals come from the incrementally maintained
+agg_ie_by_subject table when it has been built (see incremental_aggregates);
+otherwise from the columnar analytics snapshot when it is enabled and current
+(see analytics_engine), or by grouping ie_fact by subject committee.
+
+The *_from_snapshot() functions are the analytics snapshot versions of
+RaceAggregationManager's race queries and primary_race_detail's IE queries,
+returning rows in the same shape.
+
+Usage:
+    totals = candidate_ie_totals(office_id=1, cycle_id=7, date_from='2024-01-01')
+    totals.get(committee_id, EMPTY_TOTALS)['ie_for']
+"""
+
+from decimal import Decimal
+from django.db import connection
+from django.db.models import Count, Q, Sum
+
+from transparency.models import Committee, Entity, IEFact, TransactionType, cents_to_dollars
+from transparency.services import analytics_engine
+from transparency.services.analytics_engine import cents
+from transparency.services.incremental_aggregates import aggregates_built
+
+
+EMPTY_TOTALS = {
+    'ie_for': Decimal('0'),
+    'ie_for_count': 0,
+    'ie_against': Decimal('0'),
+    'ie_against_count': 0,
+}
+
+
+def candidate_ie_totals(office_id=None, cycle_id=None, date_from=None, date_to=None):
+    """
+    Return {committee_id: totals} for candidate committees with IE activity.
+
+    totals has ie_for, ie_for_count, ie_against and ie_against_count;
+    committees without IEs are absent, use EMPTY_TOTALS for them.
+    """
+    if not date_from and not date_to:
+        with connection.cursor() as cursor:
+            if aggregates_built(cursor):
+                return _totals_from_summary(cursor, office_id, cycle_id)
+
+    snap = analytics_engine.snapshot()
+    if snap is not None:
+        return _totals_from_snapshot(snap, office_id, cycle_id, date_from, date_to)
+
+    filters = Q(
+        subject_committee__candidate__isnull=False,
+        is_for_benefit__isnull=False,
+    )
+    if office_id:
+        filters &= Q(office_id=office_id)
+    if cycle_id:
+        filters &= Q(subject_committee__election_cycle_id=cycle_id)
+    if date_from:
+        filters &= Q(transaction_date__gte=date_from)
+    if date_to:
+        filters &= Q(transaction_date__lte=date_to)
+
+    # ie_fact keeps the absolute amount; the totals are signed
+    signed_cents = IEFact.signed_cents()
+    rows = IEFact.objects.filter(filters).values('subject_committee_id').annotate(
+        ie_for=cents_to_dollars(Sum(signed_cents, filter=Q(is_for_benefit=True))),
+        ie_for_count=Count('transaction_id', filter=Q(is_for_benefit=True)),
+        ie_against=cents_to_dollars(Sum(signed_cents, filter=Q(is_for_benefit=False))),
+        ie_against_count=Count('transaction_id', filter=Q(is_for_benefit=False)),
+    ).order_by()
+
+    return {
+        row['subject_committee_id']: {
+            'ie_for': row['ie_for'] or Decimal('0'),
+            'ie_for_count': row['ie_for_count'],
+            'ie_against': row['ie_against'] or Decimal('0'),
+            'ie_against_count': row['ie_against_count'],
+        }
+        for row in rows
+    }
+
+
+def _totals_from_summary(cursor, office_id, cycle_id):
+    """Same result as the grouped query, read from agg_ie_by_subject"""
+    cursor.execute("""
+        SELECT
+            a.subject_committee_id,
+            COALESCE(SUM(a.total_amount) FILTER (WHERE a.benefit = 1), 0),
+            COALESCE(SUM(a.transaction_count) FILTER (WHERE a.benefit = 1), 0),
+            COALESCE(SUM(a.total_amount) FILTER (WHERE a.benefit = 0), 0),
+            COALESCE(SUM(a.transaction_count) FILTER (WHERE a.benefit = 0), 0)
+        FROM agg_ie_by_subject a
+        JOIN "Committees" c ON c.committee_id = a.subject_committee_id
+        WHERE c.candidate_id IS NOT NULL
+          AND a.benefit >= 0
+          AND (%s::integer IS NULL OR c.candidate_office_id = %s)
+          AND (%s::integer IS NULL OR c.election_cycle_id = %s)
+        GROUP BY a.subject_committee_id
+    """, [office_id or None, office_id or None, cycle_id or None, cycle_id or None])
+
+    return {
+        committee_id: {
+            'ie_for': ie_for,
+            'ie_for_count': int(for_count),
+            'ie_against': ie_against,
+            'ie_against_count': int(against_count),
+        }
+        for committee_id, ie_for, for_count, ie_against, against_count in cursor.fetchall()
+    }
+
+
+# ==================== COLUMNAR SNAPSHOT ====================
+
+def _totals_from_snapshot(snap, office_id, cycle_id, date_from, date_to):
+    """Same result as the grouped query, from the analytics snapshot"""
+    committees = Committee.objects.filter(candidate__isnull=False)
+    if office_id:
+        committees = committees.filter(candidate_office_id=office_id)
+    if cycle_id:
+        committees = committees.filter(election_cycle_id=cycle_id)
+
+    rows = snap.rows_between(date_from or None, date_to or None)
+    where = snap.where(rows, subject=committees.values_list('committee_id', flat=True))
+    benefit = snap.benefit[rows]
+
+    totals = {}
+    for flag, amount_key, count_key in ((1, 'ie_for', 'ie_for_count'), (0, 'ie_against', 'ie_against_count')):
+        ids, sums, counts = snap.group_sum('subject', rows, where & (benefit == flag))
+        for committee_id, total, count in zip(ids.tolist(), sums.tolist(), counts.tolist()):
+            entry = totals.setdefault(committee_id, dict(EMPTY_TOTALS))
+            entry[amount_key] = cents(total)
+            entry[count_key] = count
+    return totals
+
+
+def race_ie_spending_from_snapshot(snap, office, cycle, party=None):
+    """RaceAggregationManager.get_race_ie_spending() rows, from the analytics snapshot"""
+    subjects = Committee.objects.filter(candidate_office=office)
+    if party:
+        subjects = subjects.filter(candidate_party=party)
+    expense_types = TransactionType.objects.filter(income_expense_neutral=2)
+
+    rows = snap.rows_between(cycle.begin_date, cycle.end_date)
+    where = snap.where(
+        rows,
+        subject=subjects.values_list('committee_id', flat=True),
+        ttype=expense_types.values_list('transaction_type_id', flat=True),
+    )
+    benefit = snap.benefit[rows]
+
+    ids, totals, counts = snap.group_sum('subject', rows, where, absolute=True)
+    ie_for = dict(zip(*(a.tolist() for a in snap.group_sum('subject', rows, where & (benefit == 1), absolute=True)[:2])))
+    ie_against = dict(zip(*(a.tolist() for a in snap.group_sum('subject', rows, where & (benefit == 0), absolute=True)[:2])))
+
+    labels = {
+        c['committee_id']: c for c in Committee.objects.filter(committee_id__in=ids.tolist()).values(
+            'committee_id', 'name__last_name', 'name__first_name', 'candidate_party__name'
+        )
+    }
+
+    results = []
+    for committee_id, total, count in zip(ids.tolist(), totals.tolist(), counts.tolist()):
+        label = labels.get(committee_id, {})
+        results.append({
+            'subject_committee__committee_id': committee_id,
+            'subject_committee__name__last_name': label.get('name__last_name'),
+            'subject_committee__name__first_name': label.get('name__first_name'),
+            'subject_committee__candidate_party__name': label.get('candidate_party__name'),
+            # None when there are no rows, as SUM(...) FILTER gives
+            'ie_for': cents(ie_for[committee_id]) if committee_id in ie_for else None,
+            'ie_against': cents(ie_against[committee_id]) if committee_id in ie_against else None,
+            'num_expenditures': count,
+            'total_ie': cents(total),
+        })
+    results.sort(key=lambda r: (-r['total_ie'], r['subject_committee__committee_id']))
+    return results
+
+
+def ie_committees_from_snapshot(snap, candidate_ids, cycle=None, limit=100):
+    """Committees (lowest ids first) that reported IEs on any of candidate_ids,
+    during cycle if given"""
+    rows = _cycle_rows(snap, cycle)
+    return snap.distinct('committee', rows, snap.where(rows, subject=candidate_ids))[:limit].tolist()
+
+
+def top_donors_from_snapshot(snap, committee_ids, limit=20, cycle=None):
+    """Top contributors (income transactions) to committee_ids, during cycle if
+    given, in the rows of RaceAggregationManager.get_top_ie_donors_by_race()"""
+    income_types = TransactionType.objects.filter(income_expense_neutral=1)
+
+    rows = _cycle_rows(snap, cycle)
+    where = snap.where(
+        rows,
+        committee=committee_ids,
+        ttype=income_types.values_list('transaction_type_id', flat=True),
+    )
+    ids, totals, counts = snap.group_sum('entity', rows, where)
+    top = snap.top_k(totals, limit)
+
+    labels = {
+        e['name_id']: e for e in Entity.objects.filter(name_id__in=ids[top].tolist()).values(
+            'name_id', 'last_name', 'first_name', 'occupation', 'employer'
+        )
+    }
+    results = []
+    for entity_id, total, count in zip(ids[top].tolist(), totals[top].tolist(), counts[top].tolist()):
+        label = labels.get(entity_id, {})
+        results.append({
+            'entity__name_id': entity_id,
+            'entity__last_name': label.get('last_name'),
+            'entity__first_name': label.get('first_name'),
+            'entity__occupation': label.get('occupation'),
+            'entity__employer': label.get('employer'),
+            'total_contributed': cents(total),
+            'num_contributions': count,
+        })
+    return results
+
+
+def ie_spenders_from_snapshot(snap, subject_ids, type_ids):
+    """{subject committee id: (ie_for, ie_against, for spenders, against spenders)}
+
+    Sums are signed Decimals; spenders are the rows of primary_race_detail's
+    spender queries (committee id and name, total, count), largest total first.
+    """
+    rows = snap.rows_between()
+    where = snap.where(rows, subject=subject_ids, ttype=type_ids)
+    benefit = snap.benefit[rows]
+
+    grouped = {}
+    spender_ids = set()
+    for flag in (1, 0):
+        subjects, committees, sums, counts = snap.group_sum_pairs('subject', 'committee', rows, where & (benefit == flag))
+        grouped[flag] = list(zip(subjects.tolist(), committees.tolist(), sums.tolist(), counts.tolist()))
+        spender_ids.update(committees.tolist())
+
+    names = {
+        c['committee_id']: c for c in Committee.objects.filter(committee_id__in=spender_ids).values(
+            'committee_id', 'name__last_name', 'name__first_name'
+        )
+    }
+
+    result = {subject_id: [Decimal('0.00'), Decimal('0.00'), [], []] for subject_id in subject_ids}
+    for flag, amount_index, spenders_index in ((1, 0, 2), (0, 1, 3)):
+        for subject_id, committee_id, total, count in grouped[flag]:
+            entry = result.setdefault(subject_id, [Decimal('0.00'), Decimal('0.00'), [], []])
+            entry[amount_index] += cents(total)
+            name = names.get(committee_id, {})
+            entry[spenders_index].append({
+                'committee__committee_id': committee_id,
+                'committee__name__last_name': name.get('name__last_name'),
+                'committee__name__first_name': name.get('name__first_name'),
+                'total': cents(total),
+                'count': count,
+            })
+    for entry in result.values():
+        for spenders in entry[2:]:
+            spenders.sort(key=lambda s: (-s['total'], s['committee__committee_id']))
+    return {subject_id: tuple(entry) for subject_id, entry in result.items()}
+
+
+def _cycle_rows(snap, cycle):
+    # Transaction.cycle is the cycle whose dates contain transaction_date
+    if cycle is None:
+        return snap.rows_between()
+    return snap.rows_between(cycle.begin_date, cycle.end_date)
@@ -0,0 +1,90 @@
+"""
+Name search over "Names".search_name.
+
+search_name is first, middle and last name and suffix, upper-cased with
+punctuation removed ("Mary-Kate O'Brien Jr." -> "MARYKATE OBRIEN JR."
+-> "MARYKATE OBRIEN JR"). The names_search_name trigger sets it on every
+insert and name change, whichever import path writes the row. One GIN
+trigram index (idx_entity_search_trgm, pg_trgm) answers both ways a name
+matches a query:
+
+    contains   every word of the query appears in search_name (LIKE '%WORD%')
+    similar    search_name % query, pg_trgm's similarity operator, which also
+               catches misspellings ("MICHEAL" for "MICHAEL")
+
+Results are ranked by similarity(search_name, query), best first. Lists in a
+fixed order (transactions, expenditures by date) only use the match.
+
+Usage:
+    queryset = filter_queryset(Committee.objects.all(), 'jane doe', 'name', 'candidate')
+
+    sql, params = match_sql('cn', 'jane doe')     # raw SQL, "Names" aliased cn
+    rank, rank_params = rank_sql('cn', 'jane doe')
+"""
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import Q
+from django.db.models.functions import Greatest
+import re
+
+_PUNCTUATION = re.compile(r'[^\w\s]|_')
+
+
+def normalize(value):
+    """The normalization the names_search_name trigger applies (normalize_search_name)"""
+    return ' '.join(_PUNCTUATION.sub('', (value or '').upper()).split())
+
+
+def _field(path):
+    return f'{path}__search_name' if path else 'search_name'
+
+
+# ==================== ORM ====================
+
+def name_q(query, *paths):
+    """
+    Q matching rows where the Entity at any of paths (e.g. 'name',
+    'candidate'; none for Entity itself) contains every word of query or
+    is similar to it
+    """
+    term = normalize(query)
+    condition = Q()
+    for path in paths or ('',):
+        field = _field(path)
+        contains = Q()
+        for word in term.split():
+            contains &= Q(**{f'{field}__contains': word})
+        condition |= contains | Q(**{f'{field}__trigram_similar': term})
+    return condition
+
+
+def name_rank(query, *paths):
+    """Best similarity of query to the Entity at any of paths"""
+    term = normalize(query)
+    ranks = [TrigramSimilarity(_field(path), term) for path in paths or ('',)]
+    return ranks[0] if len(ranks) == 1 else Greatest(*ranks)
+
+
+def filter_queryset(queryset, query, *paths):
+    """Rows matching query, best match first (annotated search_rank)"""
+    if not normalize(query):
+        return queryset
+    return queryset.filter(name_q(query, *paths)).annotate(
+        search_rank=name_rank(query, *paths)
+    ).order_by('-search_rank', 'pk')
+
+
+# ==================== RAW SQL ====================
+
+def match_sql(alias, query):
+    """name_q() as a condition on "Names" aliased alias, with its params"""
+    term = normalize(query)
+    words = term.split()
+    contains = ' AND '.join(f'{alias}.search_name LIKE %s' for _ in words) or 'false'
+    params = [f'%{word}%' for word in words] + [term]
+    return f'(({contains}) OR {alias}.search_name %% %s)', params
+
+
+def rank_sql(alias, query):
+    """name_rank() for "Names" aliased alias, with its params"""
+    return f'similarity({alias}.search_name, %s)', [normalize(query)]
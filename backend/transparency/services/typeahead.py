@@ -0,0 +1,318 @@
+"""
+Typeahead Prefix Index
+
+Answers search-box keystrokes from memory instead of the paginated list
+endpoints. One index per process holds every candidate and committee and the
+top donors (top_donors_mv), ranked by money:
+
+    candidate   candidate committees, by IE spent for + against them
+    committee   all committees, by contributions received
+    donor       top TYPEAHEAD_MAX_DONORS donors, by total contributed
+
+Entries are sorted by score, so an entry's position is its rank. Names are
+normalized like search_name (services/search.py) and split into tokens. The
+token -> entries map is a sorted token list plus one int32 postings array
+(CSR: the entries of vocab[i] are postings[offsets[i]:offsets[i + 1]]), so a
+prefix is two bisects and one contiguous slice, and a multi-word query is an
+intersection of sorted integer arrays. Labels are one string plus offsets.
+
+The index is built on first use. Every TYPEAHEAD_VERSION_CHECK_INTERVAL
+seconds a lookup compares the data version; when it has moved, a background
+thread rebuilds the index while the old one keeps answering.
+
+Usage:
+    get_index().lookup('jane do', kinds=['candidate'], limit=10)
+    get_index().stats()
+"""
+
+from bisect import bisect_left
+from django.conf import settings
+from django.db import connection
+from transparency.services.search import normalize
+from transparency.utils.data_version import get_data_version
+import itertools
+import logging
+import numpy as np
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+KINDS = ['candidate', 'committee', 'donor']
+
+
+class PrefixIndex:
+    """Ranked entries and a token prefix index over their normalized names"""
+
+    def __init__(self, kinds, ids, scores, labels, version):
+        order = np.argsort(-scores, kind='stable')
+        self.kinds = kinds[order]
+        self.ids = ids[order]
+        self.scores = scores[order]
+        self.version = version
+        self.built_at = time.time()
+
+        labels = [labels[i] for i in order]
+        lengths = np.fromiter((len(label) for label in labels), dtype=np.int64, count=len(labels))
+        self.label_offsets = np.zeros(len(labels) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.label_offsets[1:])
+        self.label_text = ''.join(labels)
+
+        postings = {}
+        for position, label in enumerate(labels):
+            for token in set(normalize(label).split()):
+                postings.setdefault(token, []).append(position)
+        self.vocab = sorted(postings)
+        sizes = np.fromiter((len(postings[t]) for t in self.vocab), dtype=np.int64, count=len(self.vocab))
+        self.offsets = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=self.offsets[1:])
+        self.postings = np.fromiter(
+            itertools.chain.from_iterable(postings[t] for t in self.vocab),
+            dtype=np.int32, count=int(self.offsets[-1])
+        )
+
+        # One- and two-character prefixes span most of the postings; merge them once
+        self.short_prefixes = {}
+        for token in self.vocab:
+            for prefix in (token[:1], token[:2]):
+                if prefix not in self.short_prefixes:
+                    self.short_prefixes[prefix] = self._merge(prefix)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def label(self, position):
+        return self.label_text[self.label_offsets[position]:self.label_offsets[position + 1]]
+
+    def _range(self, prefix):
+        """Vocabulary positions [lo, hi) of the tokens starting with prefix"""
+        lo = bisect_left(self.vocab, prefix)
+        return lo, bisect_left(self.vocab, prefix + '\uffff', lo)
+
+    def _merge(self, prefix):
+        lo, hi = self._range(prefix)
+        matches = self.postings[self.offsets[lo]:self.offsets[hi]]
+        # A single token's postings are already sorted and distinct
+        return matches if hi - lo == 1 else np.unique(matches)
+
+    def _prefix(self, prefix):
+        """Sorted, distinct positions of entries with a token starting with prefix"""
+        if prefix in self.short_prefixes:
+            return self.short_prefixes[prefix]
+        return self._merge(prefix)
+
+    def lookup(self, query, kinds=None, limit=10):
+        """Best-ranked entries whose tokens start with every word of query"""
+        words = normalize(query).split()
+        if not words:
+            return []
+
+        # Narrowest word first, then keep its positions that the others also match
+        def postings_size(word):
+            lo, hi = self._range(word)
+            return self.offsets[hi] - self.offsets[lo]
+
+        allowed = None
+        if kinds:
+            allowed = np.zeros(len(KINDS), dtype=bool)
+            allowed[[KINDS.index(kind) for kind in kinds]] = True
+
+        words = sorted(set(words), key=postings_size)
+        if len(words) == 1 and words[0] not in self.short_prefixes:
+            # One word over many tokens: select the best without sorting them all
+            lo, hi = self._range(words[0])
+            matches = self.postings[self.offsets[lo]:self.offsets[hi]]
+            if allowed is not None:
+                matches = matches[allowed[self.kinds[matches]]]
+            positions = _smallest_distinct(matches, limit)
+        else:
+            positions = None
+            for word in words:
+                matches = self._prefix(word)
+                positions = matches if positions is None else _intersect_sorted(positions, matches)
+                if not len(positions):
+                    return []
+            if allowed is not None:
+                positions = _first_allowed(positions, allowed[self.kinds], limit)
+
+        return [
+            {
+                'type': KINDS[self.kinds[p]],
+                'id': int(self.ids[p]),
+                'label': self.label(p),
+                'score': float(self.scores[p]),
+            }
+            for p in positions[:limit]
+        ]
+
+    def memory_bytes(self):
+        """Arrays, label text and vocabulary (strings and list), in bytes"""
+        arrays = (self.kinds, self.ids, self.scores, self.label_offsets, self.offsets, self.postings)
+        return (
+            sum(a.nbytes for a in arrays)
+            + sum(a.nbytes for a in self.short_prefixes.values())
+            + sys.getsizeof(self.label_text)
+            + sys.getsizeof(self.vocab)
+            + sum(sys.getsizeof(token) for token in self.vocab)
+        )
+
+    def stats(self):
+        counts = np.bincount(self.kinds, minlength=len(KINDS))
+        memory = self.memory_bytes()
+        budget = settings.TYPEAHEAD_MEMORY_BUDGET
+        return {
+            'entries': {kind: int(counts[i]) for i, kind in enumerate(KINDS)},
+            'tokens': len(self.vocab),
+            'postings': len(self.postings),
+            'memory_bytes': memory,
+            'memory_budget_bytes': budget,
+            'within_budget': memory <= budget,
+            'data_version': self.version,
+            'built_at': self.built_at,
+        }
+
+
+def _intersect_sorted(small, large):
+    """Values of sorted, distinct small that are also in sorted large"""
+    if len(small) > len(large):
+        small, large = large, small
+    idx = np.searchsorted(large, small)
+    idx[idx == len(large)] = 0
+    return small[large[idx] == small]
+
+
+def _smallest_distinct(values, limit):
+    """The limit smallest distinct values, sorted"""
+    k = 2 * limit
+    if len(values) > k:
+        smallest = np.unique(np.partition(values, k)[:k])
+        # Entries repeat only when several of their tokens share the prefix
+        if len(smallest) >= limit:
+            return smallest[:limit]
+    return np.unique(values)[:limit]
+
+
+def _first_allowed(positions, allowed, limit, chunk=256):
+    """The first limit positions whose entry is allowed, scanning in chunks"""
+    found = []
+    count = 0
+    for start in range(0, len(positions), chunk):
+        block = positions[start:start + chunk]
+        block = block[allowed[block]]
+        found.append(block)
+        count += len(block)
+        if count >= limit:
+            break
+    return np.concatenate(found) if found else positions[:0]
+
+
+# ==================== BUILD ====================
+
+def build_index():
+    """Index the current candidates, committees and top donors"""
+    start = time.time()
+    version = get_data_version()
+    rows = []
+
+    with connection.cursor() as cursor:
+        # Candidate and committee totals from the all-cycles rollup row
+        cursor.execute("""
+            SELECT 0, c.committee_id,
+                   concat_ws(' ', NULLIF(n.first_name, ''), n.last_name),
+                   COALESCE(r.ie_for + r.ie_against, 0)
+            FROM "Committees" c
+            JOIN "Names" n ON n.name_id = c.candidate_id
+            LEFT JOIN committee_financial_rollup r
+                ON r.committee_id = c.committee_id AND r.cycle_key = 0
+            UNION ALL
+            SELECT 1, c.committee_id,
+                   concat_ws(' ', NULLIF(n.first_name, ''), n.last_name),
+                   COALESCE(r.total_income, 0)
+            FROM "Committees" c
+            JOIN "Names" n ON n.name_id = c.name_id
+            LEFT JOIN committee_financial_rollup r
+                ON r.committee_id = c.committee_id AND r.cycle_key = 0
+        """)
+        rows.extend(cursor.fetchall())
+
+        cursor.execute("SELECT to_regclass('top_donors_mv') IS NOT NULL")
+        if cursor.fetchone()[0]:
+            cursor.execute("""
+                SELECT 2, entity_id, entity_name, total_contributed
+                FROM top_donors_mv
+                ORDER BY total_contributed DESC
+                LIMIT %s
+            """, [settings.TYPEAHEAD_MAX_DONORS])
+            rows.extend(cursor.fetchall())
+        else:
+            logger.warning("Typeahead: top_donors_mv does not exist; donors not indexed")
+
+    n = len(rows)
+    index = PrefixIndex(
+        kinds=np.fromiter((r[0] for r in rows), dtype=np.int8, count=n),
+        ids=np.fromiter((r[1] for r in rows), dtype=np.int32, count=n),
+        scores=np.fromiter((float(r[3] or 0) for r in rows), dtype=np.float64, count=n),
+        labels=[r[2] or '' for r in rows],
+        version=version,
+    )
+
+    stats = index.stats()
+    logger.info(
+        f"Typeahead index built: {n:,} entries, {stats['tokens']:,} tokens, "
+        f"{stats['memory_bytes'] / 1024 / 1024:.1f} MB in {time.time() - start:.2f}s"
+    )
+    if not stats['within_budget']:
+        logger.warning(
+            f"Typeahead index uses {stats['memory_bytes']:,} bytes, over the "
+            f"{stats['memory_budget_bytes']:,} byte budget; lower TYPEAHEAD_MAX_DONORS"
+        )
+    return index
+
+
+# ==================== PER-PROCESS INDEX ====================
+
+_index = None
+_lock = threading.Lock()
+_rebuilding = False
+_checked_at = 0.0
+
+
+def get_index():
+    """This process's index: built on first use, rebuilt when the data version moves"""
+    global _index, _checked_at
+
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = build_index()
+                _checked_at = time.monotonic()
+        return _index
+
+    now = time.monotonic()
+    if now - _checked_at >= settings.TYPEAHEAD_VERSION_CHECK_INTERVAL:
+        _checked_at = now
+        if get_data_version() != _index.version:
+            _rebuild_in_background()
+    return _index
+
+
+def _rebuild_in_background():
+    global _rebuilding
+    with _lock:
+        if _rebuilding:
+            return
+        _rebuilding = True
+    threading.Thread(target=_rebuild, name='typeahead-rebuild', daemon=True).start()
+
+
+def _rebuild():
+    global _index, _rebuilding
+    try:
+        _index = build_index()
+    except Exception as e:
+        logger.error(f"Typeahead rebuild failed: {e}", exc_info=True)
+    finally:
+        connection.close()
+        with _lock:
+            _rebuilding = False
@@ -0,0 +1,51 @@
+"""
+Cache tag invalidation for model edits that do not touch "Transactions"
+
+Imports, merges and materialized view refreshes move the data version (see
+utils/data_version.py). Committees, candidate names and SOIs also change
+through the admin, the API and the scrapers; these receivers invalidate the
+tags of the cached responses that show them.
+"""
+
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import CandidateStatementOfInterest, Committee, Entity
+from .utils.data_version import committee_tag, invalidate_tags, race_tag
+
+
+@receiver([post_save, post_delete], sender=CandidateStatementOfInterest)
+def soi_changed(sender, instance, **kwargs):
+    invalidate_tags('soi')
+
+
+@receiver(pre_save, sender=Committee)
+def committee_race_before_save(sender, instance, **kwargs):
+    # The race the committee leaves, if the save moves it
+    instance._previous_race = Committee.objects.filter(pk=instance.pk).values_list(
+        'candidate_office_id', 'election_cycle_id'
+    ).first() if instance.pk else None
+
+
+@receiver([post_save, post_delete], sender=Committee)
+def committee_changed(sender, instance, **kwargs):
+    tags = {
+        'races', committee_tag(instance.pk),
+        race_tag(instance.candidate_office_id, instance.election_cycle_id),
+    }
+    previous = getattr(instance, '_previous_race', None)
+    if previous:
+        tags.add(race_tag(*previous))
+    invalidate_tags(*tags)
+
+
+@receiver([post_save, post_delete], sender=Entity)
+def entity_changed(sender, instance, created=False, **kwargs):
+    # A new name is not shown anywhere yet
+    if created:
+        return
+    races = Committee.objects.filter(
+        Q(name_id=instance.pk) | Q(candidate_id=instance.pk)
+    ).values_list('candidate_office_id', 'election_cycle_id').distinct()
+    invalidate_tags('races', *{race_tag(*race) for race in races})
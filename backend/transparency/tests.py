@@ -1,3 +1,1683 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.core.paginator import EmptyPage
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from io import StringIO
+from pathlib import Path
+from rest_framework.test import APIRequestFactory, force_authenticate
+from transparency.models import (
+    CandidateStatementOfInterest, Committee, CommitteeFinancialRollup, Cycle, Entity, EntityType,
+    IEFact, ImportBatch, Office, Party, Transaction, TransactionType,
+)
+from transparency.management.commands import benchmark_search, import_csv
+from transparency.services import (
+    analytics_engine, bulk_load, incremental_aggregates, partitioning, race_aggregation, search, typeahead,
+)
+from transparency.services.counts import CountResult
+from transparency.services.money_flow import build_flow_graph
+from transparency.utils import compressed_cache, zstd_dictionaries
+from transparency.utils.cache_metrics import TOTALS_LOCK_KEY, WORKER_KEY, CacheMetrics, key_prefix
+from transparency.utils.data_version import (
+    committee_tag, get_data_version, race_tag, reload_data_version, versioned_key,
+)
+from transparency.utils.keyset import encode_cursor
+from transparency.utils.tiered_cache import LOG_KEY, SEQ_KEY, TieredCache
+from transparency.views import (
+    CommitteeViewSet, CountedPaginator, candidates_list, donor_page_rows, expenditure_page_rows,
+)
+from transparency.views_validation import merge_entities
+from transparency.views_ie_analysis import (
+    grassroots_threshold_analysis, ie_spending_by_race, top_candidates_by_ie,
+)
+from unittest import mock
+import gzip
+import json
+import numpy as np
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
 
-# Create your tests here.
+
+# ==================== TRANSFORM ====================
+
+SEETHEMONEY_CSV = (
+    'TransactionDate,FilerName,TransactionName,TransactionType,Amount,City,State\r\n'
+    '11/8/2016 12:00:00 AM,Friends of Jane,John Smith,Contribution,"1,250.00",Phoenix,AZ\r\n'
+    '\r\n'
+    '2016-03-01,Friends of Jane,"Smith, Mary",Contribution,25,"Tucson\r\nWest",AZ\r\n'
+    '3/2/2016,PAC One,Acme Corp,Expenditure\r\n'
+    'not a date,,,,-10.5,,\r\n'
+    '\r\n'
+    '4/4/2016,PAC One,Acme Corp,Expenditure,99.99,Mesa,AZ,extra\r\n'
+)
+
+
+class TransformChunkedTests(SimpleTestCase):
+    """The chunked transform writes what the DictReader path writes"""
+
+    def transform(self, source, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'seethemoney.csv'
+            path.write_text(source, encoding='utf-8')
+            out = StringIO()
+            call_command('transform_seethemoney', str(path), stdout=out, **options)
+            output = (Path(tmp) / 'seethemoney_transformed.csv').read_bytes()
+        counts = [line.strip() for line in out.getvalue().splitlines()
+                  if line.strip().startswith(('Processed:', 'Errors:'))]
+        return output, counts
+
+    def test_chunked_matches_serial(self):
+        serial = self.transform(SEETHEMONEY_CSV)
+        for workers, chunk_size in ((1, 2), (1, 50000), (2, 1)):
+            with self.subTest(workers=workers, chunk_size=chunk_size):
+                self.assertEqual(
+                    self.transform(SEETHEMONEY_CSV, workers=workers, chunk_size=chunk_size),
+                    serial
+                )
+
+    def test_blank_and_short_rows(self):
+        output, counts = self.transform(SEETHEMONEY_CSV, workers=1)
+        # Blank lines are not rows; the short row (no Amount) is an error
+        self.assertEqual(counts, ['Processed: 4', 'Errors: 1'])
+        self.assertNotIn(b'2016-01-01,0,', output)
+
+
+# ==================== TIERED CACHE ====================
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'},
+})
+class TieredCacheTests(SimpleTestCase):
+    """Two TieredCache instances over one L2 stand for two workers"""
+
+    def worker(self, name):
+        cache = TieredCache(name, {'OPTIONS': {'L2': 'shared', 'L1_TIMEOUT': 60, 'SYNC_INTERVAL': 0}})
+        cache._l1.clear()
+        return cache
+
+    def setUp(self):
+        caches['shared'].clear()
+        self.a = self.worker('worker_a')
+        self.b = self.worker('worker_b')
+
+    def test_l1_expiry_follows_shorter_timeout(self):
+        with mock.patch('transparency.utils.tiered_cache.time.monotonic', return_value=1000.0):
+            self.a.set('short', 'value', timeout=5)
+            self.a.set('none', 'value', timeout=0)
+        self.assertEqual(self.a._l1.entries[self.a.make_key('short')][0], 1005.0)
+        self.assertNotIn(self.a.make_key('none'), self.a._l1.entries)
+
+    def test_no_log_without_redis(self):
+        self.a.set('key', 'value')
+        self.assertIsNone(caches['shared'].get(SEQ_KEY))
+        self.assertIsNone(caches['shared'].get(LOG_KEY.format(1)))
+
+    def test_counters_read_from_l2(self):
+        self.a.set('tag', 1, timeout=None)
+        self.assertEqual(self.b.get('tag'), 1)
+        self.a.incr('tag')
+        self.assertEqual(self.b.get('tag'), 2)
+
+    def test_clear_reaches_other_workers(self):
+        self.a.set('key', 'old')
+        self.assertEqual(self.b.get('key'), 'old')
+        self.a.clear()
+        self.assertIsNone(self.b.get('key'))
+
+
+# ==================== COMPRESSION ====================
+
+class ZstdPerThreadTests(SimpleTestCase):
+    """zstd objects are not thread-safe: each warm-up thread gets its own"""
+
+    def test_compressor_per_thread(self):
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            barrier = threading.Barrier(2)
+
+            def objects():
+                barrier.wait()
+                return compressed_cache.compressor(), compressed_cache.decompressor()
+
+            first, second = [future.result() for future in [pool.submit(objects) for _ in range(2)]]
+        self.assertIsNot(first[0], second[0])
+        self.assertIsNot(first[1], second[1])
+        self.assertIs(compressed_cache.compressor(), compressed_cache.compressor())
+
+    def test_round_trip_across_threads(self):
+        body = b'{"candidates": [' + b'{"name": "Jane"},' * 1000 + b'{}]}'
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(
+                lambda _: compressed_cache.decompressor().decompress(compressed_cache.compressor().compress(body)),
+                range(64)
+            ))
+        self.assertTrue(all(result == body for result in results))
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'single-flight'}},
+    ZSTD_DICT_SAMPLE_RATE=0,
+)
+@mock.patch.object(zstd_dictionaries, 'current', return_value=None)
+@mock.patch.object(compressed_cache, 'WAIT_POLL_INTERVAL', 0.01)
+class SingleFlightTests(SimpleTestCase):
+    """get_or_compute() computes an expired entry in one request at a time"""
+
+    KEY = 'single_flight:test'
+    WAITERS = 7
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def stats_since(self, before):
+        after = compressed_cache.SingleFlightStats.snapshot()
+        return {name: after[name] - before[name] for name in before if name != 'pid'}
+
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_concurrent_misses_compute_once(self, current):
+        before = compressed_cache.SingleFlightStats.snapshot()
+        computed = []
+
+        def compute():
+            # Hold the lock until every other request is waiting for the result
+            self.wait_for(lambda: self.stats_since(before)['coalesced_waits'] == self.WAITERS)
+            computed.append(threading.get_ident())
+            return {'rows': [1, 2, 3]}
+
+        barrier = threading.Barrier(self.WAITERS + 1)
+
+        def request():
+            barrier.wait()
+            return compressed_cache.CompressedCache.get_or_compute(self.KEY, compute, timeout=60)
+
+        with self.assertNoLogs('transparency.utils.compressed_cache', level='INFO'):
+            with ThreadPoolExecutor(max_workers=self.WAITERS + 1) as pool:
+                results = [f.result() for f in [pool.submit(request) for _ in range(self.WAITERS + 1)]]
+
+        self.assertEqual(len(computed), 1)
+        self.assertEqual(results, [{'rows': [1, 2, 3]}] * (self.WAITERS + 1))
+        stats = self.stats_since(before)
+        self.assertEqual(stats['computes'], 1)
+        self.assertEqual(stats['coalesced_waits'], self.WAITERS)
+        self.assertEqual(stats['wait_timeouts'], 0)
+
+    def test_stale_value_served_during_refresh(self, current):
+        # Expired at once, kept for a minute past its TTL
+        compressed_cache.CompressedCache.set(self.KEY, {'version': 1}, timeout=0, stale_ttl=60)
+        before = compressed_cache.SingleFlightStats.snapshot()
+        release = threading.Event()
+
+        def refresh():
+            release.wait(5)
+            return {'version': 2}
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            refreshing = pool.submit(
+                compressed_cache.CompressedCache.get_or_compute, self.KEY, refresh, 60, 60
+            )
+            self.wait_for(lambda: caches['default'].get(f'zstd_lock:{self.KEY}') is not None)
+
+            with self.assertNoLogs('transparency.utils.compressed_cache', level='INFO'):
+                served = compressed_cache.CompressedCache.get_or_compute(
+                    self.KEY, mock.Mock(side_effect=AssertionError('computed twice')), 60, 60
+                )
+            self.assertEqual(served, {'version': 1})
+            release.set()
+            self.assertEqual(refreshing.result(), {'version': 2})
+
+        self.assertEqual(compressed_cache.CompressedCache.get(self.KEY), {'version': 2})
+        stats = self.stats_since(before)
+        self.assertEqual(stats['computes'], 1)
+        self.assertEqual(stats['stale_served'], 1)
+        self.assertEqual(stats['coalesced_waits'], 0)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'zstd-versions'}},
+    ZSTD_DICT_SAMPLE_RATE=0,
+    ZSTD_DICT_CHECK_INTERVAL=3600,
+)
+class ZstdDictionaryVersionTests(TestCase):
+    """Entries keep decompressing across retraining, and miss once their dictionary is pruned"""
+
+    PREFIX = 'candidates_list'
+
+    def setUp(self):
+        caches['default'].clear()
+        self.new_process()
+        self.addCleanup(self.new_process)
+
+    def new_process(self):
+        """Forget every dictionary this process has looked up or loaded"""
+        zstd_dictionaries._current = {}
+        zstd_dictionaries._checked_at = None
+        zstd_dictionaries._dictionaries.clear()
+        zstd_dictionaries._missing.clear()
+        zstd_dictionaries._zstd = threading.local()
+
+    def train(self, seed):
+        rng = random.Random(seed)
+        payloads = [
+            json.dumps({'results': [
+                {'committee_id': rng.randrange(10_000), 'full_name': f'Candidate {rng.randrange(500)}',
+                 'party': rng.choice(['Republican', 'Democratic', 'Libertarian']),
+                 'ie_total_for': rng.randrange(10**6)}
+                for _ in range(rng.randrange(5, 20))
+            ]}).encode()
+            for _ in range(300)
+        ]
+        dictionary = zstd_dictionaries.build(payloads, 4096)
+        return zstd_dictionaries.save(self.PREFIX, dictionary, len(payloads))
+
+    def payload(self, n):
+        return {'results': [{'committee_id': n, 'full_name': f'Candidate {n}', 'party': 'Republican'}] * 5}
+
+    def store(self, n):
+        key = f'{self.PREFIX}_{n}'
+        self.assertEqual(key_prefix(key), self.PREFIX)
+        compressed_cache.CompressedCache.set(key, self.payload(n))
+        return caches['default'].get(f'zstd:{key}')[2]
+
+    def get(self, n):
+        return compressed_cache.CompressedCache.get(f'{self.PREFIX}_{n}')
+
+    def test_older_version_still_read_after_retraining(self):
+        first = self.train(1)
+        self.assertEqual(self.store(1), first)
+        second = self.train(2)
+        self.assertEqual(self.store(2), second)
+
+        # Another process, which has not loaded either dictionary yet
+        self.new_process()
+        self.assertEqual(self.get(1), self.payload(1))
+        self.assertEqual(self.get(2), self.payload(2))
+
+    def test_pruned_version_is_a_clean_miss(self):
+        first = self.train(1)
+        self.store(1)
+        second = self.train(2)
+        self.store(2)
+        self.assertEqual(zstd_dictionaries.prune(self.PREFIX, 1), 1)
+
+        self.new_process()
+        with self.assertNoLogs(compressed_cache.logger, 'ERROR'):
+            self.assertIsNone(self.get(1))
+        self.assertIn(first, zstd_dictionaries._missing)
+        self.assertEqual(self.get(2), self.payload(2))
+
+        # Recomputed under the current dictionary
+        recomputed = compressed_cache.CompressedCache.get_or_compute(
+            f'{self.PREFIX}_1', lambda: self.payload(1)
+        )
+        self.assertEqual(recomputed, self.payload(1))
+        self.assertEqual(caches['default'].get(f'zstd:{self.PREFIX}_1')[2], second)
+
+    def test_entries_from_before_dictionaries_still_read(self):
+        key = f'{self.PREFIX}_1'
+        body = json.dumps(self.payload(1)).encode()
+        caches['default'].set(f'zstd:{key}', (time.time() + 60, compressed_cache.compressor().compress(body)))
+        self.train(1)
+        self.assertEqual(self.get(1), self.payload(1))
+
+
+class ResponseETagTests(SimpleTestCase):
+    """Each Content-Encoding of a cached response has its own strong ETag"""
+
+    def setUp(self):
+        body = b'{"results": []}'
+        self.entry = {
+            'etag': '"v7-abc"', 'size': len(body),
+            'gzip': gzip.compress(body), 'zstd': compressed_cache.compressor().compress(body),
+        }
+
+    def respond(self, accept_encoding, if_none_match=None):
+        headers = {'HTTP_ACCEPT_ENCODING': accept_encoding}
+        if if_none_match:
+            headers['HTTP_IF_NONE_MATCH'] = if_none_match
+        request = RequestFactory().get('/', **headers)
+        return compressed_cache.ResponseCache.respond(request, 'etag-test', self.entry)
+
+    def test_etag_per_encoding(self):
+        self.assertEqual(self.respond('gzip, zstd')['ETag'], '"v7-abc-zstd"')
+        self.assertEqual(self.respond('gzip')['ETag'], '"v7-abc-gzip"')
+        self.assertEqual(self.respond('')['ETag'], '"v7-abc"')
+
+    def test_not_modified_only_for_same_encoding(self):
+        self.assertEqual(self.respond('zstd', '"v7-abc-zstd"').status_code, 304)
+        response = self.respond('gzip', '"v7-abc-zstd"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+# ==================== PAGINATION ====================
+
+class CountedPaginatorTests(SimpleTestCase):
+    """Pages past an estimated count are checked against the exact count"""
+
+    def paginator(self, estimate, rows=450):
+        return CountedPaginator(list(range(rows)), 100, lambda _: CountResult(estimate, True))
+
+    def test_page_within_estimate_keeps_estimate(self):
+        paginator = self.paginator(1000)
+        self.assertEqual(list(paginator.page(2)), list(range(100, 200)))
+        self.assertTrue(paginator.count_approximate)
+        self.assertEqual(paginator.count, 1000)
+
+    def test_pages_beyond_low_estimate(self):
+        paginator = self.paginator(150)
+        page = paginator.page(2)
+        self.assertTrue(page.has_next())
+        self.assertEqual(len(page), 100)
+        self.assertFalse(paginator.count_approximate)
+        self.assertEqual(paginator.count, 450)
+        self.assertEqual(list(self.paginator(150).page(5)), list(range(400, 450)))
+
+    def test_page_past_exact_count(self):
+        with self.assertRaises(EmptyPage):
+            self.paginator(150).page(6)
+        paginator = CountedPaginator(list(range(450)), 100, lambda _: CountResult(450, False))
+        with self.assertRaises(EmptyPage):
+            paginator.page(6)
+
+
+# ==================== FIXTURES ====================
+
+def create_race_data():
+    """
+    One cycle and office, two candidate committees, an IE committee and three
+    donors, with contributions, an expense and IEs for and against; returns
+    {name: object}.
+    """
+    person = EntityType.objects.create(entity_type_id=1, name='Individual')
+    contribution = TransactionType.objects.create(
+        transaction_type_id=1, name='Contribution', income_expense_neutral=1
+    )
+    expense = TransactionType.objects.create(
+        transaction_type_id=2, name='Expenditure', income_expense_neutral=2
+    )
+    ie = TransactionType.objects.create(
+        transaction_type_id=3, name='Independent Expenditure', income_expense_neutral=2
+    )
+    cycle = Cycle.objects.create(
+        cycle_id=1, name='2024',
+        begin_date=datetime(2023, 1, 1, tzinfo=dt_timezone.utc),
+        end_date=datetime(2024, 12, 31, tzinfo=dt_timezone.utc),
+    )
+    office = Office.objects.create(office_id=1, name='Governor')
+
+    def entity(name_id, last_name):
+        return Entity.objects.create(
+            name_id=name_id, name_group_id=name_id, entity_type=person, last_name=last_name
+        )
+
+    def committee(committee_id, name, **fields):
+        return Committee.objects.create(committee_id=committee_id, name=entity(committee_id, name), **fields)
+
+    jones = committee(101, 'Jones for Governor', candidate=entity(201, 'Jones'),
+                      candidate_office=office, election_cycle=cycle)
+    smith = committee(102, 'Smith for Governor', candidate=entity(202, 'Smith'),
+                      candidate_office=office, election_cycle=cycle)
+    pac = committee(103, 'Arizona Forward PAC')
+    donors = [entity(301 + n, f'Donor {n}') for n in range(3)]
+
+    rows = [
+        (1, jones, donors[0], contribution, date(2024, 3, 1), '500.00', None, None),
+        (2, jones, donors[1], contribution, date(2024, 4, 1), '250.00', None, None),
+        (3, smith, donors[2], contribution, date(2024, 5, 1), '1000.00', None, None),
+        (4, jones, donors[2], expense, date(2024, 6, 1), '120.00', None, None),
+        (5, pac, donors[0], ie, date(2024, 7, 1), '5000.00', jones, True),
+        (6, pac, donors[1], ie, date(2024, 8, 1), '2500.00', smith, False),
+        (7, pac, donors[1], ie, date(2024, 9, 1), '-300.00', smith, False),
+    ]
+    for transaction_id, by, to, kind, on, amount, subject, benefit in rows:
+        Transaction.objects.create(
+            transaction_id=transaction_id, committee=by, entity=to, transaction_type=kind,
+            transaction_date=on, amount=Decimal(amount), subject_committee=subject,
+            is_for_benefit=benefit,
+        )
+    with connection.cursor() as cursor:
+        incremental_aggregates.rebuild(cursor)
+    return {
+        'cycle': cycle, 'office': office, 'jones': jones, 'smith': smith, 'pac': pac,
+        'donors': donors, 'contribution': contribution, 'ie': ie,
+    }
+
+
+def summary_mismatches():
+    """{table: mismatches} of the summary tables that differ from a full recompute"""
+    with connection.cursor() as cursor:
+        report = incremental_aggregates.check_consistency(cursor)
+    return {table: found['mismatches'] for table, found in report.items() if found['mismatches']}
+
+
+# ==================== ADMIN ====================
+
+class TransactionAdminTests(TestCase):
+    """Admin edits keep the summary tables and the data version current"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_race_data()
+
+    def setUp(self):
+        self.admin = admin.site._registry[Transaction]
+        self.request = RequestFactory().post('/admin/')
+
+    def test_save_and_delete_are_tracked(self):
+        version = get_data_version()
+        ie = Transaction.objects.get(transaction_id=5)
+        ie.amount = Decimal('7500.00')
+        self.admin.save_model(self.request, ie, form=None, change=True)
+
+        added = Transaction(
+            transaction_id=8, committee=self.data['smith'], entity=self.data['donors'][0],
+            transaction_type=self.data['contribution'], transaction_date=date(2024, 10, 1),
+            amount=Decimal('75.00'),
+        )
+        self.admin.save_model(self.request, added, form=None, change=False)
+        self.admin.delete_model(self.request, Transaction.objects.get(transaction_id=1))
+        self.admin.delete_queryset(self.request, Transaction.objects.filter(transaction_id__in=[6, 7]))
+
+        self.assertEqual(summary_mismatches(), {})
+        self.assertEqual(get_data_version(), version + 4)
+        self.assertEqual(
+            IEFact.objects.get(transaction_id=5).amount_cents, 750000
+        )
+
+
+# ==================== DEDUPLICATION ====================
+
+class DeduplicateTransactionsTests(TestCase):
+    """Duplicates are judged on the rows as they are now, after edits and merges"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_race_data()
+
+    def copy(self, transaction_id, of, **changes):
+        fields = {
+            'committee_id': of.committee_id, 'entity_id': of.entity_id,
+            'transaction_type_id': of.transaction_type_id,
+            'transaction_date': of.transaction_date, 'amount': of.amount,
+        }
+        fields.update(changes)
+        return Transaction.objects.create(transaction_id=transaction_id, **fields)
+
+    def test_edits_and_merges_update_duplicate_groups(self):
+        data = self.data
+        first, second = Transaction.objects.get(transaction_id=1), Transaction.objects.get(transaction_id=2)
+        alias = Entity.objects.create(
+            name_id=310, name_group_id=310, entity_type=data['donors'][0].entity_type, last_name='Donor 0',
+        )
+        self.copy(10, first)
+        edited = self.copy(11, second)
+        self.copy(12, first, entity_id=alias.name_id)
+        with connection.cursor() as cursor:
+            incremental_aggregates.rebuild(cursor)
+
+        # 11 stops being a duplicate of 2 after an admin edit of its amount
+        edited.amount = Decimal('260.00')
+        admin.site._registry[Transaction].save_model(RequestFactory().post('/admin/'), edited, None, True)
+        # 12 becomes a duplicate of 1 once its donor is merged into 1's
+        request = APIRequestFactory().post(
+            '/', {'primary_entity_id': first.entity_id, 'duplicate_entity_ids': [alias.name_id]}, format='json'
+        )
+        force_authenticate(request, user=User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        self.assertEqual(merge_entities(request).status_code, 200)
+
+        self.assertFalse(Transaction.objects.filter(record_hash='').exists())
+        out = StringIO()
+        call_command('deduplicate_transactions', stdout=out)
+        self.assertIn('Grouping on stored record_hash', out.getvalue())
+        self.assertEqual(
+            sorted(Transaction.objects.values_list('transaction_id', flat=True)), [1, 2, 3, 4, 5, 6, 7, 11]
+        )
+        self.assertEqual(summary_mismatches(), {})
+
+
+# ==================== IMPORT ====================
+
+class ImportCsvTests(TestCase):
+    """--bulk (COPY staging table) and the row-by-row path import a file identically"""
+
+    HEADER = (
+        'transaction_id,committee_id,transaction_type_id,transaction_date,amount,entity_id,'
+        'subject_committee_id,is_for_benefit,category_id,memo,account_type,deleted'
+    )
+    ROWS = [
+        '1,101,1,2024-03-01,550.00,301,,,,amount corrected,,0',     # updated
+        '2,101,1,04/01/2024,250,302,,,,memo only,,0',               # unchanged natural key: skipped
+        '4,101,2,2024-06-01,120.00,303,,,,,,1',                     # deleted flag only: skipped
+        '6,103,3,2024-08-01,2600.00,302,101,true,,,,0',             # updated; keeps its subject and benefit
+        '20,102,1,2024-02-15,75.50,301,,,,,,0',                     # created
+        '21,103,3,2024-10-01,900.00,302,101,false,,,,0',            # created IE
+        '22,101,1,2024-05-05,10.00,303,,,,,,0',                     # created, then
+        '22,101,1,2024-05-05,12.00,303,,,,second copy,,0',          # updated by its repeat
+        '23,abc,1,2024-05-06,5.00,301,,,,,,0',                      # error: committee_id
+        '24,101,1,not a date,5.00,301,,,,,,0',                      # error: transaction_date
+    ]
+
+    def setUp(self):
+        create_race_data()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'transactions.csv'
+        self.path.write_text('\n'.join([self.HEADER] + self.ROWS) + '\n')
+
+    def import_twice(self, *flags):
+        """[(counts, rows)] after importing the file, then again, rolled back afterwards"""
+        results = []
+        with transaction.atomic():
+            for _ in range(2):
+                call_command('import_csv', str(self.path), '--no-warm', *flags, stdout=StringIO())
+                batch = ImportBatch.objects.latest('batch_id')
+                self.assertEqual(batch.bulk, bool(flags))
+                counts = (batch.rows_total, batch.rows_created, batch.rows_updated,
+                          batch.rows_skipped, batch.rows_errored)
+                rows = list(Transaction.objects.order_by('transaction_id').values(
+                    'transaction_id', 'committee_id', 'transaction_type_id', 'transaction_date',
+                    'amount', 'entity_id', 'subject_committee_id', 'is_for_benefit', 'category_id',
+                    'memo', 'account_type', 'deleted', 'record_hash', 'cycle_id',
+                ))
+                results.append((counts, rows))
+                self.assertEqual(summary_mismatches(), {})
+            transaction.set_rollback(True)
+        return results
+
+    def test_bulk_matches_row_by_row(self):
+        row_by_row = self.import_twice()
+        bulk = self.import_twice('--bulk')
+
+        (first_counts, first_rows), (again_counts, again_rows) = row_by_row
+        self.assertEqual(first_counts, (10, 3, 3, 2, 2))
+        # Unchanged rows skip; 22's two versions still alternate
+        self.assertEqual(again_counts, (10, 0, 2, 6, 2))
+        self.assertEqual(Decimal(next(r for r in again_rows if r['transaction_id'] == 22)['amount']), Decimal('12.00'))
+
+        for (bulk_counts, bulk_rows), (row_counts, rows), label in zip(bulk, row_by_row, ('import', 're-import')):
+            with self.subTest(label):
+                self.assertEqual(bulk_counts, row_counts)
+                self.assertEqual(bulk_rows, rows)
+
+
+# ==================== MONEY FLOW ====================
+
+class MoneyFlowTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_race_data()
+
+    def test_graph_needs_a_filter(self):
+        with self.assertRaises(ValueError):
+            build_flow_graph()
+
+    def test_cycle_follows_transaction_dates(self):
+        # The candidates' committees are registered for no cycle at all
+        Committee.objects.filter(committee_id__in=[101, 102]).update(election_cycle=None)
+        graph = build_flow_graph(cycle_id=self.data['cycle'].cycle_id)
+        totals = {row['committee_id']: row['total_ie'] for row in graph.candidates()}
+        self.assertEqual(totals, {101: 5000.0, 102: 2800.0})
+
+    def test_detailed_money_flow_keeps_race_keys(self):
+        response = self.client.get('/api/v1/races/detailed-money-flow/', {
+            'office_id': self.data['office'].office_id, 'cycle_id': self.data['cycle'].cycle_id,
+        })
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(
+            [row['subject_committee__committee_id'] for row in body['candidates']], [101, 102]
+        )
+        for key in ('top_donors', 'paths', 'sankey', 'summary'):
+            self.assertIn(key, body)
+
+
+# ==================== QUERY COUNTS ====================
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'query-counts'},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, ANALYTICS_ENGINE=False, DATA_VERSION_CHECK_INTERVAL=0)
+class RaceQueryCountTests(TestCase):
+    """The race IE views run a fixed number of queries however many candidates run"""
+
+    VIEWS = (ie_spending_by_race, grassroots_threshold_analysis, top_candidates_by_ie)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_race_data()
+
+    def params(self):
+        return {'office_id': self.data['office'].office_id, 'cycle_id': self.data['cycle'].cycle_id}
+
+    def get(self, view):
+        caches['default'].clear()
+        response = view(APIRequestFactory().get('/', self.params()))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def add_candidates(self, count):
+        """count more candidates in the race, each with an IE from the PAC"""
+        data = self.data
+        for n in range(count):
+            candidate = Entity.objects.create(
+                name_id=400 + n, name_group_id=400 + n,
+                entity_type=data['donors'][0].entity_type, last_name=f'Candidate {n}',
+            )
+            committee = Committee.objects.create(
+                committee_id=500 + n, name=candidate, candidate=candidate,
+                candidate_office=data['office'], election_cycle=data['cycle'],
+            )
+            Transaction.objects.create(
+                transaction_id=1000 + n, committee=data['pac'], entity=data['donors'][0],
+                transaction_type=data['ie'], transaction_date=date(2024, 10, 1),
+                amount=Decimal('100.00'), subject_committee=committee, is_for_benefit=True,
+            )
+        with connection.cursor() as cursor:
+            incremental_aggregates.rebuild(cursor)
+
+    def test_queries_do_not_grow_with_candidates(self):
+        counts = {}
+        for view in self.VIEWS:
+            with CaptureQueriesContext(connection) as queries:
+                self.get(view)
+            counts[view] = len(queries)
+
+        self.add_candidates(10)
+        for view in self.VIEWS:
+            with self.subTest(view=view.__name__), self.assertNumQueries(counts[view]):
+                self.get(view)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, DATA_VERSION_CHECK_INTERVAL=0)
+class CandidatesListQueryCountTests(TestCase):
+    """candidates_list reads each candidate's latest SOI in the page query, not per row"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_race_data()
+
+    def get(self):
+        caches['default'].clear()
+        response = candidates_list(APIRequestFactory().get('/', {'page_size': 100}))
+        self.assertEqual(response.status_code, 200)
+        return {row['committee_id']: row for row in json.loads(response.content)['results']}
+
+    def file_soi(self, entity, filing_date, status):
+        return CandidateStatementOfInterest.objects.create(
+            candidate_name=entity.last_name, office=self.data['office'], filing_date=filing_date,
+            contact_status=status, contact_date=filing_date if status == 'contacted' else None,
+            entity=entity,
+        )
+
+    def test_queries_do_not_grow_with_page_rows(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.get()
+        baseline = len(queries)
+
+        for n in range(20):
+            candidate = Entity.objects.create(
+                name_id=400 + n, name_group_id=400 + n,
+                entity_type=self.data['donors'][0].entity_type, last_name=f'Candidate {n}',
+            )
+            Committee.objects.create(
+                committee_id=500 + n, name=candidate, candidate=candidate,
+                candidate_office=self.data['office'], election_cycle=self.data['cycle'],
+            )
+            self.file_soi(candidate, date(2024, 1, 1), 'contacted')
+        with self.assertNumQueries(baseline):
+            rows = self.get()
+        self.assertEqual(len(rows), 22)
+        self.assertTrue(rows[500]['contacted'])
+        self.assertEqual(rows[500]['contacted_at'], '2024-01-01')
+
+    def test_latest_soi_wins(self):
+        jones = self.data['jones']
+        self.file_soi(jones.candidate, date(2024, 1, 1), 'contacted')
+        self.file_soi(jones.candidate, date(2024, 3, 1), 'uncontacted')
+        row = self.get()[jones.committee_id]
+        self.assertFalse(row['contacted'])
+        self.assertIsNone(row['contacted_at'])
+
+
+# ==================== KEYSET PAGINATION ====================
+
+@override_settings(CACHES=LOCMEM_CACHES, DATA_VERSION_CHECK_INTERVAL=0)
+class KeysetPaginationTests(TestCase):
+    """Cursor pages list the same rows as OFFSET pages, also across equal sort keys"""
+
+    PAGE_SIZE = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        data = cls.data = create_race_data()
+        person = data['donors'][0].entity_type
+        # IEs on three dates and donors with equal totals: ties on every page boundary
+        for n in range(12):
+            Transaction.objects.create(
+                transaction_id=40 + n, committee=data['pac'], entity=data['donors'][n % 3],
+                transaction_type=data['ie'], transaction_date=date(2024, 10, 1 + n % 3),
+                amount=Decimal('100.00'), subject_committee=data['jones'] if n % 2 else data['smith'],
+                is_for_benefit=bool(n % 2),
+            )
+        for n in range(9):
+            donor = Entity.objects.create(
+                name_id=320 + n, name_group_id=320 + n, entity_type=person, last_name=f'Tied {n}'
+            )
+            Transaction.objects.create(
+                transaction_id=60 + n, committee=data['jones'], entity=donor,
+                transaction_type=data['contribution'], transaction_date=date(2024, 2, 1),
+                amount=Decimal('100.00'),
+            )
+        with connection.cursor() as cursor:
+            incremental_aggregates.rebuild(cursor)
+            incremental_aggregates.install_views(cursor)
+
+    def walk(self, page_rows, key):
+        """(keyset rows, OFFSET rows) of every page of page_rows"""
+        keyset, after = [], None
+        while True:
+            rows = page_rows(limit=self.PAGE_SIZE, after=after)
+            keyset += rows
+            if len(rows) < self.PAGE_SIZE:
+                break
+            after = key(rows[-1])
+        offset_rows = []
+        for page in range(len(keyset) // self.PAGE_SIZE + 1):
+            offset_rows += page_rows(limit=self.PAGE_SIZE, offset=page * self.PAGE_SIZE)
+        return keyset, offset_rows
+
+    def assert_same_rows(self, keyset, offset_rows, ids, expected):
+        self.assertEqual(keyset, offset_rows)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(set(ids), expected)
+
+    def test_expenditure_pages(self):
+        keyset, offset_rows = self.walk(expenditure_page_rows, lambda row: (row[1], row[0]))
+        self.assert_same_rows(
+            keyset, offset_rows, [row[0] for row in keyset],
+            set(IEFact.objects.values_list('transaction_id', flat=True)),
+        )
+
+    def test_donor_pages(self):
+        keyset, offset_rows = self.walk(donor_page_rows, lambda row: (row[7], row[0]))
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT entity_id FROM top_donors_mv')
+            donors = {row[0] for row in cursor.fetchall()}
+        self.assertGreater(len(donors), 2 * self.PAGE_SIZE)
+        self.assert_same_rows(keyset, offset_rows, [row[0] for row in keyset], donors)
+
+    def api_pages(self, params, follow):
+        """transaction_ids of every page of /api/v1/transactions/, following 'next'"""
+        ids, url = [], '/api/v1/transactions/'
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            ids += [row['transaction_id'] for row in response.json()['results']]
+            url, params = follow(response.json()['next']), {}
+        return ids
+
+    def test_transaction_pages(self):
+        for order_by in ('amount', '-amount', '-transaction_date', 'transaction_date'):
+            with self.subTest(order_by=order_by):
+                params = {'order_by': order_by, 'page_size': self.PAGE_SIZE}
+                by_cursor = self.api_pages({**params, 'cursor': ''}, lambda url: url)
+                by_page = self.api_pages({**params, 'page': 1}, lambda url: url)
+                self.assertEqual(by_cursor, by_page)
+                self.assert_same_rows(
+                    by_cursor, by_page, by_cursor,
+                    set(Transaction.objects.filter(deleted=False).values_list('transaction_id', flat=True)),
+                )
+
+    def test_malformed_cursor(self):
+        for path in ('/api/v1/transactions/', '/api/v1/expenditures/', '/api/v1/donors/'):
+            for token in ('not-a-cursor', encode_cursor('2024-10-01'), encode_cursor('x', 'y')):
+                with self.subTest(path=path, token=token):
+                    response = self.client.get(path, {'cursor': token})
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn('cursor', response.content.decode())
+
+
+# ==================== COMMITTEE ROLLUP ====================
+
+@override_settings(CACHES=LOCMEM_CACHES, COMMITTEE_ROLLUP_LIVE_FALLBACK=False,
+                   DATA_VERSION_CHECK_INTERVAL=3600)
+class CommitteeRollupTests(TestCase):
+    """
+    committee_financial_rollup against plain ORM aggregates, and the committee
+    endpoints' query and memory budgets with one committee of 100K transactions
+    """
+
+    ROWS = 3000
+    BIG_COMMITTEE_ROWS = 100000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_race_data()
+        data = cls.data
+        committees = [data['jones'], data['smith'], data['pac']]
+        kinds = [data['contribution'], TransactionType.objects.get(transaction_type_id=2), data['ie']]
+        rng = random.Random(8)
+        Transaction.objects.bulk_create([
+            Transaction(
+                transaction_id=10000 + n,
+                committee=rng.choice(committees),
+                entity=rng.choice(data['donors']),
+                transaction_type=kind,
+                transaction_date=date(2023, 1, 1) + timedelta(days=rng.randrange(730)),
+                amount=Decimal(rng.randrange(-50000, 500000)) / 100,
+                subject_committee=rng.choice([data['jones'], data['smith']]) if kind == data['ie'] else None,
+                is_for_benefit=rng.choice([True, False, None]) if kind == data['ie'] else None,
+                deleted=rng.random() < 0.05,
+            )
+            for n, kind in ((n, rng.choice(kinds)) for n in range(cls.ROWS))
+        ])
+        with connection.cursor() as cursor:
+            # Jones: contributions, expenses and IEs against Smith
+            cursor.execute("""
+                INSERT INTO "Transactions" (
+                    transaction_id, committee_id, entity_id, transaction_type_id, transaction_date,
+                    amount, subject_committee_id, is_for_benefit, memo, account_type, deleted, record_hash
+                )
+                SELECT 100000 + g, %s, 301 + g %% 3, k.type_id, DATE '2023-01-01' + g %% 730,
+                       ((g * 7919) %% 100000) / 100.0 - 50,
+                       CASE WHEN k.type_id = 3 THEN %s END,
+                       CASE WHEN k.type_id = 3 THEN g %% 2 = 0 END,
+                       '', '', g %% 20 = 0, ''
+                FROM generate_series(1, %s) g
+                CROSS JOIN LATERAL (
+                    SELECT CASE WHEN g %% 10 < 6 THEN 1 WHEN g %% 10 < 9 THEN 2 ELSE 3 END AS type_id
+                ) k
+            """, [data['jones'].committee_id, data['smith'].committee_id, cls.BIG_COMMITTEE_ROWS])
+            incremental_aggregates.rebuild(cursor)
+
+    def test_rollup_matches_orm(self):
+        self.assertGreater(self.data['jones'].transactions.count(), self.BIG_COMMITTEE_ROWS)
+        for committee in Committee.objects.all():
+            for method in ('total_income', 'total_expenses', 'cash_balance', 'ie_for', 'ie_against'):
+                with self.subTest(committee=committee.committee_id, method=method):
+                    self.assertEqual(
+                        getattr(committee, f'get_{method}')(),
+                        getattr(committee, f'_live_{method}')(),
+                    )
+
+    def get_within_budget(self, path, params=None, queries=None, transactions=0):
+        """
+        GET path within CommitteeViewSet.MEMORY_BUDGET bytes (tracemalloc
+        peak), at most `transactions` Transaction rows instantiated and, if
+        given, exactly `queries` queries
+        """
+        with mock.patch.object(Transaction, 'from_db', wraps=Transaction.from_db) as loaded:
+            with CaptureQueriesContext(connection) as captured:
+                tracemalloc.start()
+                try:
+                    response = self.client.get(path, params or {})
+                    peak = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(loaded.call_count, transactions)
+        self.assertLess(peak, CommitteeViewSet.MEMORY_BUDGET)
+        if queries is not None:
+            self.assertEqual(len(captured), queries, '\n'.join(q['sql'] for q in captured.captured_queries))
+        return response
+
+    def test_retrieve_budget(self):
+        reload_data_version()
+        jones = self.data['jones']
+        # committee, financial rollup, latest transactions
+        response = self.get_within_budget(
+            f'/api/v1/committees/{jones.committee_id}/', queries=3,
+            transactions=CommitteeViewSet.RECENT_TRANSACTION_LIMIT,
+        )
+        self.assertEqual(Decimal(str(response.json()['total_income'])), jones._live_total_income())
+
+    def test_list_budget(self):
+        reload_data_version()
+        # data version (count cache key), count estimate, exact count (small table), page
+        self.get_within_budget('/api/v1/committees/', {'page_size': 50}, queries=4)
+
+    def test_top_budget(self):
+        # One aggregate query over the candidate committees
+        response = self.get_within_budget('/api/v1/committees/top/', {'limit': 5}, queries=1)
+        self.assertEqual(response.json()[0]['committee_id'], self.data['smith'].committee_id)
+
+    def test_search_budget(self):
+        if not trigram_installed():
+            self.skipTest('pg_trgm is not installed')
+        reload_data_version()
+        response = self.get_within_budget('/api/v1/committees/', {'search': 'jones'})
+        self.assertEqual(response.json()['results'][0]['committee_id'], self.data['jones'].committee_id)
+
+
+class CommitteeRollupCycleTests(TestCase):
+    """Per-cycle rollup rows count each transaction once, in its Transaction.cycle"""
+
+    def setUp(self):
+        self.data = create_race_data()
+        # Overlaps cycle 1 over 2024; the trigger attributes 2024 dates to it
+        self.primary = Cycle.objects.create(
+            cycle_id=2, name='2024 P',
+            begin_date=datetime(2024, 1, 1, tzinfo=dt_timezone.utc),
+            end_date=datetime(2024, 12, 31, tzinfo=dt_timezone.utc),
+        )
+        call_command('backfill_transaction_cycles', stdout=StringIO())
+
+    def rollup(self, committee, cycle):
+        return CommitteeFinancialRollup.objects.filter(
+            committee=committee, cycle_key=cycle.cycle_id
+        ).first()
+
+    def test_transaction_counts_in_one_cycle(self):
+        self.assertEqual(set(Transaction.objects.values_list('cycle_id', flat=True)), {2})
+        jones = self.data['jones']
+        self.assertIsNone(self.rollup(jones, self.data['cycle']))
+        rollup = self.rollup(jones, self.primary)
+        all_cycles = jones.get_financial_rollup()
+        for field in ('total_income', 'total_expenses', 'ie_for', 'income_count', 'ie_for_count'):
+            with self.subTest(field=field):
+                self.assertEqual(getattr(rollup, field), getattr(all_cycles, field))
+        self.assertEqual(summary_mismatches(), {})
+
+    def test_rollup_matches_live_per_cycle(self):
+        # A 2023 contribution: cycle 1 only
+        with incremental_aggregates.track_transaction_changes('SELECT %s', [8]):
+            Transaction.objects.create(
+                transaction_id=8, committee=self.data['smith'], entity=self.data['donors'][0],
+                transaction_type=self.data['contribution'], transaction_date=date(2023, 6, 1),
+                amount=Decimal('75.00'),
+            )
+        self.assertEqual(summary_mismatches(), {})
+        for committee in (self.data['jones'], self.data['smith']):
+            for cycle in (self.data['cycle'], self.primary):
+                rollup = self.rollup(committee, cycle) or CommitteeFinancialRollup()
+                for method in ('total_income', 'total_expenses', 'cash_balance', 'ie_for', 'ie_against'):
+                    with self.subTest(committee=committee.committee_id, cycle=cycle.cycle_id, method=method):
+                        self.assertEqual(
+                            getattr(rollup, method),
+                            getattr(committee, f'_live_{method}')(cycle_id=cycle.cycle_id),
+                        )
+        self.assertEqual(self.rollup(self.data['smith'], self.data['cycle']).total_income, Decimal('75.00'))
+
+
+# ==================== IE FACT ====================
+
+class IEFactConsistencyTests(TestCase):
+    """ie_fact stays equal to a fresh rebuild through the writes that change IEs or their candidates"""
+
+    def setUp(self):
+        self.data = create_race_data()
+        self.assertEqual(summary_mismatches(), {})
+
+    def facts(self, subject):
+        return list(IEFact.objects.filter(subject_committee=subject).order_by('transaction_id').values_list(
+            'transaction_id', 'office_id', 'party_id', 'is_for_benefit', 'amount_cents', 'negative',
+        ))
+
+    def test_import(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / 'transactions.csv'
+        path.write_text(
+            'transaction_id,committee_id,transaction_type_id,transaction_date,amount,entity_id,'
+            'subject_committee_id,is_for_benefit,deleted\n'
+            '5,103,3,2024-07-01,5200.00,301,101,true,0\n'        # amount changed
+            '6,103,3,2024-08-01,2400.00,302,102,false,0\n'       # amount changed
+            '30,103,3,2024-10-01,-75.00,303,102,true,0\n'        # new IE, a refund
+        )
+        for flags in ([], ['--bulk']):
+            with self.subTest(flags=flags), transaction.atomic():
+                call_command('import_csv', str(path), '--no-warm', *flags, stdout=StringIO())
+                self.assertEqual(summary_mismatches(), {})
+                self.assertEqual(self.facts(self.data['jones']), [(5, 1, None, True, 520000, False)])
+                self.assertEqual(self.facts(self.data['smith']), [
+                    (6, 1, None, False, 240000, False), (7, 1, None, False, 30000, True),
+                    (30, 1, None, True, 7500, True),
+                ])
+                transaction.set_rollback(True)
+
+    def test_entity_merge(self):
+        donors = self.data['donors']
+        request = APIRequestFactory().post(
+            '/', {'primary_entity_id': donors[0].name_id, 'duplicate_entity_ids': [donors[1].name_id]},
+            format='json'
+        )
+        force_authenticate(request, user=User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        merge_entities(request)
+
+        self.assertEqual(summary_mismatches(), {})
+        self.assertEqual(Transaction.objects.filter(transaction_id__in=[5, 6, 7], entity=donors[0]).count(), 3)
+        self.assertEqual(IEFact.objects.count(), 3)
+
+    def test_candidate_office_and_party_change(self):
+        jones = self.data['jones']
+        senate = Office.objects.create(office_id=2, name='State Senate')
+        republican = Party.objects.create(party_id=1, name='Republican')
+
+        jones.candidate_office = senate
+        jones.candidate_party = republican
+        jones.save()
+        self.assertEqual(summary_mismatches(), {})
+        self.assertEqual(self.facts(jones), [(5, 2, 1, True, 500000, False)])
+
+        # A raw UPDATE, as a SQL fix would run it, is followed too
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE "Committees" SET candidate_party_id = NULL WHERE committee_id = %s', [jones.committee_id]
+            )
+        self.assertEqual(summary_mismatches(), {})
+        self.assertEqual(self.facts(jones), [(5, 2, None, True, 500000, False)])
+        # The other candidate's IEs are untouched
+        self.assertEqual([row[1:3] for row in self.facts(self.data['smith'])], [(1, None), (1, None)])
+
+
+# ==================== PARTITIONING ====================
+
+class PartitionConversionTests(TestCase):
+    """partition_transactions --convert keeps every write made while it runs"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_race_data()
+
+    def contribute(self, transaction_id, donor, amount):
+        data = self.data
+        return Transaction.objects.create(
+            transaction_id=transaction_id, committee=data['jones'], entity=donor,
+            transaction_type=data['contribution'], transaction_date=date(2024, 9, 1),
+            amount=Decimal(amount),
+        )
+
+    def top_donors(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT entity_id, total_contributed FROM mv_dashboard_top_donors')
+            return dict(cursor.fetchall())
+
+    def test_convert_replays_changes_and_refreshes_views(self):
+        data = self.data
+        late_donor = Entity.objects.create(
+            name_id=350, name_group_id=350, entity_type=data['donors'][0].entity_type, last_name='Late',
+        )
+        build_indexes = partitioning.build_indexes
+        build_materialized_views = partitioning.build_materialized_views
+        catch_up = partitioning.catch_up
+        indexed_at_catch_up = []
+
+        def write_during_copy(cursor, progress=None):
+            # Logged by the trigger after the rows were copied
+            Transaction.objects.filter(transaction_id=1).update(amount=Decimal('900.00'))
+            Transaction.objects.filter(transaction_id=2).delete()
+            self.contribute(2000, data['donors'][2], '75.00')
+            return build_indexes(cursor, progress)
+
+        def write_after_views(cursor, progress=None):
+            build_materialized_views(cursor, progress)
+            self.contribute(2001, late_donor, '10000.00')
+
+        def checked_catch_up(cursor, batch_size):
+            indexed_at_catch_up.append(
+                partitioning._exists(cursor, partitioning.quote(f'{partitioning.PARENT}_pkey__p'))
+            )
+            return catch_up(cursor, batch_size)
+
+        with mock.patch.object(partitioning, 'build_indexes', write_during_copy), \
+                mock.patch.object(partitioning, 'build_materialized_views', write_after_views), \
+                mock.patch.object(partitioning, 'catch_up', checked_catch_up):
+            call_command('partition_transactions', '--convert', '--batch-size', '2', stdout=StringIO())
+
+        with connection.cursor() as cursor:
+            self.assertTrue(partitioning.is_partitioned(cursor))
+            self.assertFalse(partitioning.conversion_status(cursor)['converting'])
+            cursor.execute(f'SELECT COUNT(*) FROM {partitioning.OLD}')
+            old_rows = cursor.fetchone()[0]
+        self.assertEqual(Transaction.objects.count(), old_rows)
+        self.assertTrue(indexed_at_catch_up)
+        self.assertTrue(all(indexed_at_catch_up))
+
+        self.assertEqual(Transaction.objects.get(transaction_id=1).amount, Decimal('900.00'))
+        self.assertFalse(Transaction.objects.filter(transaction_id=2).exists())
+        self.assertEqual(Transaction.objects.filter(transaction_id__in=[2000, 2001]).count(), 2)
+        # Written after the view was built: only there once it is refreshed
+        self.assertEqual(self.top_donors()[350], Decimal('10000.00'))
+
+
+# ==================== BULK LOAD ====================
+
+class SuspendedIndexTests(TransactionTestCase):
+    """
+    The index manifest rebuilds exactly the indexes a bulk load dropped.
+    Rebuilds run on their own connections, so the suspend has to commit.
+    """
+
+    def setUp(self):
+        create_race_data()
+
+    def indexes(self):
+        with connection.cursor() as cursor:
+            return {index.name: index.definition for index in bulk_load.secondary_indexes(cursor)}
+
+    def manifest(self):
+        with connection.cursor() as cursor:
+            return {index.name: index.definition for index in bulk_load.suspended(cursor)}
+
+    def load_part_of_file(self, table='"Transactions"'):
+        """A row an import wrote before it was interrupted"""
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {table} (
+                    transaction_id, committee_id, entity_id, transaction_type_id, transaction_date,
+                    amount, memo, account_type, deleted, record_hash
+                ) VALUES (50, 101, 301, 1, DATE '2024-10-01', 40.00, '', '', false, '')
+            """)
+
+    def assert_restored(self, before):
+        call_command('transaction_indexes', '--restore', '--workers', '3', stdout=StringIO())
+        self.assertEqual(self.indexes(), before)
+        self.assertEqual(self.manifest(), {})
+
+    def test_restore_after_interrupted_load(self):
+        before = self.indexes()
+        self.assertTrue(before)
+        bulk_load.suspend_indexes()
+        self.assertEqual(self.indexes(), {})
+        self.assertEqual(self.manifest(), before)
+        self.load_part_of_file()
+        self.assert_restored(before)
+
+    def test_failed_bulk_load_rebuilds(self):
+        before = self.indexes()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / 'transactions.csv'
+        path.write_text(
+            'transaction_id,committee_id,transaction_type_id,transaction_date,amount,entity_id\n'
+            '50,101,1,2024-10-01,40.00,301\n'
+        )
+        suspended_during_load = []
+
+        def interrupted(command, *args):
+            suspended_during_load.append(self.manifest())
+            raise CommandError('Import failed: connection lost')
+
+        with mock.patch.object(import_csv.Command, '_bulk_import', interrupted):
+            with self.assertRaises(CommandError):
+                call_command('import_csv', str(path), '--bulk-load', '--bulk-load-threshold', '1',
+                             '--no-warm', stdout=StringIO())
+        self.assertEqual(suspended_during_load, [before])
+        self.assertEqual(self.indexes(), before)
+        self.assertEqual(self.manifest(), {})
+
+    def test_restore_partitioned(self):
+        # The partitioned copy partition_transactions --convert builds and swaps in
+        with connection.cursor() as cursor:
+            partitioning.prepare(cursor)
+            partitioning.add_primary_key(cursor)
+            partitioning.build_indexes(cursor)
+            cursor.execute(f'INSERT INTO {partitioning.SHADOW} SELECT * FROM "Transactions"')
+        self.addCleanup(self.drop_partitioned_copy)
+
+        with mock.patch.object(bulk_load, 'PARENT', partitioning.SHADOW):
+            before = self.indexes()
+            # One copy per partition, attached to each partitioned index
+            parents = [name for name in before if name.endswith(partitioning.SHADOW_SUFFIX)]
+            self.assertTrue(parents)
+            self.assertEqual(len(before), len(parents) * (1 + len(self.partitions())))
+
+            bulk_load.suspend_indexes()
+            self.assertEqual(self.indexes(), {})
+            self.assertEqual(self.manifest(), before)
+            self.load_part_of_file(partitioning.SHADOW)
+            self.assert_restored(before)
+
+    def partitions(self):
+        with connection.cursor() as cursor:
+            return partitioning.partitions(cursor, partitioning.SHADOW)
+
+    def drop_partitioned_copy(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER IF EXISTS transactions_partition_log ON "Transactions"')
+            cursor.execute(f'DROP TABLE IF EXISTS {partitioning.SHADOW}, {partitioning.CHANGES}')
+
+
+# ==================== NAME SEARCH ====================
+
+def trigram_installed():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+class NameSearchLatencyTests(TestCase):
+    """search_name on the trigram index, where pg_trgm is installed (see migration 0027)"""
+
+    ROWS = 200_000
+    # Median per search on ROWS synthetic names, generous for shared CI hosts
+    MAX_MS = 250
+
+    def setUp(self):
+        if not trigram_installed():
+            self.skipTest('pg_trgm is not installed')
+
+    def test_misspelling_matches(self):
+        data = create_race_data()
+        found = search.filter_queryset(Entity.objects.all(), 'Donor 1')
+        self.assertEqual(found.first(), data['donors'][1])
+        self.assertIn(data['jones'].name, search.filter_queryset(Entity.objects.all(), 'Jonse for Governer'))
+
+    def test_search_uses_index_and_is_fast(self):
+        command = benchmark_search.Command(stdout=StringIO())
+        command.repeat = 5
+        with connection.cursor() as cursor:
+            command._build(cursor, self.ROWS)
+            for query in benchmark_search.DEFAULT_QUERIES:
+                match_sql, match_params = search.match_sql('n', query)
+                rank_sql, rank_params = search.rank_sql('n', query)
+                sql = f"""
+                    SELECT name_id FROM {benchmark_search.TABLE} n
+                    WHERE {match_sql}
+                    ORDER BY {rank_sql} DESC, n.name_id
+                    LIMIT 25
+                """
+                params = match_params + rank_params
+                with self.subTest(query=query):
+                    cursor.execute(f'EXPLAIN {sql}', params)
+                    plan = '\n'.join(row[0] for row in cursor.fetchall())
+                    # Words under three letters have no trigram to look up
+                    if all(len(word) >= 3 for word in search.normalize(query).split()):
+                        self.assertIn('Bitmap Index Scan', plan)
+                    self.assertLess(command._median(cursor, sql, params), self.MAX_MS)
+
+
+# ==================== TYPEAHEAD ====================
+
+def typeahead_index(entries):
+    """PrefixIndex over (kind, id, label, score) entries"""
+    kinds, ids, labels, scores = zip(*entries)
+    return typeahead.PrefixIndex(
+        kinds=np.array([typeahead.KINDS.index(kind) for kind in kinds], dtype=np.int8),
+        ids=np.array(ids, dtype=np.int32),
+        scores=np.array(scores, dtype=np.float64),
+        labels=list(labels),
+        version=1,
+    )
+
+
+class PrefixIndexTests(SimpleTestCase):
+    """lookup() ranks by score and matches every query word as a token prefix"""
+
+    def setUp(self):
+        self.index = typeahead_index([
+            ('candidate', 101, 'Jane Doe', 900.0),
+            ('candidate', 102, 'Jan Dobbs', 500.0),
+            ('committee', 101, 'Jane Doe for Governor', 700.0),
+            ('committee', 103, 'Doe Family PAC', 300.0),
+            ('donor', 301, "O'Brien, Janet", 800.0),
+            ('donor', 302, 'John Doerr', 800.0),
+        ])
+
+    def lookup(self, query, **kwargs):
+        return [(row['type'], row['id']) for row in self.index.lookup(query, **kwargs)]
+
+    def test_prefix_ranked_by_score(self):
+        self.assertEqual(self.lookup('ja'), [
+            ('candidate', 101), ('donor', 301), ('committee', 101), ('candidate', 102),
+        ])
+        self.assertEqual(self.lookup('jane'), [('candidate', 101), ('donor', 301), ('committee', 101)])
+        # Equal scores keep their input order
+        self.assertEqual(self.lookup('doe'), [
+            ('candidate', 101), ('donor', 302), ('committee', 101), ('committee', 103),
+        ])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.lookup('jane do'), [('candidate', 101), ('committee', 101)])
+        self.assertEqual(self.lookup('do ja gov'), [('committee', 101)])
+        self.assertEqual(self.lookup('obrien jan'), [('donor', 301)])
+        self.assertEqual(self.lookup('jane smith'), [])
+        self.assertEqual(self.lookup('  '), [])
+
+    def test_kind_filter_and_limit(self):
+        self.assertEqual(self.lookup('doe', kinds=['committee']), [('committee', 101), ('committee', 103)])
+        self.assertEqual(self.lookup('ja', kinds=['candidate', 'donor'], limit=2), [
+            ('candidate', 101), ('donor', 301),
+        ])
+        self.assertEqual(self.lookup('jane do', limit=1), [('candidate', 101)])
+
+    def test_matches_brute_force_scan(self):
+        rng = random.Random(14)
+        first = ['Ann', 'Anna', 'Annette', 'Andrew', 'Bob', 'Bobby', 'Carla', 'Carl', 'Dana']
+        last = ['Anderson', 'Andrews', 'Baker', 'Bakersfield', 'Carlson', 'Dana', 'Smith', 'Smithers']
+        suffix = ['', '', 'for Arizona', 'PAC', 'Committee']
+        entries = [
+            (rng.choice(typeahead.KINDS), entry_id,
+             ' '.join(filter(None, [rng.choice(first), rng.choice(last), rng.choice(suffix)])),
+             float(rng.randrange(50)))
+            for entry_id in range(3000)
+        ]
+        index = typeahead_index(entries)
+
+        # Input order breaks score ties, as the stable sort does
+        ranked = sorted(range(len(entries)), key=lambda i: -entries[i][3])
+        tokens = [search.normalize(entries[i][2]).split() for i in ranked]
+
+        def scan(query, kinds, limit):
+            words = search.normalize(query).split()
+            found = [
+                (entries[i][0], entries[i][1]) for i, entry_tokens in zip(ranked, tokens)
+                if all(any(t.startswith(w) for t in entry_tokens) for w in words)
+                and (not kinds or entries[i][0] in kinds)
+            ]
+            return found[:limit]
+
+        # One and two letters (merged ahead), longer prefixes, several words, rare kinds
+        queries = ['a', 'an', 'ann', 'anne', 'carl', 'bak', 'smith', 'dana', 'ann and', 'c a p', 'bob smi com', 'zz']
+        for query in queries:
+            for kinds in (None, ['donor'], ['candidate', 'committee']):
+                for limit in (1, 10, 400):
+                    with self.subTest(query=query, kinds=kinds, limit=limit):
+                        found = [(row['type'], row['id']) for row in index.lookup(query, kinds=kinds, limit=limit)]
+                        self.assertEqual(found, scan(query, kinds, limit))
+
+
+# ==================== CACHE METRICS ====================
+
+@override_settings(CACHES=LOCMEM_CACHES, CACHE_METRICS_FLUSH_INTERVAL=3600)
+class CacheMetricsTests(SimpleTestCase):
+    """Cache metric counters outlive the workers that recorded them"""
+
+    def setUp(self):
+        caches['default'].clear()
+        patcher = mock.patch.multiple(
+            CacheMetrics, _series={}, _flushed={'series': {}, 'single_flight': {}}, worker_id='host:1',
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def hits(self):
+        return CacheMetrics.aggregate()['series']['zstd:candidates_list']['hits']
+
+    def test_totals_survive_worker_exit(self):
+        for _ in range(3):
+            CacheMetrics.observe_get('zstd', 'candidates_list_p1_s100', 'hits', 1.0)
+        self.assertEqual(self.hits(), 3)
+        # Flushing again adds nothing already counted
+        self.assertEqual(self.hits(), 3)
+
+        # The worker exits; its replacement starts from zero
+        CacheMetrics._series = {}
+        CacheMetrics._flushed = {'series': {}, 'single_flight': {}}
+        CacheMetrics.worker_id = 'host:2'
+        caches['default'].delete(WORKER_KEY.format('host:1'))
+        CacheMetrics.observe_get('zstd', 'candidates_list_p2_s100', 'hits', 1.0)
+        self.assertEqual(self.hits(), 4)
+
+    def test_gain_waits_for_the_totals_lock(self):
+        CacheMetrics.observe_get('zstd', 'candidates_list_p1_s100', 'hits', 1.0)
+        caches['default'].add(TOTALS_LOCK_KEY, 'host:9')
+        CacheMetrics.flush()
+        self.assertEqual(CacheMetrics.totals()['series'], {})
+        caches['default'].delete(TOTALS_LOCK_KEY)
+        self.assertEqual(self.hits(), 1)
+
+    def test_cursor_tokens_are_not_prefixes(self):
+        token = encode_cursor(date(2024, 5, 1), 1234)
+        self.assertEqual(key_prefix(f'expenditures_list_k{token}_s25_q'), 'expenditures_list')
+        self.assertEqual(key_prefix(f'donors_list_mv_k{token}_s25_q'), 'donors_list')
+        self.assertEqual(key_prefix('candidates_list_p1_s100_o_pt_c_q_v42'), 'candidates_list')
+
+
+# ==================== CACHE TAGS ====================
+
+@override_settings(CACHES=LOCMEM_CACHES, DATA_VERSION_CHECK_INTERVAL=0)
+class CacheKeyInvalidationTests(TestCase):
+    """Writes move the versioned keys of the responses that show them, and only those"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_race_data()
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def keys(self):
+        data = self.data
+        governor = race_tag(data['office'].office_id, data['cycle'].cycle_id)
+        return {
+            'governor_race': versioned_key('race', tags=[governor]),
+            'senate_race': versioned_key('race', tags=[race_tag(2, data['cycle'].cycle_id)]),
+            'races': versioned_key('races', tags=['races']),
+            'jones': versioned_key('committee', tags=[committee_tag(data['jones'].committee_id)]),
+            'smith': versioned_key('committee', tags=[committee_tag(data['smith'].committee_id)]),
+            'soi': versioned_key('soi', tags=['soi']),
+            'dashboard': versioned_key('dashboard', tags=['dashboard']),
+        }
+
+    def assert_moves(self, change, moved):
+        before = self.keys()
+        change()
+        after = self.keys()
+        self.assertEqual({name for name in before if before[name] != after[name]}, set(moved))
+
+    def test_import_moves_every_transaction_key(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / 'transactions.csv'
+        path.write_text(
+            'transaction_id,committee_id,transaction_type_id,transaction_date,amount,entity_id\n'
+            '50,101,1,2024-10-01,40.00,301\n'
+        )
+        version = get_data_version()
+        self.assert_moves(
+            lambda: call_command('import_csv', str(path), '--no-warm', stdout=StringIO()),
+            self.keys().keys(),
+        )
+        self.assertEqual(get_data_version(), version + 1)
+
+    def test_merge_moves_every_transaction_key(self):
+        donors = self.data['donors']
+        request = APIRequestFactory().post(
+            '/', {'primary_entity_id': donors[0].name_id, 'duplicate_entity_ids': [donors[1].name_id]},
+            format='json'
+        )
+        force_authenticate(request, user=User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        self.assert_moves(lambda: merge_entities(request), self.keys().keys())
+        self.assertFalse(Transaction.objects.filter(entity=donors[1]).exists())
+
+    def test_soi_save_moves_soi_keys(self):
+        version = get_data_version()
+        self.assert_moves(
+            lambda: CandidateStatementOfInterest.objects.create(
+                candidate_name='Jones', office=self.data['office'], filing_date=date(2024, 1, 5),
+            ),
+            ['soi'],
+        )
+        self.assertEqual(get_data_version(), version)
+
+    def test_committee_save_moves_its_races(self):
+        jones = self.data['jones']
+        senate = Office.objects.create(office_id=2, name='State Senate')
+
+        def move_to_senate():
+            jones.candidate_office = senate
+            jones.save()
+
+        # Leaves the governor race, joins the senate race
+        self.assert_moves(move_to_senate, ['governor_race', 'senate_race', 'races', 'jones'])
+
+        def terminate():
+            jones.termination_date = date(2024, 12, 1)
+            jones.save()
+
+        self.assert_moves(terminate, ['senate_race', 'races', 'jones'])
+
+
+# ==================== ANALYTICS ENGINE ====================
+
+@override_settings(CACHES=LOCMEM_CACHES, ANALYTICS_ENGINE=False, DATA_VERSION_CHECK_INTERVAL=0)
+class AnalyticsSnapshotTests(TestCase):
+    """The snapshot kernels give the rows the SQL paths give"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_race_data()
+        data = cls.data
+        extra = [
+            Entity.objects.create(name_id=304 + n, name_group_id=304 + n, entity_type_id=1, last_name=f'Donor {3 + n}')
+            for n in range(3)
+        ]
+        donors = data['donors'] + extra
+        committees = [data['jones'], data['smith'], data['pac']]
+        kinds = [data['contribution'], TransactionType.objects.get(pk=2), data['ie']]
+
+        rng = random.Random(21)
+        rows = []
+        for transaction_id in range(100, 400):
+            kind = rng.choice(kinds)
+            is_ie = kind == data['ie']
+            rows.append(Transaction(
+                transaction_id=transaction_id, committee=rng.choice(committees), entity=rng.choice(donors),
+                transaction_type=kind,
+                transaction_date=date(2022, 6, 1) + timedelta(days=rng.randrange(1000)),
+                amount=Decimal(rng.choice([25, 100, 250, 1000, -50])) + Decimal(rng.randrange(100)) / 100,
+                subject_committee=rng.choice(committees[:2]) if is_ie else None,
+                is_for_benefit=rng.choice([True, False, None]) if is_ie else None,
+                deleted=rng.random() < 0.1,
+            ))
+        Transaction.objects.bulk_create(rows)
+        # Two donors tied for the top, so the ranking needs its tie-breaker
+        for transaction_id, name_id in ((400, 308), (401, 307)):
+            donor = Entity.objects.create(name_id=name_id, name_group_id=name_id, entity_type_id=1)
+            Transaction.objects.create(
+                transaction_id=transaction_id, committee=data['jones'], entity=donor,
+                transaction_type=data['contribution'], transaction_date=date(2024, 2, 1),
+                amount=Decimal('1000000.00'),
+            )
+        with connection.cursor() as cursor:
+            incremental_aggregates.rebuild(cursor)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / 'v1'
+        with connection.cursor() as cursor:
+            analytics_engine.write_snapshot(path, analytics_engine.read_columns(cursor), 1)
+        self.snap = analytics_engine.TransactionSnapshot(path)
+
+    def test_group_sum_matches_group_by(self):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT subject_committee_id, SUM(ABS(amount)), COUNT(*)
+                FROM "Transactions"
+                WHERE NOT deleted AND subject_committee_id IS NOT NULL
+                  AND transaction_date BETWEEN '2023-01-01' AND '2024-06-30'
+                GROUP BY subject_committee_id
+                ORDER BY subject_committee_id
+            """)
+            expected = cursor.fetchall()
+
+        snap = self.snap
+        rows = snap.rows_between(date(2023, 1, 1), date(2024, 6, 30))
+        ids, sums, counts = snap.group_sum('subject', rows, snap.where(rows, has_subject=True), absolute=True)
+        self.assertEqual(
+            [(committee_id, analytics_engine.cents(total), count)
+             for committee_id, total, count in zip(ids.tolist(), sums.tolist(), counts.tolist())],
+            expected,
+        )
+
+    def test_top_donors_match_ordered_query(self):
+        data = self.data
+        committee_ids = [data['jones'].committee_id, data['smith'].committee_id]
+        cycle = data['cycle']
+        expected = list(
+            Transaction.objects.filter(
+                deleted=False, committee_id__in=committee_ids, transaction_type__income_expense_neutral=1,
+                transaction_date__range=(cycle.begin_date.date(), cycle.end_date.date()),
+            ).values('entity_id').annotate(total=Sum('amount'), count=Count('transaction_id'))
+            .order_by('-total', 'entity_id').values_list('entity_id', 'total', 'count')
+        )
+        self.assertGreater(len(expected), 4)
+
+        # top_k partitions below the group count, and sorts everything above it
+        for limit in (2, 4, 100):
+            rows = race_aggregation.top_donors_from_snapshot(self.snap, committee_ids, limit=limit, cycle=cycle)
+            self.assertEqual(
+                [(row['entity__name_id'], row['total_contributed'], row['num_contributions']) for row in rows],
+                expected[:limit],
+            )
+
+    def test_candidate_ie_totals_match_sql(self):
+        window = {'date_from': '2023-03-01', 'date_to': '2024-08-15'}
+        for filters in ({}, {'office_id': self.data['office'].office_id, 'cycle_id': self.data['cycle'].cycle_id}):
+            with self.subTest(**filters):
+                sql = race_aggregation.candidate_ie_totals(**filters, **window)
+                with mock.patch.object(analytics_engine, 'snapshot', return_value=self.snap):
+                    columnar = race_aggregation.candidate_ie_totals(**filters, **window)
+                self.assertTrue(sql)
+                self.assertEqual(columnar, sql)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, ANALYTICS_REBUILD_INTERVAL=300)
+class AnalyticsBuildTests(SimpleTestCase):
+    """Background builds release their lock and start at most once per interval"""
+
+    def setUp(self):
+        caches['default'].clear()
+        # Run the build thread inline
+        inline = mock.patch.object(
+            analytics_engine.threading, 'Thread',
+            side_effect=lambda target, **kwargs: mock.Mock(start=target),
+        )
+        inline.start()
+        self.addCleanup(inline.stop)
+        self.build = self.patch('build', return_value=(1, 10))
+        self.patch('prune')
+        self.patch('connection')
+
+    def patch(self, name, **kwargs):
+        patcher = mock.patch.object(analytics_engine, name, **kwargs)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def lock_key(self):
+        return analytics_engine.BUILD_LOCK_KEY.format(analytics_engine.socket.gethostname())
+
+    def test_lock_released_after_build(self):
+        analytics_engine._build_in_background()
+        self.assertEqual(self.build.call_count, 1)
+        self.assertIsNone(caches['default'].get(self.lock_key()))
+
+    def test_lock_released_after_failed_build(self):
+        self.build.side_effect = RuntimeError('disk full')
+        with self.assertLogs(analytics_engine.logger, 'ERROR'):
+            analytics_engine._build_in_background()
+        self.assertIsNone(caches['default'].get(self.lock_key()))
+
+    def test_bumps_within_interval_share_one_build(self):
+        for _ in range(5):
+            analytics_engine._build_in_background()
+        self.assertEqual(self.build.call_count, 1)
+
+        # Interval over
+        caches['default'].delete(analytics_engine.BUILT_KEY.format(analytics_engine.socket.gethostname()))
+        analytics_engine._build_in_background()
+        self.assertEqual(self.build.call_count, 2)
+
+    def test_no_build_while_another_runs(self):
+        caches['default'].add(self.lock_key(), 1)
+        analytics_engine._build_in_background()
+        self.build.assert_not_called()
@@ -5,7 +5,10 @@ from .views import *
 from .views_soi import *
 from .views_email import *
 from .views_dashboard_optimized import *
-from .views_dashboard_extreme import dashboard_extreme, dashboard_streaming, refresh_extreme_cache, dashboard_spending_trends
+from .views_dashboard_extreme import (
+    dashboard_extreme, dashboard_streaming, refresh_extreme_cache, dashboard_spending_trends,
+    cache_stats, cache_metrics, cache_metrics_prometheus,
+)
 from .views_admin import DataImportViewSet, ScraperViewSet, SOSViewSet, SeeTheMoneyViewSet
 from .views_ad_buys import AdBuyViewSet
 from .views_validation import (
@@ -34,6 +37,7 @@ from .views_candidate_aggregate import (
     candidate_aggregate,
     candidate_aggregate_ie_spending
 )
+from .views_typeahead import typeahead, typeahead_stats
 
 app_name = 'transparency'
 
@@ -94,6 +98,9 @@ urlpatterns = [
     path('dashboard/streaming/', dashboard_streaming, name='dashboard-streaming'),
     path('dashboard/refresh-extreme/', refresh_extreme_cache, name='refresh-extreme-cache'),
     path('dashboard/spending-trends/', dashboard_spending_trends, name='dashboard-spending-trends'),
+    path('dashboard/cache-stats/', cache_stats, name='dashboard-cache-stats'),
+    path('admin/cache-metrics/', cache_metrics, name='admin-cache-metrics'),
+    path('admin/cache-metrics/prometheus/', cache_metrics_prometheus, name='admin-cache-metrics-prometheus'),
 
     # === DASHBOARD - OPTIMIZED ENDPOINTS (Use MV versions for performance) ===
     path('dashboard/summary-optimized/', dashboard_summary_optimized, name='dashboard-summary-optimized'),
@@ -131,6 +138,10 @@ urlpatterns = [
     path('expenditures/', expenditures_list, name='expenditures-list'),
     path('candidates/', candidates_list, name='candidates-list'),
     path('donors/', donors_list, name='donors-list'),
+
+    # === TYPEAHEAD (per-process prefix index) ===
+    path('typeahead/', typeahead, name='typeahead'),
+    path('typeahead/stats/', typeahead_stats, name='typeahead-stats'),
     
     # === SCRAPER TRIGGERS ===
     path('trigger-scrape/', trigger_scrape, name='trigger-scrape'),
@@ -0,0 +1,363 @@
+"""
+Cache Metrics
+
+Hit/miss counters, latency histograms and byte counts for CompressedCache and
+ResponseCache, per key prefix, summed across gunicorn workers.
+
+Each worker records into its own counters (a lock and a few integer additions
+per operation). Every CACHE_METRICS_FLUSH_INTERVAL seconds it adds what they
+gained since its last flush (and its single-flight counters' gain) to running
+totals in the shared cache tier, and writes its TieredCache L1 size there
+under its own key. The admin endpoints report the totals, which do not drop
+when a worker exits or restarts, and add up the L1 sizes of the workers that
+flushed within worker_ttl() seconds.
+
+Per layer (zstd = CompressedCache, response = ResponseCache) and key prefix:
+
+    hits, stale_hits, misses   lookups by outcome
+    not_modified               304s sent instead of a body (response only)
+    sets, computes             entries stored; values computed on a miss
+    get_ms, compute_ms         latency histograms, in milliseconds
+    raw_bytes, stored_bytes    JSON bytes in, compressed bytes stored
+
+The prefix is the key up to its first parameter segment (anything but a
+lowercase word of three letters or more): 'candidates_list_p1_s100_o_..._v42'
+-> 'candidates_list'. Keyset cursor tokens ('expenditures_list_kWyIy...') are
+base64url JSON, which starts with an uppercase 'W', so they are always cut
+off and the number of prefixes stays bounded.
+
+Usage:
+    CacheMetrics.aggregate()     # JSON for /api/v1/admin/cache-metrics/
+    CacheMetrics.prometheus()    # text exposition format
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from transparency.utils.tiered_cache import shared_cache
+import logging
+import os
+import re
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds, in milliseconds (+Inf is implicit)
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+COUNTERS = ('hits', 'stale_hits', 'misses', 'not_modified', 'sets', 'computes', 'raw_bytes', 'stored_bytes')
+HISTOGRAMS = ('get_ms', 'compute_ms')
+
+WORKERS_KEY = 'cache_metrics:workers'
+WORKER_KEY = 'cache_metrics:worker:{}'
+TOTALS_KEY = 'cache_metrics:totals'
+TOTALS_LOCK_KEY = 'cache_metrics:totals_lock'
+
+_NAME_SEGMENT = re.compile(r'^[a-z]{3,}$')
+
+
+def key_prefix(key):
+    """The key's leading name segments, before its first parameter segment"""
+    segments = key.split('_')
+    for i, segment in enumerate(segments[1:], start=1):
+        if not _NAME_SEGMENT.match(segment):
+            return '_'.join(segments[:i])
+    return key
+
+
+def _new_series():
+    series = dict.fromkeys(COUNTERS, 0)
+    for name in HISTOGRAMS:
+        series[name] = [0] * (len(BUCKETS_MS) + 1)
+        series[f'{name}_sum'] = 0.0
+    return series
+
+
+def _new_totals():
+    return {'series': {}, 'single_flight': {}}
+
+
+def _add_counters(totals, counters, sign=1):
+    """Add (sign=-1: subtract) counters' series and single-flight counts into totals"""
+    for name, values in counters['series'].items():
+        total = totals['series'].setdefault(name, _new_series())
+        for k, v in values.items():
+            if isinstance(v, list):
+                total[k] = [a + sign * b for a, b in zip(total[k], v)]
+            else:
+                total[k] += sign * v
+    single_flight = totals['single_flight']
+    for k, v in counters['single_flight'].items():
+        if k != 'pid':
+            single_flight[k] = single_flight.get(k, 0) + sign * v
+    return totals
+
+
+def _observe(series, name, ms):
+    buckets = series[name]
+    for i, bound in enumerate(BUCKETS_MS):
+        if ms <= bound:
+            buckets[i] += 1
+            break
+    else:
+        buckets[-1] += 1
+    series[f'{name}_sum'] += ms
+
+
+class CacheMetrics:
+    """This worker's cache metrics, and the sum over all workers"""
+
+    _series = {}
+    _lock = threading.Lock()
+    _flushed_at = time.monotonic()
+    # The counters as of the last flush whose gain reached the totals
+    _flushed = _new_totals()
+    worker_id = f'{socket.gethostname()}:{os.getpid()}'
+
+    # ==================== RECORDING ====================
+
+    @classmethod
+    def observe_get(cls, layer, key, outcome, ms):
+        """A lookup: outcome is 'hits', 'stale_hits' or 'misses'"""
+        with cls._lock:
+            series = cls._get_series(layer, key)
+            series[outcome] += 1
+            _observe(series, 'get_ms', ms)
+        cls._maybe_flush()
+
+    @classmethod
+    def observe_compute(cls, layer, key, ms):
+        with cls._lock:
+            series = cls._get_series(layer, key)
+            series['computes'] += 1
+            _observe(series, 'compute_ms', ms)
+        cls._maybe_flush()
+
+    @classmethod
+    def observe_set(cls, layer, key, raw_bytes, stored_bytes):
+        with cls._lock:
+            series = cls._get_series(layer, key)
+            series['sets'] += 1
+            series['raw_bytes'] += raw_bytes
+            series['stored_bytes'] += stored_bytes
+        cls._maybe_flush()
+
+    @classmethod
+    def observe_not_modified(cls, layer, key):
+        with cls._lock:
+            cls._get_series(layer, key)['not_modified'] += 1
+        cls._maybe_flush()
+
+    @classmethod
+    def _get_series(cls, layer, key):
+        name = f'{layer}:{key_prefix(key)}'
+        series = cls._series.get(name)
+        if series is None:
+            series = cls._series[name] = _new_series()
+        return series
+
+    # ==================== SHARING ====================
+
+    @classmethod
+    def snapshot(cls):
+        """This worker's metrics"""
+        from transparency.utils.compressed_cache import SingleFlightStats
+
+        with cls._lock:
+            series = {
+                name: {k: list(v) if isinstance(v, list) else v for k, v in values.items()}
+                for name, values in cls._series.items()
+            }
+        default = caches['default']
+        return {
+            'worker': cls.worker_id,
+            'flushed_at': time.time(),
+            'series': series,
+            'single_flight': SingleFlightStats.snapshot(),
+            'l1': default.l1_stats() if hasattr(default, 'l1_stats') else None,
+        }
+
+    @classmethod
+    def _maybe_flush(cls):
+        if time.monotonic() - cls._flushed_at >= settings.CACHE_METRICS_FLUSH_INTERVAL:
+            cls.flush()
+
+    @classmethod
+    def flush(cls):
+        """Add this worker's gain to the shared totals; publish its L1 size"""
+        cls._flushed_at = time.monotonic()
+        try:
+            shared = shared_cache()
+            snapshot = cls.snapshot()
+            gain = _add_counters(_add_counters(_new_totals(), snapshot), cls._flushed, sign=-1)
+            # Totals are read, added to and written back by one worker at a
+            # time; a worker that finds the lock taken adds its gain next flush
+            if shared.add(TOTALS_LOCK_KEY, cls.worker_id, timeout=30):
+                try:
+                    totals = shared.get(TOTALS_KEY) or _new_totals()
+                    shared.set(TOTALS_KEY, _add_counters(totals, gain), timeout=None)
+                    cls._flushed = snapshot
+                finally:
+                    shared.delete(TOTALS_LOCK_KEY)
+
+            shared.set(WORKER_KEY.format(cls.worker_id), {
+                'worker': snapshot['worker'],
+                'flushed_at': snapshot['flushed_at'],
+                'l1': snapshot['l1'],
+            }, timeout=cls.worker_ttl())
+            workers = shared.get(WORKERS_KEY) or []
+            if cls.worker_id not in workers:
+                shared.set(WORKERS_KEY, workers + [cls.worker_id], timeout=None)
+        except Exception as e:
+            logger.warning(f"Cache metrics flush failed: {e}")
+
+    @staticmethod
+    def worker_ttl():
+        """Seconds a worker's L1 size counts after its last flush"""
+        return max(60, int(settings.CACHE_METRICS_FLUSH_INTERVAL * 6))
+
+    @classmethod
+    def worker_snapshots(cls):
+        """L1 snapshots of the live workers (this one freshly flushed)"""
+        cls.flush()
+        shared = shared_cache()
+        workers = shared.get(WORKERS_KEY) or []
+        found = shared.get_many([WORKER_KEY.format(w) for w in workers])
+        live = [w for w in workers if WORKER_KEY.format(w) in found]
+        if len(live) != len(workers):
+            shared.set(WORKERS_KEY, live, timeout=None)
+        return [found[WORKER_KEY.format(w)] for w in live]
+
+    @classmethod
+    def totals(cls):
+        """Counters of every worker since the totals were started"""
+        return shared_cache().get(TOTALS_KEY) or _new_totals()
+
+    # ==================== AGGREGATION ====================
+
+    @classmethod
+    def aggregate(cls):
+        """Metrics summed over all workers, with hit ratios and percentiles"""
+        snapshots = cls.worker_snapshots()
+        counters = cls.totals()
+
+        l1 = {}
+        for snap in snapshots:
+            for k, v in (snap['l1'] or {}).items():
+                l1[k] = l1.get(k, 0) + v
+
+        series = {}
+        for name, total in sorted(counters['series'].items()):
+            layer, prefix = name.split(':', 1)
+            lookups = total['hits'] + total['stale_hits'] + total['misses']
+            series[name] = {
+                'layer': layer,
+                'prefix': prefix,
+                **{k: total[k] for k in COUNTERS},
+                'hit_ratio': round((total['hits'] + total['stale_hits']) / lookups, 4) if lookups else None,
+                'compression_ratio': (
+                    round(total['stored_bytes'] / total['raw_bytes'], 4) if total['raw_bytes'] else None
+                ),
+                'get_ms': _summary(total['get_ms'], total['get_ms_sum']),
+                'compute_ms': _summary(total['compute_ms'], total['compute_ms_sum']),
+                'buckets': {k: total[k] for k in HISTOGRAMS},
+                'sums': {k: total[f'{k}_sum'] for k in HISTOGRAMS},
+            }
+
+        return {
+            'workers': [snap['worker'] for snap in snapshots],
+            'bucket_bounds_ms': list(BUCKETS_MS),
+            'series': series,
+            'single_flight': counters['single_flight'],
+            'l1': l1 or None,
+        }
+
+    @classmethod
+    def prometheus(cls):
+        """aggregate() in the Prometheus text exposition format"""
+        data = cls.aggregate()
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        family('az_cache_workers', 'gauge', 'Workers whose metrics are included')
+        lines.append(f'az_cache_workers {len(data["workers"])}')
+
+        family('az_cache_lookups_total', 'counter', 'Cache lookups by outcome')
+        for s in data['series'].values():
+            for outcome in ('hits', 'stale_hits', 'misses'):
+                lines.append(
+                    f'az_cache_lookups_total{{{_labels(s)},outcome="{outcome}"}} {s[outcome]}'
+                )
+
+        for metric, field, help_text in (
+            ('az_cache_not_modified_total', 'not_modified', '304 responses sent instead of a cached body'),
+            ('az_cache_sets_total', 'sets', 'Entries stored'),
+            ('az_cache_computes_total', 'computes', 'Values computed on a miss'),
+            ('az_cache_raw_bytes_total', 'raw_bytes', 'Uncompressed bytes of stored entries'),
+            ('az_cache_stored_bytes_total', 'stored_bytes', 'Compressed bytes of stored entries'),
+        ):
+            family(metric, 'counter', help_text)
+            for s in data['series'].values():
+                lines.append(f'{metric}{{{_labels(s)}}} {s[field]}')
+
+        for metric, field, help_text in (
+            ('az_cache_get_duration_seconds', 'get_ms', 'Cache lookup latency'),
+            ('az_cache_compute_duration_seconds', 'compute_ms', 'Time to compute a missed value'),
+        ):
+            family(metric, 'histogram', help_text)
+            for s in data['series'].values():
+                cumulative = 0
+                for bound, count in zip(BUCKETS_MS + (None,), s['buckets'][field]):
+                    cumulative += count
+                    le = '+Inf' if bound is None else repr(bound / 1000)
+                    lines.append(f'{metric}_bucket{{{_labels(s)},le="{le}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{_labels(s)}}} {s["sums"][field] / 1000}')
+                lines.append(f'{metric}_count{{{_labels(s)}}} {cumulative}')
+
+        family('az_cache_single_flight_total', 'counter', 'Stampede protection events')
+        for event, count in sorted(data['single_flight'].items()):
+            lines.append(f'az_cache_single_flight_total{{event="{event}"}} {count}')
+
+        if data['l1']:
+            family('az_cache_l1_entries', 'gauge', 'Entries in the per-process L1 caches')
+            lines.append(f'az_cache_l1_entries {data["l1"]["entries"]}')
+            family('az_cache_l1_bytes', 'gauge', 'Bytes held by the per-process L1 caches')
+            lines.append(f'az_cache_l1_bytes {data["l1"]["bytes"]}')
+            family('az_cache_l1_evictions_total', 'counter', 'L1 entries evicted to stay within bounds')
+            lines.append(f'az_cache_l1_evictions_total {data["l1"]["evictions"]}')
+            family('az_cache_l1_expirations_total', 'counter', 'L1 entries dropped when expired')
+            lines.append(f'az_cache_l1_expirations_total {data["l1"]["expirations"]}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(series):
+    return f'layer="{series["layer"]}",prefix="{series["prefix"]}"'
+
+
+def _summary(buckets, total_ms):
+    """Count, mean and bucket-bound p50/p95/p99 of a histogram"""
+    count = sum(buckets)
+    if not count:
+        return {'count': 0}
+
+    def percentile(q):
+        rank = q * count
+        seen = 0
+        for bound, n in zip(BUCKETS_MS + (None,), buckets):
+            seen += n
+            if seen >= rank:
+                return bound
+        return None
+
+    return {
+        'count': count,
+        'mean': round(total_ms / count, 4),
+        'p50_le': percentile(0.50),
+        'p95_le': percentile(0.95),
+        'p99_le': percentile(0.99),
+    }
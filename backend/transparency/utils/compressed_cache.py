@@ -12,22 +12,86 @@ PERFORMANCE:
 - Compression: 400-800 MB/s
 - Decompression: 2000-5000 MB/s
 - Cache hit: <0.5ms (vs Redis ~5-10ms)
+
+STAMPEDE PROTECTION:
+get_or_compute() lets one request compute an expired entry (a lock key taken
+with cache.add) while concurrent requests wait for its result, or are served
+the previous value if the entry was stored with a stale_ttl window
+(stale-while-revalidate). SingleFlightStats counts both.
+
+PRE-COMPRESSED RESPONSES:
+ResponseCache stores the rendered JSON body of an API response, compressed
+with gzip and zstd, under a strong ETag per encoding. A hit is written to
+the client as stored bytes (no decompression, parse, DRF render or
+GZipMiddleware pass), and a request whose If-None-Match matches gets a 304.
+
+METRICS:
+Every lookup, compute and store is counted in CacheMetrics (hit/miss, latency,
+bytes; utils/cache_metrics.py). Per-operation log lines are DEBUG, and only a
+CACHE_LOG_SAMPLE_RATE fraction of operations write one.
+
+DICTIONARIES:
+CompressedCache compresses with the zstd dictionary trained for the key's
+prefix, if there is one (utils/zstd_dictionaries.py), and stores its id with
+the entry. Both layers sample stored payloads for training. ResponseCache
+bodies stay plain gzip/zstd, since clients decode them.
 """
 
 import zstandard as zstd
+import gzip
+import hashlib
 import json
 import logging
+import os
+import random
+import threading
+import uuid
+from django.conf import settings
 from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
 from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 from functools import wraps
+from rest_framework.renderers import JSONRenderer
+from transparency.utils import zstd_dictionaries
+from transparency.utils.cache_metrics import CacheMetrics, key_prefix
+from transparency.utils.data_version import current_data_version
 import time
 
 logger = logging.getLogger(__name__)
 
-# Initialize Zstandard compressor/decompressor
+# Zstandard compressor/decompressor, one per thread: the objects are not
+# thread-safe and the cache warm-up renders on several threads
 # Level 3 = Sweet spot (fast + good compression)
-COMPRESSOR = zstd.ZstdCompressor(level=3)
-DECOMPRESSOR = zstd.ZstdDecompressor()
+_zstd = threading.local()
+
+
+def compressor():
+    """This thread's level-3 ZstdCompressor"""
+    found = getattr(_zstd, 'compressor', None)
+    if found is None:
+        found = _zstd.compressor = zstd.ZstdCompressor(level=3)
+    return found
+
+
+def decompressor():
+    """This thread's ZstdDecompressor"""
+    found = getattr(_zstd, 'decompressor', None)
+    if found is None:
+        found = _zstd.decompressor = zstd.ZstdDecompressor()
+    return found
+
+# Single-flight: how long a computing request holds the lock, how long the
+# others wait for its result before computing themselves, and how often they poll
+LOCK_TIMEOUT = 60
+WAIT_TIMEOUT = 15
+WAIT_POLL_INTERVAL = 0.05
+
+
+def _log_sampled():
+    """Whether this operation writes its DEBUG log line"""
+    return logger.isEnabledFor(logging.DEBUG) and random.random() < settings.CACHE_LOG_SAMPLE_RATE
 
 
 class CompressedCache:
@@ -41,7 +105,7 @@ class CompressedCache:
     """
 
     @staticmethod
-    def set(key: str, data: dict, timeout: int = 300):
+    def set(key: str, data: dict, timeout: int = 300, stale_ttl: int = 0):
         """
         Compress and cache data
 
@@ -49,6 +113,8 @@ class CompressedCache:
             key: Cache key
             data: Dictionary to cache
             timeout: TTL in seconds
+            stale_ttl: Seconds past the TTL that get_or_compute may still
+                       serve the entry while one request recomputes it
         """
         try:
             start = time.perf_counter()
@@ -57,22 +123,29 @@ class CompressedCache:
             json_str = json.dumps(data)
             json_bytes = json_str.encode('utf-8')
 
-            # Compress with Zstd
-            compressed = COMPRESSOR.compress(json_bytes)
-
-            # Store compressed data
-            cache.set(f'zstd:{key}', compressed, timeout=timeout)
-
-            compress_time = (time.perf_counter() - start) * 1000
-            compression_ratio = (1 - len(compressed) / len(json_bytes)) * 100
-
-            logger.info(
-                f"ZSTD CACHE SET: {key} | "
-                f"Original: {len(json_bytes):,} bytes | "
-                f"Compressed: {len(compressed):,} bytes | "
-                f"Ratio: {compression_ratio:.1f}% | "
-                f"Time: {compress_time:.2f}ms"
-            )
+            # Compress with Zstd, primed with the prefix's dictionary if trained
+            current = zstd_dictionaries.current(key_prefix(key))
+            dict_id, zstd_compressor = current or (0, compressor())
+            compressed = zstd_compressor.compress(json_bytes)
+
+            # Store compressed data with the time it stops being fresh
+            cache.set(f'zstd:{key}', (time.time() + timeout, compressed, dict_id),
+                      timeout=timeout + stale_ttl)
+
+            CacheMetrics.observe_set('zstd', key, len(json_bytes), len(compressed))
+            zstd_dictionaries.record_sample(key, lambda: json_bytes)
+
+            if _log_sampled():
+                compress_time = (time.perf_counter() - start) * 1000
+                compression_ratio = (1 - len(compressed) / len(json_bytes)) * 100
+                logger.debug(
+                    f"ZSTD CACHE SET: {key} | "
+                    f"Original: {len(json_bytes):,} bytes | "
+                    f"Compressed: {len(compressed):,} bytes | "
+                    f"Ratio: {compression_ratio:.1f}% | "
+                    f"Dictionary: {dict_id or '-'} | "
+                    f"Time: {compress_time:.2f}ms"
+                )
 
             return True
 
@@ -91,30 +164,60 @@ class CompressedCache:
         Returns:
             Decompressed dictionary or None
         """
+        entry = CompressedCache._load(key)
+        if entry is None or not entry[1]:
+            return None
+        return entry[0]
+
+    @staticmethod
+    def _load(key: str):
+        """
+        Retrieve and decompress an entry, fresh or within its stale window
+
+        Returns:
+            (data, is_fresh) or None
+        """
         try:
             start = time.perf_counter()
 
             # Get compressed data
-            compressed = cache.get(f'zstd:{key}')
+            stored = cache.get(f'zstd:{key}')
 
-            if compressed is None:
-                logger.info(f"ZSTD CACHE MISS: {key}")
+            if stored is None:
+                CacheMetrics.observe_get('zstd', key, 'misses', (time.perf_counter() - start) * 1000)
+                if _log_sampled():
+                    logger.debug(f"ZSTD CACHE MISS: {key}")
+                return None
+
+            # Entries from before dictionaries have no dictionary id
+            fresh_until, compressed, *dict_id = stored
+            dict_id = dict_id[0] if dict_id else 0
+            zstd_decompressor = zstd_dictionaries.decompressor(dict_id) if dict_id else decompressor()
+
+            if zstd_decompressor is None:
+                # Written under a dictionary version that has been pruned
+                CacheMetrics.observe_get('zstd', key, 'misses', (time.perf_counter() - start) * 1000)
+                if _log_sampled():
+                    logger.debug(f"ZSTD CACHE MISS: {key} (dictionary {dict_id} pruned)")
                 return None
 
             # Decompress
-            json_bytes = DECOMPRESSOR.decompress(compressed)
+            json_bytes = zstd_decompressor.decompress(compressed)
             data = json.loads(json_bytes.decode('utf-8'))
 
             decompress_time = (time.perf_counter() - start) * 1000
+            is_fresh = time.time() < fresh_until
+            CacheMetrics.observe_get('zstd', key, 'hits' if is_fresh else 'stale_hits', decompress_time)
 
-            logger.info(
-                f"ZSTD CACHE HIT: {key} | "
-                f"Compressed: {len(compressed):,} bytes | "
-                f"Decompressed: {len(json_bytes):,} bytes | "
-                f"Time: {decompress_time:.3f}ms"
-            )
+            if _log_sampled():
+                logger.debug(
+                    f"ZSTD CACHE HIT: {key} | "
+                    f"Compressed: {len(compressed):,} bytes | "
+                    f"Decompressed: {len(json_bytes):,} bytes | "
+                    f"Time: {decompress_time:.3f}ms"
+                )
 
-            return data
+            return data, is_fresh
 
         except Exception as e:
             logger.error(f"ZSTD decompression error: {e}")
@@ -124,15 +227,96 @@ class CompressedCache:
     def delete(key: str):
         """Delete cached item"""
         cache.delete(f'zstd:{key}')
-        logger.info(f"🗑️  ZSTD CACHE DELETE: {key}")
+        if _log_sampled():
+            logger.debug(f"ZSTD CACHE DELETE: {key}")
+
+    @staticmethod
+    def get_or_compute(key: str, compute, timeout: int = 300, stale_ttl: int = 0):
+        """
+        Return the cached value, computing it in at most one request at a time
+
+        A fresh entry is returned as-is. Otherwise the request that takes the
+        lock runs compute() and caches the result; the others get the stale
+        entry if there is one, or wait for the result (up to WAIT_TIMEOUT,
+        then compute it themselves).
+
+        Args:
+            key: Cache key
+            compute: Callable returning the JSON-serializable data
+            timeout: TTL in seconds
+            stale_ttl: Seconds past the TTL the old value may still be served
+        """
+        return _single_flight(
+            'zstd', key,
+            load=CompressedCache._load,
+            compute=compute,
+            store=lambda data: CompressedCache.set(key, data, timeout=timeout, stale_ttl=stale_ttl),
+        )
+
 
+def _single_flight(layer, key, load, compute, store):
+    """
+    get_or_compute() for any cache layout
 
-def zstd_cached(cache_key_func, timeout=300):
+    load() returns (value, is_fresh) or None, compute() a new value and
+    store(value) caches it. Returns the value to serve.
+    """
+    entry = load(key)
+    if entry is not None and entry[1]:
+        return entry[0]
+
+    def timed_compute():
+        start = time.perf_counter()
+        value = compute()
+        CacheMetrics.observe_compute(layer, key, (time.perf_counter() - start) * 1000)
+        return value
+
+    lock_key = f'{layer}_lock:{key}'
+    token = uuid.uuid4().hex
+    if cache.add(lock_key, token, timeout=LOCK_TIMEOUT):
+        try:
+            SingleFlightStats.incr('computes')
+            value = timed_compute()
+            store(value)
+            return value
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    if entry is not None:
+        SingleFlightStats.incr('stale_served')
+        if _log_sampled():
+            logger.debug(f"CACHE STALE: {key} (recompute in progress)")
+        return entry[0]
+
+    SingleFlightStats.incr('coalesced_waits')
+    if _log_sampled():
+        logger.debug(f"CACHE WAIT: {key} (recompute in progress)")
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_POLL_INTERVAL)
+        entry = load(key)
+        if entry is not None:
+            return entry[0]
+        if cache.get(lock_key) is None:
+            break
+
+    # The computing request failed or is too slow: compute without the lock
+    SingleFlightStats.incr('wait_timeouts')
+    value = timed_compute()
+    store(value)
+    return value
+
+
+def zstd_cached(cache_key_func, timeout=300, stale_ttl=0):
     """
     Decorator for automatic Zstd-compressed caching
 
+    Concurrent misses are coalesced (see CompressedCache.get_or_compute);
+    with stale_ttl the previous value is served while one request recomputes.
+
     Usage:
-        @zstd_cached(lambda request: 'dashboard_v1', timeout=300)
+        @zstd_cached(lambda request: 'dashboard_v1', timeout=300, stale_ttl=300)
         def my_view(request):
             return {'data': 'expensive_computation'}
     """
@@ -142,40 +326,198 @@ def zstd_cached(cache_key_func, timeout=300):
             # Generate cache key
             key = cache_key_func(*args, **kwargs)
 
-            # Try cache first
-            cached_data = CompressedCache.get(key)
-            if cached_data is not None:
-                return cached_data
+            return CompressedCache.get_or_compute(
+                key, lambda: func(*args, **kwargs),
+                timeout=timeout, stale_ttl=stale_ttl
+            )
 
-            # Cache miss - execute function
-            logger.info(f"ZSTD: Computing fresh data for {key}...")
-            result = func(*args, **kwargs)
+        return wrapper
+    return decorator
 
-            # Cache result
-            CompressedCache.set(key, result, timeout=timeout)
 
-            return result
+class ResponseCache:
+    """
+    Cached API responses, stored as final compressed bodies
 
-        return wrapper
-    return decorator
+    An entry is the JSON body as DRF's JSONRenderer writes it, compressed
+    once with gzip and once with zstd, and a strong ETag made of the data
+    version and a digest of the body; each encoded body is sent with it
+    suffixed by its encoding ("<tag>-zstd"). Views return the HttpResponse
+    these methods build instead of a DRF Response; the bytes go out as stored
+    (GZipMiddleware leaves responses that already have a Content-Encoding
+    alone). Clients that send neither encoding get the gzip body inflated.
+
+    Usage:
+        cached = ResponseCache.get(request, cache_key)
+        if cached:
+            return cached
+        ...
+        return ResponseCache.set(request, cache_key, response_data, timeout=600)
+
+        return ResponseCache.get_or_compute(request, cache_key, build, timeout=600)
+    """
+
+    RENDERER = JSONRenderer()
+
+    @staticmethod
+    def get(request, key: str):
+        """The cached response (or 304) for a fresh entry, or None"""
+        entry = ResponseCache._load(key)
+        if entry is None or not entry[1]:
+            return None
+        return ResponseCache.respond(request, key, entry[0])
+
+    @staticmethod
+    def set(request, key: str, data, timeout: int = 300, stale_ttl: int = 0):
+        """Render, compress and cache data; returns its response"""
+        entry = ResponseCache.render(data)
+        ResponseCache._store(key, entry, timeout, stale_ttl)
+        return ResponseCache.respond(request, key, entry)
+
+    @staticmethod
+    def get_or_compute(request, key: str, compute, timeout: int = 300, stale_ttl: int = 0):
+        """CompressedCache.get_or_compute() for responses; compute() returns the data"""
+        entry = _single_flight(
+            'response', key,
+            load=ResponseCache._load,
+            compute=lambda: ResponseCache.render(compute()),
+            store=lambda entry: ResponseCache._store(key, entry, timeout, stale_ttl),
+        )
+        return ResponseCache.respond(request, key, entry)
+
+    @staticmethod
+    def render(data):
+        """The cache entry for data: its ETag and compressed bodies"""
+        body = ResponseCache.RENDERER.render(data)
+        digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        return {
+            'etag': f'"v{current_data_version()}-{digest}"',
+            'size': len(body),
+            'gzip': gzip.compress(body, compresslevel=6),
+            'zstd': compressor().compress(body),
+        }
+
+    @staticmethod
+    def respond(request, key, entry):
+        """304 if the client has the entry, else its body in the best accepted encoding"""
+        encodings = _accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        encoding = 'zstd' if 'zstd' in encodings else 'gzip' if 'gzip' in encodings else None
+        # Each encoding is its own representation, so its own strong ETag
+        etag = _encoded_etag(entry['etag'], encoding)
+        if _etag_matches(request.META.get('HTTP_IF_NONE_MATCH'), etag):
+            CacheMetrics.observe_not_modified('response', key)
+            response = HttpResponseNotModified()
+        elif encoding:
+            response = HttpResponse(entry[encoding], content_type='application/json')
+            response['Content-Encoding'] = encoding
+        else:
+            response = HttpResponse(gzip.decompress(entry['gzip']), content_type='application/json')
+
+        response['ETag'] = etag
+        # Cacheable, but revalidated on every use so data changes show at once
+        response['Cache-Control'] = 'no-cache'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+    @staticmethod
+    def _load(key: str):
+        start = time.perf_counter()
+        stored = cache.get(f'resp:{key}')
+        if stored is None:
+            CacheMetrics.observe_get('response', key, 'misses', (time.perf_counter() - start) * 1000)
+            return None
+        fresh_until, entry = stored
+        is_fresh = time.time() < fresh_until
+        CacheMetrics.observe_get(
+            'response', key, 'hits' if is_fresh else 'stale_hits', (time.perf_counter() - start) * 1000
+        )
+        return entry, is_fresh
+
+    @staticmethod
+    def _store(key: str, entry, timeout: int, stale_ttl: int):
+        cache.set(f'resp:{key}', (time.time() + timeout, entry), timeout=timeout + stale_ttl)
+        CacheMetrics.observe_set('response', key, entry['size'], len(entry['gzip']) + len(entry['zstd']))
+        zstd_dictionaries.record_sample(key, lambda: decompressor().decompress(entry['zstd']))
+
+
+def _accepted_encodings(header):
+    """Content codings listed in an Accept-Encoding header, less those with q=0"""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _encoded_etag(etag, encoding):
+    """etag of the body sent with Content-Encoding encoding ("<tag>-zstd")"""
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+def _etag_matches(header, etag):
+    """If-None-Match comparison (weak: a W/ prefix is ignored)"""
+    if not header:
+        return False
+    tags = parse_etags(header)
+    return '*' in tags or any(tag.removeprefix('W/') == etag for tag in tags)
+
+
+class SingleFlightStats:
+    """
+    Stampede protection counters for this worker process
+
+    computes:        cache fills run by the lock holder
+    coalesced_waits: requests that waited for another request's result
+    stale_served:    requests served a stale value during a recompute
+    wait_timeouts:   waiters that gave up and computed themselves
+    """
+
+    _counts = {'computes': 0, 'coalesced_waits': 0, 'stale_served': 0, 'wait_timeouts': 0}
+    _lock = threading.Lock()
+
+    @classmethod
+    def incr(cls, name):
+        with cls._lock:
+            cls._counts[name] += 1
+
+    @classmethod
+    def snapshot(cls):
+        with cls._lock:
+            return {'pid': os.getpid(), **cls._counts}
 
 
 class CacheStats:
     """
-    Performance tracking for compressed cache
+    Performance tracking for compressed cache (measured; see CacheMetrics)
     """
 
     @staticmethod
     def get_stats():
-        """Get cache statistics"""
+        """Hit ratio, latency and compression per layer, summed over all workers"""
+        metrics = CacheMetrics.aggregate()
+        layers = {}
+        for series in metrics['series'].values():
+            layer = layers.setdefault(series['layer'], {
+                'hits': 0, 'stale_hits': 0, 'misses': 0, 'not_modified': 0,
+                'raw_bytes': 0, 'stored_bytes': 0,
+            })
+            for k in layer:
+                layer[k] += series[k]
+        for layer in layers.values():
+            lookups = layer['hits'] + layer['stale_hits'] + layer['misses']
+            layer['hit_ratio'] = round((layer['hits'] + layer['stale_hits']) / lookups, 4) if lookups else None
+            layer['compression_ratio'] = (
+                round(layer['stored_bytes'] / layer['raw_bytes'], 4) if layer['raw_bytes'] else None
+            )
         return {
-            'backend': 'Zstandard (in-memory)',
+            'backend': 'Zstandard / pre-compressed responses',
             'compression_level': 3,
-            'compression_speed': '400-800 MB/s',
-            'decompression_speed': '2000-5000 MB/s',
-            'typical_ratio': '70-80%',
-            'cache_hit_latency': '<0.5ms',
-            'vs_redis_improvement': '10-20x faster (no network)'
+            'workers': len(metrics['workers']),
+            'layers': layers,
+            'l1': metrics['l1'],
+            'single_flight': metrics['single_flight'],
         }
 
 
@@ -194,12 +536,12 @@ def benchmark_compression(data: dict):
 
     # Test compression
     start = time.perf_counter()
-    compressed = COMPRESSOR.compress(json_bytes)
+    compressed = compressor().compress(json_bytes)
     compress_time = (time.perf_counter() - start) * 1000
 
     # Test decompression
     start = time.perf_counter()
-    decompressed = DECOMPRESSOR.decompress(compressed)
+    decompressed = decompressor().decompress(compressed)
     decompress_time = (time.perf_counter() - start) * 1000
 
     # Calculate stats
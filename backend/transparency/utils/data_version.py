@@ -0,0 +1,129 @@
+"""
+Transaction data version and cache tags
+
+A single counter in the data_version table, bumped in the same database
+transaction as any tracked change to "Transactions" (imports, deduplication,
+entity merges; see services/incremental_aggregates.track_transaction_changes)
+and by every materialized view refresh (refresh_materialized_view).
+
+Caches built from transaction data put the version in their key, so a
+committed import invalidates them in every process, not only the one that
+ran the import (the first tier of the default cache is per process).
+
+Changes that do not touch "Transactions" (a committee or SOI edited through
+the API, a scraper saving SOIs) invalidate tags instead. A tag is a counter
+in the cache; versioned_key() puts the counters of the entry's tags in the
+key, and invalidate_tags() moves them (see transparency/signals.py):
+
+    soi                     any CandidateStatementOfInterest
+    committee:{id}          one committee
+    race:{office}:{cycle}   the committees running for one office in one cycle
+    races                   entries spanning several races
+    dashboard               the dashboard views; moved by the clear-cache endpoints
+
+Usage:
+    key = f'money_flow_o{office_id}_c{cycle_id}_v{get_data_version()}'
+
+    key = versioned_key(f'ie_spending_by_race_o{office_id}_c{cycle_id}',
+                        tags=[race_tag(office_id, cycle_id)])
+    invalidate_tags('soi')
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+import time
+
+TAG_KEY = 'cache_tag:{}'
+
+# (checked_at, version) of this process's last read, for current_data_version()
+_last_read = (float('-inf'), 0)
+
+
+def get_data_version():
+    """Current version (a primary-key lookup on a one-row table)"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT version FROM data_version WHERE id = 1")
+        row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def bump_data_version(cursor):
+    """Increment the version; visible to readers when the caller commits"""
+    cursor.execute("""
+        INSERT INTO data_version (id, version, updated_at) VALUES (1, 1, now())
+        ON CONFLICT (id) DO UPDATE SET
+            version = data_version.version + 1,
+            updated_at = now()
+        RETURNING version
+    """)
+    return cursor.fetchone()[0]
+
+
+def current_data_version():
+    """get_data_version(), re-read at most every DATA_VERSION_CHECK_INTERVAL seconds"""
+    checked_at, version = _last_read
+    now = time.monotonic()
+    if now - checked_at >= settings.DATA_VERSION_CHECK_INTERVAL:
+        version = reload_data_version()
+    return version
+
+
+def reload_data_version():
+    """Re-read the version for current_data_version() now (e.g. after a refresh)"""
+    global _last_read
+    version = get_data_version()
+    _last_read = (time.monotonic(), version)
+    return version
+
+
+# ==================== CACHE TAGS ====================
+
+def race_tag(office_id, cycle_id):
+    """The tag of one race, or 'races' unless both office and cycle are given"""
+    if office_id and cycle_id:
+        return f'race:{office_id}:{cycle_id}'
+    return 'races'
+
+
+def committee_tag(committee_id):
+    """The tag of one committee"""
+    return f'committee:{committee_id}'
+
+
+def _initial_tag_version():
+    # Counters start from the clock, so a tag evicted from the cache never
+    # returns to a version an old entry was stored under
+    return time.time_ns() // 1000
+
+
+def tag_versions(tags):
+    """{tag: current version} for tags"""
+    keys = {tag: TAG_KEY.format(tag) for tag in tags}
+    found = cache.get_many(list(keys.values()))
+    versions = {}
+    for tag, key in keys.items():
+        if key not in found:
+            cache.add(key, _initial_tag_version(), timeout=None)
+            found[key] = cache.get(key)
+        versions[tag] = found[key]
+    return versions
+
+
+def invalidate_tags(*tags):
+    """Move tags to a new version, so every entry stored under them is missed"""
+    for tag in tags:
+        key = TAG_KEY.format(tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_tag_version(), timeout=None)
+
+
+def versioned_key(key, tags=()):
+    """key stamped with the data version and the current version of each tag"""
+    stamped = f'{key}_v{current_data_version()}'
+    if tags:
+        versions = tag_versions(tags)
+        stamped += '_t' + '.'.join(str(versions[tag]) for tag in tags)
+    return stamped
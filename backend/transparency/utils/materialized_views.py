@@ -2,6 +2,7 @@
 from django.db import connection
 from django.db.models import Sum, Count
 from django.core.management.base import BaseCommand
+from transparency.utils.data_version import bump_data_version
 import logging
 
 logger = logging.getLogger(__name__)
@@ -39,7 +40,7 @@ class MaterializedViewManager:
             cursor.execute("""
                 CREATE MATERIALIZED VIEW IF NOT EXISTS race_ie_spending AS
                 SELECT 
-                    c.office_id,
+                    c.candidate_office_id as office_id,
                     o.name as office_name,
                     cy.cycle_id,
                     cy.name as cycle_name,
@@ -54,7 +55,7 @@ class MaterializedViewManager:
                 JOIN "Cycles" cy ON c.election_cycle_id = cy.cycle_id
                 JOIN "Committees" sc ON t.subject_committee_id = sc.committee_id
                 WHERE t.deleted = false AND t.subject_committee_id IS NOT NULL
-                GROUP BY c.office_id, o.name, cy.cycle_id, cy.name, t.subject_committee_id, sc.name_id, t.is_for_benefit
+                GROUP BY c.candidate_office_id, o.name, cy.cycle_id, cy.name, t.subject_committee_id, sc.name_id, t.is_for_benefit
             """)
     
     @staticmethod
@@ -64,6 +65,7 @@ class MaterializedViewManager:
             cursor.execute("REFRESH MATERIALIZED VIEW dashboard_aggregations")
             cursor.execute("REFRESH MATERIALIZED VIEW race_ie_spending")
             cursor.execute("REFRESH MATERIALIZED VIEW top_donors_mv")
+            bump_data_version(cursor)
         logger.info("All materialized views refreshed")
 
 # Add to views.py - Update dashboard endpoints to use materialized views
@@ -0,0 +1,313 @@
+"""
+Two-tier cache backend for multi-worker gunicorn
+
+L1: a bounded LRU in each process (entries and bytes), read without any I/O.
+L2: a cache shared by every worker, configured as another CACHES alias
+    (Redis when REDIS_URL is set, otherwise FileBasedCache on local disk).
+
+A miss in L1 reads L2, so a value computed by one worker is served to the
+others instead of being recomputed once per worker.
+
+On Redis every set/add/delete/incr/clear is appended to an invalidation log,
+numbered by an atomic INCR; each worker replays the log at most every
+SYNC_INTERVAL seconds and evicts the keys from its L1, so clearing the
+dashboard cache from one worker clears it in all of them. Other backends have
+no atomic counter (FileBasedCache's incr is a read and a write, so concurrent
+entries would overwrite each other), and there is no log: clear() changes a
+generation token that the workers compare instead, writes evict only the
+writer's L1, and integers (e.g. the cache tag counters) are always read
+from L2.
+
+An L1 copy lives at most min(timeout, L1_TIMEOUT) seconds, which bounds the
+staleness of entries written by other workers without a log (or whose log
+entry expired; a gap in the log clears L1). Entries set with timeout <= 0 are
+not kept in L1.
+
+Values are pickled once: the pickle is what L1 holds and what L2 stores
+(L2 adds only a bytes wrapper). Integers are stored as-is in L2 so incr/decr
+stay atomic on Redis. CompressedCache's zstd payloads are therefore held
+compressed, once, in L2.
+
+Settings:
+    CACHES = {
+        'default': {
+            'BACKEND': 'transparency.utils.tiered_cache.TieredCache',
+            'OPTIONS': {'L2': 'shared', 'MAX_ENTRIES': 1000,
+                        'MAX_BYTES': 64 * 1024 * 1024, 'L1_TIMEOUT': 60},
+        },
+        'shared': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', ...},
+    }
+"""
+
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.core.cache.backends.redis import RedisCache
+
+SEQ_KEY = 'tiered:invalidation_seq'
+GENERATION_KEY = 'tiered:generation'
+LOG_KEY = 'tiered:invalidation:{}'
+LOG_TIMEOUT = 3600
+# Replaying more entries than this clears L1 instead
+MAX_LOG_REPLAY = 1000
+CLEAR_ALL = '*'
+
+_MISSING = object()
+
+# L1 stores, one per cache alias, shared by the threads of a process
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def shared_cache():
+    """The cache every worker reads: TieredCache's L2, else the default cache"""
+    default = caches['default']
+    return getattr(default, 'l2', default)
+
+
+class _L1Store:
+    """LRU of key -> (expires_at, pickled bytes), bounded by entries and bytes"""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.seen_seq = None
+        self.seen_generation = _MISSING
+        self.synced_at = 0.0
+        # Entries dropped to stay within the bounds, and dropped when expired
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, now):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                self._pop(key)
+                self.expirations += 1
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, payload, expires_at, max_entries, max_bytes):
+        with self.lock:
+            self._pop(key)
+            if len(payload) > max_bytes:
+                return
+            self.entries[key] = (expires_at, payload)
+            self.size += len(payload)
+            while len(self.entries) > max_entries or self.size > max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self.lock:
+            self._pop(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def _pop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+
+class TieredCache(BaseCache):
+    """Per-process LRU (L1) in front of a shared cache alias (L2)"""
+
+    def __init__(self, name, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l2_alias = options.get('L2', 'shared')
+        self._max_bytes = int(options.get('MAX_BYTES', 64 * 1024 * 1024))
+        self._l1_timeout = float(options.get('L1_TIMEOUT', 60))
+        self._sync_interval = float(options.get('SYNC_INTERVAL', 1.0))
+
+        with _stores_lock:
+            self._l1 = _stores.setdefault(name or self._l2_alias, _L1Store())
+
+    @property
+    def l2(self):
+        return caches[self._l2_alias]
+
+    @property
+    def logged(self):
+        """True if L2 is Redis, whose atomic INCR numbers the invalidation log"""
+        return isinstance(self.l2, RedisCache)
+
+    # ==================== READS ====================
+
+    def get(self, key, default=None, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        self._sync()
+
+        now = time.monotonic()
+        payload = self._l1.get(full_key, now)
+        if payload is not None:
+            return pickle.loads(payload)
+
+        stored = self.l2.get(full_key, _MISSING, version=1)
+        if stored is _MISSING:
+            return default
+
+        if isinstance(stored, int):
+            if not self.logged:
+                # No log carries other workers' incr: read counters from L2
+                return stored
+            payload = pickle.dumps(stored, pickle.HIGHEST_PROTOCOL)
+            value = stored
+        else:
+            payload = stored
+            value = pickle.loads(payload)
+
+        self._l1.set(full_key, payload, now + self._l1_timeout,
+                     self._max_entries, self._max_bytes)
+        return value
+
+    def l1_stats(self):
+        """This process's L1: entries, bytes, evictions and expirations"""
+        return self._l1.stats()
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    # ==================== WRITES ====================
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        stored, payload = self._encode(value)
+        timeout = self._timeout(timeout)
+        self.l2.set(full_key, stored, timeout=timeout, version=1)
+        self._invalidate(full_key)
+
+        if isinstance(stored, int) and not self.logged:
+            return
+        if timeout is None:
+            lifetime = self._l1_timeout
+        elif timeout > 0:
+            lifetime = min(timeout, self._l1_timeout)
+        else:
+            return
+        self._l1.set(full_key, payload, time.monotonic() + lifetime,
+                     self._max_entries, self._max_bytes)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        stored, _ = self._encode(value)
+        added = self.l2.add(full_key, stored, timeout=self._timeout(timeout), version=1)
+        if added:
+            self._invalidate(full_key)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        return self.l2.touch(full_key, timeout=self._timeout(timeout), version=1)
+
+    def delete(self, key, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        deleted = self.l2.delete(full_key, version=1)
+        self._invalidate(full_key)
+        return deleted
+
+    def incr(self, key, delta=1, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        value = self.l2.incr(full_key, delta, version=1)
+        self._invalidate(full_key)
+        return value
+
+    def clear(self):
+        self.l2.clear()
+        self._invalidate(CLEAR_ALL)
+
+    # ==================== INVALIDATION LOG ====================
+
+    def _invalidate(self, full_key):
+        """Evict locally and tell the other workers (the log on Redis, else only a clear)"""
+        if full_key == CLEAR_ALL:
+            self._l1.clear()
+        else:
+            self._l1.pop(full_key)
+
+        l2 = self.l2
+        if not self.logged:
+            if full_key == CLEAR_ALL:
+                l2.set(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+            return
+
+        try:
+            seq = l2.incr(SEQ_KEY)
+        except ValueError:
+            # First entry, or the counter was cleared; readers treat the reset as a clear
+            l2.add(SEQ_KEY, 0, timeout=None)
+            seq = l2.incr(SEQ_KEY)
+        l2.set(LOG_KEY.format(seq), full_key, timeout=LOG_TIMEOUT)
+
+        # Nothing else happened in between: no need to replay our own entry
+        if self._l1.seen_seq == seq - 1:
+            self._l1.seen_seq = seq
+
+    def _sync(self):
+        """Replay log entries written by other workers since the last sync"""
+        store = self._l1
+        now = time.monotonic()
+        if now - store.synced_at < self._sync_interval:
+            return
+        store.synced_at = now
+
+        if not self.logged:
+            generation = self.l2.get(GENERATION_KEY)
+            if store.seen_generation is not _MISSING and generation != store.seen_generation:
+                store.clear()
+            store.seen_generation = generation
+            return
+
+        seq = self.l2.get(SEQ_KEY) or 0
+        seen = store.seen_seq
+        store.seen_seq = seq
+        if seen is None or seq == seen:
+            return
+
+        if seq < seen or seq - seen > MAX_LOG_REPLAY:
+            store.clear()
+            return
+
+        log_keys = [LOG_KEY.format(n) for n in range(seen + 1, seq + 1)]
+        entries = self.l2.get_many(log_keys)
+        for log_key in log_keys:
+            full_key = entries.get(log_key)
+            if full_key is None or full_key == CLEAR_ALL:
+                store.clear()
+                return
+            store.pop(full_key)
+
+    # ==================== HELPERS ====================
+
+    def _encode(self, value):
+        """(value stored in L2, pickled payload kept in L1)"""
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value, payload
+        return payload, payload
+
+    def _timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
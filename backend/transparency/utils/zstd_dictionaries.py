@@ -0,0 +1,233 @@
+"""
+Trained zstd dictionaries for CompressedCache
+
+Cached payloads are mostly small JSON pages that repeat the same keys and
+values ('committee_id', 'full_name', 'ie_total_for', party names, ...). Plain
+zstd starts every entry with an empty window, so that vocabulary is paid for
+again in each one. A dictionary trained on earlier payloads of the same kind
+primes the window, and each entry compresses as the tail of a long stream.
+
+There is one dictionary per key prefix (cache_metrics.key_prefix:
+'candidates_list', 'donors_list', ...). Rows of zstd_dictionaries are never
+updated: training a prefix again adds a row, and the row id is the version
+stored with each entry. Entries written under an older dictionary therefore
+still decompress until that row is pruned; an entry whose dictionary is gone
+is treated as a miss.
+
+Samples: a ZSTD_DICT_SAMPLE_RATE fraction of stored payloads is copied (its
+first SAMPLE_MAX_BYTES) into one of SAMPLE_SLOTS slots per prefix in the
+shared cache, and `manage.py train_zstd_dictionaries` trains from them.
+
+Each process re-reads which dictionary is current at most every
+ZSTD_DICT_CHECK_INTERVAL seconds; dictionaries are loaded once per process.
+
+Usage:
+    current = zstd_dictionaries.current('candidates_list')   # (id, compressor) or None
+    decompressor = zstd_dictionaries.decompressor(dict_id)   # None if pruned
+"""
+
+from django.conf import settings
+from django.db import connection
+from transparency.utils.cache_metrics import key_prefix
+from transparency.utils.tiered_cache import shared_cache
+import logging
+import random
+import threading
+import time
+import zstandard as zstd
+
+logger = logging.getLogger(__name__)
+
+# Same level as CompressedCache's plain compressor
+LEVEL = 3
+
+SAMPLE_KEY = 'zstd_sample:{}:{}'
+PREFIXES_KEY = 'zstd_sample_prefixes'
+SAMPLE_SLOTS = 256
+SAMPLE_MAX_BYTES = 32 * 1024
+SAMPLE_TIMEOUT = 7 * 24 * 3600
+
+_lock = threading.Lock()
+# prefix -> id of its newest dictionary, as of _checked_at
+_current = {}
+_checked_at = None
+# id -> dictionary bytes (rows never change, so never reloaded)
+_dictionaries = {}
+# Per thread: id -> ZstdCompressor / ZstdDecompressor, which are not thread-safe
+_zstd = threading.local()
+# ids looked up and not found (pruned; serial ids are not reused)
+_missing = set()
+# prefixes this process has added to PREFIXES_KEY
+_registered = set()
+
+
+# ==================== SAMPLING ====================
+
+def record_sample(key, get_raw):
+    """Sometimes keep the payload stored under key as a training sample
+
+    get_raw() returns the uncompressed bytes; it is only called when sampled.
+    """
+    if random.random() >= settings.ZSTD_DICT_SAMPLE_RATE:
+        return
+
+    prefix = key_prefix(key)
+    try:
+        shared = shared_cache()
+        shared.set(
+            SAMPLE_KEY.format(prefix, random.randrange(SAMPLE_SLOTS)),
+            bytes(get_raw()[:SAMPLE_MAX_BYTES]),
+            timeout=SAMPLE_TIMEOUT,
+        )
+        if prefix not in _registered:
+            prefixes = shared.get(PREFIXES_KEY) or []
+            if prefix not in prefixes:
+                shared.set(PREFIXES_KEY, prefixes + [prefix], timeout=None)
+            _registered.add(prefix)
+    except Exception as e:
+        logger.warning(f"zstd dictionary sample failed: {e}")
+
+
+def sampled_prefixes():
+    """Key prefixes that have samples"""
+    return sorted(shared_cache().get(PREFIXES_KEY) or [])
+
+
+def samples(prefix):
+    """The sampled payloads of a prefix"""
+    keys = [SAMPLE_KEY.format(prefix, slot) for slot in range(SAMPLE_SLOTS)]
+    return list(shared_cache().get_many(keys).values())
+
+
+# ==================== TRAINING ====================
+
+def build(sample_list, dict_size=None):
+    """Train a dictionary from payloads (raises zstd.ZstdError if too few)"""
+    return zstd.train_dictionary(dict_size or settings.ZSTD_DICT_SIZE, sample_list, level=LEVEL)
+
+
+def save(prefix, dictionary, sample_count):
+    """Store dictionary as prefix's newest version; returns its id"""
+    global _checked_at
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO zstd_dictionaries (prefix, data, sample_count)
+            VALUES (%s, %s, %s)
+            RETURNING id
+            """,
+            [prefix, dictionary.as_bytes(), sample_count],
+        )
+        dict_id = cursor.fetchone()[0]
+
+    # Use it in this process right away
+    _checked_at = None
+    return dict_id
+
+
+def prune(prefix, keep):
+    """Delete all but the newest `keep` versions of prefix; returns how many went"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            DELETE FROM zstd_dictionaries
+            WHERE prefix = %s AND id NOT IN (
+                SELECT id FROM zstd_dictionaries
+                WHERE prefix = %s
+                ORDER BY id DESC
+                LIMIT %s
+            )
+            """,
+            [prefix, prefix, keep],
+        )
+        return cursor.rowcount
+
+
+def versions():
+    """(id, prefix, size in bytes, sample_count, created_at) of every stored dictionary"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT id, prefix, length(data), sample_count, created_at
+            FROM zstd_dictionaries
+            ORDER BY prefix, id DESC
+            """
+        )
+        return cursor.fetchall()
+
+
+# ==================== LOOKUP ====================
+
+def current(prefix):
+    """(id, compressor) of prefix's newest dictionary, or None; the compressor is this thread's"""
+    _refresh()
+    dict_id = _current.get(prefix)
+    if dict_id is None:
+        return None
+    compressors = _thread_cache('compressors')
+    compressor = compressors.get(dict_id)
+    if compressor is None:
+        dictionary = _dictionary(dict_id)
+        if dictionary is None:
+            return None
+        compressor = compressors[dict_id] = zstd.ZstdCompressor(level=LEVEL, dict_data=dictionary)
+    return dict_id, compressor
+
+
+def decompressor(dict_id):
+    """This thread's decompressor for entries written under dict_id, or None if it was pruned"""
+    decompressors = _thread_cache('decompressors')
+    found = decompressors.get(dict_id)
+    if found is None:
+        dictionary = _dictionary(dict_id)
+        if dictionary is None:
+            return None
+        found = decompressors[dict_id] = zstd.ZstdDecompressor(dict_data=dictionary)
+    return found
+
+
+def _thread_cache(name):
+    found = getattr(_zstd, name, None)
+    if found is None:
+        found = {}
+        setattr(_zstd, name, found)
+    return found
+
+
+def _dictionary(dict_id):
+    if dict_id in _missing:
+        return None
+    data = _dictionaries.get(dict_id)
+    if data is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT data FROM zstd_dictionaries WHERE id = %s", [dict_id])
+            row = cursor.fetchone()
+        if row is None:
+            _missing.add(dict_id)
+            return None
+        with _lock:
+            data = _dictionaries.setdefault(dict_id, bytes(row[0]))
+    return zstd.ZstdCompressionDict(data)
+
+
+def _refresh():
+    global _current, _checked_at
+
+    now = time.monotonic()
+    if _checked_at is not None and now - _checked_at < settings.ZSTD_DICT_CHECK_INTERVAL:
+        return
+    _checked_at = now
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT DISTINCT ON (prefix) prefix, id
+                FROM zstd_dictionaries
+                ORDER BY prefix, id DESC
+                """
+            )
+            _current = dict(cursor.fetchall())
+    except Exception as e:
+        logger.warning(f"zstd dictionary lookup failed: {e}")
@@ -1,17 +1,30 @@
 
 from django.utils import timezone
-from django.db.models import Sum, Count, Q, Prefetch, F
+from django.db import connection
+from django.db.models import Sum, Count, Q, Prefetch, F, OuterRef, Subquery, DecimalField
+from django.db.models.functions import Coalesce
+from django.core.paginator import EmptyPage, Paginator as DjangoPaginator
+from django.utils.functional import cached_property
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.urls import replace_query_param
 from decimal import Decimal
-from datetime import datetime, timedelta
+from datetime import date, timedelta
 from django.core.cache import cache
+from django.conf import settings
+from django.shortcuts import get_object_or_404
 
 from .models import *
 from .services.email_service import EmailService
+from .services.money_flow import get_flow_graph
+from .services.counts import counter_count, queryset_count, search_count
+from .services import search as name_search
+from .utils.data_version import invalidate_tags, race_tag, versioned_key
+from .utils.keyset import InvalidCursor, encode_cursor, decode_cursor, keyset_filter
 from .serializers import *
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
@@ -360,13 +373,68 @@ def add_cors_headers(response):
 
 # ==================== PAGINATION ====================
 
-class StandardResultsSetPagination(PageNumberPagination):
+class CountedPaginator(DjangoPaginator):
+    """Paginator whose count comes from count_source(object_list) -> CountResult"""
+
+    def __init__(self, object_list, per_page, count_source):
+        super().__init__(object_list, per_page)
+        self.count_source = count_source
+        self.count_approximate = False
+
+    @cached_property
+    def count(self):
+        result = self.count_source(self.object_list)
+        self.count_approximate = result.approximate
+        return result.count
+
+    def validate_number(self, number):
+        # An estimate can fall short of the rows: the last page it allows (no
+        # next link) and pages past it (404) are checked against COUNT(*)
+        try:
+            valid = super().validate_number(number)
+        except EmptyPage:
+            if not self.count_approximate:
+                raise
+            valid = None
+        if self.count_approximate and (valid is None or valid >= self.num_pages):
+            self.count = DjangoPaginator.count.func(self)
+            self.count_approximate = False
+            self.__dict__.pop('num_pages', None)
+            return super().validate_number(number)
+        return valid
+
+
+class CountedPaginationMixin:
+    """
+    Views that define result_count(queryset) (see services/counts.py) get
+    their page count from it instead of COUNT(*), and a 'count_approximate'
+    flag in the response. Other views paginate as before.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_source = getattr(view, 'result_count', None)
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, queryset, page_size):
+        # Called by PageNumberPagination.paginate_queryset in place of the class
+        if self.count_source is None:
+            return DjangoPaginator(queryset, page_size)
+        return CountedPaginator(queryset, page_size, self.count_source)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if isinstance(self.page.paginator, CountedPaginator):
+            response.data['count_approximate'] = self.page.paginator.count_approximate
+        return response
+
+
+class StandardResultsSetPagination(CountedPaginationMixin, PageNumberPagination):
     page_size = 25
     page_size_query_param = 'page_size'
     max_page_size = 100
 
 
-class LargeResultsSetPagination(PageNumberPagination):
+class LargeResultsSetPagination(CountedPaginationMixin, PageNumberPagination):
     page_size = 100
     page_size_query_param = 'page_size'
     max_page_size = 500
@@ -419,6 +487,67 @@ class FastPagination(PageNumberPagination):
         })
 
 
+class TransactionKeysetPagination(LargeResultsSetPagination):
+    """
+    Page numbers by default; ?cursor= switches to keyset pagination
+    (see utils/keyset.py), whose cost does not grow with depth.
+
+    Pass an empty cursor for the first page, then follow 'next'. Cursor
+    pages have no count or previous link, and order_by must be one of
+    KEYSET_ORDERINGS (ascending or descending), tie-broken by transaction_id.
+    """
+    cursor_query_param = 'cursor'
+    KEYSET_ORDERINGS = {'transaction_date': date, 'amount': Decimal}
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        ordering = request.query_params.get('order_by', '-transaction_date')
+        field = ordering.lstrip('-')
+        if field not in self.KEYSET_ORDERINGS:
+            raise ValidationError({
+                'order_by': f'Cursor pagination supports: {", ".join(self.KEYSET_ORDERINGS)}'
+            })
+        descending = ordering.startswith('-')
+        queryset = queryset.order_by(ordering, '-transaction_id' if descending else 'transaction_id')
+
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            try:
+                after = decode_cursor(token, self.KEYSET_ORDERINGS[field], int)
+            except InvalidCursor as e:
+                raise ValidationError({'cursor': str(e)})
+            queryset = keyset_filter(queryset, field, 'transaction_id', after, descending)
+
+        page_size = self.get_page_size(request)
+        rows = list(queryset[:page_size + 1])
+
+        self.next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            self.next_cursor = encode_cursor(getattr(last, field), last.transaction_id)
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+
+        next_url = None
+        if self.next_cursor:
+            next_url = replace_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor
+            )
+        return Response({
+            'next': next_url,
+            'previous': None,
+            'results': data,
+        })
+
+
 # ==================== PHASE 1: CANDIDATE TRACKING ====================
 
 class CandidateSOIViewSet(viewsets.ModelViewSet):
@@ -537,29 +666,117 @@ class CandidateSOIViewSet(viewsets.ModelViewSet):
 
 # ==================== PHASE 1: CANDIDATE/COMMITTEE VIEWS ====================
 
+# Columns EntitySerializer reads, for .only() on select_related entities
+ENTITY_SERIALIZER_COLUMNS = [
+    'name_id', 'name_group_id', 'last_name', 'first_name', 'middle_name', 'suffix',
+    'address1', 'address2', 'city', 'state', 'zip_code', 'occupation', 'employer',
+    'entity_type__entity_type_id', 'entity_type__name',
+    'county__county_id', 'county__name',
+]
+
+
+def _entity_related(*fields):
+    """select_related paths and .only() columns for nested EntitySerializer fields"""
+    related = []
+    columns = []
+    for field in fields:
+        related += [field, f'{field}__entity_type', f'{field}__county']
+        columns += [f'{field}__{column}' for column in ENTITY_SERIALIZER_COLUMNS]
+    return related, columns
+
+
 class CommitteeViewSet(viewsets.ReadOnlyModelViewSet):
     """
     Committee data with IE spending aggregations
     Phase 1 Requirements 2a-2e: Track outside spending
+
+    Each action loads only what its serializer reads. Budgets for a page or
+    a single committee, independent of how many transactions it has:
+
+        list, top (incl. ?search=)
+                               1 query for the page, one row per committee,
+                               serializer columns only; plus the count when
+                               not cached (see result_count)
+        retrieve               3 queries: committee, financial rollup, latest
+                               RECENT_TRANSACTION_LIMIT transactions
+        other detail actions   1 query for the committee (name, candidate,
+                               office, party) plus the action's own aggregates
+
+    Memory per request is bounded the same way: list, ?search= and
+    /committees/top/ instantiate no Transaction rows, retrieve at most
+    RECENT_TRANSACTION_LIMIT, and each stays under MEMORY_BUDGET bytes of
+    Python allocations (tracemalloc peak) with 100K transactions on one
+    committee (CommitteeRollupTests).
     """
     queryset = Committee.objects.all()
     serializer_class = CommitteeSerializer
     permission_classes = [AllowAny]
     pagination_class = StandardResultsSetPagination
-    
+
+    RECENT_TRANSACTION_LIMIT = 25
+    MEMORY_BUDGET = 2 * 1024 * 1024
+
+    ENTITY_RELATED, ENTITY_COLUMNS = _entity_related('name', 'candidate', 'sponsor')
+    LIST_RELATED = ENTITY_RELATED + [
+        'candidate_party', 'candidate_office', 'candidate_county',
+        'election_cycle', 'ballot_measure',
+    ]
+    LIST_COLUMNS = ENTITY_COLUMNS + [
+        'committee_id', 'is_incumbent', 'sponsor_type', 'sponsor_relationship',
+        'ballot_measure', 'benefits_ballot_measure', 'organization_date', 'termination_date',
+        'physical_city', 'physical_state',
+        'candidate_party__party_id', 'candidate_party__name', 'candidate_party__abbreviation',
+        'candidate_office__office_id', 'candidate_office__name', 'candidate_office__office_type',
+        'candidate_county__county_id', 'candidate_county__name',
+        'election_cycle__cycle_id', 'election_cycle__name',
+        'election_cycle__begin_date', 'election_cycle__end_date',
+    ]
+    DETAIL_RELATED = LIST_RELATED + _entity_related('chairperson', 'treasurer')[0]
+
     def get_queryset(self):
-        queryset = Committee.objects.select_related(
-            'name', 'candidate', 'candidate_party', 'candidate_office',
-            'election_cycle', 'sponsor', 'chairperson', 'treasurer'
-        ).prefetch_related(
-            Prefetch(
-                'transactions',
-                queryset=Transaction.objects.filter(deleted=False).select_related(
-                    'transaction_type', 'entity', 'category'
-                )
+        if self.action == 'retrieve':
+            queryset = self._detail_queryset()
+        elif self.action in ('list', 'top'):
+            queryset = self._list_queryset()
+        else:
+            queryset = Committee.objects.select_related(
+                'name', 'candidate', 'candidate_office', 'candidate_party'
             )
+
+        return self._apply_filters(queryset)
+
+    def _rollup_prefetch(self):
+        # Financial totals for CommitteeDetailSerializer, one query for the page
+        return Prefetch(
+            'financial_rollups',
+            queryset=CommitteeFinancialRollup.objects.filter(
+                cycle_key=CommitteeFinancialRollup.ALL_CYCLES
+            ),
+            to_attr='prefetched_rollups'
         )
-        
+
+    def _list_queryset(self):
+        """Serializer columns only; no transactions"""
+        return Committee.objects.select_related(*self.LIST_RELATED).only(*self.LIST_COLUMNS)
+
+    def _detail_queryset(self):
+        """Full committee row and its financial rollup"""
+        return Committee.objects.select_related(*self.DETAIL_RELATED).prefetch_related(
+            self._rollup_prefetch()
+        )
+
+    def _recent_transactions(self, committee):
+        """Latest RECENT_TRANSACTION_LIMIT transactions (idx_txn_comm_active_date + LIMIT)"""
+        transactions = list(Transaction.objects.filter(committee=committee, deleted=False).select_related(
+            'transaction_type', 'category', 'entity__entity_type', 'entity__county',
+            'subject_committee__name', 'subject_committee__candidate',
+            'subject_committee__candidate_office', 'subject_committee__candidate_party',
+        ).order_by('-transaction_date', '-transaction_id')[:self.RECENT_TRANSACTION_LIMIT])
+        for txn in transactions:
+            txn.committee = committee
+        return transactions
+
+    def _apply_filters(self, queryset):
         # Filter candidate committees only
         candidates_only = self.request.query_params.get('candidates_only', None)
         if candidates_only == 'true':
@@ -585,24 +802,27 @@ class CommitteeViewSet(viewsets.ReadOnlyModelViewSet):
         if active_only == 'true':
             queryset = queryset.filter(termination_date__isnull=True)
 
-        # Search by candidate name or committee name
+        # Search by committee or candidate name, best match first
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(name__full_name__icontains=search) |
-                Q(candidate__full_name__icontains=search) |
-                Q(name__last_name__icontains=search) |
-                Q(name__first_name__icontains=search) |
-                Q(candidate__last_name__icontains=search) |
-                Q(candidate__first_name__icontains=search)
-            )
+            queryset = name_search.filter_queryset(queryset, search, 'name', 'candidate')
 
         return queryset
+
+    def result_count(self, queryset):
+        """Page count, cached per data version; estimated for broad searches"""
+        return queryset_count(queryset)
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return CommitteeDetailSerializer
         return CommitteeSerializer
+
+    def retrieve(self, request, *args, **kwargs):
+        committee = self.get_object()
+        committee.recent_transactions = self._recent_transactions(committee)
+        serializer = self.get_serializer(committee)
+        return Response(serializer.data)
     
     @action(detail=True, methods=['get'], url_path='ie_spending')
     def ie_spending(self, request, pk=None):
@@ -674,9 +894,31 @@ class CommitteeViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=True, methods=['get'])
     def financial_summary(self, request, pk=None):
-        """Overall financial summary: income, expenses, cash on hand"""
-        committee = self.get_object()
-        
+        """
+        Overall financial summary: income, expenses, cash on hand
+        Optional ?cycle=<cycle_id> limits totals to transactions of that cycle (Transaction.cycle)
+        """
+        try:
+            cycle_key = int(request.query_params.get('cycle') or CommitteeFinancialRollup.ALL_CYCLES)
+        except ValueError:
+            return Response({'error': 'cycle must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # One indexed lookup on (committee_id, cycle_key), joined to the name
+        rollup = CommitteeFinancialRollup.objects.select_related('committee__name').filter(
+            committee_id=pk, cycle_key=cycle_key
+        ).first()
+
+        if rollup is not None:
+            committee = rollup.committee
+            committee._financial_rollup = rollup
+        else:
+            # No rollup row: the committee has no transactions (in that cycle)
+            committee = get_object_or_404(Committee.objects.select_related('name'), pk=pk)
+            if cycle_key == CommitteeFinancialRollup.ALL_CYCLES:
+                committee._financial_rollup = None
+            else:
+                committee._financial_rollup = CommitteeFinancialRollup(committee=committee)
+
         return Response({
             'committee_id': committee.committee_id,
             'name': committee.name.full_name,
@@ -692,7 +934,7 @@ class CommitteeViewSet(viewsets.ReadOnlyModelViewSet):
         """Top committees by IE spending"""
         limit = int(request.query_params.get('limit', 10))
         
-        committees = Committee.objects.filter(
+        committees = self._list_queryset().filter(
             candidate__isnull=False
         ).annotate(
             total_ie_for=Sum(
@@ -735,12 +977,10 @@ class EntityViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         queryset = Entity.objects.select_related('entity_type', 'county')
         
-        # Search by name
+        # Search by name, best match first
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(last_name__icontains=search) | Q(first_name__icontains=search)
-            )
+            queryset = name_search.filter_queryset(queryset, search)
         
         # Filter by entity type
         entity_type = self.request.query_params.get('entity_type', None)
@@ -967,12 +1207,14 @@ def races_money_flow(request):
 def races_detailed_money_flow(request):
     """
     Get detailed money flow: Donors -> Specific IE Committees -> Candidates
-    Shows actual transaction paths for top donors
-    NOTE: Temporarily using aggregated data like races_money_flow until we optimize the complex query
+    candidates and top_donors are the race aggregates (RaceAggregationManager);
+    paths, sankey and summary come from the cached money flow graph
+    (services/money_flow.py)
     """
     office_id = request.GET.get('office_id')
     cycle_id = request.GET.get('cycle_id')
     donor_limit = int(request.GET.get('donor_limit', 6))
+    path_limit = int(request.GET.get('path_limit', 10))
 
     if not office_id or not cycle_id:
         return Response(
@@ -989,17 +1231,20 @@ def races_detailed_money_flow(request):
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    # For now, use the existing aggregated data
-    # TODO: Implement detailed committee-specific flows
     candidates_data = RaceAggregationManager.get_race_ie_spending(office, cycle, None)
     donors_data = RaceAggregationManager.get_top_ie_donors_by_race(office, cycle, donor_limit)
+    graph = get_flow_graph(office_id=office.office_id, cycle_id=cycle.cycle_id)
 
     return Response({
         'candidates': list(candidates_data),
         'top_donors': list(donors_data),
+        'paths': graph.top_paths(path_limit),
+        'sankey': graph.sankey(donor_limit=donor_limit),
+        'summary': graph.summary(),
         'metadata': {
             'donor_limit': donor_limit,
-            'note': 'Using aggregated data - detailed committee flows coming soon'
+            'path_limit': path_limit,
+            'attribution': 'Donor amounts are split across candidates in proportion to each committee\'s IE spending'
         }
     })
 
@@ -1011,8 +1256,13 @@ class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Transaction.objects.filter(deleted=False)
     serializer_class = TransactionSerializer
     permission_classes = [AllowAny]
-    pagination_class = LargeResultsSetPagination
-    
+    pagination_class = TransactionKeysetPagination
+
+    # Filters transaction_counts can answer exactly, with the params that don't filter
+    COUNTER_PARAMS = {'committee', 'type', 'ie_only'}
+    UNFILTERED_PARAMS = {'page', 'page_size', 'order_by', 'format'}
+    TYPE_INCOME_EXPENSE_NEUTRAL = {'contributions': 1, 'expenses': 2}
+
     def get_queryset(self):
         queryset = Transaction.objects.filter(deleted=False).select_related(
             'committee', 'committee__name',
@@ -1030,10 +1280,10 @@ class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(entity_id=entity_id)
         
         txn_type = self.request.query_params.get('type', None)
-        if txn_type == 'contributions':
-            queryset = queryset.filter(transaction_type__income_expense_neutral=1)
-        elif txn_type == 'expenses':
-            queryset = queryset.filter(transaction_type__income_expense_neutral=2)
+        if txn_type in self.TYPE_INCOME_EXPENSE_NEUTRAL:
+            queryset = queryset.filter(
+                transaction_type__income_expense_neutral=self.TYPE_INCOME_EXPENSE_NEUTRAL[txn_type]
+            )
         
         ie_only = self.request.query_params.get('ie_only', None)
         if ie_only == 'true':
@@ -1057,21 +1307,42 @@ class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
         if amount_max:
             queryset = queryset.filter(amount__lte=amount_max)
 
-        # Search by purpose or committee name
+        # Search by memo or committee, subject or contributor name
         search = self.request.query_params.get('search', None)
         if search:
             queryset = queryset.filter(
-                Q(purpose__icontains=search) |
-                Q(committee__name__full_name__icontains=search) |
-                Q(subject_committee__name__full_name__icontains=search) |
-                Q(entity__full_name__icontains=search)
+                Q(memo__icontains=search) |
+                name_search.name_q(search, 'committee__name', 'subject_committee__name', 'entity')
             )
 
+        # transaction_id breaks ties so pages are stable (and match the keyset indexes)
         order_by = self.request.query_params.get('order_by', '-transaction_date')
-        queryset = queryset.order_by(order_by)
+        if order_by.lstrip('-') == 'transaction_id':
+            queryset = queryset.order_by(order_by)
+        else:
+            queryset = queryset.order_by(
+                order_by, '-transaction_id' if order_by.startswith('-') else 'transaction_id'
+            )
 
         return queryset
-    
+
+    def result_count(self, queryset):
+        """
+        Exact count from transaction_counts when only committee, type and
+        ie_only filter the list; otherwise counted (or estimated) by
+        services/counts.py. Either way cached per data version.
+        """
+        params = self.request.query_params
+        filters = {name for name, value in params.items() if value} - self.UNFILTERED_PARAMS
+        if self.action in ('list', 'ie_transactions') and filters <= self.COUNTER_PARAMS:
+            committee_id = params.get('committee')
+            return counter_count(
+                committee_id=int(committee_id) if committee_id else None,
+                income_expense_neutral=self.TYPE_INCOME_EXPENSE_NEUTRAL.get(params.get('type')),
+                ie_only=params.get('ie_only') == 'true' or self.action == 'ie_transactions',
+            )
+        return queryset_count(queryset)
+
     @action(detail=False, methods=['get'])
     def ie_transactions(self, request):
         """All independent expenditure transactions"""
@@ -1293,7 +1564,7 @@ def donors_top(request):
 @permission_classes([AllowAny])
 def candidates_list(request):
     """Adapter endpoint: /api/candidates/ -> maps to committees with candidates + Zstd compression"""
-    from transparency.utils.compressed_cache import CompressedCache
+    from transparency.utils.compressed_cache import ResponseCache
 
     # Build cache key from request parameters
     page_num = request.query_params.get('page', 1)
@@ -1302,162 +1573,194 @@ def candidates_list(request):
     party_id = request.query_params.get('party', '')
     cycle_id = request.query_params.get('cycle', '')
     search = request.query_params.get('search', '')
-    cache_key = f'candidates_list_p{page_num}_s{page_size}_o{office_id}_pt{party_id}_c{cycle_id}_q{search}'
-
-    # Try to get from Zstd-compressed cache (10 minute cache)
-    cached_data = CompressedCache.get(cache_key)
-    if cached_data:
-        return Response(cached_data)
-
-    queryset = Committee.objects.filter(candidate__isnull=False).select_related(
-        'name', 'candidate', 'candidate_party', 'candidate_office', 'election_cycle'
+    cache_key = versioned_key(
+        f'candidates_list_p{page_num}_s{page_size}_o{office_id}_pt{party_id}_c{cycle_id}_q{search}',
+        tags=['soi', race_tag(office_id, cycle_id)]
     )
 
-    # Apply filters
-    if office_id:
-        queryset = queryset.filter(candidate_office_id=office_id)
+    def build():
+        queryset = Committee.objects.filter(candidate__isnull=False).select_related(
+            'name', 'candidate', 'candidate_party', 'candidate_office', 'election_cycle'
+        )
+
+        # Apply filters
+        if office_id:
+            queryset = queryset.filter(candidate_office_id=office_id)
 
-    if party_id:
-        queryset = queryset.filter(candidate_party_id=party_id)
+        if party_id:
+            queryset = queryset.filter(candidate_party_id=party_id)
 
-    if cycle_id:
-        queryset = queryset.filter(election_cycle_id=cycle_id)
+        if cycle_id:
+            queryset = queryset.filter(election_cycle_id=cycle_id)
 
-    # Apply search filter
-    if search:
-        queryset = queryset.filter(
-            Q(candidate__first_name__icontains=search) |
-            Q(candidate__last_name__icontains=search) |
-            Q(name__first_name__icontains=search) |
-            Q(name__last_name__icontains=search) |
-            Q(candidate_office__name__icontains=search)
+        # Apply search filter: candidate or committee name (best match first) or office
+        if search:
+            queryset = queryset.filter(
+                name_search.name_q(search, 'candidate', 'name') |
+                Q(candidate_office__name__icontains=search)
+            ).annotate(
+                search_rank=name_search.name_rank(search, 'candidate', 'name')
+            ).order_by('-search_rank', 'committee_id')
+    
+        # Annotate with IE totals
+        queryset = queryset.annotate(
+            ie_total_for=Sum(
+                'subject_of_ies__amount',
+                filter=Q(subject_of_ies__is_for_benefit=True, subject_of_ies__deleted=False)
+            ),
+            ie_total_against=Sum(
+                'subject_of_ies__amount',
+                filter=Q(subject_of_ies__is_for_benefit=False, subject_of_ies__deleted=False)
+            )
         )
     
-    # Annotate with IE totals
-    queryset = queryset.annotate(
-        ie_total_for=Sum(
-            'subject_of_ies__amount',
-            filter=Q(subject_of_ies__is_for_benefit=True, subject_of_ies__deleted=False)
-        ),
-        ie_total_against=Sum(
-            'subject_of_ies__amount',
-            filter=Q(subject_of_ies__is_for_benefit=False, subject_of_ies__deleted=False)
+        # Contact state from the candidate's latest SOI, in the page query
+        # itself rather than one query per row (idx_soi_entity_date)
+        latest_soi = CandidateStatementOfInterest.objects.filter(
+            entity=OuterRef('candidate')
+        ).order_by('-filing_date', '-id')
+        queryset = queryset.annotate(
+            soi_contact_status=Subquery(latest_soi.values('contact_status')[:1]),
+            soi_contact_date=Subquery(latest_soi.values('contact_date')[:1]),
         )
-    )
     
-    # Pagination
-    paginator = LargeResultsSetPagination()
-    page = paginator.paginate_queryset(queryset, request)
+        # Pagination
+        paginator = LargeResultsSetPagination()
+        page = paginator.paginate_queryset(queryset, request)
     
-    # Transform to match frontend expectations
-    result_data = []
-    for committee in (page if page is not None else queryset):
-        # Get contact status from CandidateSOI if exists
-        try:
-            soi = CandidateStatementOfInterest.objects.filter(
-                entity=committee.candidate
-            ).order_by('-filing_date').first()
-            contacted = soi.contact_status == 'contacted' if soi else False
-            contacted_at = soi.contact_date.isoformat() if soi and soi.contact_date else None
-        except:
-            contacted = False
-            contacted_at = None
+        # Transform to match frontend expectations
+        result_data = []
+        for committee in (page if page is not None else queryset):
+            contacted = committee.soi_contact_status == 'contacted'
+            contacted_at = committee.soi_contact_date.isoformat() if committee.soi_contact_date else None
         
-        result_data.append({
-            'committee_id': committee.committee_id,
-            'candidate': {
-                'full_name': committee.candidate.full_name if committee.candidate else None,
-            } if committee.candidate else None,
-            'name': {
-                'full_name': committee.name.full_name if committee.name else None,
-            } if committee.name else None,
-            'candidate_office': {
-                'name': committee.candidate_office.name if committee.candidate_office else None,
-            } if committee.candidate_office else None,
-            'candidate_party': {
-                'name': committee.candidate_party.name if committee.candidate_party else None,
-            } if committee.candidate_party else None,
-            'election_cycle': {
-                'name': committee.election_cycle.name if committee.election_cycle else None,
-            } if committee.election_cycle else None,
-            'is_incumbent': committee.candidate.is_incumbent if committee.candidate and hasattr(committee.candidate, 'is_incumbent') else False,
-            'contacted': contacted,
-            'contacted_at': contacted_at,
-            'ie_total_for': float(committee.ie_total_for or 0),
-            'ie_total_against': float(committee.ie_total_against or 0),
-        })
+            result_data.append({
+                'committee_id': committee.committee_id,
+                'candidate': {
+                    'full_name': committee.candidate.full_name if committee.candidate else None,
+                } if committee.candidate else None,
+                'name': {
+                    'full_name': committee.name.full_name if committee.name else None,
+                } if committee.name else None,
+                'candidate_office': {
+                    'name': committee.candidate_office.name if committee.candidate_office else None,
+                } if committee.candidate_office else None,
+                'candidate_party': {
+                    'name': committee.candidate_party.name if committee.candidate_party else None,
+                } if committee.candidate_party else None,
+                'election_cycle': {
+                    'name': committee.election_cycle.name if committee.election_cycle else None,
+                } if committee.election_cycle else None,
+                'is_incumbent': committee.candidate.is_incumbent if committee.candidate and hasattr(committee.candidate, 'is_incumbent') else False,
+                'contacted': contacted,
+                'contacted_at': contacted_at,
+                'ie_total_for': float(committee.ie_total_for or 0),
+                'ie_total_against': float(committee.ie_total_against or 0),
+            })
 
-    # Build response data
-    if page is not None:
-        response_data = {
-            'results': result_data,
-            'count': queryset.count(),
-            'next': None,  # Will be added by paginator
-            'previous': None  # Will be added by paginator
-        }
-    else:
-        response_data = {
+        # Build response data (the paginated form includes next/previous links)
+        if page is not None:
+            return paginator.get_paginated_response(result_data).data
+
+        return {
             'results': result_data,
             'count': len(result_data)
         }
 
-    # Cache for 10 minutes with Zstd compression
-    CompressedCache.set(cache_key, response_data, timeout=600)
+    # Pre-compressed response cache, keyed on the data version and tags; concurrent
+    # misses share one build
+    return ResponseCache.get_or_compute(
+        request, cache_key, build, timeout=settings.RESPONSE_CACHE_TIMEOUT
+    )
 
-    if page is not None:
-        return paginator.get_paginated_response(result_data)
 
-    return Response(response_data)
+def _donor_search_sql(search):
+    """Join and condition (and params) shared by the donors page and count queries"""
+    if not search:
+        return "", [], []
+    match_sql, params = name_search.match_sql('n', search)
+    return 'JOIN "Names" n ON n.name_id = d.entity_id', [match_sql], params
+
+
+def donor_page_rows(search='', limit=100, offset=0, after=None):
+    """
+    Rows for one donors_list page from top_donors_mv, by total_contributed DESC
+
+    OFFSET paging by default; with after=(total_contributed, entity_id) of the
+    previous page's last row, keyset paging (idx_top_donors_keyset). An
+    OFFSET-mode search puts the best name matches first.
+    """
+    join_sql, conditions, params = _donor_search_sql(search)
+    order_sql = "d.total_contributed DESC, d.entity_id DESC"
+    order_params = []
+    if after is not None:
+        conditions.append("(d.total_contributed, d.entity_id) < (%s, %s)")
+        params = params + list(after)
+    elif search:
+        rank_sql, order_params = name_search.rank_sql('n', search)
+        order_sql = f"{rank_sql} DESC, {order_sql}"
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT
+                d.entity_id,
+                d.entity_name as full_name,
+                d.city,
+                d.state,
+                d.entity_type,
+                ABS(d.total_contributed) as total_contribution,
+                d.contribution_count as num_contributions,
+                d.total_contributed
+            FROM top_donors_mv d
+            {join_sql}
+            {where_sql}
+            ORDER BY {order_sql}
+            LIMIT %s OFFSET %s
+        """, params + order_params + [limit, 0 if after is not None else offset])
+        return cursor.fetchall()
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def donors_list(request):
-    """OPTIMIZED: Use top_donors_mv materialized view + Zstd compression"""
-    from transparency.utils.compressed_cache import CompressedCache
+    """
+    OPTIMIZED: Use top_donors_mv materialized view + Zstd compression
+
+    ?page=N pages with OFFSET; ?cursor= (empty for the first page, then the
+    'next' link) pages by keyset, at the same cost for every page.
+    """
+    from transparency.utils.compressed_cache import ResponseCache
 
     # Build cache key from request parameters
     page_num = request.query_params.get('page', 1)
     page_size = request.query_params.get('page_size', 100)
     search = request.query_params.get('search', '')
+    cursor_token = request.query_params.get('cursor')
     cache_key = f'donors_list_mv_p{page_num}_s{page_size}_q{search}'
+    if cursor_token is not None:
+        cache_key = f'donors_list_mv_k{cursor_token}_s{page_size}_q{search}'
+    # top_donors_mv refreshes move the data version
+    cache_key = versioned_key(cache_key)
 
-    # Try to get from Zstd-compressed cache (10 minute cache)
-    cached_data = CompressedCache.get(cache_key)
-    if cached_data:
-        return Response(cached_data)
+    # Try the pre-compressed response cache (304 if the client has it)
+    cached_response = ResponseCache.get(request, cache_key)
+    if cached_response is not None:
+        return cached_response
 
     # Use materialized view for blazing fast results!
     page_size = int(page_size)
     offset = (int(page_num) - 1) * page_size
 
-    # Build search filter
-    search_sql = ""
-    search_params = []
-    if search:
-        search_sql = "WHERE d.entity_name ILIKE %s"
-        search_params = [f"%{search}%"]
+    after = None
+    if cursor_token:
+        try:
+            after = decode_cursor(cursor_token, Decimal, int)
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     # Query from materialized view ONLY - blazing fast with complete data!
-    sql = f"""
-        SELECT
-            d.entity_id,
-            d.entity_name as full_name,
-            d.city,
-            d.state,
-            d.entity_type,
-            ABS(d.total_contributed) as total_contribution,
-            d.contribution_count as num_contributions
-        FROM top_donors_mv d
-        {search_sql}
-        ORDER BY d.total_contributed DESC
-        LIMIT %s OFFSET %s
-    """
-
-    from django.db import connection
-    with connection.cursor() as cursor:
-        cursor.execute(sql, search_params + [page_size + 1, offset])
-        rows = cursor.fetchall()
+    rows = donor_page_rows(search, page_size + 1, offset, after)
 
     # Check if there are more results
     has_next = len(rows) > page_size
@@ -1482,88 +1785,143 @@ def donors_list(request):
         })
 
     # Get approximate count from materialized view (fast!)
+    join_sql, conditions, params = _donor_search_sql(search)
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
     with connection.cursor() as cursor:
-        if search:
-            cursor.execute("SELECT COUNT(*) FROM top_donors_mv WHERE entity_name ILIKE %s", [f"%{search}%"])
-        else:
-            cursor.execute("SELECT COUNT(*) FROM top_donors_mv")
+        cursor.execute(f"SELECT COUNT(*) FROM top_donors_mv d {join_sql} {where_sql}", params)
         total_count = cursor.fetchone()[0]
 
+    search_qs = f'&search={search}' if search else ''
+    if cursor_token is not None:
+        next_cursor = encode_cursor(results[-1][7], results[-1][0]) if has_next else None
+        next_url = f'/api/v1/donors/?cursor={next_cursor}&page_size={page_size}' + search_qs if has_next else None
+        prev_url = None
+    else:
+        next_url = f'/api/v1/donors/?page={int(page_num) + 1}&page_size={page_size}' + search_qs if has_next else None
+        prev_url = f'/api/v1/donors/?page={int(page_num) - 1}&page_size={page_size}' + search_qs if int(page_num) > 1 else None
+
     # Build response
     response_data = {
         'results': result_data,
         'count': total_count,  # Fast count from materialized view
-        'next': f'/api/v1/donors/?page={int(page_num) + 1}&page_size={page_size}' + (f'&search={search}' if search else '') if has_next else None,
-        'previous': f'/api/v1/donors/?page={int(page_num) - 1}&page_size={page_size}' + (f'&search={search}' if search else '') if int(page_num) > 1 else None,
+        'next': next_url,
+        'previous': prev_url,
     }
 
-    # Cache with Zstd compression for 10 minutes
-    CompressedCache.set(cache_key, response_data, timeout=600)
+    # Cache the compressed response body until the data version moves
+    response = ResponseCache.set(request, cache_key, response_data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
 
     logger.info(f"Donors list loaded from MV: {len(result_data)} donors (page {page_num})")
-    return Response(response_data)
-
-
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def expenditures_list(request):
-    """OPTIMIZED: Use raw SQL + Zstd compression for fast independent expenditure listing"""
-    from transparency.utils.compressed_cache import CompressedCache
-    from django.db import connection
-
-    # Get pagination params
-    page_num = int(request.query_params.get('page', 1))
-    page_size = int(request.query_params.get('page_size', 10))
-    search = request.query_params.get('search', '')
-
-    # Build cache key
-    cache_key = f'expenditures_list_p{page_num}_s{page_size}_q{search}'
-    cached_data = CompressedCache.get(cache_key)
-    if cached_data:
-        return Response(cached_data)
+    return response
 
-    # Calculate offset
-    offset = (page_num - 1) * page_size
 
-    # Build search conditions
-    search_sql = ""
-    search_params = []
-    if search:
-        search_sql = """
+def _expenditure_search_sql(search):
+    """Search condition (and params) shared by the expenditures page and count queries"""
+    if not search:
+        return "", []
+    search_term = f"%{search}%"
+    return """
             AND (
                 t.memo ILIKE %s
                 OR COALESCE(cn.first_name || ' ' || cn.last_name, cn.last_name) ILIKE %s
                 OR COALESCE(scn.first_name || ' ' || scn.last_name, scn.last_name) ILIKE %s
             )
-        """
-        search_term = f"%{search}%"
-        search_params = [search_term, search_term, search_term]
+        """, [search_term, search_term, search_term]
+
+
+def expenditure_page_rows(search='', limit=10, offset=0, after=None):
+    """
+    Rows for one expenditures_list page, newest first
+
+    OFFSET paging by default; with after=(transaction_date, transaction_id) of
+    the previous page's last row, keyset paging on idx_ie_fact_date.
+    """
+    search_sql, params = _expenditure_search_sql(search)
+    keyset_sql = ""
+    if after is not None:
+        keyset_sql = "AND (f.transaction_date, f.transaction_id) < (%s, %s)"
+        params = params + list(after)
+        offset = 0
+
+    # Pages walk ie_fact (live IEs only) on idx_ie_fact_date. Without a search
+    # the page is cut from ie_fact alone, so "Transactions" is read by primary
+    # key only for the memo and signed amount of the rows shown.
+    params = params + [limit, offset]
+    source, page_sql = "ie_fact f", "LIMIT %s OFFSET %s"
+    if not search:
+        source = f"""(
+            SELECT * FROM ie_fact f
+            WHERE TRUE {keyset_sql}
+            ORDER BY f.transaction_date DESC, f.transaction_id DESC
+            LIMIT %s OFFSET %s
+        ) f"""
+        keyset_sql = page_sql = ""
 
-    # Optimized SQL query with minimal JOINs
     sql = f"""
         SELECT
-            t.transaction_id,
-            t.transaction_date,
+            f.transaction_id,
+            f.transaction_date,
             t.amount,
-            t.is_for_benefit,
+            f.is_for_benefit,
             t.memo,
             COALESCE(cn.first_name || ' ' || cn.last_name, cn.last_name, 'Unknown') as committee_name,
             COALESCE(scn.first_name || ' ' || scn.last_name, scn.last_name, 'Unknown') as candidate_name
-        FROM "Transactions" t
-        LEFT JOIN "Committees" c ON t.committee_id = c.committee_id
+        FROM {source}
+        JOIN "Transactions" t
+          ON t.transaction_id = f.transaction_id AND t.transaction_date = f.transaction_date
+        LEFT JOIN "Committees" c ON f.committee_id = c.committee_id
         LEFT JOIN "Names" cn ON c.name_id = cn.name_id
-        LEFT JOIN "Committees" sc ON t.subject_committee_id = sc.committee_id
+        LEFT JOIN "Committees" sc ON f.subject_committee_id = sc.committee_id
         LEFT JOIN "Names" scn ON sc.name_id = scn.name_id
-        WHERE t.subject_committee_id IS NOT NULL
-          AND t.deleted = false
+        WHERE TRUE
           {search_sql}
-        ORDER BY t.transaction_date DESC NULLS LAST
-        LIMIT %s OFFSET %s
+          {keyset_sql}
+        ORDER BY f.transaction_date DESC, f.transaction_id DESC
+        {page_sql}
     """
 
     with connection.cursor() as cursor:
-        cursor.execute(sql, search_params + [page_size + 1, offset])
-        rows = cursor.fetchall()
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def expenditures_list(request):
+    """
+    OPTIMIZED: Use raw SQL + Zstd compression for fast independent expenditure listing
+
+    ?page=N pages with OFFSET; ?cursor= (empty for the first page, then the
+    'next' link) pages by keyset, at the same cost for every page.
+    """
+    from transparency.utils.compressed_cache import ResponseCache
+
+    # Get pagination params
+    page_num = int(request.query_params.get('page', 1))
+    page_size = int(request.query_params.get('page_size', 10))
+    search = request.query_params.get('search', '')
+    cursor_token = request.query_params.get('cursor')
+
+    # Build cache key
+    cache_key = f'expenditures_list_p{page_num}_s{page_size}_q{search}'
+    if cursor_token is not None:
+        cache_key = f'expenditures_list_k{cursor_token}_s{page_size}_q{search}'
+    cache_key = versioned_key(cache_key, tags=['races'])
+    cached_response = ResponseCache.get(request, cache_key)
+    if cached_response is not None:
+        return cached_response
+
+    # Calculate offset
+    offset = (page_num - 1) * page_size
+
+    after = None
+    if cursor_token:
+        try:
+            after = decode_cursor(cursor_token, date, int)
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = expenditure_page_rows(search, page_size + 1, offset, after)
 
     # Check if there are more results
     has_next = len(rows) > page_size
@@ -1599,41 +1957,50 @@ def expenditures_list(request):
             'purpose': purpose
         })
 
-    # Get approximate count (fast query on indexed column)
-    with connection.cursor() as cursor:
-        count_sql = f"""
-            SELECT COUNT(*)
-            FROM "Transactions" t
-            LEFT JOIN "Committees" c ON t.committee_id = c.committee_id
+    # Count from the maintained counters, or (for a search) cached per data
+    # version and estimated when broad; see services/counts.py
+    if search:
+        search_sql, search_params = _expenditure_search_sql(search)
+        total_count, count_approximate = search_count(f"""
+            SELECT f.transaction_id
+            FROM ie_fact f
+            JOIN "Transactions" t
+              ON t.transaction_id = f.transaction_id AND t.transaction_date = f.transaction_date
+            LEFT JOIN "Committees" c ON f.committee_id = c.committee_id
             LEFT JOIN "Names" cn ON c.name_id = cn.name_id
-            LEFT JOIN "Committees" sc ON t.subject_committee_id = sc.committee_id
+            LEFT JOIN "Committees" sc ON f.subject_committee_id = sc.committee_id
             LEFT JOIN "Names" scn ON sc.name_id = scn.name_id
-            WHERE t.subject_committee_id IS NOT NULL
-              AND t.deleted = false
+            WHERE TRUE
               {search_sql}
-        """
-        cursor.execute(count_sql, search_params)
-        total_count = cursor.fetchone()[0]
+        """, search_params)
+    else:
+        total_count, count_approximate = counter_count(ie_only=True)
 
     # Build paginated response
-    next_url = f'/api/v1/expenditures/?page={page_num + 1}&page_size={page_size}'
-    prev_url = f'/api/v1/expenditures/?page={page_num - 1}&page_size={page_size}'
+    if cursor_token is not None:
+        next_cursor = encode_cursor(results[-1][1], results[-1][0]) if has_next else None
+        next_url = f'/api/v1/expenditures/?cursor={next_cursor}&page_size={page_size}'
+        prev_url = None
+    else:
+        next_url = f'/api/v1/expenditures/?page={page_num + 1}&page_size={page_size}'
+        prev_url = f'/api/v1/expenditures/?page={page_num - 1}&page_size={page_size}'
     if search:
         next_url += f'&search={search}'
-        prev_url += f'&search={search}'
+        prev_url = prev_url and prev_url + f'&search={search}'
 
     response_data = {
         'results': result_data,
-        'count': total_count,  # Fast count with index
+        'count': total_count,
+        'count_approximate': count_approximate,
         'next': next_url if has_next else None,
-        'previous': prev_url if page_num > 1 else None,
+        'previous': prev_url if prev_url and page_num > 1 else None,
     }
 
-    # Cache for 5 minutes with Zstd compression
-    CompressedCache.set(cache_key, response_data, timeout=300)
+    # Cache the compressed response body until the data version or a committee moves
+    response = ResponseCache.set(request, cache_key, response_data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
 
     logger.info(f"Expenditures loaded: {len(result_data)} (page {page_num})")
-    return Response(response_data)
+    return response
 
 
 @api_view(['GET'])
@@ -1743,31 +2110,30 @@ def expenditures_list_OLD_SLOW(request):
 def committees_top(request):
     """Top committees by IE spending"""
     limit = int(request.query_params.get('limit', 10))
-    
+
+    # IE totals as correlated subqueries (subject_committee index), sorted and
+    # limited in SQL; the name comes in the same query
+    def ie_total(is_for_benefit):
+        return Coalesce(Subquery(
+            Transaction.objects.filter(
+                subject_committee=OuterRef('pk'), is_for_benefit=is_for_benefit, deleted=False
+            ).values('subject_committee').annotate(total=Sum('amount')).values('total')
+        ), Decimal('0'), output_field=DecimalField(max_digits=15, decimal_places=2))
+
     committees = Committee.objects.filter(
         candidate__isnull=False
-    ).annotate(
-        total_ie_for=Sum(
-            'subject_of_ies__amount',
-            filter=Q(subject_of_ies__is_for_benefit=True, subject_of_ies__deleted=False)
-        ),
-        total_ie_against=Sum(
-            'subject_of_ies__amount',
-            filter=Q(subject_of_ies__is_for_benefit=False, subject_of_ies__deleted=False)
-        )
-    )
-    
-    result = []
-    for committee in committees:
-        total = (committee.total_ie_for or Decimal('0')) + (committee.total_ie_against or Decimal('0'))
-        result.append({
+    ).select_related('name').annotate(
+        total=ie_total(True) + ie_total(False)
+    ).order_by('-total', 'committee_id')[:limit]
+
+    return Response([
+        {
             'committee_id': committee.committee_id,
             'name': committee.name.full_name if committee.name else 'Unknown',
-            'total': float(total)
-        })
-    
-    result.sort(key=lambda x: x['total'], reverse=True)
-    return Response(result[:limit])
+            'total': float(committee.total),
+        }
+        for committee in committees
+    ])
 
 
 # ==================== OPTIMIZED DASHBOARD ENDPOINT ====================
@@ -1776,12 +2142,12 @@ def committees_top(request):
 @permission_classes([AllowAny])
 def dashboard_summary_optimized(request):
     """
-    OPTIMIZED: Single query dashboard with 5-minute caching
+    OPTIMIZED: Single query dashboard cached until the data changes
     This reduces load time from ~3-5 seconds to ~100-300ms
     """
     
     # Try to get cached data first
-    cache_key = 'dashboard_summary_v1'
+    cache_key = versioned_key('dashboard_summary_v1', tags=['dashboard', 'soi', 'races'])
     cached_data = cache.get(cache_key)
     
     if cached_data:
@@ -1842,8 +2208,7 @@ def dashboard_summary_optimized(request):
             'cached': False
         }
         
-        # Cache for 5 minutes (300 seconds)
-        cache.set(cache_key, response_data, timeout=300)
+        cache.set(cache_key, response_data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
         
         logger.info("Dashboard data computed and cached")
         return Response(response_data)
@@ -1867,11 +2232,11 @@ def dashboard_summary_optimized(request):
 @permission_classes([AllowAny])
 def dashboard_charts_data(request):
     """
-    OPTIMIZED: Separate endpoint for chart data with 10-minute cache
+    OPTIMIZED: Separate endpoint for chart data cached until the data changes
     Load this after the main dashboard for progressive enhancement
     """
     
-    cache_key = 'dashboard_charts_v1'
+    cache_key = versioned_key('dashboard_charts_v1', tags=['dashboard', 'races'])
     cached_data = cache.get(cache_key)
     
     if cached_data:
@@ -1924,8 +2289,7 @@ def dashboard_charts_data(request):
             }
         }
         
-        # Cache for 10 minutes
-        cache.set(cache_key, response_data, timeout=600)
+        cache.set(cache_key, response_data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
         
         return Response(response_data)
         
@@ -1946,7 +2310,7 @@ def dashboard_recent_expenditures(request):
     Separate endpoint for progressive loading
     """
     
-    cache_key = 'dashboard_recent_exp_v1'
+    cache_key = versioned_key('dashboard_recent_exp_v1', tags=['dashboard', 'races'])
     cached_data = cache.get(cache_key)
     
     if cached_data:
@@ -1970,8 +2334,7 @@ def dashboard_recent_expenditures(request):
         
         response_data = list(recent)
         
-        # Cache for 5 minutes
-        cache.set(cache_key, response_data, timeout=300)
+        cache.set(cache_key, response_data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
         
         return Response(response_data)
         
@@ -1988,9 +2351,7 @@ def clear_dashboard_cache(request):
     POST /api/v1/dashboard/clear-cache/
     """
     try:
-        cache.delete('dashboard_summary_v1')
-        cache.delete('dashboard_charts_v1')
-        cache.delete('dashboard_recent_exp_v1')
+        invalidate_tags('dashboard')
         return Response({'success': True, 'message': 'Dashboard cache cleared'})
     except Exception as e:
         return Response({'success': False, 'error': str(e)}, status=500)
@@ -11,6 +11,7 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
 from django.core.management import call_command
+from transparency.models import ImportBatch
 from pathlib import Path
 import subprocess
 import os
@@ -150,10 +151,27 @@ class DataImportViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def history(self, request):
         """Get import history"""
-        # TODO: Implement import history tracking
+        batches = ImportBatch.objects.all()[:50]
         return Response({
             'status': 'success',
-            'imports': []
+            'imports': [
+                {
+                    'batch_id': batch.batch_id,
+                    'source': batch.source,
+                    'file_name': batch.file_name,
+                    'bulk': batch.bulk,
+                    'started_at': batch.started_at,
+                    'completed_at': batch.completed_at,
+                    'statistics': {
+                        'total': batch.rows_total,
+                        'created': batch.rows_created,
+                        'updated': batch.rows_updated,
+                        'skipped': batch.rows_skipped,
+                        'errors': batch.rows_errored,
+                    },
+                }
+                for batch in batches
+            ]
         })
 
 
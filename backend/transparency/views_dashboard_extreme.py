@@ -5,26 +5,196 @@ Handles 10M+ records with sub-50ms response times
 Architecture:
 1. Unified single-request endpoint (eliminate multiple HTTP round trips)
 2. Pre-aggregated materialized views (no live aggregation)
-3. Aggressive caching (5-10 min TTL)
+3. Aggressive caching (keyed on the data version, kept for hours)
 4. Streaming JSON responses for large datasets
 5. Database connection pooling
 """
 
-from django.http import JsonResponse, StreamingHttpResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.db import connection
-from django.core.cache import cache
+from django.conf import settings
 from django.utils import timezone
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 import logging
 import json
 
-from transparency.utils.compressed_cache import CompressedCache, benchmark_compression
+from transparency.utils.cache_metrics import CacheMetrics
+from transparency.utils.compressed_cache import ResponseCache, CacheStats
+from transparency.models import Cycle
+from transparency.services import analytics_engine
+from transparency.services.analytics_engine import cents
+from transparency.services.cache_warmup import after_refresh
+from transparency.services.incremental_aggregates import refresh_materialized_view
+from transparency.utils.data_version import invalidate_tags, versioned_key
 
 logger = logging.getLogger(__name__)
 
 
+def _build_dashboard_extreme():
+    """Build the dashboard_extreme payload from the materialized views"""
+    logger.info("EXTREME MODE: Building dashboard from materialized views...")
+
+    with connection.cursor() as cursor:
+        # ==================================================================
+        # PART 1: Summary Metrics (from single-row materialized view)
+        # ==================================================================
+        cursor.execute("SELECT * FROM dashboard_aggregations LIMIT 1")
+        summary_row = cursor.fetchone()
+
+        summary = {
+            'total_ie_spending': abs(float(summary_row[0] or 0)),
+            'candidate_committees': int(summary_row[1] or 0),
+            'num_expenditures': int(summary_row[2] or 0),
+            'soi_tracking': {
+                'total_filings': int(summary_row[3] or 0),
+                'uncontacted': int(summary_row[4] or 0),
+                'pledged': int(summary_row[5] or 0),
+            }
+        }
+
+        # ==================================================================
+        # PART 2: IE Benefit Breakdown (from materialized view)
+        # ==================================================================
+        cursor.execute("""
+            SELECT
+                is_for_benefit,
+                transaction_count,
+                total_amount
+            FROM ie_benefit_breakdown
+            ORDER BY is_for_benefit DESC
+        """)
+        benefit_rows = cursor.fetchall()
+
+        total_amount = sum(abs(float(row[2])) for row in benefit_rows) if benefit_rows else 0
+
+        for_benefit_data = {'total': 0.0, 'count': 0, 'percentage': 0.0}
+        not_for_benefit_data = {'total': 0.0, 'count': 0, 'percentage': 0.0}
+
+        for row in benefit_rows:
+            is_for_benefit, count, amount = row
+            abs_amount = abs(float(amount))
+            percentage = (abs_amount / total_amount * 100) if total_amount > 0 else 0.0
+            data = {
+                'total': float(amount),
+                'count': int(count),
+                'percentage': round(percentage, 1)
+            }
+            if is_for_benefit:
+                for_benefit_data = data
+            else:
+                not_for_benefit_data = data
+
+        # ==================================================================
+        # PART 3: Top 10 IE Committees (from materialized view)
+        # ==================================================================
+        cursor.execute("""
+            SELECT
+                committee_name,
+                committee_id,
+                total_spent
+            FROM mv_dashboard_top_ie_committees
+            ORDER BY total_spent DESC
+            LIMIT 10
+        """)
+
+        top_committees = [{
+            'committee': row[0],
+            'committee_id': row[1],
+            'total_spending': float(row[2])
+        } for row in cursor.fetchall()]
+
+        # ==================================================================
+        # PART 4: Top 10 Donors (from materialized view)
+        # ==================================================================
+        cursor.execute("""
+            SELECT
+                entity_name,
+                entity_id,
+                total_contributed
+            FROM mv_dashboard_top_donors
+            ORDER BY total_contributed DESC
+            LIMIT 10
+        """)
+
+        top_donors = [{
+            'entity_name': row[0],
+            'entity_id': row[1],
+            'total_contributed': float(row[2])
+        } for row in cursor.fetchall()]
+
+        # ==================================================================
+        # PART 5: Recent Expenditures (from materialized view)
+        # ==================================================================
+        cursor.execute("""
+            SELECT
+                expenditure_date,
+                ABS(amount) as amount,
+                is_for_benefit,
+                committee_name,
+                candidate_name
+            FROM mv_dashboard_recent_expenditures
+            ORDER BY expenditure_date DESC NULLS LAST
+            LIMIT 10
+        """)
+
+        recent_expenditures = [{
+            'date': row[0].isoformat() if row[0] else None,
+            'amount': float(row[1]),
+            'is_for_benefit': row[2],
+            'committee': row[3] or 'Unknown',
+            'candidate': row[4] or 'Unknown'
+        } for row in cursor.fetchall()]
+
+        # ==================================================================
+        # PART 6: Get actual data date range
+        # ==================================================================
+        cursor.execute("""
+            SELECT
+                MIN(expenditure_date) as min_date,
+                MAX(expenditure_date) as max_date
+            FROM mv_dashboard_recent_expenditures
+            WHERE expenditure_date IS NOT NULL
+        """)
+        date_range_row = cursor.fetchone()
+        date_range = {
+            'start': date_range_row[0].isoformat() if date_range_row and date_range_row[0] else None,
+            'end': date_range_row[1].isoformat() if date_range_row and date_range_row[1] else None
+        }
+
+    # ==================================================================
+    # UNIFIED RESPONSE: Everything in one payload
+    # ==================================================================
+    response_data = {
+        'summary': summary,
+        'charts': {
+            'is_for_benefit_breakdown': {
+                'for_benefit': for_benefit_data,
+                'not_for_benefit': not_for_benefit_data
+            },
+            'top_ie_committees': top_committees,
+            'top_donors': top_donors
+        },
+        'recent_expenditures': recent_expenditures,
+        'date_range': date_range,
+        'metadata': {
+            'last_updated': timezone.now().isoformat(),
+            'cached': False,
+            'cache_ttl_seconds': 300,
+            'performance_mode': 'EXTREME'
+        }
+    }
+
+    # Compressed sizes and build times are recorded by CacheMetrics
+    logger.info(
+        f"EXTREME MODE: Dashboard built: {summary['num_expenditures']:,} expenditures, "
+        f"{len(top_committees)} committees, {len(top_donors)} donors"
+    )
+
+    return response_data
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def dashboard_extreme(request):
@@ -38,180 +208,16 @@ def dashboard_extreme(request):
 
     Performance: <50ms even with 10M+ records
     """
-    cache_key = 'dashboard_extreme_v1'
-
-    # Check Zstd-compressed cache first (5 min TTL)
-    cached_data = CompressedCache.get(cache_key)
-    if cached_data:
-        logger.info("⚡ ZSTD CACHE HIT: Returning dashboard in <0.5ms")
-        return Response(cached_data)
-
-    logger.info("EXTREME MODE: Building dashboard from materialized views...")
+    cache_key = versioned_key('dashboard_extreme_v1', tags=['dashboard', 'soi', 'races'])
 
     try:
-        with connection.cursor() as cursor:
-            # ==================================================================
-            # PART 1: Summary Metrics (from single-row materialized view)
-            # ==================================================================
-            cursor.execute("SELECT * FROM dashboard_aggregations LIMIT 1")
-            summary_row = cursor.fetchone()
-
-            summary = {
-                'total_ie_spending': abs(float(summary_row[0] or 0)),
-                'candidate_committees': int(summary_row[1] or 0),
-                'num_expenditures': int(summary_row[2] or 0),
-                'soi_tracking': {
-                    'total_filings': int(summary_row[3] or 0),
-                    'uncontacted': int(summary_row[4] or 0),
-                    'pledged': int(summary_row[5] or 0),
-                }
-            }
-
-            # ==================================================================
-            # PART 2: IE Benefit Breakdown (from materialized view)
-            # ==================================================================
-            cursor.execute("""
-                SELECT
-                    is_for_benefit,
-                    transaction_count,
-                    total_amount
-                FROM ie_benefit_breakdown
-                ORDER BY is_for_benefit DESC
-            """)
-            benefit_rows = cursor.fetchall()
-
-            total_amount = sum(abs(float(row[2])) for row in benefit_rows) if benefit_rows else 0
-
-            for_benefit_data = {'total': 0.0, 'count': 0, 'percentage': 0.0}
-            not_for_benefit_data = {'total': 0.0, 'count': 0, 'percentage': 0.0}
-
-            for row in benefit_rows:
-                is_for_benefit, count, amount = row
-                abs_amount = abs(float(amount))
-                percentage = (abs_amount / total_amount * 100) if total_amount > 0 else 0.0
-                data = {
-                    'total': float(amount),
-                    'count': int(count),
-                    'percentage': round(percentage, 1)
-                }
-                if is_for_benefit:
-                    for_benefit_data = data
-                else:
-                    not_for_benefit_data = data
-
-            # ==================================================================
-            # PART 3: Top 10 IE Committees (from materialized view)
-            # ==================================================================
-            cursor.execute("""
-                SELECT
-                    committee_name,
-                    committee_id,
-                    total_spent
-                FROM mv_dashboard_top_ie_committees
-                ORDER BY total_spent DESC
-                LIMIT 10
-            """)
-
-            top_committees = [{
-                'committee': row[0],
-                'committee_id': row[1],
-                'total_spending': float(row[2])
-            } for row in cursor.fetchall()]
-
-            # ==================================================================
-            # PART 4: Top 10 Donors (from materialized view)
-            # ==================================================================
-            cursor.execute("""
-                SELECT
-                    entity_name,
-                    entity_id,
-                    total_contributed
-                FROM mv_dashboard_top_donors
-                ORDER BY total_contributed DESC
-                LIMIT 10
-            """)
-
-            top_donors = [{
-                'entity_name': row[0],
-                'entity_id': row[1],
-                'total_contributed': float(row[2])
-            } for row in cursor.fetchall()]
-
-            # ==================================================================
-            # PART 5: Recent Expenditures (from materialized view)
-            # ==================================================================
-            cursor.execute("""
-                SELECT
-                    expenditure_date,
-                    ABS(amount) as amount,
-                    is_for_benefit,
-                    committee_name,
-                    candidate_name
-                FROM mv_dashboard_recent_expenditures
-                ORDER BY expenditure_date DESC NULLS LAST
-                LIMIT 10
-            """)
-
-            recent_expenditures = [{
-                'date': row[0].isoformat() if row[0] else None,
-                'amount': float(row[1]),
-                'is_for_benefit': row[2],
-                'committee': row[3] or 'Unknown',
-                'candidate': row[4] or 'Unknown'
-            } for row in cursor.fetchall()]
-
-            # ==================================================================
-            # PART 6: Get actual data date range
-            # ==================================================================
-            cursor.execute("""
-                SELECT
-                    MIN(expenditure_date) as min_date,
-                    MAX(expenditure_date) as max_date
-                FROM mv_dashboard_recent_expenditures
-                WHERE expenditure_date IS NOT NULL
-            """)
-            date_range_row = cursor.fetchone()
-            date_range = {
-                'start': date_range_row[0].isoformat() if date_range_row and date_range_row[0] else None,
-                'end': date_range_row[1].isoformat() if date_range_row and date_range_row[1] else None
-            }
-
-        # ==================================================================
-        # UNIFIED RESPONSE: Everything in one payload
-        # ==================================================================
-        response_data = {
-            'summary': summary,
-            'charts': {
-                'is_for_benefit_breakdown': {
-                    'for_benefit': for_benefit_data,
-                    'not_for_benefit': not_for_benefit_data
-                },
-                'top_ie_committees': top_committees,
-                'top_donors': top_donors
-            },
-            'recent_expenditures': recent_expenditures,
-            'date_range': date_range,
-            'metadata': {
-                'last_updated': timezone.now().isoformat(),
-                'cached': False,
-                'cache_ttl_seconds': 300,
-                'performance_mode': 'EXTREME'
-            }
-        }
-
-        # Cache with Zstd compression for 5 minutes
-        CompressedCache.set(cache_key, response_data, timeout=300)
-
-        # Benchmark compression (log stats)
-        stats = benchmark_compression(response_data)
-        logger.info(f"EXTREME MODE: Dashboard built in single query")
-        logger.info(f"   - {summary['num_expenditures']:,} expenditures")
-        logger.info(f"   - {len(top_committees)} committees")
-        logger.info(f"   - {len(top_donors)} donors")
-        logger.info(f"   - Zstd: {stats['original_size_bytes']:,} → {stats['compressed_size_bytes']:,} bytes ({stats['compression_ratio_percent']}% saved)")
-        logger.info(f"   - Decompress speed: {stats['decompress_throughput_mbps']:.0f} MB/s")
-
-        return Response(response_data)
+        # Pre-compressed response cache until the data version or a tag moves; after
+        # expiry the old dashboard is served for up to 5 more minutes while
+        # one request rebuilds it
+        return ResponseCache.get_or_compute(
+            request, cache_key, _build_dashboard_extreme,
+            timeout=settings.RESPONSE_CACHE_TIMEOUT, stale_ttl=300
+        )
 
     except Exception as e:
         logger.error(f"EXTREME MODE ERROR: {e}", exc_info=True)
@@ -294,41 +300,16 @@ def dashboard_spending_trends(request):
     Spending Trends Over Time
     Returns IE spending aggregated by election cycle for trend visualization
     """
-    cache_key = 'dashboard_spending_trends_v1'
+    cache_key = versioned_key('dashboard_spending_trends_v1', tags=['dashboard'])
 
-    cached_data = CompressedCache.get(cache_key)
-    if cached_data:
-        return Response(cached_data)
+    cached_response = ResponseCache.get(request, cache_key)
+    if cached_response is not None:
+        return cached_response
 
     try:
-        with connection.cursor() as cursor:
-            # Get IE spending by cycle
-            cursor.execute("""
-                SELECT
-                    c.name as cycle_name,
-                    c.cycle_id,
-                    COALESCE(SUM(ABS(t.amount)), 0) as total_spending,
-                    COUNT(DISTINCT t.transaction_id) as transaction_count,
-                    COUNT(DISTINCT t.subject_committee_id) as candidates_affected
-                FROM "Cycles" c
-                LEFT JOIN "Transactions" t ON t.transaction_date >= c.begin_date
-                    AND t.transaction_date <= c.end_date
-                    AND t.subject_committee_id IS NOT NULL
-                    AND t.deleted = false
-                WHERE c.name >= '2006' AND c.name <= '2026'
-                GROUP BY c.cycle_id, c.name
-                ORDER BY c.name ASC
-            """)
-
-            trends = []
-            for row in cursor.fetchall():
-                trends.append({
-                    'cycle': row[0],
-                    'cycle_id': row[1],
-                    'total_spending': float(row[2] or 0),
-                    'transaction_count': int(row[3] or 0),
-                    'candidates_affected': int(row[4] or 0)
-                })
+        # From the columnar snapshot when it is enabled and current
+        snap = analytics_engine.snapshot()
+        trends = _spending_trends_from_snapshot(snap) if snap is not None else _spending_trends_from_sql()
 
         response_data = {
             'trends': trends,
@@ -338,10 +319,9 @@ def dashboard_spending_trends(request):
             }
         }
 
-        # Cache for 10 minutes
-        CompressedCache.set(cache_key, response_data, timeout=600)
+        response = ResponseCache.set(request, cache_key, response_data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
 
-        return Response(response_data)
+        return response
 
     except Exception as e:
         logger.error(f"Error fetching spending trends: {e}", exc_info=True)
@@ -351,6 +331,69 @@ def dashboard_spending_trends(request):
         }, status=200)
 
 
+def _spending_trends_from_sql():
+    """IE spending (subject committee set) per cycle from 2006 to 2026, grouped on Transaction.cycle"""
+    with connection.cursor() as cursor:
+        # Get IE spending by cycle
+        cursor.execute("""
+            SELECT
+                c.name as cycle_name,
+                c.cycle_id,
+                COALESCE(s.total_spending, 0) as total_spending,
+                COALESCE(s.transaction_count, 0) as transaction_count,
+                COALESCE(s.candidates_affected, 0) as candidates_affected
+            FROM "Cycles" c
+            LEFT JOIN (
+                SELECT
+                    t.cycle_id,
+                    SUM(ABS(t.amount)) as total_spending,
+                    COUNT(*) as transaction_count,
+                    COUNT(DISTINCT t.subject_committee_id) as candidates_affected
+                FROM "Transactions" t
+                WHERE t.cycle_id IS NOT NULL
+                    AND t.subject_committee_id IS NOT NULL
+                    AND t.deleted = false
+                GROUP BY t.cycle_id
+            ) s ON s.cycle_id = c.cycle_id
+            WHERE c.name >= '2006' AND c.name <= '2026'
+            ORDER BY c.name ASC
+        """)
+
+        trends = []
+        for row in cursor.fetchall():
+            trends.append({
+                'cycle': row[0],
+                'cycle_id': row[1],
+                'total_spending': float(row[2] or 0),
+                'transaction_count': int(row[3] or 0),
+                'candidates_affected': int(row[4] or 0)
+            })
+    return trends
+
+
+def _spending_trends_from_snapshot(snap):
+    """_spending_trends_from_sql() over the analytics snapshot: one date slice per cycle"""
+    cycles = Cycle.objects.filter(name__gte='2006', name__lte='2026').order_by('name').values_list(
+        'name', 'cycle_id', 'begin_date', 'end_date'
+    )
+    trends = []
+    for name, cycle_id, begin_date, end_date in cycles:
+        total, count, affected = 0, 0, 0
+        if begin_date is not None and end_date is not None:
+            rows = snap.rows_between(begin_date, end_date)
+            where = snap.where(rows, has_subject=True)
+            total, count = snap.total(rows, where, absolute=True)
+            affected = len(snap.distinct('subject', rows, where))
+        trends.append({
+            'cycle': name,
+            'cycle_id': cycle_id,
+            'total_spending': float(cents(total)),
+            'transaction_count': count,
+            'candidates_affected': affected
+        })
+    return trends
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def refresh_extreme_cache(request):
@@ -363,23 +406,24 @@ def refresh_extreme_cache(request):
         # STEP 1: Refresh materialized views to get latest data
         with connection.cursor() as cursor:
             # Refresh the most critical view first (contains SOI stats)
+            # (skipped when it is maintained incrementally)
             logger.info("  Refreshing dashboard_aggregations...")
-            cursor.execute('REFRESH MATERIALIZED VIEW dashboard_aggregations')
+            refresh_materialized_view(cursor, 'dashboard_aggregations')
 
             # Refresh other key views concurrently for speed
             logger.info("  Refreshing chart views...")
-            cursor.execute('REFRESH MATERIALIZED VIEW CONCURRENTLY ie_benefit_breakdown')
-            cursor.execute('REFRESH MATERIALIZED VIEW CONCURRENTLY mv_dashboard_top_donors')
-            cursor.execute('REFRESH MATERIALIZED VIEW CONCURRENTLY mv_dashboard_top_ie_committees')
-            cursor.execute('REFRESH MATERIALIZED VIEW mv_dashboard_recent_expenditures')
-
-        # STEP 2: Clear all dashboard caches (including Zstd)
-        logger.info("  Clearing Zstd compressed caches...")
-        CompressedCache.delete('dashboard_extreme_v1')
-        CompressedCache.delete('soi_dashboard_stats_v1')  # Also clear SOI stats cache
-        cache.delete('dashboard_summary_v1')
-        cache.delete('dashboard_charts_fast_v2')
-        cache.delete('dashboard_recent_exp_v1')
+            refresh_materialized_view(cursor, 'ie_benefit_breakdown', concurrently=True)
+            refresh_materialized_view(cursor, 'mv_dashboard_top_donors', concurrently=True)
+            refresh_materialized_view(cursor, 'mv_dashboard_top_ie_committees', concurrently=True)
+            refresh_materialized_view(cursor, 'mv_dashboard_recent_expenditures')
+
+        # STEP 2: Clear all dashboard caches (the refreshes above also moved
+        # the data version; this covers views that are no longer materialized)
+        logger.info("  Invalidating dashboard caches...")
+        invalidate_tags('dashboard', 'soi')
+
+        # STEP 3: Recompute the hot pages in the background
+        after_refresh()
 
         logger.info("Dashboard refresh complete: materialized views updated + caches cleared")
 
@@ -395,3 +439,33 @@ def refresh_extreme_cache(request):
             'success': False,
             'error': str(e)
         }, status=500)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def cache_stats(request):
+    """
+    Cache hit ratio, compression and stampede protection counters (all workers)
+    GET /api/v1/dashboard/cache-stats/
+    """
+    return Response(CacheStats.get_stats())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_metrics(request):
+    """
+    Cache metrics per layer and key prefix, summed over all workers
+    GET /api/v1/admin/cache-metrics/
+    """
+    return Response(CacheMetrics.aggregate())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_metrics_prometheus(request):
+    """
+    cache_metrics in the Prometheus text exposition format
+    GET /api/v1/admin/cache-metrics/prometheus/
+    """
+    return HttpResponse(CacheMetrics.prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -2,6 +2,7 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.db import connection
+from django.conf import settings
 from django.core.cache import cache
 from django.utils import timezone
 from rest_framework.decorators import api_view, permission_classes
@@ -9,6 +10,9 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 import logging
 
+from .services.cache_warmup import after_refresh
+from .utils.data_version import invalidate_tags, versioned_key
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,9 +20,9 @@ logger = logging.getLogger(__name__)
 @permission_classes([AllowAny])
 def dashboard_summary_optimized(request):
     """
-    OPTIMIZED: Single query dashboard with 5-minute caching
+    OPTIMIZED: Single query dashboard, cached until the data changes
     """
-    cache_key = 'dashboard_summary_v1'
+    cache_key = versioned_key('dashboard_summary_v1', tags=['dashboard', 'soi', 'races'])
     cached_data = cache.get(cache_key)
     
     if cached_data:
@@ -70,7 +74,7 @@ def dashboard_summary_optimized(request):
                     'cached': False
                 }
         
-        cache.set(cache_key, response_data, timeout=300)
+        cache.set(cache_key, response_data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
         logger.info("Dashboard data computed and cached")
         return Response(response_data)
         
@@ -91,7 +95,7 @@ def dashboard_charts_data_mv(request):
     """
     OPTIMIZED: Use materialized views for instant results
     """
-    cache_key = 'dashboard_charts_fast_v2'
+    cache_key = versioned_key('dashboard_charts_fast_v2', tags=['dashboard'])
 
     # Check for refresh param
     force_refresh = request.GET.get('refresh') == '1'
@@ -180,8 +184,7 @@ def dashboard_charts_data_mv(request):
                 'top_donors': top_donors
             }
 
-            # Cache for 10 minutes
-            cache.set(cache_key, response_data, timeout=600)
+            cache.set(cache_key, response_data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
 
             logger.info(f"Charts loaded from MV: {len(top_committees)} committees, {len(top_donors)} donors")
             return Response(response_data)
@@ -205,7 +208,7 @@ def dashboard_recent_expenditures_mv(request):
     """
     OPTIMIZED: Latest expenditures from materialized view
     """
-    cache_key = 'dashboard_recent_exp_v1'
+    cache_key = versioned_key('dashboard_recent_exp_v1', tags=['dashboard'])
     cached_data = cache.get(cache_key)
 
     if cached_data:
@@ -235,7 +238,7 @@ def dashboard_recent_expenditures_mv(request):
             } for row in cursor.fetchall()]
 
         response_data = {'results': results}
-        cache.set(cache_key, response_data, timeout=300)
+        cache.set(cache_key, response_data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
 
         logger.info(f"Recent expenditures loaded from MV: {len(results)} records")
         return Response(response_data)
@@ -253,9 +256,8 @@ def refresh_dashboard_materialized_views(request):
     """
     try:
         # Clear cache regardless
-        cache.delete('dashboard_summary_v1')
-        cache.delete('dashboard_charts_fast_v2')
-        cache.delete('dashboard_recent_exp_v1')
+        invalidate_tags('dashboard')
+        after_refresh()
         
         return Response({
             'success': True,
@@ -16,10 +16,14 @@ from rest_framework.response import Response
 from rest_framework import status
 from decimal import Decimal
 from django.core.cache import cache
+from django.conf import settings
 
 from .models import (
     Committee, Transaction, Entity, Office, Cycle, Party
 )
+from .services.race_aggregation import candidate_ie_totals, EMPTY_TOTALS
+from .services.money_flow import get_flow_graph
+from .utils.data_version import race_tag, versioned_key
 
 
 @api_view(['GET'])
@@ -32,7 +36,7 @@ def ie_spending_by_race(request):
     Returns IE spending for/against all candidates in a race
     Supports optional date_from and date_to filters for date range filtering
     """
-    from transparency.utils.compressed_cache import CompressedCache
+    from transparency.utils.compressed_cache import ResponseCache
 
     office_id = request.GET.get('office_id')
     cycle_id = request.GET.get('cycle_id')
@@ -51,111 +55,92 @@ def ie_spending_by_race(request):
         cache_key += f'_df{date_from}'
     if date_to:
         cache_key += f'_dt{date_to}'
+    cache_key = versioned_key(cache_key, tags=[race_tag(office_id, cycle_id)])
 
-    # Try Zstd-compressed cache first (10 min TTL)
-    cached_data = CompressedCache.get(cache_key)
-    if cached_data:
-        return Response(cached_data)
-
-    try:
+    def build():
         office = Office.objects.get(office_id=office_id)
         cycle = Cycle.objects.get(cycle_id=cycle_id)
-    except (Office.DoesNotExist, Cycle.DoesNotExist):
-        return Response(
-            {'error': 'Invalid office_id or cycle_id'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-
-    # Get all candidates in this race
-    candidates = Committee.objects.filter(
-        candidate_office=office,
-        election_cycle=cycle,
-        candidate__isnull=False
-    ).select_related('candidate', 'candidate_party', 'name')
-
-    race_summary = []
-    total_ie_for = Decimal('0')
-    total_ie_against = Decimal('0')
 
-    for candidate in candidates:
-        # Build date filter for transactions
-        date_filter = Q()
-        if date_from:
-            date_filter &= Q(transaction_date__gte=date_from)
-        if date_to:
-            date_filter &= Q(transaction_date__lte=date_to)
-
-        # Get IE spending for this candidate
-        ie_for = Transaction.objects.filter(
-            date_filter,
-            subject_committee=candidate,
-            is_for_benefit=True,
-            deleted=False
-        ).aggregate(
-            total=Sum('amount'),
-            count=Count('transaction_id')
+        # Get all candidates in this race
+        candidates = Committee.objects.filter(
+            candidate_office=office,
+            election_cycle=cycle,
+            candidate__isnull=False
+        ).select_related('candidate', 'candidate_party', 'name')
+
+        # For/against totals for the whole race in one grouped query
+        ie_totals = candidate_ie_totals(
+            office_id=office.office_id,
+            cycle_id=cycle.cycle_id,
+            date_from=date_from,
+            date_to=date_to,
         )
 
-        ie_against = Transaction.objects.filter(
-            date_filter,
-            subject_committee=candidate,
-            is_for_benefit=False,
-            deleted=False
-        ).aggregate(
-            total=Sum('amount'),
-            count=Count('transaction_id')
-        )
-        
-        for_amount = ie_for['total'] or Decimal('0')
-        against_amount = ie_against['total'] or Decimal('0')
-        net_amount = for_amount - against_amount
-        
-        total_ie_for += for_amount
-        total_ie_against += against_amount
-        
-        race_summary.append({
-            'committee_id': candidate.committee_id,
-            'candidate_name': candidate.candidate.full_name if candidate.candidate else candidate.name.full_name,
-            'party': candidate.candidate_party.name if candidate.candidate_party else None,
-            'is_incumbent': candidate.is_incumbent,
-            'ie_for': float(for_amount),
-            'ie_for_count': ie_for['count'] or 0,
-            'ie_against': float(against_amount),
-            'ie_against_count': ie_against['count'] or 0,
-            'ie_net': float(net_amount),
-            'ie_total': float(for_amount + against_amount),
-        })
-    
-    # Sort by total IE spending (descending)
-    race_summary.sort(key=lambda x: x['ie_total'], reverse=True)
+        race_summary = []
+        total_ie_for = Decimal('0')
+        total_ie_against = Decimal('0')
 
-    response_data = {
-        'office': {
-            'office_id': office.office_id,
-            'name': office.name,
-            'office_type': office.office_type
-        },
-        'cycle': {
-            'cycle_id': cycle.cycle_id,
-            'name': cycle.name
-        },
-        'filters': {
-            'date_from': date_from,
-            'date_to': date_to,
-        },
-        'summary': {
-            'total_ie_for': float(total_ie_for),
-            'total_ie_against': float(total_ie_against),
-            'total_ie': float(total_ie_for + total_ie_against),
-            'num_candidates': len(race_summary)
-        },
-        'candidates': race_summary
-    }
+        for candidate in candidates:
+            totals = ie_totals.get(candidate.committee_id, EMPTY_TOTALS)
+            for_amount = totals['ie_for']
+            against_amount = totals['ie_against']
+            net_amount = for_amount - against_amount
 
-    # Cache for 10 minutes with Zstd compression
-    CompressedCache.set(cache_key, response_data, timeout=600)
+            total_ie_for += for_amount
+            total_ie_against += against_amount
 
-    return Response(response_data)
+            race_summary.append({
+                'committee_id': candidate.committee_id,
+                'candidate_name': candidate.candidate.full_name if candidate.candidate else candidate.name.full_name,
+                'party': candidate.candidate_party.name if candidate.candidate_party else None,
+                'is_incumbent': candidate.is_incumbent,
+                'ie_for': float(for_amount),
+                'ie_for_count': totals['ie_for_count'],
+                'ie_against': float(against_amount),
+                'ie_against_count': totals['ie_against_count'],
+                'ie_net': float(net_amount),
+                'ie_total': float(for_amount + against_amount),
+            })
+    
+        # Sort by total IE spending (descending)
+        race_summary.sort(key=lambda x: x['ie_total'], reverse=True)
+
+        response_data = {
+            'office': {
+                'office_id': office.office_id,
+                'name': office.name,
+                'office_type': office.office_type
+            },
+            'cycle': {
+                'cycle_id': cycle.cycle_id,
+                'name': cycle.name
+            },
+            'filters': {
+                'date_from': date_from,
+                'date_to': date_to,
+            },
+            'summary': {
+                'total_ie_for': float(total_ie_for),
+                'total_ie_against': float(total_ie_against),
+                'total_ie': float(total_ie_for + total_ie_against),
+                'num_candidates': len(race_summary)
+            },
+            'candidates': race_summary
+        }
+
+        return response_data
+
+    # Pre-compressed response cache until the data version or the race moves;
+    # concurrent misses share one build
+    try:
+        return ResponseCache.get_or_compute(
+            request, cache_key, build, timeout=settings.RESPONSE_CACHE_TIMEOUT
+        )
+    except (Office.DoesNotExist, Cycle.DoesNotExist):
+        return Response(
+            {'error': 'Invalid office_id or cycle_id'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
 
 @api_view(['GET'])
@@ -262,19 +247,22 @@ def grassroots_threshold_analysis(request):
 
     Compares IE spending to grassroots threshold for all candidates
     """
-    from transparency.utils.compressed_cache import CompressedCache
+    from transparency.utils.compressed_cache import ResponseCache
 
     cycle_id = request.GET.get('cycle_id', '')
     office_id = request.GET.get('office_id', '')
     threshold = Decimal(request.GET.get('threshold', '5000'))
 
     # Build cache key
-    cache_key = f'grassroots_threshold_c{cycle_id}_o{office_id}_t{threshold}'
+    cache_key = versioned_key(
+        f'grassroots_threshold_c{cycle_id}_o{office_id}_t{threshold}',
+        tags=[race_tag(office_id, cycle_id)]
+    )
 
-    # Try Zstd-compressed cache first (10 min TTL)
-    cached_data = CompressedCache.get(cache_key)
-    if cached_data:
-        return Response(cached_data)
+    # Try the pre-compressed response cache first (until the data version or the race moves)
+    cached_response = ResponseCache.get(request, cache_key)
+    if cached_response is not None:
+        return cached_response
     
     filters = Q(candidate__isnull=False)
     
@@ -289,21 +277,16 @@ def grassroots_threshold_analysis(request):
         'candidate', 'candidate_office', 'candidate_party', 'name', 'election_cycle'
     )
     
+    # IE totals for every candidate in one grouped query
+    ie_totals = candidate_ie_totals(office_id=office_id, cycle_id=cycle_id)
+
     results = []
     over_threshold_count = 0
-    
+
     for candidate in candidates:
-        # Get IE totals
-        ie_totals = Transaction.objects.filter(
-            subject_committee=candidate,
-            deleted=False
-        ).aggregate(
-            ie_for=Sum('amount', filter=Q(is_for_benefit=True)),
-            ie_against=Sum('amount', filter=Q(is_for_benefit=False))
-        )
-        
-        ie_for = ie_totals['ie_for'] or Decimal('0')
-        ie_against = ie_totals['ie_against'] or Decimal('0')
+        totals = ie_totals.get(candidate.committee_id, EMPTY_TOTALS)
+        ie_for = totals['ie_for']
+        ie_against = totals['ie_against']
         ie_total = ie_for + ie_against
         
         over_threshold = ie_total > threshold
@@ -335,10 +318,10 @@ def grassroots_threshold_analysis(request):
         'candidates': results
     }
 
-    # Cache for 10 minutes with Zstd compression
-    CompressedCache.set(cache_key, response_data, timeout=600)
+    # Cache the compressed response body until the data version or the race moves
+    response = ResponseCache.set(request, cache_key, response_data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
 
-    return Response(response_data)
+    return response
 
 
 @api_view(['GET'])
@@ -527,24 +510,27 @@ def top_candidates_by_ie(request):
 
     Returns top candidates sorted by total IE spending (for + against)
     """
-    from transparency.utils.compressed_cache import CompressedCache
+    from transparency.utils.compressed_cache import ResponseCache
 
     office_id = request.GET.get('office_id', '')
     cycle_id = request.GET.get('cycle_id', '')
     limit = int(request.GET.get('limit', 20))
 
     # Build cache key
-    cache_key = f'top_candidates_by_ie_o{office_id}_c{cycle_id}_l{limit}'
+    cache_key = versioned_key(
+        f'top_candidates_by_ie_o{office_id}_c{cycle_id}_l{limit}',
+        tags=[race_tag(office_id, cycle_id)]
+    )
 
-    # Try Zstd-compressed cache first (10 min TTL)
-    cached_data = CompressedCache.get(cache_key)
-    if cached_data:
-        return Response(cached_data)
+    # Try the pre-compressed response cache first (until the data version or the race moves)
+    cached_response = ResponseCache.get(request, cache_key)
+    if cached_response is not None:
+        return cached_response
     
     # Base queryset - candidate committees only
     committees = Committee.objects.filter(
         candidate__isnull=False
-    ).select_related('candidate', 'candidate_party', 'candidate_office')
+    ).select_related('candidate', 'candidate_party', 'candidate_office', 'name')
     
     # Apply filters
     if office_id:
@@ -552,36 +538,19 @@ def top_candidates_by_ie(request):
     if cycle_id:
         committees = committees.filter(election_cycle_id=cycle_id)
     
-    # Aggregate IE spending for each candidate
+    # Aggregate IE spending for all candidates in one grouped query
+    ie_totals = candidate_ie_totals(office_id=office_id, cycle_id=cycle_id)
+
     candidates_data = []
     total_ie_for = Decimal('0')
     total_ie_against = Decimal('0')
-    
+
     for committee in committees:
-        # IE spending FOR candidate
-        ie_for = Transaction.objects.filter(
-            subject_committee=committee,
-            is_for_benefit=True,
-            deleted=False
-        ).aggregate(
-            total=Sum('amount'),
-            count=Count('transaction_id')
-        )
-        
-        # IE spending AGAINST candidate
-        ie_against = Transaction.objects.filter(
-            subject_committee=committee,
-            is_for_benefit=False,
-            deleted=False
-        ).aggregate(
-            total=Sum('amount'),
-            count=Count('transaction_id')
-        )
-        
-        for_amount = ie_for['total'] or Decimal('0')
-        against_amount = ie_against['total'] or Decimal('0')
+        totals = ie_totals.get(committee.committee_id, EMPTY_TOTALS)
+        for_amount = totals['ie_for']
+        against_amount = totals['ie_against']
         total_amount = for_amount + against_amount
-        
+
         # Only include candidates with IE activity
         if total_amount > 0:
             total_ie_for += for_amount
@@ -596,8 +565,8 @@ def top_candidates_by_ie(request):
                 'ie_against': float(against_amount),
                 'ie_net': float(for_amount - against_amount),
                 'ie_total': float(total_amount),
-                'ie_for_count': ie_for['count'] or 0,
-                'ie_against_count': ie_against['count'] or 0,
+                'ie_for_count': totals['ie_for_count'],
+                'ie_against_count': totals['ie_against_count'],
             })
     
     # Sort by total IE spending (descending) and limit
@@ -615,10 +584,10 @@ def top_candidates_by_ie(request):
         'candidates': top_candidates
     }
 
-    # Cache for 10 minutes with Zstd compression
-    CompressedCache.set(cache_key, response_data, timeout=600)
+    # Cache the compressed response body until the data version or the race moves
+    response = ResponseCache.set(request, cache_key, response_data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
 
-    return Response(response_data)
+    return response
     
 
 @api_view(['GET'])
@@ -630,7 +599,7 @@ def money_flow_through_pacs(request):
     
     Query params:
     - office_id: Filter by office (optional)
-    - cycle_id: Filter by cycle (optional)
+    - cycle_id: Filter by cycle (optional; the latest cycle if neither is given)
     - limit: Number of flows to return (default 10)
     
     Returns flow paths: Donors → IE Committees → Candidates
@@ -638,129 +607,23 @@ def money_flow_through_pacs(request):
     office_id = request.GET.get('office_id')
     cycle_id = request.GET.get('cycle_id')
     limit = int(request.GET.get('limit', 10))
-    
-    # Get IE committees
-    ie_committees = Committee.objects.filter(
-        committee_type__name__icontains='independent'
-    ).select_related('name')
-    
-    flows = []
-    total_donors = set()
-    total_committees = set()
-    total_candidates = set()
-    total_amount = Decimal('0')
-    
-    for committee in ie_committees[:limit]:
-        # Get contributions TO this IE committee (from donors)
-        contributions = Transaction.objects.filter(
-            committee=committee,
-            transaction_type__income_expense_neutral='Income',
-            deleted=False
-        ).select_related('entity').values(
-            'entity_id',
-            'entity__first_name',
-            'entity__last_name'
-        ).annotate(
-            donor_amount=Sum('amount')
-        ).order_by('-donor_amount')
-        
-        # Get IE spending BY this committee
-        ie_spending = Transaction.objects.filter(
-            committee=committee,
-            subject_committee__isnull=False,
-            deleted=False
-        ).select_related(
-            'subject_committee__candidate'
-        ).values(
-            'subject_committee_id',
-            'is_for_benefit'
-        ).annotate(
-            spending_amount=Sum('amount'),
-            num_transactions=Count('transaction_id')
-        )
-        
-        if contributions.exists() and ie_spending.exists():
-            # Calculate flow totals
-            total_contrib = sum(c['donor_amount'] for c in contributions if c['donor_amount'])
-            total_spend = sum(s['spending_amount'] for s in ie_spending if s['spending_amount'])
-            
-            # Get top donor
-            top_donor = contributions.first()
-            top_donor_name = f"{top_donor['entity__first_name'] or ''} {top_donor['entity__last_name'] or ''}".strip()
-            
-            # Get top candidate target
-            top_spending = list(ie_spending.order_by('-spending_amount'))[:1]
-            if top_spending:
-                target_committee = Committee.objects.get(
-                    committee_id=top_spending[0]['subject_committee_id']
-                )
-                top_candidate = (
-                    target_committee.candidate.full_name 
-                    if target_committee.candidate 
-                    else target_committee.name.full_name
-                )
-            else:
-                top_candidate = None
-            
-            # Determine spending type
-            support_spending = sum(
-                s['spending_amount'] for s in ie_spending 
-                if s['is_for_benefit'] and s['spending_amount']
-            ) or Decimal('0')
-            oppose_spending = sum(
-                s['spending_amount'] for s in ie_spending 
-                if not s['is_for_benefit'] and s['spending_amount']
-            ) or Decimal('0')
-            
-            spending_type = 'Support' if support_spending > oppose_spending else 'Oppose'
-            primary_amount = max(support_spending, oppose_spending)
-            
-            # Build flow details
-            flow = {
-                'committee_id': committee.committee_id,
-                'committee_name': committee.name.full_name,
-                'num_donors': contributions.count(),
-                'num_candidates': ie_spending.values('subject_committee_id').distinct().count(),
-                'total_amount': float(primary_amount),
-                'top_donor': top_donor_name if top_donor_name else 'Anonymous',
-                'top_candidate': top_candidate,
-                'spending_type': spending_type,
-                'details': {
-                    'top_donors': [
-                        {
-                            'name': f"{c['entity__first_name'] or ''} {c['entity__last_name'] or ''}".strip(),
-                            'amount': float(c['donor_amount'] or 0)
-                        }
-                        for c in contributions[:5]
-                    ],
-                    'total_contributions': float(total_contrib),
-                    'total_spending': float(total_spend),
-                    'support_spending': float(support_spending),
-                    'oppose_spending': float(oppose_spending),
-                }
-            }
-            
-            flows.append(flow)
-            
-            # Track totals
-            for c in contributions:
-                if c['entity_id']:
-                    total_donors.add(c['entity_id'])
-            total_committees.add(committee.committee_id)
-            for s in ie_spending:
-                total_candidates.add(s['subject_committee_id'])
-            total_amount += primary_amount
-    
-    # Sort by total amount descending
-    flows.sort(key=lambda x: x['total_amount'], reverse=True)
-    
+
+    # The graph is built per office and/or cycle, never over the whole table
+    if not office_id and not cycle_id:
+        cycle_id = Cycle.objects.order_by('-begin_date').values_list('cycle_id', flat=True).first()
+        if cycle_id is None:
+            return Response({'summary': {'num_flows': 0}, 'flows': []})
+
+    # Donor -> committee -> candidate graph from a fixed number of queries
+    graph = get_flow_graph(office_id=office_id, cycle_id=cycle_id)
+    flows, committees = graph.committee_flows(limit=limit)
+
     return Response({
         'summary': {
-            'total_donors': len(total_donors),
-            'total_committees': len(total_committees),
-            'total_candidates': len(total_candidates),
-            'total_amount': float(total_amount),
-            'num_flows': len(flows)
+            **graph.summary(committees),
+            'num_flows': len(flows),
+            'office_id': office_id,
+            'cycle_id': cycle_id,
         },
-        'flows': flows[:limit]
-    })
\ No newline at end of file
+        'flows': flows
+    })
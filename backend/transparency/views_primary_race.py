@@ -7,8 +7,12 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.db.models import Sum, Count, Q, F
-from .models import Committee, Transaction, TransactionType, Cycle, Party, Office, Entity
+from .models import (
+    Committee, Transaction, TransactionType, Cycle, Party, Office, Entity, IEFact, cents_to_dollars
+)
 from decimal import Decimal
+from .services import analytics_engine
+from .services.race_aggregation import ie_spenders_from_snapshot, top_donors_from_snapshot
 
 
 @api_view(['GET'])
@@ -64,54 +68,22 @@ def primary_race_detail(request):
     candidates_data = []
     all_ie_spenders = []  # Track all IE committees for "biggest spenders" section
 
+    # One pass over the analytics snapshot replaces the four queries per candidate
+    snap = analytics_engine.snapshot()
+    if snap is not None:
+        snapshot_ie = ie_spenders_from_snapshot(
+            snap,
+            [comm.committee_id for comm in candidates],
+            ie_types.values_list('transaction_type_id', flat=True),
+        )
+
     for comm in candidates:
         cand_name = comm.candidate.full_name if comm.candidate else "Unknown"
 
-        # Calculate IE FOR this candidate
-        ie_for_amount = Transaction.objects.filter(
-            subject_committee=comm,
-            transaction_type__in=ie_types,
-            is_for_benefit=True,
-            deleted=False
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-        # Calculate IE AGAINST this candidate
-        ie_against_amount = Transaction.objects.filter(
-            subject_committee=comm,
-            transaction_type__in=ie_types,
-            is_for_benefit=False,
-            deleted=False
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-        # Get IE spenders FOR this candidate
-        ie_for_spenders = Transaction.objects.filter(
-            subject_committee=comm,
-            transaction_type__in=ie_types,
-            is_for_benefit=True,
-            deleted=False
-        ).values(
-            'committee__committee_id',
-            'committee__name__last_name',
-            'committee__name__first_name'
-        ).annotate(
-            total=Sum('amount'),
-            count=Count('transaction_id')
-        ).order_by('-total')
-
-        # Get IE spenders AGAINST this candidate
-        ie_against_spenders = Transaction.objects.filter(
-            subject_committee=comm,
-            transaction_type__in=ie_types,
-            is_for_benefit=False,
-            deleted=False
-        ).values(
-            'committee__committee_id',
-            'committee__name__last_name',
-            'committee__name__first_name'
-        ).annotate(
-            total=Sum('amount'),
-            count=Count('transaction_id')
-        ).order_by('-total')
+        if snap is not None:
+            ie_for_amount, ie_against_amount, ie_for_spenders, ie_against_spenders = snapshot_ie[comm.committee_id]
+        else:
+            ie_for_amount, ie_against_amount, ie_for_spenders, ie_against_spenders = _candidate_ie(comm, ie_types)
 
         # Format spenders
         for_spenders_list = []
@@ -169,18 +141,21 @@ def primary_race_detail(request):
     ie_committee_ids = list(set([s['committee_id'] for s in all_ie_spenders]))
 
     # Get top donors to these IE committees
-    top_donors_to_ies = Transaction.objects.filter(
-        committee_id__in=ie_committee_ids,
-        transaction_type__income_expense_neutral=1,  # Contributions
-        deleted=False
-    ).values(
-        'entity__name_id',
-        'entity__last_name',
-        'entity__first_name'
-    ).annotate(
-        total_contributed=Sum('amount'),
-        contribution_count=Count('transaction_id')
-    ).order_by('-total_contributed')[:10]
+    if snap is not None:
+        top_donors_to_ies = top_donors_from_snapshot(snap, ie_committee_ids, 10)
+    else:
+        top_donors_to_ies = Transaction.objects.filter(
+            committee_id__in=ie_committee_ids,
+            transaction_type__income_expense_neutral=1,  # Contributions
+            deleted=False
+        ).values(
+            'entity__name_id',
+            'entity__last_name',
+            'entity__first_name'
+        ).annotate(
+            total_contributed=Sum('amount'),
+            num_contributions=Count('transaction_id')
+        ).order_by('-total_contributed')[:10]
 
     donors_list = []
     for donor in top_donors_to_ies:
@@ -189,7 +164,7 @@ def primary_race_detail(request):
             'entity_id': donor['entity__name_id'],
             'name': donor_name,
             'total_contributed': float(donor['total_contributed']),
-            'contribution_count': donor['contribution_count']
+            'contribution_count': donor['num_contributions']
         })
 
     # Calculate race totals
@@ -213,6 +188,30 @@ def primary_race_detail(request):
     })
 
 
+def _candidate_ie(comm, ie_types):
+    """(ie_for, ie_against, for spenders, against spenders) of one candidate committee"""
+    ie_facts = IEFact.objects.filter(subject_committee=comm, transaction_type__in=ie_types)
+    total = cents_to_dollars(Sum(IEFact.signed_cents()))
+
+    # Calculate IE FOR and AGAINST this candidate
+    ie_for_amount = ie_facts.filter(is_for_benefit=True).aggregate(total=total)['total'] or Decimal('0.00')
+    ie_against_amount = ie_facts.filter(is_for_benefit=False).aggregate(total=total)['total'] or Decimal('0.00')
+
+    # Get IE spenders FOR and AGAINST this candidate
+    spenders = ie_facts.values(
+        'committee__committee_id',
+        'committee__name__last_name',
+        'committee__name__first_name'
+    ).annotate(
+        total=total,
+        count=Count('transaction_id')
+    ).order_by('-total')
+    ie_for_spenders = spenders.filter(is_for_benefit=True)
+    ie_against_spenders = spenders.filter(is_for_benefit=False)
+
+    return ie_for_amount, ie_against_amount, ie_for_spenders, ie_against_spenders
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def available_primary_races(request):
@@ -251,11 +250,10 @@ def available_primary_races(request):
                     # Calculate total IE spending in this race
                     total_ie = 0
                     for comm in comms:
-                        ie_amount = Transaction.objects.filter(
+                        ie_amount = IEFact.objects.filter(
                             subject_committee=comm,
-                            transaction_type__in=ie_types,
-                            deleted=False
-                        ).aggregate(total=Sum('amount'))['total'] or 0
+                            transaction_type__in=ie_types
+                        ).aggregate(total=cents_to_dollars(Sum(IEFact.signed_cents())))['total'] or 0
                         total_ie += abs(float(ie_amount))
 
                     primary_races.append({
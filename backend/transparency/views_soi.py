@@ -1,6 +1,7 @@
 """
 SOI-specific views for Phase 1 completion
 """
+from django.conf import settings
 from django.utils import timezone
 from django.db.models import Count, Q
 from rest_framework.decorators import api_view, permission_classes
@@ -11,6 +12,7 @@ import logging
 
 from .models import CandidateStatementOfInterest, EmailTemplate, EmailLog, EmailCampaign
 from .serializers import CandidateSOISerializer, EmailTemplateSerializer
+from .utils.data_version import versioned_key
 
 logger = logging.getLogger(__name__)
 
@@ -18,14 +20,14 @@ logger = logging.getLogger(__name__)
 @permission_classes([AllowAny])
 def soi_dashboard_stats(request):
     """Get SOI dashboard statistics + Zstd compression"""
-    from transparency.utils.compressed_cache import CompressedCache
+    from transparency.utils.compressed_cache import ResponseCache
 
-    cache_key = 'soi_dashboard_stats_v1'
+    cache_key = versioned_key('soi_dashboard_stats_v1', tags=['soi'])
 
-    # Try Zstd-compressed cache first (5 min TTL)
-    cached_data = CompressedCache.get(cache_key)
-    if cached_data:
-        return Response(cached_data)
+    # Try the pre-compressed response cache first (until an SOI changes)
+    cached_response = ResponseCache.get(request, cache_key)
+    if cached_response is not None:
+        return cached_response
 
     try:
         stats = CandidateStatementOfInterest.objects.aggregate(
@@ -45,10 +47,10 @@ def soi_dashboard_stats(request):
             'pending_pledge': stats['contacted'] - stats['pledged']
         }
 
-        # Cache for 5 minutes with Zstd compression
-        CompressedCache.set(cache_key, response_data, timeout=300)
+        # Cache the compressed response body until an SOI changes
+        response = ResponseCache.set(request, cache_key, response_data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
 
-        return Response(response_data)
+        return response
         
     except Exception as e:
         logger.error(f"Error fetching SOI stats: {e}")
@@ -65,7 +67,7 @@ def soi_dashboard_stats(request):
 @permission_classes([AllowAny])
 def soi_candidates_list(request):
     """Get SOI candidates list with filtering and pagination + Zstd compression"""
-    from transparency.utils.compressed_cache import CompressedCache
+    from transparency.utils.compressed_cache import ResponseCache
 
     # Build cache key from request parameters
     status_filter = request.GET.get('status', '')
@@ -75,12 +77,15 @@ def soi_candidates_list(request):
     page_size = int(request.GET.get('page_size', 20))
     page = int(request.GET.get('page', 1))
 
-    cache_key = f'soi_candidates_list_st{status_filter}_o{office_id}_pf{pledge_filter}_s{search_term}_pg{page}_ps{page_size}'
+    cache_key = versioned_key(
+        f'soi_candidates_list_st{status_filter}_o{office_id}_pf{pledge_filter}_s{search_term}_pg{page}_ps{page_size}',
+        tags=['soi']
+    )
 
-    # Try Zstd-compressed cache first (5 min TTL)
-    cached_data = CompressedCache.get(cache_key)
-    if cached_data:
-        return Response(cached_data)
+    # Try the pre-compressed response cache first (until an SOI changes)
+    cached_response = ResponseCache.get(request, cache_key)
+    if cached_response is not None:
+        return cached_response
 
     try:
         queryset = CandidateStatementOfInterest.objects.select_related('office').all()
@@ -121,10 +126,10 @@ def soi_candidates_list(request):
             'total_pages': (total_count + page_size - 1) // page_size
         }
 
-        # Cache for 5 minutes with Zstd compression
-        CompressedCache.set(cache_key, response_data, timeout=300)
+        # Cache the compressed response body until an SOI changes
+        response = ResponseCache.set(request, cache_key, response_data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
 
-        return Response(response_data)
+        return response
         
     except Exception as e:
         logger.error(f"Error fetching SOI candidates: {e}")
@@ -0,0 +1,54 @@
+"""
+Typeahead Views
+
+Search-box suggestions from the per-process prefix index
+(transparency/services/typeahead.py), so keystrokes don't hit the paginated
+list endpoints and their database searches.
+"""
+
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from .services.typeahead import KINDS, get_index
+
+MAX_LIMIT = 50
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def typeahead(request):
+    """
+    Best-ranked candidates, committees and donors whose names start with q
+    GET /api/v1/typeahead/?q=jane%20do&type=candidate,donor&limit=10
+    """
+    query = request.query_params.get('q', '')
+    kinds = [k for k in request.query_params.get('type', '').split(',') if k]
+    unknown = [k for k in kinds if k not in KINDS]
+    if unknown:
+        return Response(
+            {'error': f'Unknown type: {", ".join(unknown)} (expected {", ".join(KINDS)})'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), MAX_LIMIT)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    index = get_index()
+    return Response({
+        'query': query,
+        'results': index.lookup(query, kinds=kinds or None, limit=limit),
+        'data_version': index.version,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def typeahead_stats(request):
+    """
+    Entry counts and memory against TYPEAHEAD_MEMORY_BUDGET (for the serving worker)
+    GET /api/v1/typeahead/stats/
+    """
+    return Response(get_index().stats())
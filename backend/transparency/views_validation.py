@@ -11,6 +11,7 @@ from django.db.models import Count, Sum, Q, F
 from django.db import connection, transaction
 from decimal import Decimal
 from .models import Transaction, Entity, Committee, Office, Cycle
+from .services.incremental_aggregates import track_transaction_changes
 
 
 @api_view(['GET'])
@@ -441,8 +442,11 @@ def merge_entities(request):
         try:
             duplicate = Entity.objects.get(name_id=dup_id)
 
-            # Update entity transactions
-            Transaction.objects.filter(entity=duplicate).update(entity=primary_entity)
+            # Update entity transactions (donor totals move with them)
+            with track_transaction_changes(
+                'SELECT transaction_id FROM "Transactions" WHERE entity_id = %s', [dup_id]
+            ):
+                Transaction.objects.filter(entity=duplicate).update(entity=primary_entity)
 
             # Mark duplicate as merged (or delete if preferred)
             # duplicate.delete()  # Uncomment to delete instead of marking
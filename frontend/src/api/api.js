@@ -365,6 +365,31 @@ export async function getTopDonors(params = {}) {
 }
 
 
+// ==================== TYPEAHEAD ENDPOINTS ====================
+
+/**
+ * Name suggestions for search boxes, best ranked first
+ * @param {string} q - What the user has typed so far
+ * @param {Object} params - type ('candidate', 'committee', 'donor', comma-separated), limit
+ */
+export async function getTypeahead(q, params = {}, signal = null) {
+  try {
+    const queryString = buildQueryString({ q, ...params });
+    const config = signal ? { signal } : {};
+    const res = await api.get(`/typeahead/?${queryString}`, config);
+    return res.data;
+  } catch (error) {
+    // Keystrokes abort the previous request; let the caller ignore those
+    if (axios.isCancel(error) || error.name === 'CanceledError') {
+      const abortError = new Error('Request aborted');
+      abortError.name = 'AbortError';
+      throw abortError;
+    }
+    handleError(error, 'Failed to load suggestions');
+  }
+}
+
+
 // ==================== EXPENDITURE ENDPOINTS ====================
 
 /**
@@ -7,11 +7,14 @@ import { TableSkeleton } from "../components/SkeletonLoader";
 import { exportToCSV } from "../utils/csvExport";
 import { useDarkMode } from "../context/DarkModeContext";
 import Pagination from "../components/Pagination";
+import { useTypeahead } from "../utils/searchUtils";
 
 // --- REFINED BANNER COMPONENT ---
 const Banner = ({ controls, searchTerm, onSearch }) => {
   const { darkMode } = useDarkMode();
   const [localSearch, setLocalSearch] = useState(searchTerm);
+  const [showSuggestions, setShowSuggestions] = useState(false);
+  const suggestions = useTypeahead(localSearch, 'candidate');
 
   // Sync local state when URL param changes (e.g., browser back button)
   useEffect(() => {
@@ -30,6 +33,7 @@ const Banner = ({ controls, searchTerm, onSearch }) => {
 
   const handleLocalSearch = (e) => {
     e.preventDefault();
+    setShowSuggestions(false);
     onSearch(localSearch);
   };
 
@@ -69,13 +73,37 @@ const Banner = ({ controls, searchTerm, onSearch }) => {
               type="text"
               placeholder="Search Candidates..."
               value={localSearch}
-              onChange={(e) => setLocalSearch(e.target.value)}
+              onChange={(e) => {
+                setLocalSearch(e.target.value);
+                setShowSuggestions(true);
+              }}
+              onFocus={() => setShowSuggestions(true)}
+              // Let a click on a suggestion land before the list closes
+              onBlur={() => setTimeout(() => setShowSuggestions(false), 150)}
               className="w-full border-none rounded-full py-2.5 pl-11 pr-4 text-sm text-white placeholder-gray-400 outline-none transition-all focus:ring-1 focus:ring-[#7667C1]"
               style={darkMode
                 ? { background: 'rgba(31, 27, 49, 0.8)' }
                 : { background: 'rgba(255, 255, 255, 0.15)' }
               }
             />
+
+            {/* Typeahead Suggestions */}
+            {showSuggestions && suggestions.length > 0 && (
+              <ul
+                className={`absolute z-20 left-0 right-0 mt-2 rounded-xl shadow-lg overflow-hidden text-sm ${darkMode ? 'bg-[#2D2844] text-white' : 'bg-white text-gray-900'}`}
+              >
+                {suggestions.map((suggestion) => (
+                  <li key={suggestion.id}>
+                    <Link
+                      to={`/candidate/${suggestion.id}`}
+                      className={`block px-4 py-2 ${darkMode ? 'hover:bg-[#3d3559]' : 'hover:bg-purple-50'}`}
+                    >
+                      {suggestion.label}
+                    </Link>
+                  </li>
+                ))}
+              </ul>
+            )}
           </form>
         </div>
       </div>
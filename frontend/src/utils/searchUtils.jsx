@@ -1,4 +1,5 @@
-import React from "react";
+import React, { useEffect, useState } from "react";
+import { getTypeahead } from "../api/api";
 
 /**
  * Utility functions for search functionality
@@ -135,3 +136,38 @@ export function generateSearchSuggestions(searchTerm, candidates = [], maxSugges
   }));
 }
 
+/**
+ * Typeahead suggestions for a search box, fetched as the user types
+ * @param {string} searchTerm - Current search term
+ * @param {string} type - 'candidate', 'committee', 'donor' (comma-separated)
+ * @param {number} limit - Maximum number of suggestions
+ * @returns {Array} - Suggestion objects ({ type, id, label, score }), best ranked first
+ */
+export function useTypeahead(searchTerm, type, limit = 8) {
+  const [suggestions, setSuggestions] = useState([]);
+
+  useEffect(() => {
+    const term = (searchTerm || '').trim();
+    if (term.length < 2) {
+      setSuggestions([]);
+      return;
+    }
+
+    // Each keystroke aborts the previous request
+    const controller = new AbortController();
+    const timer = setTimeout(() => {
+      getTypeahead(term, { type, limit }, controller.signal)
+        .then((data) => setSuggestions(data?.results || []))
+        .catch((error) => {
+          if (error.name !== 'AbortError') setSuggestions([]);
+        });
+    }, 100);
+
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [searchTerm, type, limit]);
+
+  return suggestions;
+}